@@ -0,0 +1,105 @@
+"""
+Admin Diagnostics API
+Slow query summaries and captured request profiles for administrators
+"""
+
+from functools import wraps
+
+from flask import Blueprint, current_app, jsonify, request, send_file
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Create blueprint
+admin_diagnostics_bp = Blueprint('admin_diagnostics', __name__, url_prefix='/api/admin')
+
+
+def admin_required(view):
+    """Allow administrators only (skipped when LOGIN_DISABLED, as for login_required)"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if current_app.config.get('LOGIN_DISABLED'):
+            return view(*args, **kwargs)
+        try:
+            from flask_login import current_user
+            from models.replit_user_preferences import ReplitUserPreferences
+
+            if not current_user.is_authenticated:
+                return jsonify({'success': False, 'error': 'Authentication required'}), 401
+            if not ReplitUserPreferences.get_or_create(current_user.id).is_admin:
+                return jsonify({'success': False, 'error': 'Administrator access required'}), 403
+        except Exception as e:
+            logger.error(f"Admin check failed: {e}")
+            return jsonify({'success': False, 'error': 'Administrator access required'}), 403
+        return view(*args, **kwargs)
+    return wrapper
+
+
+@admin_diagnostics_bp.route('/slow-queries', methods=['GET'])
+@admin_required
+def slow_queries():
+    """
+    Slow statements grouped by fingerprint
+
+    Query Parameters:
+        limit: number of fingerprints, at most 200 (default: 50)
+        recent: number of latest raw entries to include (default: 0)
+
+    Returns:
+        JSON with count, p50/p95/max and the latest plan per fingerprint
+    """
+    from utils import slow_queries as slow_query_log
+
+    try:
+        recorder = slow_query_log.slow_query_recorder
+        if recorder is None:
+            return jsonify({'success': False, 'error': 'Slow query log is disabled'}), 404
+
+        limit = max(1, min(request.args.get('limit', 50, type=int), 200))
+        recent = max(0, min(request.args.get('recent', 0, type=int), 200))
+        return jsonify({
+            'success': True,
+            'threshold_ms': recorder.threshold * 1000,
+            'buffered': len(recorder.entries),
+            'dropped': recorder.dropped,
+            'fingerprints': recorder.aggregate(limit),
+            'recent': recorder.recent(recent) if recent else []
+        })
+
+    except Exception as e:
+        logger.error(f"Error in slow query API: {e}")
+        return jsonify({
+            'success': False,
+            'error': 'Failed to load slow queries',
+            'message': str(e)
+        }), 500
+
+
+@admin_diagnostics_bp.route('/profiles', methods=['GET'])
+@admin_required
+def list_profiles():
+    """Captured request profiles, newest first"""
+    from utils import request_profiler as profiler_module
+
+    profiler = profiler_module.request_profiler
+    if profiler is None:
+        return jsonify({'success': False, 'error': 'Request profiler is disabled'}), 404
+    try:
+        return jsonify({'success': True, 'directory': profiler.directory, 'profiles': profiler.list()})
+    except Exception as e:
+        logger.error(f"Error listing profiles: {e}")
+        return jsonify({'success': False, 'error': 'Failed to list profiles', 'message': str(e)}), 500
+
+
+@admin_diagnostics_bp.route('/profiles/<name>', methods=['GET'])
+@admin_required
+def download_profile(name):
+    """Download one profile: collapsed stacks (flamegraph.pl, speedscope) or cProfile pstats"""
+    from utils import request_profiler as profiler_module
+
+    profiler = profiler_module.request_profiler
+    path = profiler.path(name) if profiler is not None else None
+    if path is None:
+        return jsonify({'success': False, 'error': 'Profile not found'}), 404
+    mimetype = 'text/plain' if name.endswith('.folded') else 'application/octet-stream'
+    return send_file(path, mimetype=mimetype, as_attachment=True, download_name=name)
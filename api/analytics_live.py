@@ -3,8 +3,9 @@ Live Analytics API Endpoints
 Provides real-time analytics data from survey responses
 """
 
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, jsonify, request
 from utils.live_analytics import LiveAnalyticsProcessor
+from utils.live_feed import live_feed, stream_events
 import logging
 
 logger = logging.getLogger(__name__)
@@ -99,6 +100,25 @@ def get_insights_feed():
         }), 500
 
 
+@analytics_live_bp.route('/stream', methods=['GET'])
+def stream_live_dashboard():
+    """
+    Server-Sent Events stream of dashboard changes, replacing polling of the endpoints above
+    
+    Events:
+        snapshot: full metrics and insights (on connect, or after the client fell behind)
+        metrics: only the metric fields that changed
+        insight: one new text answer
+    
+    Reconnecting browsers send Last-Event-ID and receive only what they missed.
+    """
+    subscription = live_feed.subscribe(request.headers.get('Last-Event-ID') or request.args.get('last_event_id'))
+    return Response(stream_events(subscription), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+
 @analytics_live_bp.route('/trending-topics', methods=['GET'])
 def get_trending_topics():
     """
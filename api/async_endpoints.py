@@ -0,0 +1,140 @@
+"""
+Async Endpoints
+I/O-bound endpoints served from the event loop in ASGI mode (uvicorn asgi:app)
+
+Each one mirrors a Flask endpoint at the same URL, reusing its prompt, parsing and
+queries, so a worker waits on OpenAI or the database without holding a thread.
+"""
+
+import json
+import logging
+
+from utils import async_db
+from utils.asgi import AsgiRequest, AsgiResponse, AsyncRoutes, StreamingResponse, json_response
+from utils.imports import get_async_openai_client
+from utils.live_analytics import LiveAnalyticsProcessor
+from utils.live_feed import live_feed, stream_events_async
+from utils.webhook_ingestion import QueueSaturated, parse_sms_form, parse_whatsapp_payload, webhook_queue
+
+logger = logging.getLogger(__name__)
+
+async_api = AsyncRoutes()
+
+analytics_processor = LiveAnalyticsProcessor()
+
+TWIML_EMPTY = b'<?xml version="1.0" encoding="UTF-8"?><Response></Response>'
+
+# AsyncOpenAI client, created on the first analysis request
+async_openai_client = None
+
+
+def _get_async_openai_client():
+    global async_openai_client
+    if async_openai_client is None:
+        async_openai_client = get_async_openai_client()
+    return async_openai_client
+
+
+@async_api.route('/api/analyze-text', methods=['POST'])
+async def analyze_text(request: AsgiRequest) -> AsgiResponse:
+    """Async twin of routes_ai_analysis.analyze_text"""
+    from routes_ai_analysis import analysis_completion_options, validate_analysis
+
+    data = await request.json()
+    if not isinstance(data, dict) or 'text' not in data:
+        return json_response({'success': False, 'error': 'يرجى إرسال النص المراد تحليله'}, 400)
+    text_to_analyze = str(data['text']).strip()
+    if not text_to_analyze:
+        return json_response({'success': False, 'error': 'النص فارغ'}, 400)
+
+    try:
+        response = await _get_async_openai_client().chat.completions.create(
+            **analysis_completion_options(text_to_analyze))
+        validated_result = validate_analysis(response.choices[0].message.content)
+        logger.info(f"Successfully analyzed text with sentiment: {validated_result['sentiment']}")
+        return json_response({'success': True, 'analysis': validated_result, 'message': 'تم تحليل النص بنجاح'})
+
+    except json.JSONDecodeError as e:
+        logger.error(f"JSON parsing error: {e}")
+        return json_response({'success': False, 'error': 'خطأ في تحليل النتائج من الذكاء الاصطناعي'}, 500)
+    except Exception as e:
+        logger.error(f"Error in AI text analysis: {e}")
+        return json_response({'success': False, 'error': 'حدث خطأ في تحليل النص'}, 500)
+
+
+@async_api.route('/api/surveys/webhook/whatsapp', methods=['POST'])
+async def whatsapp_webhook(request: AsgiRequest) -> AsgiResponse:
+    """Append WhatsApp events to the durable queue and acknowledge"""
+    data = await request.json()
+    if not data:
+        return json_response({'error': 'Invalid webhook data'}, 400)
+    try:
+        events = parse_whatsapp_payload(data)
+        async with async_db.async_session() as session:
+            result = await session.run_sync(lambda sync_session: webhook_queue.enqueue(events, sync_session))
+        return json_response({'status': 'accepted', **result})
+    except QueueSaturated as e:
+        logger.warning(f"WhatsApp webhook deferred: {e}")
+        return json_response({'error': 'Queue saturated, retry later'}, 503, {'Retry-After': '30'})
+    except Exception as e:
+        logger.error(f"WhatsApp webhook failed: {e}")
+        return json_response({'error': 'Webhook processing failed'}, 500)
+
+
+@async_api.route('/api/surveys/webhook/sms', methods=['POST'])
+async def sms_webhook(request: AsgiRequest) -> AsgiResponse:
+    """Append Twilio SMS events to the durable queue and answer with empty TwiML"""
+    events = parse_sms_form(await request.form())
+    if not events:
+        return json_response({'error': 'Invalid SMS data'}, 400)
+    try:
+        async with async_db.async_session() as session:
+            await session.run_sync(lambda sync_session: webhook_queue.enqueue(events, sync_session))
+        return AsgiResponse(TWIML_EMPTY, 200, 'text/xml')
+    except QueueSaturated as e:
+        logger.warning(f"SMS webhook deferred: {e}")
+        return AsgiResponse(TWIML_EMPTY, 503, 'text/xml', {'Retry-After': '30'})
+    except Exception as e:
+        # Non-2xx makes Twilio retry; the dedup index absorbs the repeat
+        logger.error(f"SMS webhook failed: {e}")
+        return AsgiResponse(TWIML_EMPTY, 500, 'text/xml')
+
+
+@async_api.route('/api/analytics/insights-feed', methods=['GET'])
+async def insights_feed(request: AsgiRequest) -> AsgiResponse:
+    """Async twin of api.analytics_live.get_insights_feed"""
+    try:
+        limit = int(request.args.get('limit', 50))
+    except ValueError:
+        return json_response({'error': 'Invalid limit parameter - must be a number'}, 400)
+    if limit < 1 or limit > 200:
+        return json_response({'error': 'Limit must be between 1 and 200'}, 400)
+
+    try:
+        async with async_db.async_session() as session:
+            insights = await session.run_sync(
+                lambda sync_session: analytics_processor.get_insights_feed(limit, sync_session))
+        return json_response({
+            'success': True,
+            'data': insights,
+            'count': len(insights),
+            'message': 'Insights feed retrieved successfully'
+        })
+    except Exception as e:
+        logger.error(f"Error in insights feed API: {e}")
+        return json_response({
+            'success': False,
+            'error': 'Failed to retrieve insights feed',
+            'message': str(e)
+        }, 500)
+
+
+@async_api.route('/api/analytics/stream', methods=['GET'])
+async def live_dashboard_stream(request: AsgiRequest) -> StreamingResponse:
+    """Async twin of api.analytics_live.stream_live_dashboard: open dashboards hold no threads"""
+    last_event_id = request.headers.get('last-event-id') or request.args.get('last_event_id')
+    return StreamingResponse(
+        stream_events_async(live_feed, last_event_id),
+        request.wait_disconnect,
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
@@ -6,9 +6,18 @@ Provides KPI data for the 4-card dashboard with toggleable charts
 import logging
 from flask import Blueprint, jsonify, request
 from datetime import datetime, timedelta
+from sqlalchemy import case, func
 import random
 import math
 
+from app import db
+from api.executive_dashboard import feedback_series
+from models.survey_flask import ResponseFlask
+from utils.chart_payload import (
+    JSON_FORMAT, chart_response, downsample, encode_columns, negotiate_format, requested_width
+)
+from utils.time_series import bucketed_totals, fill_series, truncate
+
 logger = logging.getLogger(__name__)
 
 # Create blueprint
@@ -31,6 +40,41 @@ def get_date_range(time_range):
     
     return start_date, end_date
 
+# Default bucket size per chart range, and label format per bucket size
+CHART_GRANULARITY = {'7d': 'day', '30d': 'day', '90d': 'week', '1y': 'month'}
+LABEL_FORMATS = {'hour': '%m/%d %H:00', 'day': '%m/%d', 'week': '%m/%d', 'month': '%Y/%m'}
+
+def build_chart_data(metric, time_range, granularity=None):
+    """Chart series for metric from stored feedback and responses, None when the range has no data"""
+    granularity = granularity or CHART_GRANULARITY.get(time_range, 'day')
+    label_format = LABEL_FORMATS[granularity]
+    start_date, end_date = get_date_range(time_range)
+    # Stored timestamps are UTC; the first bucket is widened to a whole day/week/month
+    end_date, span = datetime.utcnow(), end_date - start_date
+    start_date = truncate(end_date - span, granularity)
+    
+    if metric == 'completion':
+        aggregates = {
+            'total': func.count(ResponseFlask.id),
+            'completed': func.sum(case((ResponseFlask.is_complete.is_(True), 1), else_=0)),
+        }
+        totals = bucketed_totals(db.session, ResponseFlask.created_at, aggregates, start_date, end_date, granularity)
+        series = fill_series(totals, start_date, end_date, granularity, aggregates)
+        values = [point['completed'] / point['total'] * 100 if point['total'] else None for point in series]
+    else:
+        series = feedback_series(start_date, end_date, granularity)
+        if metric == 'csat':
+            values = [point['csat'] if point['responses'] else None for point in series]
+        else:
+            values = [point[metric] for point in series]
+    
+    if all(value is None for value in values):
+        return None
+    return {
+        'labels': [point['bucket'].strftime(label_format) for point in series],
+        'values': [round(value, 1) if value is not None else None for value in values]
+    }
+
 def generate_sample_kpi_data(time_range):
     """Generate sample KPI data for demonstration"""
     # Base values for each KPI
@@ -180,6 +224,10 @@ def get_chart_data():
     Query parameters:
     - metric: "csat", "nps", "ces", "completion" (required)
     - time_range: "7d", "30d", "90d", "1y" (default: "7d")
+    - granularity: "hour", "day", "week", "month" (default depends on time_range)
+    - width: downsample to this many points (LTTB); envelope=1 adds min/max bands
+    
+    Accept: application/vnd.voc.columns+json or application/vnd.voc.typed+json for compact payloads
     """
     try:
         metric = request.args.get('metric', 'csat')
@@ -194,14 +242,39 @@ def get_chart_data():
                 'valid_metrics': valid_metrics
             }), 400
         
-        # Generate chart data
-        chart_data = generate_sample_chart_data(metric, time_range)
+        granularity = request.args.get('granularity')
+        if granularity is not None and granularity not in LABEL_FORMATS:
+            return jsonify({
+                'success': False,
+                'error': 'Invalid granularity specified',
+                'valid_granularities': list(LABEL_FORMATS)
+            }), 400
+        
+        # Real series when the range has data, sample data otherwise
+        chart_data = build_chart_data(metric, time_range, granularity)
+        data_source = 'real'
+        if chart_data is None:
+            chart_data = generate_sample_chart_data(metric, time_range)
+            data_source = 'sample'
+        
+        envelope = None
+        width = requested_width(request)
+        if width:
+            chart_data, envelope = downsample(chart_data, 'values', width, envelope=request.args.get('envelope') == '1')
+        
+        fmt = negotiate_format(request)
+        if fmt != JSON_FORMAT:
+            return chart_response(encode_columns(chart_data, fmt, envelope, success=True, metric=metric,
+                                                 time_range=time_range, data_source=data_source), fmt)
+        if envelope is not None:
+            chart_data['envelope'] = envelope
         
         return jsonify({
             'success': True,
             'data': chart_data,
             'metric': metric,
             'time_range': time_range,
+            'data_source': data_source,
             'last_updated': datetime.now().isoformat(),
             'message': f'Chart data for {metric} retrieved successfully'
         })
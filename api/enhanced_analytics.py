@@ -124,7 +124,7 @@ def get_historical_analysis():
                 'id': row.id,
                 'survey_id': row.survey_id,
                 'answers': row.answers,
-                'created_at': row.created_at.isoformat() if row.created_at else None,
+                'created_at': row.created_at,
                 'survey_title': row.title,
                 'existing_sentiment': row.sentiment_score,
                 'existing_keywords': row.keywords
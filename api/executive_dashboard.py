@@ -3,19 +3,66 @@ Executive Dashboard API endpoints for Arabic VoC platform
 Provides real-time KPI metrics for executive consumption
 """
 
-from flask import Blueprint, jsonify, render_template
+from flask import Blueprint, jsonify, render_template, request
 from datetime import datetime, timedelta
-from sqlalchemy import func, and_, or_, text
+from sqlalchemy import func, and_, or_, text, case
 from sqlalchemy.orm import sessionmaker
 from models_unified import Feedback, FeedbackChannel, FeedbackStatus, FeedbackAggregation
 from app import db
+from utils.cold_archive import cold_archive
+from utils.http_caching import conditional_blueprint
+from utils.analytics_snapshot import analytics_snapshot, CHANNELS, CHANNEL_CODES, STATUS_CODES
+from utils.time_series import GRANULARITIES, add_to_bucket, bucketed_totals, fill_series, truncate
+from utils.chart_payload import (
+    JSON_FORMAT, chart_response, downsample, encode_columns, negotiate_format, requested_width
+)
 import logging
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 # Create blueprint
 executive_bp = Blueprint('executive', __name__, url_prefix='/api/executive-dashboard')
+# Unchanged feedback answers 304 before any of the queries below run (archiving deletes rows, so it counts too)
+conditional_blueprint(executive_bp, Feedback)
 
 logger = logging.getLogger(__name__)
 
+# Effort adjustment per channel for CES (1-7 scale, lower is easier)
+CHANNEL_EFFORT = {
+    FeedbackChannel.PHONE: -0.5,      # Phone is easier
+    FeedbackChannel.WHATSAPP: -0.3,   # WhatsApp is easier
+    FeedbackChannel.WEBSITE: 0.2,     # Website neutral to harder
+    FeedbackChannel.EMAIL: 0.5,       # Email requires more effort
+    FeedbackChannel.SOCIAL_MEDIA: 0.3  # Social media medium effort
+}
+
+# Arabic channel names
+CHANNEL_NAMES = {
+    FeedbackChannel.EMAIL: 'البريد الإلكتروني',
+    FeedbackChannel.PHONE: 'الهاتف',
+    FeedbackChannel.WEBSITE: 'الموقع الإلكتروني',
+    FeedbackChannel.MOBILE_APP: 'التطبيق المحمول',
+    FeedbackChannel.SOCIAL_MEDIA: 'وسائل التواصل',
+    FeedbackChannel.WHATSAPP: 'واتساب',
+    FeedbackChannel.SMS: 'الرسائل النصية',
+    FeedbackChannel.IN_PERSON: 'وجهاً لوجه',
+    FeedbackChannel.SURVEY: 'الاستطلاعات',
+    FeedbackChannel.CHATBOT: 'الدردشة الآلية'
+}
+
+RESOLUTION_CHANNELS = [FeedbackChannel.PHONE, FeedbackChannel.WHATSAPP, FeedbackChannel.CHATBOT]
+
+PROCESSED = STATUS_CODES[FeedbackStatus.PROCESSED]
+
+def _feedback_frame(start_date):
+    """Columnar snapshot able to answer a range starting at start_date, None to query the database"""
+    if cold_archive.covers('feedback', start_date):
+        return None
+    return analytics_snapshot.feedback()
+
 def calculate_csat_score(days=30):
     """
     Calculate Customer Satisfaction Score based on sentiment analysis
@@ -25,6 +72,10 @@ def calculate_csat_score(days=30):
         end_date = datetime.utcnow()
         start_date = end_date - timedelta(days=days)
         
+        frame = _feedback_frame(start_date - timedelta(days=days))
+        if frame is not None:
+            return _csat_from_frame(frame, start_date, end_date, days)
+        
         # Query for processed feedback with sentiment scores
         feedback_query = db.session.query(Feedback).filter(
             and_(
@@ -100,6 +151,10 @@ def calculate_nps_score(days=30):
         end_date = datetime.utcnow()
         start_date = end_date - timedelta(days=days)
         
+        frame = _feedback_frame(start_date - timedelta(days=days))
+        if frame is not None:
+            return _nps_from_frame(frame, start_date, end_date, days)
+        
         # Get feedback with ratings or high sentiment scores
         current_feedback = db.session.query(Feedback).filter(
             and_(
@@ -194,6 +249,10 @@ def calculate_ces_score(days=30):
         end_date = datetime.utcnow()
         start_date = end_date - timedelta(days=days)
         
+        frame = _feedback_frame(start_date - timedelta(days=days))
+        if frame is not None:
+            return _ces_from_frame(frame, start_date, end_date, days)
+        
         # Get feedback and analyze effort indicators
         current_feedback = db.session.query(Feedback).filter(
             and_(
@@ -228,14 +287,7 @@ def calculate_ces_score(days=30):
                 effort += 0.5
             
             # Channel complexity
-            channel_effort = {
-                FeedbackChannel.PHONE: -0.5,      # Phone is easier
-                FeedbackChannel.WHATSAPP: -0.3,   # WhatsApp is easier
-                FeedbackChannel.WEBSITE: 0.2,     # Website neutral to harder
-                FeedbackChannel.EMAIL: 0.5,       # Email requires more effort
-                FeedbackChannel.SOCIAL_MEDIA: 0.3  # Social media medium effort
-            }
-            effort += channel_effort.get(feedback.channel, 0)
+            effort += CHANNEL_EFFORT.get(feedback.channel, 0)
             
             # Clamp to 1-7 range
             effort = max(1.0, min(7.0, effort))
@@ -272,14 +324,7 @@ def calculate_ces_score(days=30):
                 elif content_length > 200:
                     effort += 0.5
                 
-                channel_effort = {
-                    FeedbackChannel.PHONE: -0.5,
-                    FeedbackChannel.WHATSAPP: -0.3,
-                    FeedbackChannel.WEBSITE: 0.2,
-                    FeedbackChannel.EMAIL: 0.5,
-                    FeedbackChannel.SOCIAL_MEDIA: 0.3
-                }
-                effort += channel_effort.get(feedback.channel, 0)
+                effort += CHANNEL_EFFORT.get(feedback.channel, 0)
                 effort = max(1.0, min(7.0, effort))
                 prev_effort_scores.append(effort)
             
@@ -307,15 +352,17 @@ def calculate_fcr_score(days=30):
         end_date = datetime.utcnow()
         start_date = end_date - timedelta(days=days)
         
-        # Get feedback from phone and chat channels
-        resolution_channels = [FeedbackChannel.PHONE, FeedbackChannel.WHATSAPP, FeedbackChannel.CHATBOT]
+        frame = _feedback_frame(start_date - timedelta(days=days))
+        if frame is not None:
+            return _fcr_from_frame(frame, start_date, end_date, days)
         
+        # Get feedback from phone and chat channels
         current_feedback = db.session.query(Feedback).filter(
             and_(
                 Feedback.created_at >= start_date,
                 Feedback.created_at <= end_date,
                 Feedback.status == FeedbackStatus.PROCESSED,
-                Feedback.channel.in_(resolution_channels)
+                Feedback.channel.in_(RESOLUTION_CHANNELS)
             )
         ).all()
         
@@ -355,7 +402,7 @@ def calculate_fcr_score(days=30):
                 Feedback.created_at >= prev_start,
                 Feedback.created_at < prev_end,
                 Feedback.status == FeedbackStatus.PROCESSED,
-                Feedback.channel.in_(resolution_channels)
+                Feedback.channel.in_(RESOLUTION_CHANNELS)
             )
         ).all()
         
@@ -395,6 +442,10 @@ def calculate_volume_metrics():
     try:
         now = datetime.utcnow()
         
+        frame = _feedback_frame(now - timedelta(days=45))
+        if frame is not None:
+            return _volume_from_frame(frame, now)
+        
         # Today
         today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
         today_count = db.session.query(func.count(Feedback.id)).filter(
@@ -457,6 +508,10 @@ def calculate_sentiment_metrics(days=30):
         end_date = datetime.utcnow()
         start_date = end_date - timedelta(days=days)
         
+        frame = _feedback_frame(start_date - timedelta(days=days))
+        if frame is not None:
+            return _sentiment_from_frame(frame, start_date, end_date, days)
+        
         # Get current period sentiment data
         current_feedback = db.session.query(Feedback.sentiment_score, Feedback.confidence_score).filter(
             and_(
@@ -523,6 +578,126 @@ def calculate_sentiment_metrics(days=30):
             'distribution': {'positive': 0, 'neutral': 0, 'negative': 0}
         }
 
+def _nps_score_expression():
+    """Rating 1-5 or sentiment -1..1 mapped to 0-10, as in calculate_nps_score"""
+    return case(
+        (func.coalesce(Feedback.rating, 0) != 0, (Feedback.rating - 1) * 2.5),
+        else_=(Feedback.sentiment_score + 1) * 5
+    )
+
+def _effort_expression():
+    """Per-feedback effort on the 1-7 scale, as in calculate_ces_score"""
+    content_length = func.coalesce(func.length(Feedback.content), 0)
+    effort = (
+        4.0 + func.coalesce(Feedback.sentiment_score, 0.0) * -1.5
+        + case((content_length > 500, 1.5), (content_length > 200, 0.5), else_=0.0)
+        + case(*((Feedback.channel == channel, adjustment) for channel, adjustment in CHANNEL_EFFORT.items()),
+               else_=0.0)
+    )
+    return case((effort < 1.0, 1.0), (effort > 7.0, 7.0), else_=effort)
+
+def _feedback_aggregates():
+    """Sums per bucket from which every chart metric is derived"""
+    processed = Feedback.status == FeedbackStatus.PROCESSED
+    scored = and_(processed, Feedback.sentiment_score.isnot(None))
+    rated = and_(processed, or_(Feedback.rating.isnot(None), Feedback.sentiment_score.isnot(None)))
+    nps_score = _nps_score_expression()
+    return {
+        'volume': func.count(Feedback.id),
+        'scored': func.sum(case((scored, 1), else_=0)),
+        'satisfied': func.sum(case((and_(scored, Feedback.sentiment_score > 0.1), 1), else_=0)),
+        'sentiment_sum': func.sum(case((scored, Feedback.sentiment_score), else_=0.0)),
+        'confidence_sum': func.sum(case((scored, func.coalesce(Feedback.confidence_score, 0.0)), else_=0.0)),
+        'nps_total': func.sum(case((rated, 1), else_=0)),
+        'promoters': func.sum(case((and_(rated, nps_score >= 9), 1), else_=0)),
+        'detractors': func.sum(case((and_(rated, nps_score <= 6), 1), else_=0)),
+        'effort_total': func.sum(case((processed, 1), else_=0)),
+        'effort_sum': func.sum(case((processed, _effort_expression()), else_=0.0)),
+    }
+
+def _archived_row_totals(row):
+    """The _feedback_aggregates() sums for one archived feedback row"""
+    processed = row['status'] == FeedbackStatus.PROCESSED.value
+    sentiment = row['sentiment_score']
+    scored = processed and sentiment is not None
+    rated = processed and (row['rating'] is not None or sentiment is not None)
+    nps_score = None
+    if rated:
+        nps_score = (row['rating'] - 1) * 2.5 if row['rating'] else (sentiment + 1) * 5
+    
+    effort = 0.0
+    if processed:
+        content_length = len(row['content'] or '')
+        effort = 4.0 + (sentiment or 0.0) * -1.5
+        effort += 1.5 if content_length > 500 else 0.5 if content_length > 200 else 0.0
+        effort += CHANNEL_EFFORT.get(FeedbackChannel(row['channel']), 0)
+        effort = max(1.0, min(7.0, effort))
+    
+    return {
+        'volume': 1,
+        'scored': int(scored),
+        'satisfied': int(scored and sentiment > 0.1),
+        'sentiment_sum': sentiment if scored else 0.0,
+        'confidence_sum': (row['confidence_score'] or 0.0) if scored else 0.0,
+        'nps_total': int(rated),
+        'promoters': int(rated and nps_score >= 9),
+        'detractors': int(rated and nps_score <= 6),
+        'effort_total': int(processed),
+        'effort_sum': effort,
+    }
+
+def _archived_bucket_totals(rows, granularity):
+    """_archived_row_totals() summed per time bucket"""
+    totals = {}
+    for row in rows:
+        add_to_bucket(totals, truncate(row['created_at'], granularity), _archived_row_totals(row))
+    return totals
+
+def _archived_channel_counts(rows):
+    counts = {}
+    for row in rows:
+        counts[row['channel']] = counts.get(row['channel'], 0) + 1
+    return counts
+
+SERIES_METRICS = ('volume', 'responses', 'csat', 'sentiment', 'confidence', 'nps', 'ces')
+
+def feedback_series(start_date, end_date, granularity='day', channel=None):
+    """
+    Volume, CSAT, NPS, CES and sentiment per time bucket over [start_date, end_date)
+    
+    One GROUP BY query for the hot table plus a pass over archived months when the range reaches them.
+    Buckets with no feedback are included with zero volume.
+    """
+    aggregates = _feedback_aggregates()
+    where = [] if channel is None else [Feedback.channel == channel]
+    totals = bucketed_totals(db.session, Feedback.created_at, aggregates, start_date, end_date,
+                             granularity, where=where)
+    
+    # Months older than the hot tables come from the archive, bucketed once per archived chunk
+    if cold_archive.covers('feedback', start_date):
+        channels = None if channel is None else [channel.value]
+        columns = ['created_at', 'status', 'sentiment_score', 'confidence_score', 'rating', 'content', 'channel']
+        for chunk_totals in cold_archive.summaries('feedback', start_date, end_date,
+                                                   lambda rows: _archived_bucket_totals(rows, granularity),
+                                                   ('feedback_series', granularity), channels, columns):
+            for bucket, values in chunk_totals.items():
+                add_to_bucket(totals, bucket, values)
+    
+    series = []
+    for point in fill_series(totals, start_date, end_date, granularity, aggregates):
+        scored, nps_total, effort_total = point['scored'], point['nps_total'], point['effort_total']
+        series.append({
+            'bucket': point['bucket'],
+            'volume': int(point['volume']),
+            'responses': int(scored),
+            'csat': (point['satisfied'] / scored * 100) if scored else 0,
+            'sentiment': float(point['sentiment_sum']) / scored if scored else None,
+            'confidence': float(point['confidence_sum']) / scored if scored else None,
+            'nps': (point['promoters'] - point['detractors']) / nps_total * 100 if nps_total else None,
+            'ces': float(point['effort_sum']) / effort_total if effort_total else None,
+        })
+    return series
+
 def get_trend_data(days=30):
     """
     Get trend data for the last 30 days
@@ -530,39 +705,18 @@ def get_trend_data(days=30):
     try:
         end_date = datetime.utcnow()
         start_date = end_date - timedelta(days=days)
+        first_day = start_date.replace(hour=0, minute=0, second=0, microsecond=0)
         
-        # Generate daily CSAT data
-        daily_data = []
-        labels = []
+        frame = _feedback_frame(first_day)
+        if frame is not None:
+            return _trend_from_frame(frame, start_date, days)
         
-        for i in range(days):
-            day = start_date + timedelta(days=i)
-            day_start = day.replace(hour=0, minute=0, second=0, microsecond=0)
-            day_end = day_start + timedelta(days=1)
-            
-            # Get feedback for this day
-            day_feedback = db.session.query(Feedback.sentiment_score).filter(
-                and_(
-                    Feedback.created_at >= day_start,
-                    Feedback.created_at < day_end,
-                    Feedback.status == FeedbackStatus.PROCESSED,
-                    Feedback.sentiment_score.isnot(None)
-                )
-            ).all()
-            
-            if day_feedback:
-                satisfied = sum(1 for f in day_feedback if f.sentiment_score > 0.1)
-                total = len(day_feedback)
-                csat = (satisfied / total * 100) if total > 0 else 0
-            else:
-                csat = 0
-            
-            daily_data.append(csat)
-            labels.append(day.strftime('%m/%d'))
+        # Daily CSAT for every day in the window, from one grouped query
+        series = feedback_series(first_day, first_day + timedelta(days=days), 'day')
         
         return {
-            'labels': labels,
-            'values': daily_data
+            'labels': [(start_date + timedelta(days=i)).strftime('%m/%d') for i in range(days)],
+            'values': [point['csat'] for point in series]
         }
         
     except Exception as e:
@@ -580,6 +734,10 @@ def get_channel_distribution(days=30):
         end_date = datetime.utcnow()
         start_date = end_date - timedelta(days=days)
         
+        frame = _feedback_frame(start_date)
+        if frame is not None:
+            return _channels_from_frame(frame, start_date, end_date)
+        
         # Query channel distribution
         channel_data = db.session.query(
             Feedback.channel,
@@ -591,25 +749,19 @@ def get_channel_distribution(days=30):
             )
         ).group_by(Feedback.channel).all()
         
-        # Arabic channel names
-        channel_names = {
-            FeedbackChannel.EMAIL: 'البريد الإلكتروني',
-            FeedbackChannel.PHONE: 'الهاتف',
-            FeedbackChannel.WEBSITE: 'الموقع الإلكتروني',
-            FeedbackChannel.MOBILE_APP: 'التطبيق المحمول',
-            FeedbackChannel.SOCIAL_MEDIA: 'وسائل التواصل',
-            FeedbackChannel.WHATSAPP: 'واتساب',
-            FeedbackChannel.SMS: 'الرسائل النصية',
-            FeedbackChannel.IN_PERSON: 'وجهاً لوجه',
-            FeedbackChannel.SURVEY: 'الاستطلاعات',
-            FeedbackChannel.CHATBOT: 'الدردشة الآلية'
-        }
+        counts = dict(channel_data)
+        if cold_archive.covers('feedback', start_date):
+            for chunk_counts in cold_archive.summaries('feedback', start_date, end_date, _archived_channel_counts,
+                                                       'channel_counts', columns=['channel']):
+                for value, count in chunk_counts.items():
+                    channel = FeedbackChannel(value)
+                    counts[channel] = counts.get(channel, 0) + count
         
         labels = []
         values = []
         
-        for channel, count in channel_data:
-            labels.append(channel_names.get(channel, channel.value))
+        for channel, count in counts.items():
+            labels.append(CHANNEL_NAMES.get(channel, channel.value))
             values.append(count)
         
         return {
@@ -624,6 +776,181 @@ def get_channel_distribution(days=30):
             'values': []
         }
 
+# Vectorized equivalents of the queries above, served from the columnar snapshot
+
+def _scored(frame):
+    """Processed feedback that has a sentiment score"""
+    return (frame.status == PROCESSED) & ~np.isnan(frame.sentiment)
+
+def _csat_from_frame(frame, start_date, end_date, days):
+    scored = _scored(frame)
+    current = scored & frame.window(start_date, end_date, end_inclusive=True)
+    total_count = int(current.sum())
+    if not total_count:
+        return {'score': 0.0, 'trend': 0.0, 'total_responses': 0, 'confidence': 0.0}
+    
+    current_csat = int((frame.sentiment[current] > 0.1).sum()) / total_count
+    avg_confidence = float(frame.confidence[current].sum(dtype='f8')) / total_count
+    
+    previous = scored & frame.window(start_date - timedelta(days=days), start_date)
+    trend = 0.0
+    if previous.any():
+        prev_csat = int((frame.sentiment[previous] > 0.1).sum()) / int(previous.sum())
+        trend = ((current_csat - prev_csat) / prev_csat * 100) if prev_csat > 0 else 0.0
+    
+    return {'score': current_csat, 'trend': trend, 'total_responses': total_count, 'confidence': avg_confidence}
+
+def _nps_from_frame(frame, start_date, end_date, days):
+    rated = frame.rating > 0
+    eligible = (frame.status == PROCESSED) & (rated | ~np.isnan(frame.sentiment))
+    # Rating 1-5 or sentiment -1..1, both mapped to 0-10
+    scores = np.where(rated, (frame.rating - 1) * 2.5, (frame.sentiment + 1) * 5)
+    
+    def counts(mask):
+        selected = scores[mask]
+        return int((selected >= 9).sum()), int((selected <= 6).sum()), len(selected)
+    
+    promoters, detractors, total = counts(eligible & frame.window(start_date, end_date, end_inclusive=True))
+    if not total:
+        return {'score': 0.0, 'trend': 0.0, 'promoters': 0, 'detractors': 0, 'passives': 0}
+    nps = (promoters - detractors) / total * 100
+    
+    prev_promoters, prev_detractors, prev_total = counts(
+        eligible & frame.window(start_date - timedelta(days=days), start_date)
+    )
+    trend = nps - (prev_promoters - prev_detractors) / prev_total * 100 if prev_total else 0.0
+    
+    return {
+        'score': nps,
+        'trend': trend,
+        'promoters': promoters,
+        'detractors': detractors,
+        'passives': total - promoters - detractors
+    }
+
+def _ces_from_frame(frame, start_date, end_date, days):
+    processed = frame.status == PROCESSED
+    channel_effort = np.zeros(len(CHANNELS) + 1)
+    for channel, adjustment in CHANNEL_EFFORT.items():
+        channel_effort[CHANNEL_CODES[channel]] = adjustment
+    
+    effort = 4.0 + np.nan_to_num(frame.sentiment) * -1.5
+    effort = effort + np.where(frame.content_length > 500, 1.5, np.where(frame.content_length > 200, 0.5, 0.0))
+    effort = np.clip(effort + channel_effort[frame.channel], 1.0, 7.0)
+    
+    current = effort[processed & frame.window(start_date, end_date, end_inclusive=True)]
+    if not len(current):
+        return {'score': 5.0, 'trend': 0.0, 'easy_count': 0, 'difficult_count': 0}
+    avg_effort = float(current.mean())
+    
+    previous = effort[processed & frame.window(start_date - timedelta(days=days), start_date)]
+    trend = 0.0
+    if len(previous):
+        prev_avg_effort = float(previous.mean())
+        trend = ((avg_effort - prev_avg_effort) / prev_avg_effort * 100) if prev_avg_effort > 0 else 0.0
+    
+    return {
+        'score': avg_effort,
+        'trend': trend,
+        'easy_count': int((current <= 3.0).sum()),
+        'difficult_count': int((current >= 5.0).sum())
+    }
+
+def _fcr_from_frame(frame, start_date, end_date, days):
+    codes = [CHANNEL_CODES[channel] for channel in RESOLUTION_CHANNELS]
+    eligible = (frame.status == PROCESSED) & np.isin(frame.channel, codes)
+    sentiment = np.nan_to_num(frame.sentiment)
+    length = frame.content_length
+    
+    # Positive and short resolves; very negative or very long escalates; otherwise the rating decides
+    first_contact = (sentiment > 0.2) & (length < 300)
+    escalation = ~first_contact & ((sentiment < -0.3) | (length > 800))
+    resolved = first_contact | (~escalation & (frame.rating >= 4))
+    
+    current = eligible & frame.window(start_date, end_date, end_inclusive=True)
+    total = int(current.sum())
+    if not total:
+        return {'score': 0.85, 'trend': 0.0, 'resolved_first': 0, 'escalated': 0}
+    resolved_first = int((resolved & current).sum())
+    fcr_rate = resolved_first / total
+    
+    previous = eligible & frame.window(start_date - timedelta(days=days), start_date)
+    trend = 0.0
+    if previous.any():
+        prev_fcr = int((resolved & previous).sum()) / int(previous.sum())
+        trend = ((fcr_rate - prev_fcr) / prev_fcr * 100) if prev_fcr > 0 else 0.0
+    
+    return {'score': fcr_rate, 'trend': trend, 'resolved_first': resolved_first, 'escalated': total - resolved_first}
+
+def _volume_from_frame(frame, now):
+    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    week_start = (now - timedelta(days=now.weekday())).replace(hour=0, minute=0, second=0, microsecond=0)
+    month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    
+    week_count = int(frame.window(week_start).sum())
+    last_week_count = int(frame.window(week_start - timedelta(days=7), week_start).sum())
+    
+    return {
+        'total': int(frame.window(now - timedelta(days=30)).sum()),
+        'today': int(frame.window(today_start).sum()),
+        'week': week_count,
+        'month': int(frame.window(month_start).sum()),
+        'trend': ((week_count - last_week_count) / last_week_count * 100) if last_week_count > 0 else 0.0
+    }
+
+def _sentiment_from_frame(frame, start_date, end_date, days):
+    scored = _scored(frame)
+    current = scored & frame.window(start_date, end_date, end_inclusive=True)
+    if not current.any():
+        return {
+            'score': 0.0,
+            'trend': 0.0,
+            'confidence': 0.0,
+            'distribution': {'positive': 0, 'neutral': 0, 'negative': 0}
+        }
+    
+    sentiment_scores = frame.sentiment[current]
+    avg_sentiment = float(sentiment_scores.mean())
+    positive = int((sentiment_scores > 0.1).sum())
+    negative = int((sentiment_scores < -0.1).sum())
+    
+    previous = scored & frame.window(start_date - timedelta(days=days), start_date)
+    prev_sentiment = float(frame.sentiment[previous].mean()) if previous.any() else 0.0
+    trend = ((avg_sentiment - prev_sentiment) / abs(prev_sentiment) * 100) if prev_sentiment != 0 else 0.0
+    
+    return {
+        'score': avg_sentiment,
+        'trend': trend,
+        'confidence': float(frame.confidence[current].mean(dtype='f8')),
+        'distribution': {
+            'positive': positive,
+            'neutral': len(sentiment_scores) - positive - negative,
+            'negative': negative
+        }
+    }
+
+def _trend_from_frame(frame, start_date, days):
+    first_day = start_date.replace(hour=0, minute=0, second=0, microsecond=0)
+    scored = _scored(frame)
+    totals = frame.daily_bins(scored, first_day, days)
+    satisfied = frame.daily_bins(scored & (frame.sentiment > 0.1), first_day, days)
+    
+    return {
+        'labels': [(start_date + timedelta(days=i)).strftime('%m/%d') for i in range(days)],
+        'values': [float(satisfied[i] / totals[i] * 100) if totals[i] else 0 for i in range(days)]
+    }
+
+def _channels_from_frame(frame, start_date, end_date):
+    in_range = frame.window(start_date, end_date, end_inclusive=True) & (frame.channel >= 0)
+    counts = np.bincount(frame.channel[in_range], minlength=len(CHANNELS))
+    # Same order as GROUP BY over the stored enum names
+    channels = sorted((channel for channel in CHANNELS if counts[CHANNEL_CODES[channel]]), key=lambda c: c.name)
+    
+    return {
+        'labels': [CHANNEL_NAMES.get(channel, channel.value) for channel in channels],
+        'values': [int(counts[CHANNEL_CODES[channel]]) for channel in channels]
+    }
+
 @executive_bp.route('/metrics')
 def get_dashboard_metrics():
     """
@@ -669,6 +996,46 @@ def get_csat_metrics():
         logger.error(f"Error getting CSAT metrics: {e}")
         return jsonify({'error': 'Failed to load CSAT metrics'}), 500
 
+@executive_bp.route('/trends')
+def get_trend_series():
+    """
+    Get bucketed KPI series (?days=90&granularity=week)
+    
+    ?width=N downsamples to N points by LTTB on ?metric= (default volume), ?envelope=1 adds
+    per-point min/max bands; Accept selects the JSON, column or typed-array payload.
+    """
+    try:
+        days = min(max(request.args.get('days', 30, type=int), 1), 3660)
+        granularity = request.args.get('granularity', 'day')
+        if granularity not in GRANULARITIES:
+            return jsonify({'error': 'Invalid granularity', 'valid_granularities': list(GRANULARITIES)}), 400
+        metric = request.args.get('metric', 'volume')
+        if metric not in SERIES_METRICS:
+            return jsonify({'error': 'Invalid metric', 'valid_metrics': list(SERIES_METRICS)}), 400
+        
+        end_date = datetime.utcnow()
+        series = feedback_series(truncate(end_date - timedelta(days=days), granularity), end_date, granularity)
+        columns = {name: [point[name] for point in series] for name in ('bucket',) + SERIES_METRICS}
+        
+        envelope = None
+        width = requested_width(request)
+        if width:
+            columns, envelope = downsample(columns, metric, width, envelope=request.args.get('envelope') == '1')
+        
+        fmt = negotiate_format(request)
+        if fmt != JSON_FORMAT:
+            return chart_response(encode_columns(columns, fmt, envelope, granularity=granularity, days=days), fmt)
+        
+        payload = {'granularity': granularity, 'days': days,
+                   'series': [dict(zip(columns, row)) for row in zip(*columns.values())]}
+        if envelope is not None:
+            payload['envelope'] = envelope
+        return jsonify(payload)
+            
+    except Exception as e:
+        logger.error(f"Error getting trend series: {e}")
+        return jsonify({'error': 'Failed to load trend series'}), 500
+
 @executive_bp.route('/volume')
 def get_volume_metrics():
     """
@@ -0,0 +1,69 @@
+"""
+Search API Endpoints
+Ranked, highlighted full-text search over feedback content and survey text answers
+"""
+
+from flask import Blueprint, jsonify, request
+from utils.text_search import MAX_PAGE_SIZE, SOURCES, search
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Create blueprint
+search_bp = Blueprint('search', __name__, url_prefix='/api/search')
+
+
+@search_bp.route('', methods=['GET'])
+def search_text():
+    """
+    Search feedback or text answers
+
+    Query Parameters:
+        q: search text, every word must match (Arabic spelling variants and affixes are folded)
+        source: "feedback" or "answers" (default: "feedback")
+        limit: page size, at most 100 (default: 20)
+        cursor: next_cursor from the previous page
+        channel: feedback channel filter; survey_id: answers survey filter
+
+    Returns:
+        JSON with ranked results carrying <mark>-highlighted excerpts and the next page cursor
+    """
+    try:
+        query = request.args.get('q', '').strip()
+        source = request.args.get('source', 'feedback')
+
+        if not query:
+            return jsonify({'success': False, 'error': 'Query parameter q is required'}), 400
+        if source not in SOURCES:
+            return jsonify({
+                'success': False,
+                'error': 'Invalid source parameter',
+                'valid_options': list(SOURCES)
+            }), 400
+
+        page = search(
+            query,
+            source=source,
+            limit=request.args.get('limit', 20, type=int),
+            cursor=request.args.get('cursor'),
+            channel=request.args.get('channel'),
+            survey_id=request.args.get('survey_id', type=int),
+        )
+
+        return jsonify({
+            'success': True,
+            'source': source,
+            'query': query,
+            'max_page_size': MAX_PAGE_SIZE,
+            **page
+        })
+
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error in search API: {e}")
+        return jsonify({
+            'success': False,
+            'error': 'Search failed',
+            'message': str(e)
+        }), 500
@@ -16,18 +16,22 @@ from models.survey_delivery import (
     SurveyStatus, DeliveryStatus, ResponseStatus
 )
 from models_unified import FeedbackChannel
-from utils.survey_distribution import SurveyDistributionManager, SurveyResponseCollector
-from utils.web_delivery import WebSurveyRenderer, QRCodeGenerator
-from utils.whatsapp_delivery import WhatsAppWebhookHandler
-from utils.sms_delivery import SMSResponseHandler
-from utils.database import get_db
-from utils.security import validate_survey_input, rate_limiter
+from utils.webhook_ingestion import webhook_queue, parse_whatsapp_payload, parse_sms_form, QueueSaturated
 
 logger = logging.getLogger(__name__)
 
+
+def get_db():
+    """Async session for the distribution views (utils.database builds its asyncpg engine on import)"""
+    from utils.database import get_db as database_session
+    return database_session()
+
 # Create Blueprint
 survey_bp = Blueprint('surveys', __name__, url_prefix='/api/surveys')
 
+# Provider callbacks, registered on their own: app.py serves /distribute and /campaigns itself
+webhook_bp = Blueprint('survey_webhooks', __name__, url_prefix='/api/surveys/webhook')
+
 @survey_bp.route('/distribute', methods=['POST'])
 async def distribute_survey():
     """
@@ -56,6 +60,7 @@ async def distribute_survey():
         campaign_id = data['campaign_id']
         
         # Initialize distribution manager
+        from utils.survey_distribution import SurveyDistributionManager
         distribution_manager = SurveyDistributionManager()
         
         # Start distribution
@@ -109,6 +114,7 @@ async def collect_survey_response():
             return jsonify({'error': 'responses are required'}), 400
         
         # Collect response
+        from utils.survey_distribution import SurveyResponseCollector
         collector = SurveyResponseCollector()
         result = await collector.collect_response(
             delivery_token=delivery_token,
@@ -139,6 +145,7 @@ async def render_web_survey(token: str):
     Render survey page for web delivery
     """
     try:
+        from utils.web_delivery import WebSurveyRenderer
         renderer = WebSurveyRenderer()
         result = await renderer.render_survey_page(token, get_db())
         
@@ -161,6 +168,7 @@ async def generate_survey_qr(token: str):
         survey_url = f"https://arabic-voc.replit.app/surveys/respond/{token}"
         
         # Generate QR code
+        from utils.web_delivery import QRCodeGenerator
         qr_generator = QRCodeGenerator()
         qr_data = await qr_generator.generate_qr_code(survey_url, token)
         
@@ -178,28 +186,32 @@ async def generate_survey_qr(token: str):
         logger.error(f"QR generation failed: {e}")
         return jsonify({'error': 'QR code generation failed'}), 500
 
-@survey_bp.route('/webhook/whatsapp', methods=['POST'])
-async def whatsapp_webhook():
+@webhook_bp.route('/whatsapp', methods=['POST'])
+def whatsapp_webhook():
     """
     Handle WhatsApp webhook for interactive surveys
+    
+    Acknowledges immediately after appending the raw events to the durable
+    queue; the batch consumer applies them to deliveries and responses.
     """
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True)
         
         if not data:
             return jsonify({'error': 'Invalid webhook data'}), 400
         
-        # Process webhook
-        webhook_handler = WhatsAppWebhookHandler()
-        result = await webhook_handler.process_webhook(data, get_db())
+        result = webhook_queue.enqueue(parse_whatsapp_payload(data))
         
-        return jsonify(result), 200
+        return jsonify({'status': 'accepted', **result}), 200
         
+    except QueueSaturated as e:
+        logger.warning(f"WhatsApp webhook deferred: {e}")
+        return jsonify({'error': 'Queue saturated, retry later'}), 503, {'Retry-After': '30'}
     except Exception as e:
         logger.error(f"WhatsApp webhook failed: {e}")
         return jsonify({'error': 'Webhook processing failed'}), 500
 
-@survey_bp.route('/webhook/whatsapp', methods=['GET'])
+@webhook_bp.route('/whatsapp', methods=['GET'])
 def whatsapp_webhook_verify():
     """
     Verify WhatsApp webhook (Facebook requirement)
@@ -221,30 +233,43 @@ def whatsapp_webhook_verify():
         logger.error(f"WhatsApp webhook verification failed: {e}")
         return 'Verification failed', 403
 
-@survey_bp.route('/webhook/sms', methods=['POST'])
-async def sms_webhook():
+@webhook_bp.route('/sms', methods=['POST'])
+def sms_webhook():
     """
-    Handle SMS responses via Twilio webhook
+    Handle SMS responses and status callbacks via Twilio webhook
     """
+    twiml_response = '<?xml version="1.0" encoding="UTF-8"?><Response></Response>'
+    
     try:
         # Twilio sends form data, not JSON
-        from_phone = request.form.get('From')
-        message_body = request.form.get('Body')
+        events = parse_sms_form(request.form.to_dict())
         
-        if not from_phone or not message_body:
+        if not events:
             return jsonify({'error': 'Invalid SMS data'}), 400
         
-        # Process SMS response
-        sms_handler = SMSResponseHandler()
-        result = await sms_handler.process_sms_response(from_phone, message_body, get_db())
+        webhook_queue.enqueue(events)
         
         # Return TwiML response
-        twiml_response = '<?xml version="1.0" encoding="UTF-8"?><Response></Response>'
         return twiml_response, 200, {'Content-Type': 'text/xml'}
         
+    except QueueSaturated as e:
+        logger.warning(f"SMS webhook deferred: {e}")
+        return twiml_response, 503, {'Content-Type': 'text/xml', 'Retry-After': '30'}
     except Exception as e:
+        # Non-2xx makes Twilio retry; the dedup index absorbs the repeat
         logger.error(f"SMS webhook failed: {e}")
-        return '<?xml version="1.0" encoding="UTF-8"?><Response></Response>', 200, {'Content-Type': 'text/xml'}
+        return twiml_response, 500, {'Content-Type': 'text/xml'}
+
+@webhook_bp.route('/metrics', methods=['GET'])
+def webhook_metrics():
+    """
+    Webhook queue depth, lag and throughput for backpressure monitoring
+    """
+    try:
+        return jsonify(webhook_queue.metrics()), 200
+    except Exception as e:
+        logger.error(f"Webhook metrics failed: {e}")
+        return jsonify({'error': 'Failed to fetch webhook metrics'}), 500
 
 @survey_bp.route('/campaigns', methods=['GET'])
 async def list_campaigns():
@@ -277,14 +302,14 @@ async def list_campaigns():
             campaigns_data.append({
                 'id': campaign.id,
                 'name': campaign.name,
-                'status': campaign.status.value,
+                'status': campaign.status,
                 'target_count': campaign.target_count,
                 'sent_count': campaign.sent_count,
                 'response_count': campaign.response_count,
                 'response_rate': campaign.response_rate,
-                'created_at': campaign.created_at.isoformat(),
-                'start_date': campaign.start_date.isoformat() if campaign.start_date else None,
-                'end_date': campaign.end_date.isoformat() if campaign.end_date else None
+                'created_at': campaign.created_at,
+                'start_date': campaign.start_date,
+                'end_date': campaign.end_date
             })
         
         return jsonify({
@@ -426,4 +451,5 @@ async def get_survey_response(response_id: int):
 # Route registration function
 def register_survey_routes(app):
     """Register survey distribution routes with Flask app"""
-    app.register_blueprint(survey_bp)
\ No newline at end of file
+    app.register_blueprint(survey_bp)
+    app.register_blueprint(webhook_bp)
\ No newline at end of file
@@ -73,8 +73,8 @@ def get_surveys():
                 'contacts_delivered': delivered_count,
                 'contacts_responded': responded_count,
                 'public_url': survey.public_url,
-                'created_at': survey.created_at.isoformat() if survey.created_at else None,
-                'updated_at': survey.updated_at.isoformat() if survey.updated_at else None,
+                'created_at': survey.created_at,
+                'updated_at': survey.updated_at,
                 'days_since_update': days_since_update,
                 'is_public': survey.is_public,
                 'primary_language': survey.primary_language
@@ -45,6 +45,10 @@ app.config['SESSION_COOKIE_HTTPONLY'] = True
 app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
 app.config['SESSION_PERMANENT'] = False
 
+# jsonify through orjson: native datetimes, enums and dataclasses, Arabic unescaped
+from utils.json_provider import init_json_provider
+init_json_provider(app)
+
 # Configure proxy fix for Replit
 app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
 
@@ -73,16 +77,126 @@ with app.app_context():
     # Import survey campaign models
     from models.survey_campaigns import SurveyCampaign, DistributionMethod
     
-    # Import preferences model to ensure table creation
-    try:
-        from models.replit_user_preferences import ReplitUserPreferences
-    except ImportError:
-        pass
+    # Import webhook event queue for provider callback ingestion
+    from models.webhook_events import WebhookEvent
     
-    # Create all tables
-    db.create_all()
+    # Import preferences model to ensure table creation (its FK needs Replit Auth's users table)
+    if make_replit_blueprint_func:
+        try:
+            from models.replit_user_preferences import ReplitUserPreferences
+        except ImportError:
+            pass
+    
+
+
+def create_schema():
+    """Create missing tables, apply schema migrations and prepare partitions"""
+    with app.app_context():
+        db.create_all()
+        
+        # Apply column/index changes that create_all() skips on existing tables
+        from utils.schema_migrations import run_schema_migrations
+        run_schema_migrations(db.engine)
+        
+        # Monthly partitions for the unbounded created_at tables (PostgreSQL only)
+        if app.config.get('PARTITIONING_ENABLED') and not app.testing:
+            from utils.partitioning import maintain_partitions
+            try:
+                maintain_partitions(
+                    db.engine,
+                    months_ahead=app.config['PARTITION_MONTHS_AHEAD'],
+                    retention_months=app.config['PARTITION_RETENTION_MONTHS'],
+                    drop_detached=app.config['PARTITION_DROP_DETACHED'],
+                )
+            except Exception as e:
+                logger.error(f"Partition maintenance failed at startup: {e}")
     logger.info("Database tables created successfully")
 
+
+@app.cli.command('init-db')
+def init_db_command():
+    """Create tables and apply schema migrations (flask --app app init-db)"""
+    create_schema()
+
+
+# Historical reads fall back to the cold archive for rows moved out of the hot tables
+from utils.cold_archive import init_cold_archive
+init_cold_archive(app)
+
+# Dashboard aggregates from an in-memory columnar snapshot
+from utils.analytics_snapshot import init_analytics_snapshot
+init_analytics_snapshot(app)
+
+# Per-route request metrics and the /metrics endpoint
+from utils.metrics import init_metrics
+init_metrics(app)
+
+# Per-request SQL counts and N+1 detection
+from utils.query_accounting import init_query_accounting
+init_query_accounting(app)
+
+# Slow statements with their EXPLAIN plans, aggregated at /api/admin/slow-queries
+from utils.slow_queries import init_slow_query_log
+init_slow_query_log(app)
+
+# On-demand request profiles, listed at /api/admin/profiles
+from utils.request_profiler import init_request_profiler
+init_request_profiler(app)
+
+# Pushed dashboard updates: write hooks feed an in-process bus streamed at /api/analytics/stream
+from utils.live_feed import init_live_feed
+init_live_feed(app)
+
+# 304s from data-version ETags on dashboards and survey pages; gzip/brotli for JSON and HTML
+from utils.http_caching import init_http_caching, conditional
+init_http_caching(app)
+
+_services_pid = None
+
+
+def start_background_services():
+    """Start this process's background threads (once per serving process, after any fork)"""
+    global _services_pid
+    if _services_pid == os.getpid():
+        return
+    _services_pid = os.getpid()
+    
+    # Optional group-commit ingestion mode for survey submissions
+    from utils.submission_buffer import init_submission_buffer
+    init_submission_buffer(app)
+    
+    # Recompute and push live dashboard changes (and LISTEN for other workers' writes)
+    from utils.live_feed import live_feed
+    live_feed.start(app)
+    
+    # Apply acknowledged WhatsApp/SMS webhook events from the durable queue
+    if app.config.get('WEBHOOK_CONSUMER_ENABLED') and not app.testing:
+        from utils.webhook_ingestion import start_background_consumer
+        start_background_consumer(app, app.config['WEBHOOK_CONSUMER_INTERVAL'])
+    
+    # Periodically correct any drift in incrementally maintained survey metrics
+    if app.config.get('SURVEY_METRICS_RECONCILE_INTERVAL') and not app.testing:
+        from utils.survey_metrics import start_background_reconciler
+        start_background_reconciler(app, app.config['SURVEY_METRICS_RECONCILE_INTERVAL'])
+    
+    # Keep upcoming partitions created and retention applied
+    if app.config.get('PARTITIONING_ENABLED') and not app.testing:
+        from utils.partitioning import start_background_partition_maintenance
+        start_background_partition_maintenance(app, app.config['PARTITION_MAINTENANCE_INTERVAL'])
+
+
+def create_app(start_services=True):
+    """
+    Application factory for servers (gunicorn 'main:create_app()')
+    
+    Routes register on the module-level app at import; the factory adds what must not
+    run on a bare import: the background services of the serving process. A preloading
+    master passes start_services=False and starts them in each worker after fork.
+    """
+    if start_services:
+        start_background_services()
+    return app
+
 # Import survey management API
 import api.survey_management
 
@@ -114,6 +228,13 @@ else:
     logger.info("Running without Replit Auth - development mode")
 
 # Register remaining API blueprints (complex operations only)
+try:
+    from api.survey_distribution import webhook_bp
+    app.register_blueprint(webhook_bp)
+    logger.info("Survey webhook API blueprint registered successfully")
+except Exception as e:
+    logger.error(f"Could not register Survey webhook API blueprint: {e}")
+
 try:
     from api.analytics_live import analytics_live_bp
     app.register_blueprint(analytics_live_bp)
@@ -145,6 +266,22 @@ try:
 except Exception as e:
     logger.error(f"Could not register Professional Reports API blueprint: {e}")
 
+# Register Full-Text Search API
+try:
+    from api.search import search_bp
+    app.register_blueprint(search_bp)
+    logger.info("Search API blueprint registered successfully")
+except Exception as e:
+    logger.error(f"Could not register Search API blueprint: {e}")
+
+# Register Admin Diagnostics API
+try:
+    from api.admin_diagnostics import admin_diagnostics_bp
+    app.register_blueprint(admin_diagnostics_bp)
+    logger.info("Admin diagnostics API blueprint registered successfully")
+except Exception as e:
+    logger.error(f"Could not register Admin diagnostics API blueprint: {e}")
+
 # NOTE: Contact management, user preferences, and simple operations migrated to Flask routes in routes.py
 
 # Import simplified feedback widget routes
@@ -282,11 +419,11 @@ def list_feedback():
             feedback_list.append({
                 'id': feedback.id,
                 'content': feedback.content[:100] + '...' if len(feedback.content) > 100 else feedback.content,
-                'channel': feedback.channel.value,
-                'status': feedback.status.value,
+                'channel': feedback.channel,
+                'status': feedback.status,
                 'rating': feedback.rating,
                 'sentiment_score': feedback.sentiment_score,
-                'created_at': feedback.created_at.isoformat() if feedback.created_at else None
+                'created_at': feedback.created_at
             })
         
         return jsonify({
@@ -312,8 +449,8 @@ def get_feedback(feedback_id):
         feedback_data = {
             'id': feedback.id,
             'content': feedback.content,  # Will be safely inserted using textContent
-            'channel': feedback.channel.value,
-            'status': feedback.status.value,
+            'channel': feedback.channel,
+            'status': feedback.status,
             'rating': feedback.rating,
             'sentiment_score': feedback.sentiment_score,
             'confidence_score': feedback.confidence_score,
@@ -323,8 +460,8 @@ def get_feedback(feedback_id):
             'customer_email': feedback.customer_email,
             'customer_phone': feedback.customer_phone,
             'language_detected': feedback.language_detected,
-            'created_at': feedback.created_at.isoformat() if feedback.created_at else None,
-            'updated_at': feedback.updated_at.isoformat() if feedback.updated_at else None
+            'created_at': feedback.created_at,
+            'updated_at': feedback.updated_at
         }
         
         return jsonify(feedback_data)
@@ -336,6 +473,7 @@ def get_feedback(feedback_id):
 # Removed redundant realtime dashboard route
 
 @app.route('/surveys')
+@conditional(SurveyFlask, ResponseFlask, window=False)
 def surveys_page():
     """Survey management page - simple database pull"""
     try:
@@ -1036,32 +1174,33 @@ def survey_responses_page():
                              error='حدث خطأ في تحميل البيانات المباشرة')
 
 # Public Survey Routes for Email-to-Web Integration
+from utils.survey_render_cache import survey_render_cache
+
+def _render_public_survey(uuid):
+    """Serve a public survey page from the versioned render cache"""
+    probe = survey_render_cache.probe(uuid)
+    
+    if not probe:
+        return render_template('404.html'), 404
+        
+    if not probe.is_active:
+        from models.survey_flask import SurveyFlask
+        survey = SurveyFlask.query.get(probe.id)
+        return render_template('survey_inactive.html', survey=survey), 403
+    
+    return survey_render_cache.get_page(probe)
+
+def _public_survey_version(uuid):
+    """Cache version and availability of a public survey, None when it does not exist"""
+    probe = survey_render_cache.probe(uuid)
+    return f"{probe.id}:{probe.version}:{probe.is_active}" if probe else None
+
 @app.route('/survey/<uuid>')
+@conditional(key=_public_survey_version, per_viewer=False, window=False)
 def public_survey(uuid):
     """Public survey access via UUID"""
     try:
-        from models.survey_flask import SurveyFlask
-        import json
-        
-        # Find survey by UUID
-        survey = SurveyFlask.query.filter_by(uuid=uuid).first()
-        
-        if not survey:
-            return render_template('404.html'), 404
-            
-        if not survey.is_active:
-            return render_template('survey_inactive.html', survey=survey), 403
-            
-        # Convert JSON strings to objects for template
-        for question in survey.questions:
-            if question.options:
-                try:
-                    import json
-                    question.options = json.loads(question.options)
-                except:
-                    question.options = []
-        
-        return render_template('survey_public.html', survey=survey)
+        return _render_public_survey(uuid)
         
     except Exception as e:
         logger.error(f"Error loading survey {uuid}: {e}")
@@ -1071,16 +1210,13 @@ def public_survey(uuid):
 def public_survey_short(short_id):
     """Public survey access via short ID"""
     try:
-        from models.survey_flask import SurveyFlask
-        
-        # Find survey by short ID
-        survey = SurveyFlask.query.filter_by(short_id=short_id).first()
+        # Served directly from the in-process short ID map, no redirect round trip
+        uuid = survey_render_cache.resolve_short_id(short_id)
         
-        if not survey:
+        if not uuid:
             return render_template('404.html'), 404
             
-        # Redirect to UUID-based URL for consistency
-        return redirect(url_for('public_survey', uuid=survey.uuid))
+        return _render_public_survey(uuid)
         
     except Exception as e:
         logger.error(f"Error loading survey with short ID {short_id}: {e}")
@@ -1090,11 +1226,13 @@ def public_survey_short(short_id):
 def submit_survey_response(uuid):
     """Submit survey response"""
     try:
-        from models.survey_flask import SurveyFlask, ResponseFlask, QuestionResponseFlask
+        from utils.survey_submission import (
+            load_survey_for_submission, prepare_answers, store_submission, analyze_text_answers
+        )
         import json
         
-        # Find survey
-        survey = SurveyFlask.query.filter_by(uuid=uuid).first()
+        # Find survey with its questions eagerly loaded
+        survey = load_survey_for_submission(uuid)
         if not survey or not survey.is_active:
             return jsonify({'success': False, 'error': 'Survey not found or inactive'}), 404
         
@@ -1105,9 +1243,7 @@ def submit_survey_response(uuid):
         respondent_email = form_data.get('respondent_email', '')
         respondent_name = form_data.get('respondent_name', '')
         
-        # Create response record
-        response = ResponseFlask(
-            survey_id=survey.id,
+        response_fields = dict(
             respondent_email=respondent_email if respondent_email else None,
             respondent_name=respondent_name if respondent_name else None,
             answers=json.dumps(form_data),
@@ -1119,47 +1255,44 @@ def submit_survey_response(uuid):
             user_agent=request.headers.get('User-Agent', '')
         )
         
-        db.session.add(response)
-        db.session.flush()  # Get response ID
-        
-        # Create individual question responses
-        for question in survey.questions:
-            question_key = f'question_{question.id}'
-            answer_value = form_data.get(question_key, '')
-            
-            if answer_value:
-                question_response = QuestionResponseFlask(
-                    response_id=response.id,
-                    question_id=question.id,
-                    answer_text=answer_value if question.type in ['text', 'textarea'] else None,
-                    answer_number=float(answer_value) if question.type in ['rating', 'nps'] and answer_value.isdigit() else None,
-                    answer_json=json.dumps({'value': answer_value}) if question.type in ['multiple_choice', 'checkbox'] else None
-                )
-                db.session.add(question_response)
-        
-        # Update survey metrics
-        survey.response_count += 1
-        db.session.commit()
+        # Validate answers in one pass
+        prepared = prepare_answers(survey.questions, form_data)
+        
+        # Ingestion mode: hand off to the group-commit writer when enabled
+        from utils.submission_buffer import submission_buffer, BufferedSubmission, BufferFull
+        if submission_buffer is not None:
+            submission = BufferedSubmission.build(survey.id, response_fields, prepared)
+            try:
+                response_uuid = submission_buffer.submit(submission)
+                return jsonify({
+                    'success': True,
+                    'message': 'تم إرسال إجاباتك بنجاح',
+                    'response_id': response_uuid
+                })
+            except BufferFull:
+                logger.warning("Submission buffer full, writing directly")
+            except TimeoutError:
+                # Still queued and may yet commit: a failure here would only invite a duplicate resubmission
+                logger.warning(f"Submission {submission.uuid} not committed in time, acknowledged as accepted")
+                return jsonify({
+                    'success': True,
+                    'accepted': True,
+                    'message': 'تم استلام إجاباتك وسيتم حفظها',
+                    'response_id': submission.uuid
+                }), 202
+        
+        # Direct path: one transaction with a bulk insert of question responses
+        response = store_submission(survey.id, response_fields, prepared)
         
         # Optional: Analyze text responses with existing AI system
         try:
-            text_responses = []
-            for question in survey.questions:
-                if question.type in ['text', 'textarea']:
-                    answer = form_data.get(f'question_{question.id}', '')
-                    if answer:
-                        text_responses.append(answer)
+            analysis = analyze_text_answers(prepared.text_answers)
             
-            if text_responses:
-                combined_text = ' '.join(text_responses)
-                from utils.simple_arabic_analyzer import SimpleArabicAnalyzer
-                analyzer = SimpleArabicAnalyzer()
-                analysis_result = analyzer.analyze_feedback_sync(combined_text)
-                
+            if analysis:
                 # Update response with analysis
-                response.sentiment_score = analysis_result.get('sentiment_score')
-                response.confidence_score = analysis_result.get('confidence')
-                response.keywords = json.dumps(analysis_result.get('topics', []))
+                response.sentiment_score = analysis['sentiment_score']
+                response.confidence_score = analysis['confidence_score']
+                response.keywords = analysis['keywords']
                 db.session.commit()
                 
         except Exception as e:
@@ -1631,6 +1764,7 @@ def specialized_agents_performance():
         }), 500
 
 @app.route('/api/dashboard/metrics')
+@conditional(Feedback)
 def dashboard_metrics():
     """Dashboard metrics API"""
     try:
@@ -2046,11 +2180,11 @@ def delete_contact_route(contact_id):
 import contact_routes  # noqa: F401
 import routes  # noqa: F401
 
-# Initialize database tables
-with app.app_context():
+# Schema changes are a deploy step (init-db); development and tests still apply them on import,
+# once every route module has imported its models
+if app.config.get('AUTO_CREATE_SCHEMA'):
     try:
-        db.create_all()
-        logger.info("Database tables created successfully")
+        create_schema()
     except Exception as e:
         logger.error(f"Error creating database tables: {e}")
 
@@ -0,0 +1,14 @@
+"""
+Arabic Voice of Customer Platform - ASGI Entry Point
+Serves the I/O-bound endpoints from the event loop and every other route through the Flask app
+
+    uvicorn asgi:app --host 0.0.0.0 --port 5000 --workers 3
+"""
+
+from app import create_app
+from api.async_endpoints import async_api
+from utils.asgi import build_asgi_app
+
+# Same app, models and database as main.py; Flask routes run on a thread pool (ASGI_WSGI_THREADS)
+flask_app = create_app()
+app = build_asgi_app(flask_app, async_api)
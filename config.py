@@ -4,6 +4,7 @@ Supports test, staging, and production environments
 """
 
 import os
+import tempfile
 from datetime import timedelta
 
 class BaseConfig:
@@ -21,6 +22,9 @@ class BaseConfig:
         "pool_recycle": 300,
     }
     
+    # Create tables and apply migrations when app.py is imported; otherwise run "flask --app app init-db"
+    AUTO_CREATE_SCHEMA = os.environ.get("AUTO_CREATE_SCHEMA", "false").lower() == "true"
+    
     # Arabic processing settings
     ARABIC_LOCALE = "ar_SA.UTF-8"
     DEFAULT_LANGUAGE = "ar"
@@ -39,6 +43,115 @@ class BaseConfig:
     # Pagination defaults
     DEFAULT_PAGE_SIZE = 10
     MAX_PAGE_SIZE = 100
+    
+    # Survey metrics drift reconciler (seconds, 0 disables)
+    SURVEY_METRICS_RECONCILE_INTERVAL = int(os.environ.get("SURVEY_METRICS_RECONCILE_INTERVAL", 900))
+    
+    # WhatsApp/SMS webhook consumer: applies events the webhook endpoints acknowledged (one thread per worker)
+    WEBHOOK_CONSUMER_ENABLED = os.environ.get("WEBHOOK_CONSUMER_ENABLED", "true").lower() == "true"
+    WEBHOOK_CONSUMER_INTERVAL = float(os.environ.get("WEBHOOK_CONSUMER_INTERVAL", 0.5))  # idle poll, seconds
+    
+    # Group-commit ingestion for survey submissions
+    # Durability: "memory" (ack on enqueue), "journal" (ack after fsync'd journal append),
+    # "commit" (ack after the batch commits)
+    SUBMISSION_BUFFER_ENABLED = os.environ.get("SUBMISSION_BUFFER_ENABLED", "false").lower() == "true"
+    SUBMISSION_BUFFER_DURABILITY = os.environ.get("SUBMISSION_BUFFER_DURABILITY", "commit")
+    SUBMISSION_BUFFER_MAX_SIZE = int(os.environ.get("SUBMISSION_BUFFER_MAX_SIZE", 10000))
+    SUBMISSION_BUFFER_BATCH_SIZE = int(os.environ.get("SUBMISSION_BUFFER_BATCH_SIZE", 500))
+    SUBMISSION_BUFFER_FLUSH_MS = int(os.environ.get("SUBMISSION_BUFFER_FLUSH_MS", 5))
+    # Base name: each process journals to <name>.<pid>.jsonl, and startup replays those of exited processes
+    SUBMISSION_BUFFER_JOURNAL = os.environ.get(
+        "SUBMISSION_BUFFER_JOURNAL",
+        os.path.join(tempfile.gettempdir(), "voc_submission_journal.jsonl")
+    )
+    
+    # Monthly created_at partitions for feedback and responses_flask (PostgreSQL only)
+    PARTITIONING_ENABLED = os.environ.get("PARTITIONING_ENABLED", "false").lower() == "true"
+    PARTITION_MONTHS_AHEAD = int(os.environ.get("PARTITION_MONTHS_AHEAD", 3))
+    PARTITION_RETENTION_MONTHS = int(os.environ.get("PARTITION_RETENTION_MONTHS", 0))  # 0 keeps everything
+    PARTITION_DROP_DETACHED = os.environ.get("PARTITION_DROP_DETACHED", "false").lower() == "true"
+    PARTITION_MAINTENANCE_INTERVAL = int(os.environ.get("PARTITION_MAINTENANCE_INTERVAL", 86400))
+    
+    # Cold archive for old feedback/responses ("" disables archive reads)
+    ARCHIVE_DIR = os.environ.get(
+        "ARCHIVE_DIR",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "instance", "archive")
+    )
+    ARCHIVE_AFTER_DAYS = int(os.environ.get("ARCHIVE_AFTER_DAYS", 365))
+    ARCHIVE_CACHE_CHUNKS = int(os.environ.get("ARCHIVE_CACHE_CHUNKS", 48))  # decoded chunks kept per worker
+    
+    # In-memory columnar snapshot for dashboard aggregates (needs numpy)
+    ANALYTICS_SNAPSHOT_ENABLED = os.environ.get("ANALYTICS_SNAPSHOT_ENABLED", "false").lower() == "true"
+    ANALYTICS_SNAPSHOT_MAX_AGE = float(os.environ.get("ANALYTICS_SNAPSHOT_MAX_AGE", 5))  # seconds of staleness
+    ANALYTICS_SNAPSHOT_REBUILD_INTERVAL = float(os.environ.get("ANALYTICS_SNAPSHOT_REBUILD_INTERVAL", 3600))
+    
+    # Rendered public survey pages shared by workers on the same host ("" disables)
+    SURVEY_RENDER_CACHE_DIR = os.environ.get(
+        "SURVEY_RENDER_CACHE_DIR",
+        os.path.join(tempfile.gettempdir(), "voc_survey_render_cache")
+    )
+    
+    # Request metrics served in Prometheus text format; set a multiprocess directory under gunicorn
+    METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "true").lower() == "true"
+    METRICS_PATH = os.environ.get("METRICS_PATH", "/metrics")
+    METRICS_MULTIPROC_DIR = os.environ.get("METRICS_MULTIPROC_DIR", os.environ.get("PROMETHEUS_MULTIPROC_DIR", ""))
+    METRICS_FLUSH_INTERVAL = float(os.environ.get("METRICS_FLUSH_INTERVAL", 1.0))  # seconds
+    
+    # Per-request SQL accounting: X-DB-* response headers and N+1 warnings
+    QUERY_ACCOUNTING_ENABLED = os.environ.get("QUERY_ACCOUNTING_ENABLED", "true").lower() == "true"
+    QUERY_ACCOUNTING_HEADERS = os.environ.get("QUERY_ACCOUNTING_HEADERS", "true").lower() == "true"
+    QUERY_N_PLUS_ONE_THRESHOLD = int(os.environ.get("QUERY_N_PLUS_ONE_THRESHOLD", 5))  # same SELECT shape per request
+    
+    # Slow query log: ring buffer for /api/admin/slow-queries plus a rotating JSONL file ("" disables the file)
+    SLOW_QUERY_LOG_ENABLED = os.environ.get("SLOW_QUERY_LOG_ENABLED", "true").lower() == "true"
+    SLOW_QUERY_THRESHOLD_MS = float(os.environ.get("SLOW_QUERY_THRESHOLD_MS", 200))
+    SLOW_QUERY_BUFFER_SIZE = int(os.environ.get("SLOW_QUERY_BUFFER_SIZE", 1000))
+    SLOW_QUERY_EXPLAIN = os.environ.get("SLOW_QUERY_EXPLAIN", "true").lower() == "true"
+    SLOW_QUERY_LOG_PATH = os.environ.get(
+        "SLOW_QUERY_LOG_PATH",
+        os.path.join(tempfile.gettempdir(), "voc_slow_queries.jsonl")
+    )
+    SLOW_QUERY_LOG_MAX_BYTES = int(os.environ.get("SLOW_QUERY_LOG_MAX_BYTES", 10 * 1024 * 1024))
+    SLOW_QUERY_LOG_BACKUPS = int(os.environ.get("SLOW_QUERY_LOG_BACKUPS", 5))
+    
+    # Request profiler: X-Profile: <PROFILER_TOKEN> on demand ("" disables), or 1 in PROFILER_SAMPLE_RATE requests
+    PROFILER_ENABLED = os.environ.get("PROFILER_ENABLED", "true").lower() == "true"
+    PROFILER_TOKEN = os.environ.get("PROFILER_TOKEN", "")
+    PROFILER_SAMPLE_RATE = int(os.environ.get("PROFILER_SAMPLE_RATE", 0))  # 0 disables sampling
+    PROFILER_INTERVAL_MS = float(os.environ.get("PROFILER_INTERVAL_MS", 5))
+    PROFILER_DIR = os.environ.get("PROFILER_DIR", os.path.join(tempfile.gettempdir(), "voc_profiles"))
+    PROFILER_MAX_FILES = int(os.environ.get("PROFILER_MAX_FILES", 200))
+    PROFILER_MAX_AGE_HOURS = float(os.environ.get("PROFILER_MAX_AGE_HOURS", 72))
+    
+    # ASGI mode (uvicorn asgi:app): I/O-bound endpoints on the event loop, the rest of Flask on a thread pool
+    ASYNC_DATABASE_URL = os.environ.get("ASYNC_DATABASE_URL", "")  # derived from SQLALCHEMY_DATABASE_URI when empty
+    ASGI_WSGI_THREADS = int(os.environ.get("ASGI_WSGI_THREADS", 10))
+    
+    # JSON responses (utils/json_provider.py): keys in insertion order unless sorting is asked for
+    JSON_SORT_KEYS = os.environ.get("JSON_SORT_KEYS", "false").lower() == "true"
+    
+    # Live dashboard feed (/api/analytics/stream): one recomputation per burst of writes, pushed to every open dashboard
+    LIVE_FEED_DEBOUNCE_SECONDS = float(os.environ.get("LIVE_FEED_DEBOUNCE_SECONDS", 0.5))
+    LIVE_FEED_HEARTBEAT_SECONDS = float(os.environ.get("LIVE_FEED_HEARTBEAT_SECONDS", 15))
+    LIVE_FEED_CLIENT_QUEUE = int(os.environ.get("LIVE_FEED_CLIENT_QUEUE", 100))  # events held per slow client
+    LIVE_FEED_TIME_RANGE = os.environ.get("LIVE_FEED_TIME_RANGE", "7d")
+    LIVE_FEED_INSIGHTS_LIMIT = int(os.environ.get("LIVE_FEED_INSIGHTS_LIMIT", 20))
+    # Flask streams end after this long so sync workers are released; browsers reconnect with Last-Event-ID
+    LIVE_FEED_MAX_STREAM_SECONDS = float(os.environ.get("LIVE_FEED_MAX_STREAM_SECONDS", 55))
+    LIVE_FEED_PG_NOTIFY = os.environ.get("LIVE_FEED_PG_NOTIFY", "false").lower() == "true"  # fan out across workers
+    # Dashboards subscribe to the stream only where it does not hold a sync worker (ASGI, or gunicorn
+    # gthread); otherwise they poll every 30 seconds. Set by asgi.py and gunicorn_conf.py.
+    LIVE_FEED_SSE = os.environ.get("LIVE_FEED_SSE", "false").lower() == "true"
+    
+    # Conditional GET (utils/http_caching.py): ETags from per-table row counts and newest updated_at
+    CONDITIONAL_GET_ENABLED = os.environ.get("CONDITIONAL_GET_ENABLED", "true").lower() == "true"
+    CONDITIONAL_GET_PROBE_TTL = float(os.environ.get("CONDITIONAL_GET_PROBE_TTL", 2))  # seconds before other workers' writes are seen
+    CONDITIONAL_GET_WINDOW_SECONDS = int(os.environ.get("CONDITIONAL_GET_WINDOW_SECONDS", 60))  # "last N days" views roll over
+    # Response compression for JSON and HTML (brotli when installed, else gzip)
+    COMPRESSION_ENABLED = os.environ.get("COMPRESSION_ENABLED", "true").lower() == "true"
+    COMPRESSION_MIN_BYTES = int(os.environ.get("COMPRESSION_MIN_BYTES", 1024))
+    COMPRESSION_GZIP_LEVEL = int(os.environ.get("COMPRESSION_GZIP_LEVEL", 6))
+    COMPRESSION_BROTLI_QUALITY = int(os.environ.get("COMPRESSION_BROTLI_QUALITY", 4))
 
 class DevelopmentConfig(BaseConfig):
     """Development environment configuration"""
@@ -47,6 +160,9 @@ class DevelopmentConfig(BaseConfig):
     DEBUG = True
     TESTING = False
     
+    # Schema is created on import for local runs
+    AUTO_CREATE_SCHEMA = os.environ.get("AUTO_CREATE_SCHEMA", "true").lower() == "true"
+    
     # Database
     SQLALCHEMY_DATABASE_URI = os.environ.get(
         "DATABASE_URL", 
@@ -72,6 +188,9 @@ class TestConfig(BaseConfig):
     DEBUG = False
     TESTING = True
     
+    # Schema is created on import for local runs
+    AUTO_CREATE_SCHEMA = os.environ.get("AUTO_CREATE_SCHEMA", "true").lower() == "true"
+    
     # Database (in-memory for fast tests)
     SQLALCHEMY_DATABASE_URI = os.environ.get(
         "TEST_DATABASE_URL",
@@ -165,6 +284,9 @@ class ProductionConfig(BaseConfig):
     RATE_LIMIT_REQUESTS_PER_HOUR = 1000
     RATE_LIMIT_BURST = 20
     
+    # Query accounting stays in logs and metrics; no X-DB-* headers to clients
+    QUERY_ACCOUNTING_HEADERS = os.environ.get("QUERY_ACCOUNTING_HEADERS", "false").lower() == "true"
+    
     # CORS (production domains only)
     CORS_ORIGINS = [
         "https://arabic-voc.replit.app",
@@ -2,7 +2,7 @@
 Contact management routes for direct database operations
 """
 
-from flask import request, redirect, url_for, flash, Response
+from flask import request, redirect, url_for, flash, Response, jsonify
 from app import app, db
 # Use simplified import utility
 from utils.imports import safe_import_replit_auth
@@ -36,6 +36,9 @@ def edit_contact(contact_id):
         contact.email = request.form.get('email', '').strip() or None
         contact.phone = request.form.get('phone', '').strip() or None
         contact.company = request.form.get('company', '').strip() or None
+        # The contact forms have no region field; keep the stored one unless it is posted
+        if 'region' in request.form:
+            contact.region = request.form.get('region', '').strip().lower() or None
         contact.language_preference = request.form.get('language_preference', 'ar')
         contact.is_active = request.form.get('is_active') == 'true'
         contact.email_opt_in = request.form.get('email_opt_in') == 'on'
@@ -176,6 +179,8 @@ def create_contact():
     contact.email = request.form.get('email', '').strip() or None
     contact.phone = request.form.get('phone', '').strip() or None
     contact.company = request.form.get('company', '').strip() or None
+    if 'region' in request.form:
+        contact.region = request.form.get('region', '').strip().lower() or None
     contact.language_preference = request.form.get('language_preference', 'ar')
     contact.is_active = request.form.get('is_active') == 'true'
     contact.email_opt_in = request.form.get('email_opt_in') == 'on'
@@ -402,4 +407,38 @@ def download_csv_template():
     )
     response.headers['Content-Type'] = 'text/csv; charset=utf-8'
     
-    return response
\ No newline at end of file
+    return response
+
+# Contact Search and Filter (Flask-based)
+@app.route('/contacts/search', methods=['GET'])
+@require_login
+def search_contacts():
+    """Search contacts with filters"""
+    from utils.contact_search import search_contacts as run_contact_search
+    
+    try:
+        search_term = request.args.get('q', '').strip()
+        channel = request.args.get('channel')
+        limit = min(int(request.args.get('limit', 20)), 100)
+        
+        contacts = run_contact_search(search_term, limit=limit, channel=channel)
+        
+        return jsonify({
+            'success': True,
+            'contacts': [
+                {
+                    'id': c.id,
+                    'name': c.name,
+                    'email': c.email,
+                    'phone': c.phone,
+                    'company': c.company
+                } for c in contacts
+            ],
+            'total': len(contacts)
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
@@ -0,0 +1,64 @@
+"""
+Gunicorn production profile
+Preloads the app in the master, warms shared state and freezes it before forking workers
+
+    gunicorn -c deployment/gunicorn_conf.py
+"""
+
+import gc
+import glob
+import os
+import tempfile
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('WEB_CONCURRENCY', '3'))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '120'))
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', '1000'))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', '100'))
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+errorlog = os.environ.get('GUNICORN_ERROR_LOG', '-')
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'sync')
+threads = int(os.environ.get('GUNICORN_THREADS', '1'))
+
+# A dashboard's live stream holds a whole sync worker; only threaded workers can spare it a thread
+if worker_class == 'gthread' and threads > 1:
+    os.environ.setdefault('LIVE_FEED_SSE', 'true')
+
+# Import once in the master; workers inherit the modules copy-on-write.
+# Background services start per worker in post_fork, never in the master.
+preload_app = True
+wsgi_app = 'app:create_app(start_services=False)'
+
+# Workers share one metrics directory so any of them can serve the /metrics totals
+os.environ.setdefault('METRICS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'voc_metrics'))
+for stale in glob.glob(os.path.join(os.environ['METRICS_MULTIPROC_DIR'], 'metrics-*.json')):
+    os.remove(stale)
+
+# No collections while the app imports, so long-lived objects are not interleaved with freed holes
+gc.disable()
+
+
+def when_ready(server):
+    """Runs in the master after preload, before the first worker forks"""
+    from app import app
+    from utils.prefork import freeze_heap, warm_shared_state
+
+    warm_shared_state(app)
+    frozen = freeze_heap()
+    gc.enable()
+    server.log.info(f"Shared state warmed; {frozen} objects frozen before fork")
+
+
+def post_fork(server, worker):
+    gc.enable()
+    from app import app
+    from utils.prefork import reinit_after_fork
+
+    reinit_after_fork(app)
+
+
+def child_exit(server, worker):
+    # Keep the dead worker's counters in the totals but drop its gauges
+    from utils.metrics import registry
+    registry.mark_process_dead(worker.pid)
@@ -25,12 +25,8 @@ except ValueError as e:
 
 # Database migration (production)
 echo "Running production database migrations..."
-python -c "
-from app import app, db
-with app.app_context():
-    db.create_all()
-    print('Production database migrated')
-"
+# Tables, column migrations and partitions (AUTO_CREATE_SCHEMA is off outside development)
+flask --app app init-db
 
 # Start production server
 echo "Starting production server..."
@@ -25,12 +25,8 @@ print('Staging configuration valid')
 
 # Database migration
 echo "Running database migrations..."
-python -c "
-from app import app, db
-with app.app_context():
-    db.create_all()
-    print('Staging database migrated')
-"
+# Tables, column migrations and partitions (AUTO_CREATE_SCHEMA is off outside development)
+flask --app app init-db
 
 # Run staging server
 echo "Starting staging server..."
@@ -4,12 +4,10 @@ Arabic Voice of Customer Platform - Main Application Entry Point
 Imports the main Flask app from app.py for WSGI compatibility
 """
 
-from app import app
+from app import create_app
 
-# Import all routes and ensure database tables are created
-with app.app_context():
-    from app import db
-    db.create_all()
+# Tables are created by "flask --app app init-db" (or on import with AUTO_CREATE_SCHEMA)
+app = create_app()
 
 # All routes are defined in app.py
 
@@ -4,7 +4,7 @@ Simple contact storage for survey distribution
 """
 
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, JSON, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, JSON, ForeignKey, Index, event
 from sqlalchemy.orm import relationship
 from app import db
 
@@ -19,6 +19,7 @@ class Contact(db.Model):
     
     # Optional additional fields
     company = Column(String(100), nullable=True)
+    region = Column(String(50), nullable=True, index=True)  # Lower-cased, e.g. 'riyadh'
     language_preference = Column(String(5), default='ar')  # 'ar' or 'en'
     tags = Column(JSON, default=list)  # List of tags for segmentation
     
@@ -36,6 +37,10 @@ class Contact(db.Model):
     is_active = Column(Boolean, default=True)
     notes = Column(Text, nullable=True)
     
+    # Search keys (Arabic-normalized, maintained on write - see refresh_search_keys)
+    name_normalized = Column(String(100), nullable=True, index=True)
+    search_text = Column(Text, nullable=True)
+    
     # Relationships
     deliveries = relationship("ContactDelivery", back_populates="contact", cascade="all, delete-orphan")
     
@@ -43,6 +48,13 @@ class Contact(db.Model):
         email_or_phone = getattr(self, 'email', None) or getattr(self, 'phone', None)
         return f"<Contact {getattr(self, 'name', 'Unknown')} ({email_or_phone})>"
     
+    def refresh_search_keys(self):
+        """Recompute normalized search columns from name, company, email and phone"""
+        from utils.arabic_search import normalize_for_search, build_search_text
+        
+        self.name_normalized = normalize_for_search(self.name)
+        self.search_text = build_search_text(self.name, self.company, self.email, self.phone)
+    
     def get_preferred_contact_method(self):
         """Get preferred contact method based on available data and preferences"""
         if getattr(self, 'email', None) and getattr(self, 'email_opt_in', False):
@@ -72,6 +84,7 @@ class Contact(db.Model):
             'email': self.email,
             'phone': self.phone,
             'company': self.company,
+            'region': self.region,
             'language_preference': self.language_preference,
             'tags': self.tags or [],
             'email_opt_in': self.email_opt_in,
@@ -84,6 +97,12 @@ class Contact(db.Model):
             'notes': self.notes
         }
 
+@event.listens_for(Contact, 'before_insert')
+@event.listens_for(Contact, 'before_update')
+def _maintain_contact_search_keys(mapper, connection, target):
+    """Keep search keys in sync on every ORM write"""
+    target.refresh_search_keys()
+
 class ContactGroup(db.Model):
     """Contact groups for easier management"""
     __tablename__ = 'contact_groups'
@@ -131,6 +150,10 @@ class ContactGroupMembership(db.Model):
     # Relationships
     contact = relationship("Contact")
     group = relationship("ContactGroup", back_populates="memberships")
+    
+    __table_args__ = (
+        Index('ix_contact_group_memberships_group_contact', 'group_id', 'contact_id'),
+    )
 
 class ContactDelivery(db.Model):
     """Track survey deliveries to contacts"""
@@ -166,6 +189,10 @@ class ContactDelivery(db.Model):
     # Relationships
     contact = relationship("Contact", back_populates="deliveries")
     
+    __table_args__ = (
+        Index('ix_contact_deliveries_contact_created', 'contact_id', 'created_at'),
+    )
+    
     def __repr__(self):
         return f"<ContactDelivery {self.contact_id} via {self.channel} - {self.status}>"
     
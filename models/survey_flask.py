@@ -6,6 +6,7 @@ Simplified survey models using Flask-SQLAlchemy
 import uuid
 from datetime import datetime
 from enum import Enum
+from sqlalchemy import event
 from app import db
 
 
@@ -77,6 +78,11 @@ class SurveyFlask(db.Model):
     completion_rate = db.Column(db.Float, default=0.0, nullable=False)
     average_duration = db.Column(db.Float, nullable=True)
     
+    # Running sums behind completion_rate/average_duration (see utils.survey_metrics)
+    completed_count = db.Column(db.Integer, default=0, nullable=False, server_default='0')
+    duration_count = db.Column(db.Integer, default=0, nullable=False, server_default='0')
+    duration_sum = db.Column(db.Float, default=0.0, nullable=False, server_default='0')
+    
     # Audit fields
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -266,6 +272,7 @@ class QuestionResponseFlask(db.Model):
     sentiment_score = db.Column(db.Float, nullable=True)
     confidence_score = db.Column(db.Float, nullable=True)
     extracted_keywords = db.Column(db.Text, nullable=True)  # JSON string
+    search_text = db.Column(db.Text, nullable=True)  # Stemmed answer_text for full-text search
     
     # Audit fields
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
@@ -276,4 +283,60 @@ class QuestionResponseFlask(db.Model):
     question = db.relationship("QuestionFlask", back_populates="question_responses")
     
     def __repr__(self):
-        return f"<QuestionResponseFlask(id={self.id}, question_id={self.question_id})>"
\ No newline at end of file
+        return f"<QuestionResponseFlask(id={self.id}, question_id={self.question_id})>"
+
+
+@event.listens_for(QuestionResponseFlask, 'before_insert')
+@event.listens_for(QuestionResponseFlask, 'before_update')
+def _maintain_answer_search_text(mapper, connection, target):
+    """Keep the full-text search document in sync on ORM writes (bulk inserts set it in prepare_answers)"""
+    from utils.arabic_search import build_search_document
+    target.search_text = build_search_document(target.answer_text) if target.answer_text else None
+
+
+
+class KeywordPostingFlask(db.Model):
+    """Text-answer keyword counts per day, maintained at write time (see utils.keyword_index)"""
+    __tablename__ = "keyword_postings_flask"
+    
+    keyword = db.Column(db.String(100), primary_key=True)  # Normalized for search
+    day = db.Column(db.Date, primary_key=True)
+    count = db.Column(db.Integer, default=0, nullable=False)
+    sentiment_sum = db.Column(db.Float, default=0.0, nullable=False)
+    
+    def __repr__(self):
+        return f"<KeywordPostingFlask(keyword={self.keyword}, day={self.day}, count={self.count})>"
+
+
+class KeywordDayFlask(db.Model):
+    """Number of indexed text answers per day, the denominator for keyword percentages"""
+    __tablename__ = "keyword_days_flask"
+    
+    day = db.Column(db.Date, primary_key=True)
+    answers = db.Column(db.Integer, default=0, nullable=False)
+    
+    def __repr__(self):
+        return f"<KeywordDayFlask(day={self.day}, answers={self.answers})>"
+
+
+class KeywordFormFlask(db.Model):
+    """How often each keyword was written in a given surface form; the most frequent one is displayed"""
+    __tablename__ = "keyword_forms_flask"
+    
+    keyword = db.Column(db.String(100), primary_key=True)  # Normalized key, as in KeywordPostingFlask
+    form = db.Column(db.String(100), primary_key=True)  # As written
+    count = db.Column(db.Integer, default=0, nullable=False)
+    
+    def __repr__(self):
+        return f"<KeywordFormFlask(keyword={self.keyword}, form={self.form}, count={self.count})>"
+
+# Composite/partial indexes for dashboard and list queries (see utils.schema_migrations)
+db.Index('ix_questions_flask_survey_order', QuestionFlask.survey_id, QuestionFlask.order_index)
+db.Index('ix_responses_flask_survey_created', ResponseFlask.survey_id, ResponseFlask.created_at)
+db.Index('ix_responses_flask_created', ResponseFlask.created_at)
+db.Index('ix_question_responses_flask_response', QuestionResponseFlask.response_id)
+db.Index('ix_question_responses_flask_question', QuestionResponseFlask.question_id)
+db.Index('ix_question_responses_flask_text_created', QuestionResponseFlask.created_at,
+         postgresql_where=QuestionResponseFlask.answer_text.isnot(None),
+         sqlite_where=QuestionResponseFlask.answer_text.isnot(None))
+db.Index('ix_keyword_postings_flask_day', KeywordPostingFlask.day, KeywordPostingFlask.keyword)
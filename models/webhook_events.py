@@ -0,0 +1,51 @@
+"""
+Webhook Event Queue Model
+Durable local queue for raw WhatsApp/SMS provider callbacks
+"""
+
+from datetime import datetime
+from app import db
+
+
+class WebhookEventStatus:
+    """Processing states for queued webhook events"""
+    PENDING = "pending"
+    APPLIED = "applied"
+    ORPHANED = "orphaned"  # No matching survey delivery
+    FAILED = "failed"
+
+
+class WebhookEvent(db.Model):
+    """Raw provider callback appended by the webhook acknowledge path"""
+    __tablename__ = "webhook_events"
+
+    id = db.Column(db.Integer, primary_key=True)
+
+    # Provider identity - (provider, provider_message_id) is the dedup key
+    provider = db.Column(db.String(20), nullable=False)  # whatsapp, sms
+    provider_message_id = db.Column(db.String(255), nullable=False)
+    event_type = db.Column(db.String(20), nullable=False)  # message, status
+
+    # Routing
+    delivery_token = db.Column(db.String(255), nullable=True, index=True)
+    sender = db.Column(db.String(50), nullable=True)  # Phone number for token resolution
+
+    # Raw event (JSON stored as text)
+    payload = db.Column(db.Text, nullable=False)
+
+    # Processing state
+    status = db.Column(db.String(20), default=WebhookEventStatus.PENDING, nullable=False)
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    error_message = db.Column(db.Text, nullable=True)
+
+    # Audit fields
+    received_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    processed_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.UniqueConstraint('provider', 'provider_message_id', name='uq_webhook_events_provider_message'),
+        db.Index('ix_webhook_events_status_id', 'status', 'id'),
+    )
+
+    def __repr__(self):
+        return f"<WebhookEvent(id={self.id}, provider='{self.provider}', status='{self.status}')>"
@@ -5,7 +5,7 @@ Single source of truth for all database models
 
 import enum
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, DateTime, Float, JSON, Enum
+from sqlalchemy import Column, Integer, String, Text, DateTime, Float, JSON, Enum, Index, event
 from sqlalchemy.ext.declarative import declarative_base
 
 # Import db only when needed to avoid circular imports
@@ -115,6 +115,7 @@ class Feedback(Base):
     processed_at = Column(DateTime, nullable=True)
     language_detected = Column(String(10), default="ar", comment="Detected language")
     region = Column(String(10), nullable=True, comment="Geographic region")
+    search_text = Column(Text, nullable=True, comment="Normalized, stemmed content for full-text search")
     
     def __repr__(self):
         return f"<Feedback(id={self.id}, channel={self.channel}, status={self.status})>"
@@ -132,6 +133,13 @@ class Feedback(Base):
         else:
             return "محايد"
 
+@event.listens_for(Feedback, 'before_insert')
+@event.listens_for(Feedback, 'before_update')
+def _maintain_feedback_search_text(mapper, connection, target):
+    """Keep the full-text search document in sync on every ORM write"""
+    from utils.arabic_search import build_search_document
+    target.search_text = build_search_document(target.content)
+
 class AggregationPeriod(str, enum.Enum):
     """Time periods for data aggregation"""
     HOURLY = "hourly"
@@ -169,4 +177,13 @@ class FeedbackAggregation(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     def __repr__(self):
-        return f"<FeedbackAggregation(period={self.period}, start={self.period_start})>"
\ No newline at end of file
+        return f"<FeedbackAggregation(period={self.period}, start={self.period_start})>"
+
+
+# Composite/partial indexes for dashboard and list queries (see utils.schema_migrations)
+Index('ix_feedback_channel_created', Feedback.channel, Feedback.created_at)
+Index('ix_feedback_status_created', Feedback.status, Feedback.created_at)
+Index('ix_feedback_scored_status_created',
+      Feedback.status, Feedback.created_at, Feedback.sentiment_score,
+      postgresql_where=Feedback.sentiment_score.isnot(None),
+      sqlite_where=Feedback.sentiment_score.isnot(None))
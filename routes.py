@@ -395,58 +395,6 @@ def distribute_survey(survey_id):
             'error': 'Distribution failed'
         }), 500
 
-# Contact Search and Filter (Flask-based)
-@app.route('/contacts/search', methods=['GET'])
-@require_login
-def search_contacts():
-    """Search contacts with filters"""
-    from models.contacts import Contact
-    from flask import request
-    from sqlalchemy import or_
-    
-    try:
-        search_term = request.args.get('q', '').strip()
-        channel = request.args.get('channel')
-        limit = min(int(request.args.get('limit', 20)), 100)
-        
-        query = Contact.query.filter(Contact.is_active == True)
-        
-        if search_term:
-            search_pattern = f"%{search_term}%"
-            query = query.filter(or_(
-                Contact.name.ilike(search_pattern),
-                Contact.email.ilike(search_pattern),
-                Contact.company.ilike(search_pattern)
-            ))
-        
-        if channel:
-            if channel == 'email':
-                query = query.filter(Contact.email_opt_in == True)
-            elif channel == 'sms':
-                query = query.filter(Contact.sms_opt_in == True)
-        
-        contacts = query.limit(limit).all()
-        
-        return jsonify({
-            'success': True,
-            'contacts': [
-                {
-                    'id': c.id,
-                    'name': c.name,
-                    'email': c.email,
-                    'phone': c.phone,
-                    'company': c.company
-                } for c in contacts
-            ],
-            'total': len(contacts)
-        })
-        
-    except Exception as e:
-        return jsonify({
-            'success': False,
-            'error': str(e)
-        }), 500
-
 # Add any other routes here.
 # Use flask_login.current_user to check if current user is logged in or anonymous.
 # Use db & models to interact with the database.
\ No newline at end of file
@@ -7,7 +7,8 @@ from flask import Blueprint, render_template, request, redirect, url_for, flash,
 from app import db
 from models.survey_campaigns import SurveyCampaign, DistributionMethod
 from models.survey_flask import SurveyFlask
-from models_unified import Contact, ContactGroup
+from models.contacts import Contact, ContactGroup
+from utils.audience_segmentation import segment_engine
 from datetime import datetime, timedelta
 import logging
 
@@ -15,6 +16,12 @@ logger = logging.getLogger(__name__)
 
 distribution_bp = Blueprint('distribution', __name__, url_prefix='/surveys/distribution')
 
+def _segment_config(target_audience):
+    """Distribution methods store {'all': True} or {'groups': [...]} from the campaign form"""
+    target_audience = dict(target_audience or {})
+    target_audience.pop('all', None)
+    return target_audience
+
 @distribution_bp.route('/')
 def distribution_hub():
     """Main distribution dashboard"""
@@ -195,9 +202,14 @@ def launch_campaign(campaign_id):
         campaign.status = 'active'
         campaign.scheduled_at = datetime.utcnow()
         
-        # Count target contacts (simplified - count all contacts for now)
-        total_contacts = Contact.query.count()
-        campaign.total_contacts = total_contacts
+        # Size the audience from each distribution method's segment
+        audience = None
+        for method in DistributionMethod.query.filter_by(campaign_id=campaign_id):
+            members = segment_engine.resolve_config(_segment_config(method.target_audience))
+            audience = members if audience is None else audience | members
+        if audience is None:
+            audience = segment_engine.resolve_config({})
+        campaign.total_contacts = len(audience)
         
         db.session.commit()
         
@@ -212,6 +224,19 @@ def launch_campaign(campaign_id):
         flash('حدث خطأ في إطلاق الحملة', 'error')
         return redirect(url_for('distribution.campaign_detail', campaign_id=campaign_id))
 
+@distribution_bp.route('/audience/preview', methods=['POST'])
+def preview_audience():
+    """Audience size for a segment definition (used while building campaigns)"""
+    try:
+        config = request.get_json(silent=True) or {}
+        return jsonify({'success': True, **segment_engine.preview(_segment_config(config))})
+        
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error previewing audience: {e}")
+        return jsonify({'success': False, 'error': 'حدث خطأ في حساب حجم الجمهور'}), 500
+
 @distribution_bp.route('/campaign/<int:campaign_id>/pause', methods=['POST'])
 def pause_campaign(campaign_id):
     """Pause active campaign"""
@@ -6,14 +6,73 @@ Provides real OpenAI-powered text analysis for customer feedback
 import json
 import logging
 from flask import request, jsonify
-from openai import OpenAI
 import os
 from app import app
+from utils.imports import get_openai_client
 
 logger = logging.getLogger(__name__)
 
-# Initialize OpenAI client
-openai_client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+# OpenAI client, created on the first analysis request
+openai_client = None
+
+def _get_openai_client():
+    global openai_client
+    if openai_client is None:
+        openai_client = get_openai_client()
+    return openai_client
+
+def analysis_completion_options(text_to_analyze):
+    """Chat completion arguments for one feedback analysis (shared by the WSGI and ASGI endpoints)"""
+    prompt = f"""You are an expert Arabic text analyst specializing in customer feedback analysis. Analyze the following customer text and provide a structured response.
+
+Text to analyze: "{text_to_analyze}"
+
+Please provide your analysis in the following JSON format:
+
+{{
+  "sentiment": "positive" | "negative" | "neutral",
+  "confidence": <number between 0-100>,
+  "emotions": ["joy", "frustration", "satisfaction", "disappointment", etc.],
+  "topics": ["product_quality", "customer_service", "pricing", "delivery", etc.],
+  "key_phrases": ["<important phrases from the text>"],
+  "summary": "<brief Arabic summary of the main feedback points>"
+}}
+
+Guidelines:
+- Focus on clear sentiment identification
+- Extract business-relevant topics
+- Provide confidence based on text clarity and sentiment strength
+- Identify both explicit and implied sentiments
+- Respond only with valid JSON, no additional text"""
+
+    return dict(
+        model="gpt-4o",  # the newest OpenAI model is "gpt-4o" which was released May 13, 2024. do not change this unless explicitly requested by the user
+        messages=[
+            {
+                "role": "system",
+                "content": "You are an expert text analyst. Always respond with valid JSON only."
+            },
+            {
+                "role": "user", 
+                "content": prompt
+            }
+        ],
+        response_format={"type": "json_object"},
+        temperature=0.3,
+        max_tokens=1000
+    )
+
+def validate_analysis(ai_response):
+    """Parse the model's JSON and clamp it to the fields the UI expects"""
+    analysis_result = json.loads(ai_response)
+    return {
+        'sentiment': analysis_result.get('sentiment', 'neutral'),
+        'confidence': min(100, max(0, analysis_result.get('confidence', 0))),
+        'emotions': analysis_result.get('emotions', []),
+        'topics': analysis_result.get('topics', []),
+        'key_phrases': analysis_result.get('key_phrases', []),
+        'summary': analysis_result.get('summary', 'لا يوجد ملخص متاح')
+    }
 
 @app.route('/api/analyze-text', methods=['POST'])
 def analyze_text():
@@ -54,60 +113,11 @@ def analyze_text():
                 'error': 'النص فارغ'
             }), 400
         
-        # Create AI analysis prompt
-        prompt = f"""You are an expert Arabic text analyst specializing in customer feedback analysis. Analyze the following customer text and provide a structured response.
-
-Text to analyze: "{text_to_analyze}"
-
-Please provide your analysis in the following JSON format:
-
-{{
-  "sentiment": "positive" | "negative" | "neutral",
-  "confidence": <number between 0-100>,
-  "emotions": ["joy", "frustration", "satisfaction", "disappointment", etc.],
-  "topics": ["product_quality", "customer_service", "pricing", "delivery", etc.],
-  "key_phrases": ["<important phrases from the text>"],
-  "summary": "<brief Arabic summary of the main feedback points>"
-}}
-
-Guidelines:
-- Focus on clear sentiment identification
-- Extract business-relevant topics
-- Provide confidence based on text clarity and sentiment strength
-- Identify both explicit and implied sentiments
-- Respond only with valid JSON, no additional text"""
-
         # Call OpenAI API
-        response = openai_client.chat.completions.create(
-            model="gpt-4o",  # the newest OpenAI model is "gpt-4o" which was released May 13, 2024. do not change this unless explicitly requested by the user
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are an expert text analyst. Always respond with valid JSON only."
-                },
-                {
-                    "role": "user", 
-                    "content": prompt
-                }
-            ],
-            response_format={"type": "json_object"},
-            temperature=0.3,
-            max_tokens=1000
-        )
-        
-        # Parse AI response
-        ai_response = response.choices[0].message.content
-        analysis_result = json.loads(ai_response)
+        response = _get_openai_client().chat.completions.create(**analysis_completion_options(text_to_analyze))
         
-        # Validate and clean the response
-        validated_result = {
-            'sentiment': analysis_result.get('sentiment', 'neutral'),
-            'confidence': min(100, max(0, analysis_result.get('confidence', 0))),
-            'emotions': analysis_result.get('emotions', []),
-            'topics': analysis_result.get('topics', []),
-            'key_phrases': analysis_result.get('key_phrases', []),
-            'summary': analysis_result.get('summary', 'لا يوجد ملخص متاح')
-        }
+        # Parse, validate and clean the AI response
+        validated_result = validate_analysis(response.choices[0].message.content)
         
         logger.info(f"Successfully analyzed text with sentiment: {validated_result['sentiment']}")
         
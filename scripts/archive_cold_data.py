@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Cold data archival
+Moves feedback and survey responses older than the retention window into the cold archive
+"""
+
+import argparse
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app import app, db
+from utils.cold_archive import cold_archive
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Archive old feedback and survey responses")
+    parser.add_argument('--older-than-days', type=int, default=app.config.get('ARCHIVE_AFTER_DAYS', 365),
+                        help="Archive whole months older than this many days")
+    parser.add_argument('--table', action='append', choices=['feedback', 'responses_flask'],
+                        help="Tables to archive (repeatable, default: both)")
+    parser.add_argument('--status', action='store_true', help="Show the manifest and exit")
+    args = parser.parse_args()
+
+    if not cold_archive.enabled:
+        print("ARCHIVE_DIR is not configured")
+        return 1
+
+    if args.status:
+        for table in ('feedback', 'responses_flask', 'question_responses_flask'):
+            chunks = cold_archive.chunks(table)
+            watermark = cold_archive.watermark(table)
+            print(f"{table}: {sum(c.rows for c in chunks)} rows in {len(chunks)} chunks, "
+                  f"archived before {watermark or 'nothing archived'}")
+        return 0
+
+    cutoff = datetime.utcnow() - timedelta(days=args.older_than_days)
+    with app.app_context():
+        moved = cold_archive.archive_before(db.engine, cutoff, tables=args.table or ('feedback', 'responses_flask'))
+    for table, count in moved.items():
+        print(f"{table}: archived {count} rows ({cold_archive.file_format})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Keyword index backfill
+Rebuilds the per-day keyword postings behind trending topics from stored text answers
+"""
+
+import argparse
+import sys
+from datetime import date
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app import app, db
+from utils.keyword_index import rebuild_keyword_index
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Rebuild keyword postings for trending topics")
+    parser.add_argument('--start', type=date.fromisoformat, help="First day to rebuild (YYYY-MM-DD, default: all)")
+    parser.add_argument('--end', type=date.fromisoformat, help="Last day to rebuild (YYYY-MM-DD, default: all)")
+    parser.add_argument('--batch-size', type=int, default=5000, help="Answers read per batch")
+    args = parser.parse_args()
+
+    with app.app_context():
+        indexed = rebuild_keyword_index(start_day=args.start, end_day=args.end, batch_size=args.batch_size)
+        db.session.commit()
+    print(f"Indexed {indexed} text answers")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
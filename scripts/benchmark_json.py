@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+JSON serialization benchmark
+Compares Flask's default encoder with the orjson provider on representative API payloads
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from models_unified import FeedbackChannel, FeedbackStatus
+from utils.json_provider import ORJSON_AVAILABLE, FastJSONProvider
+
+ANSWERS = (
+    'الخدمة ممتازة والموظفون متعاونون جداً',
+    'التوصيل تأخر ثلاثة أيام ولم يتواصل معي أحد',
+    'السعر مناسب لكن جودة المنتج تحتاج إلى تحسين',
+    'تجربة رائعة، سأوصي أصدقائي بالتطبيق',
+)
+EMOTIONS = ('joy', 'anger', 'trust', 'sadness', 'surprise')
+
+
+def insights_feed(rows: int, rng: random.Random):
+    """/api/analytics/insights-feed: Arabic answers with datetimes"""
+    now = datetime.utcnow()
+    return {'success': True, 'data': [{
+        'id': i, 'survey_id': rng.randint(1, 20), 'survey_title': 'استبيان رضا العملاء',
+        'question_text': 'ما رأيك في الخدمة؟', 'response_text': rng.choice(ANSWERS),
+        'sentiment': rng.choice(('positive', 'neutral', 'negative')), 'sentiment_score': rng.uniform(-1, 1),
+        'confidence_score': rng.random(), 'keywords': ['الخدمة', 'التوصيل', 'السعر'][:rng.randint(1, 3)],
+        'respondent_name': 'مجهول', 'device_type': 'mobile', 'language_used': 'ar',
+        'created_at': now - timedelta(minutes=i), 'time_ago': 'منذ دقائق',
+    } for i in range(rows)]}
+
+
+def historical_analysis(rows: int, rng: random.Random):
+    """/api/enhanced-analytics/historical-analysis: nested per-response analysis"""
+    now = datetime.utcnow()
+    return {'success': True, 'data': {
+        'total_responses': rows,
+        'analyzed_responses': [{
+            'response_id': i, 'created_at': now - timedelta(hours=i), 'text': rng.choice(ANSWERS),
+            'emotions': {emotion: round(rng.random(), 3) for emotion in EMOTIONS},
+            'topics': [{'topic': 'التوصيل', 'confidence': rng.random()}, {'topic': 'الأسعار', 'confidence': rng.random()}],
+            'sentiment': {'score': rng.uniform(-1, 1), 'label': 'إيجابي', 'confidence': rng.random()},
+        } for i in range(rows)],
+        'summary': {'emotion_distribution': {emotion: rng.randint(0, rows) for emotion in EMOTIONS}},
+    }}
+
+
+def feedback_list(rows: int, rng: random.Random):
+    """/feedback listing: enums and datetimes straight from the model"""
+    now = datetime.utcnow()
+    return {'feedback': [{
+        'id': i, 'content': rng.choice(ANSWERS), 'channel': rng.choice(list(FeedbackChannel)),
+        'status': rng.choice(list(FeedbackStatus)), 'rating': rng.randint(1, 5),
+        'sentiment_score': rng.uniform(-1, 1), 'created_at': now - timedelta(minutes=i),
+    } for i in range(rows)], 'total': rows, 'pages': 1, 'current_page': 1}
+
+
+def trend_series(rows: int, rng: random.Random):
+    """/api/executive-dashboard/trends: numeric series with datetime buckets"""
+    start = datetime.utcnow() - timedelta(hours=rows)
+    return {'granularity': 'hour', 'days': rows // 24, 'series': [{
+        'bucket': start + timedelta(hours=i), 'volume': rng.randint(0, 500), 'sentiment': rng.uniform(-1, 1),
+        'csat': rng.uniform(1, 5), 'resolution_rate': rng.random(),
+    } for i in range(rows)]}
+
+
+PAYLOADS = {
+    'insights-feed': insights_feed,
+    'historical-analysis': historical_analysis,
+    'feedback-list': feedback_list,
+    'trend-series': trend_series,
+}
+
+
+def throughput(serialize, payload, min_seconds: float):
+    """Serializations per second and output size"""
+    size = len(serialize(payload))
+    iterations, started = 0, time.perf_counter()
+    while True:
+        serialize(payload)
+        iterations += 1
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_seconds:
+            return iterations / elapsed, size
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Compare Flask's default JSON encoder with the orjson provider")
+    parser.add_argument('--rows', type=int, default=500, help="Rows per payload")
+    parser.add_argument('--seconds', type=float, default=1.0, help="Minimum timing per measurement")
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    stdlib = DefaultJSONProvider(app)
+    fast = FastJSONProvider(app)
+    encoders = {
+        # What jsonify did before: stdlib, sorted keys, ASCII escapes
+        'flask default': lambda payload: stdlib.response(payload).get_data(),
+        'provider': lambda payload: fast.response(payload).get_data(),
+    }
+
+    results = []
+    for name, build in PAYLOADS.items():
+        payload = build(args.rows, random.Random(7))
+        row = {'payload': name}
+        for encoder, serialize in encoders.items():
+            rate, size = throughput(serialize, payload, args.seconds)
+            row[encoder] = {'per_second': round(rate, 1), 'bytes': size}
+        row['speedup'] = round(row['provider']['per_second'] / row['flask default']['per_second'], 1)
+        results.append(row)
+
+    if args.json:
+        print(json.dumps({'orjson': ORJSON_AVAILABLE, 'rows': args.rows, 'results': results}, indent=2))
+        return
+    print(f"{args.rows} rows per payload, provider backend: {'orjson' if ORJSON_AVAILABLE else 'stdlib'}")
+    print(f"{'payload':>20}  {'default/s':>9}  {'provider/s':>10}  {'speedup':>7}  {'default KB':>10}  {'provider KB':>11}")
+    for row in results:
+        print(f"{row['payload']:>20}  {row['flask default']['per_second']:9.0f}  {row['provider']['per_second']:10.0f}  "
+              f"{row['speedup']:6.1f}x  {row['flask default']['bytes'] / 1024:10.1f}  "
+              f"{row['provider']['bytes'] / 1024:11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Full-text search latency benchmark
+Loads a synthetic Arabic feedback corpus and reports p50/p95 for first pages and keyset follow-ups
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from flask import Flask
+from sqlalchemy import insert
+
+from app import db
+from models_unified import Feedback, FeedbackChannel, FeedbackStatus
+from utils.arabic_search import build_search_document
+from utils.text_search import create_search_index, search
+
+VOCABULARY = [
+    'الخدمة', 'ممتازة', 'التوصيل', 'متأخر', 'الموظفين', 'لطيفين', 'الأسعار', 'مرتفعة', 'التطبيق', 'بطيء',
+    'الدفع', 'سهل', 'الطلب', 'وصل', 'ناقص', 'الجودة', 'عالية', 'المنتج', 'جديد', 'العملاء', 'الفرع',
+    'مزدحم', 'الانتظار', 'طويل', 'الموقع', 'واضح', 'الاسترجاع', 'صعب', 'العرض', 'رائع', 'شكرا', 'جدا',
+]
+# Zipf-like word frequencies, so common and rare query terms both occur
+WEIGHTS = [1 / (rank + 1) for rank in range(len(VOCABULARY))]
+QUERIES = ['التوصيل متأخر', 'الأسعار', 'خدمة ممتازة', 'تطبيق بطيء الدفع', 'الاسترجاع صعب', 'الفرع']
+CHANNELS = list(FeedbackChannel)
+
+
+def load_corpus(rows: int, batch_size: int = 20000, seed: int = 11):
+    """Insert rows synthetic feedback documents with their search text"""
+    rng = random.Random(seed)
+    start = datetime.utcnow() - timedelta(days=365)
+    for offset in range(0, rows, batch_size):
+        batch = []
+        for i in range(offset, min(offset + batch_size, rows)):
+            content = ' '.join(rng.choices(VOCABULARY, weights=WEIGHTS, k=rng.randint(4, 30)))
+            batch.append({
+                'content': content, 'search_text': build_search_document(content),
+                'channel': rng.choice(CHANNELS), 'status': FeedbackStatus.PROCESSED,
+                'created_at': start + timedelta(seconds=i * 31536000 // rows),
+            })
+        db.session.execute(insert(Feedback), batch)
+        db.session.commit()
+
+
+def percentile(timings, fraction):
+    return sorted(timings)[max(0, int(len(timings) * fraction) - 1)] * 1000
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Benchmark full-text search latency")
+    parser.add_argument('--database-url', help="SQLAlchemy URL (default: temporary SQLite file)")
+    parser.add_argument('--rows', type=int, default=200000, help="Corpus size, e.g. 5000000 for the target")
+    parser.add_argument('--repeat', type=int, default=20, help="Runs per query")
+    parser.add_argument('--skip-load', action='store_true', help="Reuse the corpus already in --database-url")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='search-bench-')
+    database_url = args.database_url or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    bench_app = Flask(__name__)
+    bench_app.config['SQLALCHEMY_DATABASE_URI'] = database_url
+    db.init_app(bench_app)
+
+    with bench_app.app_context():
+        if not args.skip_load:
+            Feedback.__table__.drop(db.engine, checkfirst=True)
+            Feedback.__table__.create(db.engine)
+            started = time.monotonic()
+            load_corpus(args.rows)
+            with db.engine.begin() as conn:
+                create_search_index(conn, 'feedback')
+            print(f"Loaded and indexed {args.rows} rows in {time.monotonic() - started:.1f}s")
+
+        print(f"Database: {database_url.split('@')[-1]}")
+        for query in QUERIES:
+            first, follow = [], []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                page = search(query, limit=20)
+                first.append(time.perf_counter() - started)
+                if page['next_cursor']:
+                    started = time.perf_counter()
+                    search(query, limit=20, cursor=page['next_cursor'])
+                    follow.append(time.perf_counter() - started)
+            line = f"{query:>20}: first page p50 {percentile(first, 0.5):7.1f} ms  p95 {percentile(first, 0.95):7.1f} ms"
+            if follow:
+                line += f"  | next page p95 {percentile(follow, 0.95):7.1f} ms"
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark
+Imports the app in fresh interpreters and reports wall time, resident memory and the slowest imports
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+
+# Heavy optional stacks that must only be imported by the feature that uses them
+DEFERRED_MODULES = ('openai', 'reportlab', 'xlsxwriter', 'langchain', 'pandas', 'matplotlib')
+
+# Runs inside the child interpreter; prints one JSON line after the import
+PROBE = """
+import json, resource, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+try:
+    import psutil
+    rss = psutil.Process().memory_info().rss
+except ImportError:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+print('STARTUP ' + json.dumps({{
+    'seconds': elapsed,
+    'rss_bytes': rss,
+    'loaded': sorted(name for name in {deferred!r} if name in sys.modules),
+}}))
+"""
+
+_IMPORTTIME = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+def child_env(database_url: str) -> dict:
+    """Environment of a fresh worker: no schema work, no background services"""
+    env = dict(os.environ)
+    env.update({
+        'DATABASE_URL': database_url,
+        'AUTO_CREATE_SCHEMA': 'false',
+        'PYTHONDONTWRITEBYTECODE': '1',
+    })
+    env.pop('PYTHONPROFILEIMPORTTIME', None)
+    return env
+
+
+def measure(module: str = 'main', database_url: str = None, importtime: bool = False) -> dict:
+    """Import module in a new interpreter; with importtime, also parse -X importtime output"""
+    if database_url is None:
+        database_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='startup-bench-'), 'bench.db')}"
+    command = [sys.executable]
+    if importtime:
+        command += ['-X', 'importtime']
+    command += ['-c', PROBE.format(module=module, deferred=DEFERRED_MODULES)]
+
+    result = subprocess.run(command, cwd=str(project_root), env=child_env(database_url),
+                            capture_output=True, text=True, timeout=300)
+    summary = next((line[len('STARTUP '):] for line in result.stdout.splitlines()
+                    if line.startswith('STARTUP ')), None)
+    if result.returncode != 0 or summary is None:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    measurement = json.loads(summary)
+    if importtime:
+        measurement['imports'] = parse_importtime(result.stderr)
+    return measurement
+
+
+def parse_importtime(output: str) -> list:
+    """(module, self_us, cumulative_us, depth) for each line of -X importtime output"""
+    imports = []
+    for line in output.splitlines():
+        match = _IMPORTTIME.match(line)
+        if match:
+            imports.append((match.group(4), int(match.group(1)), int(match.group(2)),
+                            (len(match.group(3)) - 1) // 2))
+    return imports
+
+
+def top_packages(imports: list, limit: int) -> list:
+    """Top-level packages by cumulative import time"""
+    packages = {}
+    for name, _, cumulative, _ in imports:
+        package = name.split('.')[0]
+        packages[package] = max(packages.get(package, 0), cumulative)
+    return sorted(packages.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Benchmark application cold start")
+    parser.add_argument('--module', default='main', help="Module a worker imports (default: main)")
+    parser.add_argument('--database-url', help="SQLAlchemy URL (default: temporary SQLite file)")
+    parser.add_argument('--runs', type=int, default=5, help="Fresh interpreters to start")
+    parser.add_argument('--top', type=int, default=20, help="Slowest imports to list")
+    parser.add_argument('--json', action='store_true', help="Print the raw measurements as JSON")
+    args = parser.parse_args()
+
+    # Timed runs without the importtime hook, which adds its own overhead
+    runs = [measure(args.module, args.database_url) for _ in range(args.runs)]
+    traced = measure(args.module, args.database_url, importtime=True)
+
+    seconds = sorted(run['seconds'] for run in runs)
+    rss = sorted(run['rss_bytes'] for run in runs)
+    if args.json:
+        print(json.dumps({'runs': runs, 'imports': traced['imports']}, indent=2))
+        return
+
+    print(f"Cold start of '{args.module}' over {args.runs} runs")
+    print(f"  import time: min {seconds[0] * 1000:7.1f} ms  median {seconds[len(seconds) // 2] * 1000:7.1f} ms  "
+          f"max {seconds[-1] * 1000:7.1f} ms")
+    print(f"  RSS per worker: median {rss[len(rss) // 2] / 2 ** 20:6.1f} MiB  max {rss[-1] / 2 ** 20:6.1f} MiB")
+    loaded = sorted({name for run in runs for name in run['loaded']})
+    print(f"  deferred modules loaded at startup: {', '.join(loaded) if loaded else 'none'}")
+
+    print("\nSlowest packages (cumulative, -X importtime):")
+    for package, cumulative in top_packages(traced['imports'], args.top):
+        print(f"  {cumulative / 1000:8.1f} ms  {package}")
+
+    print("\nSlowest modules (self time):")
+    for name, self_us, cumulative, _ in sorted(traced['imports'], key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"  {self_us / 1000:8.1f} ms  {name}  (cumulative {cumulative / 1000:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Survey submission load benchmark
+Compares sustained submits per second for the direct write path and the group-commit buffer
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from flask import Flask
+
+from app import db
+from models.survey_flask import (
+    SurveyFlask, QuestionFlask, ResponseFlask, QuestionResponseFlask, KeywordPostingFlask, KeywordDayFlask,
+    KeywordFormFlask
+)
+from utils.submission_buffer import BufferedSubmission, BufferFull, DurabilityMode, SubmissionWriteBuffer
+from utils.survey_submission import load_survey_for_submission, prepare_answers, store_submission
+
+QUESTION_TYPES = ['text', 'rating', 'multiple_choice', 'nps', 'textarea']
+SAMPLE_ANSWERS = {'text': 'الخدمة ممتازة', 'textarea': 'التسليم متأخر', 'rating': '4',
+                  'nps': '9', 'multiple_choice': 'option_a'}
+
+
+def create_benchmark_app(database_url: str) -> Flask:
+    """Standalone app with a fresh survey schema and one published survey"""
+    bench_app = Flask(__name__)
+    bench_app.config['SQLALCHEMY_DATABASE_URI'] = database_url
+    if database_url.startswith('sqlite'):
+        bench_app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'connect_args': {'timeout': 30}}
+    db.init_app(bench_app)
+
+    tables = [m.__table__ for m in (SurveyFlask, QuestionFlask, ResponseFlask, QuestionResponseFlask,
+                                    KeywordPostingFlask, KeywordDayFlask, KeywordFormFlask)]
+    with bench_app.app_context():
+        db.metadata.drop_all(db.engine, tables=tables)
+        db.metadata.create_all(db.engine, tables=tables)
+        survey = SurveyFlask(uuid='benchmark-survey', title='Benchmark', status='published', created_by='benchmark')
+        survey.questions = [
+            QuestionFlask(text=f'Q{i}', type=QUESTION_TYPES[i % 5], order_index=i) for i in range(10)
+        ]
+        db.session.add(survey)
+        db.session.commit()
+    return bench_app
+
+
+def run_load(bench_app, submit, clients: int, seconds: float) -> int:
+    """Drive submit() from concurrent clients for a fixed time, returns completed submits"""
+    completed = [0] * clients
+    deadline = time.monotonic() + seconds
+
+    def client(index):
+        with bench_app.app_context():
+            while time.monotonic() < deadline:
+                submit()
+                completed[index] += 1
+            db.session.remove()
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(completed)
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Benchmark survey submission throughput")
+    parser.add_argument('--database-url', help="SQLAlchemy URL (default: temporary SQLite file)")
+    parser.add_argument('--clients', type=int, default=16, help="Concurrent submitting clients")
+    parser.add_argument('--seconds', type=float, default=5.0, help="Duration of each run")
+    parser.add_argument('--durability', action='append', choices=[DurabilityMode.MEMORY, DurabilityMode.JOURNAL,
+                                                                  DurabilityMode.COMMIT],
+                        help="Buffer durability modes to compare (repeatable, default: all)")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='submission-bench-')
+    database_url = args.database_url or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    bench_app = create_benchmark_app(database_url)
+
+    with bench_app.app_context():
+        survey = load_survey_for_submission('benchmark-survey')
+        survey_id = survey.id
+        form_data = {f'question_{q.id}': SAMPLE_ANSWERS[q.type] for q in survey.questions}
+        questions = list(survey.questions)
+
+    def response_fields():
+        return dict(answers='{}', language_used='ar', is_complete=True, completion_percentage=100.0)
+
+    def direct_submit():
+        store_submission(survey_id, response_fields(), prepare_answers(questions, form_data))
+
+    print(f"Database: {database_url.split('@')[-1]}  clients={args.clients}  duration={args.seconds}s")
+
+    total = run_load(bench_app, direct_submit, args.clients, args.seconds)
+    baseline = total / args.seconds
+    print(f"{'direct':>10}: {baseline:8.0f} submits/s")
+
+    for mode in args.durability or [DurabilityMode.MEMORY, DurabilityMode.JOURNAL, DurabilityMode.COMMIT]:
+        buffer = SubmissionWriteBuffer(
+            durability=mode, analyze=False,
+            journal_path=os.path.join(workdir, f'journal-{mode}.jsonl')
+        )
+        buffer.start(bench_app)
+
+        fallbacks = [0]
+
+        def buffered_submit():
+            prepared = prepare_answers(questions, form_data)
+            try:
+                buffer.submit(BufferedSubmission.build(survey_id, response_fields(), prepared))
+            except BufferFull:
+                # Same fallback as the submit route
+                fallbacks[0] += 1
+                store_submission(survey_id, response_fields(), prepared)
+
+        started = time.monotonic()
+        run_load(bench_app, buffered_submit, args.clients, args.seconds)
+        buffer.stop(timeout=60)
+        elapsed = time.monotonic() - started
+        rate = (buffer.stats['written'] + fallbacks[0]) / elapsed
+        print(f"{mode:>10}: {rate:8.0f} submits/s written ({rate / baseline:.1f}x), "
+              f"{buffer.stats['batches']} batches, {fallbacks[0]} direct fallbacks")
+
+
+if __name__ == "__main__":
+    main()
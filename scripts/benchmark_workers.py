@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Worker memory benchmark
+Starts gunicorn with and without the preload profile and reports RSS, USS and PSS per worker
+"""
+
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+import psutil
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from scripts.benchmark_startup import child_env
+
+PROFILES = {
+    # What Dockerfile.prod ran before: every worker imports and warms the app itself
+    'per-worker import': ['main:app'],
+    'preload + gc.freeze': ['-c', 'deployment/gunicorn_conf.py'],
+}
+WARM_PATHS = ('/', '/health', '/surveys', '/analytics/dashboard', '/feedback')
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_workers(master: psutil.Process, workers: int, port: int, deadline: float):
+    while time.monotonic() < deadline:
+        try:
+            if len(master.children()) >= workers:
+                urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=5).read()
+                return
+        except Exception:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("gunicorn did not become ready")
+
+
+def measure(profile: str, workers: int, requests: int, database_url: str) -> dict:
+    """Per-worker memory after each worker served its share of warm-up requests"""
+    port = free_port()
+    command = [sys.executable, '-m', 'gunicorn', *PROFILES[profile], '--bind', f"127.0.0.1:{port}",
+               '--workers', str(workers), '--log-level', 'warning']
+    env = child_env(database_url)
+    env['METRICS_MULTIPROC_DIR'] = tempfile.mkdtemp(prefix='worker-bench-metrics-')
+    # Request logs would fill an undrained pipe and block the workers
+    server = subprocess.Popen(command, cwd=str(project_root), env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        master = psutil.Process(server.pid)
+        wait_for_workers(master, workers, port, time.monotonic() + 120)
+        for _ in range(requests):
+            for path in WARM_PATHS:
+                try:
+                    urllib.request.urlopen(f"http://127.0.0.1:{port}{path}", timeout=30).read()
+                except Exception:
+                    pass
+        time.sleep(1)
+        samples = [child.memory_full_info() for child in master.children()]
+        return {
+            'rss': sum(sample.rss for sample in samples) / len(samples),
+            'uss': sum(sample.uss for sample in samples) / len(samples),
+            'pss': sum(sample.pss for sample in samples) / len(samples),
+            'master_rss': master.memory_info().rss,
+        }
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Compare gunicorn worker memory with and without preload")
+    parser.add_argument('--workers', type=int, default=3, help="Workers per server")
+    parser.add_argument('--requests', type=int, default=20, help="Warm-up rounds over the sample pages")
+    parser.add_argument('--database-url', help="SQLAlchemy URL (default: temporary SQLite file)")
+    args = parser.parse_args()
+
+    database_url = args.database_url
+    if database_url is None:
+        database_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='worker-bench-'), 'bench.db')}"
+        subprocess.run([sys.executable, '-m', 'flask', '--app', 'app', 'init-db'], cwd=str(project_root),
+                       env=child_env(database_url), capture_output=True, check=True)
+
+    mib = 2 ** 20
+    print(f"{'profile':>22}  {'RSS/worker':>10}  {'USS/worker':>10}  {'PSS/worker':>10}  {'master RSS':>10}")
+    for profile in PROFILES:
+        result = measure(profile, args.workers, args.requests, database_url)
+        print(f"{profile:>22}  {result['rss'] / mib:8.1f}Mi  {result['uss'] / mib:8.1f}Mi  "
+              f"{result['pss'] / mib:8.1f}Mi  {result['master_rss'] / mib:8.1f}Mi")
+    print("USS is memory private to one worker; PSS splits shared pages across the processes using them.")
+
+
+if __name__ == "__main__":
+    main()
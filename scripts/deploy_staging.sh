@@ -25,12 +25,8 @@ print('Staging configuration valid')
 
 # Database migration
 echo "Running database migrations..."
-python -c "
-from app import app, db
-with app.app_context():
-    db.create_all()
-    print('Staging database migrated')
-"
+flask --app app init-db
+echo "Staging database migrated"
 
 # Run staging server
 echo "Starting staging server..."
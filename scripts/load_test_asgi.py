@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Sync vs ASGI load test
+Drives /api/analyze-text against a stub OpenAI upstream with fixed latency under sync gunicorn and under uvicorn
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import httpx
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from scripts.benchmark_startup import child_env
+from scripts.benchmark_workers import free_port
+
+COMPLETION = {
+    'id': 'chatcmpl-load', 'object': 'chat.completion', 'created': 0, 'model': 'gpt-4o',
+    'choices': [{'index': 0, 'finish_reason': 'stop', 'message': {'role': 'assistant', 'content': json.dumps({
+        'sentiment': 'positive', 'confidence': 90, 'emotions': [], 'topics': [], 'key_phrases': [],
+        'summary': 'ملخص'})}}],
+    'usage': {'prompt_tokens': 1, 'completion_tokens': 1, 'total_tokens': 2},
+}
+
+
+def start_stub_upstream(delay: float) -> ThreadingHTTPServer:
+    """OpenAI-compatible chat completions endpoint that answers after delay seconds"""
+    body = json.dumps(COMPLETION).encode('utf-8')
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            time.sleep(delay)
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    class Server(ThreadingHTTPServer):
+        # The default backlog of 5 drops connections long before the servers under test saturate
+        request_queue_size = 1024
+        daemon_threads = True
+
+    server = Server(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def server_command(mode: str, port: int, workers: int):
+    if mode == 'sync':
+        return [sys.executable, '-m', 'gunicorn', 'main:app', '--bind', f"127.0.0.1:{port}",
+                '--workers', str(workers), '--log-level', 'warning']
+    return [sys.executable, '-m', 'uvicorn', 'asgi:app', '--host', '127.0.0.1', '--port', str(port),
+            '--workers', str(workers), '--log-level', 'warning']
+
+
+async def drive(port: int, total: int, concurrency: int):
+    """Latencies of total requests issued concurrency at a time, plus the wall time"""
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, failures = [], 0
+
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=120) as client:
+        async def one():
+            nonlocal failures
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post('/api/analyze-text', json={'text': 'الخدمة ممتازة'})
+                if response.status_code == 200:
+                    latencies.append(time.perf_counter() - started)
+                else:
+                    failures += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        return latencies, failures, time.perf_counter() - started
+
+
+def wait_until_up(port: int, server: subprocess.Popen):
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"server exited with {server.returncode}")
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/health", timeout=2)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.3)
+    raise RuntimeError("server did not start")
+
+
+def run(mode: str, args, database_url: str, upstream: str) -> dict:
+    port = free_port()
+    env = child_env(database_url)
+    env.update({'OPENAI_BASE_URL': upstream, 'OPENAI_API_KEY': 'load-test', 'METRICS_MULTIPROC_DIR': ''})
+    # Logs go to a file: an undrained pipe would block the server once it fills
+    log = tempfile.NamedTemporaryFile(prefix=f'asgi-load-{mode}-', suffix='.log', delete=False)
+    server = subprocess.Popen(server_command(mode, port, args.workers), cwd=str(project_root), env=env,
+                              stdout=log, stderr=subprocess.STDOUT)
+    try:
+        wait_until_up(port, server)
+        latencies, failures, elapsed = asyncio.run(drive(port, args.requests, args.concurrency))
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+        log.close()
+    latencies.sort()
+    throughput = len(latencies) / elapsed
+    return {
+        'throughput': throughput,
+        'p50': latencies[len(latencies) // 2] if latencies else 0,
+        'p95': latencies[int(len(latencies) * 0.95) - 1] if latencies else 0,
+        'failures': failures,
+        # Requests in flight on average: how many upstream waits the deployment overlaps
+        'concurrency': throughput * args.upstream_ms / 1000,
+    }
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Compare sync gunicorn and ASGI concurrency on LLM-bound requests")
+    parser.add_argument('--workers', type=int, default=2, help="Processes per server")
+    parser.add_argument('--concurrency', type=int, default=50, help="Requests in flight from the client")
+    parser.add_argument('--requests', type=int, default=200, help="Requests per run")
+    parser.add_argument('--upstream-ms', type=int, default=500, help="Stub OpenAI latency")
+    parser.add_argument('--modes', default='sync,asgi', help="Comma-separated: sync, asgi")
+    args = parser.parse_args()
+
+    upstream = start_stub_upstream(args.upstream_ms / 1000)
+    upstream_url = f"http://127.0.0.1:{upstream.server_address[1]}/v1"
+    database_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='asgi-load-'), 'load.db')}"
+    subprocess.run([sys.executable, '-m', 'flask', '--app', 'app', 'init-db'], cwd=str(project_root),
+                   env=child_env(database_url), capture_output=True, check=True)
+
+    print(f"{args.requests} requests, {args.concurrency} in flight, {args.workers} workers, "
+          f"upstream {args.upstream_ms} ms")
+    print(f"{'mode':>6}  {'req/s':>7}  {'p50 ms':>8}  {'p95 ms':>8}  {'in flight':>9}  {'failed':>6}")
+    for mode in args.modes.split(','):
+        result = run(mode, args, database_url, upstream_url)
+        print(f"{mode:>6}  {result['throughput']:7.1f}  {result['p50'] * 1000:8.0f}  {result['p95'] * 1000:8.0f}  "
+              f"{result['concurrency']:9.1f}  {result['failures']:6d}")
+    upstream.shutdown()
+
+
+if __name__ == "__main__":
+    main()
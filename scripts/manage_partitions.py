@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Partition management for feedback and responses_flask
+Convert existing tables, create upcoming partitions, apply retention, and show status
+"""
+
+import argparse
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app import app, db
+from utils.partitioning import (
+    PARTITIONED_TABLES, add_months, convert_to_partitioned, detach_partitions_before,
+    is_partitioned, list_partitions, maintain_partitions
+)
+
+
+def show_status():
+    with db.engine.connect() as conn:
+        for table in PARTITIONED_TABLES:
+            if not is_partitioned(conn, table):
+                print(f"{table}: not partitioned")
+                continue
+            partitions = list_partitions(conn, table)
+            print(f"{table}: {len(partitions)} partitions")
+            for partition in partitions:
+                bounds = 'DEFAULT' if partition.is_default else f"{partition.lower:%Y-%m-%d} .. {partition.upper:%Y-%m-%d}"
+                print(f"  {partition.name:40} {bounds}")
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Manage monthly created_at partitions (PostgreSQL)")
+    parser.add_argument('command', choices=['status', 'convert', 'maintain', 'detach'])
+    parser.add_argument('--table', choices=list(PARTITIONED_TABLES), help="Limit to one table")
+    parser.add_argument('--months-ahead', type=int, default=app.config.get('PARTITION_MONTHS_AHEAD', 3))
+    parser.add_argument('--retention-months', type=int, default=app.config.get('PARTITION_RETENTION_MONTHS', 0))
+    parser.add_argument('--drop', action='store_true', help="Drop detached partitions instead of keeping them")
+    args = parser.parse_args()
+
+    with app.app_context():
+        if db.engine.dialect.name != 'postgresql':
+            print(f"Partitioning requires PostgreSQL (current database: {db.engine.dialect.name})")
+            return 1
+
+        tables = [args.table] if args.table else list(PARTITIONED_TABLES)
+        if args.command == 'convert':
+            # Rewrites the table; run during a maintenance window
+            with db.engine.begin() as conn:
+                for table in tables:
+                    created = convert_to_partitioned(conn, table, args.months_ahead)
+                    print(f"{table}: {len(created)} partitions" if created else f"{table}: already partitioned")
+        elif args.command == 'maintain':
+            report = maintain_partitions(db.engine, args.months_ahead, args.retention_months, args.drop)
+            for table, entry in report.items():
+                print(f"{table}: created {entry['created'] or 'none'}, detached {entry['detached'] or 'none'}")
+        elif args.command == 'detach':
+            if not args.retention_months:
+                print("--retention-months is required for detach")
+                return 1
+            cutoff = add_months(datetime.utcnow(), -args.retention_months)
+            with db.engine.begin() as conn:
+                for table in tables:
+                    detached = detach_partitions_before(conn, table, cutoff, drop=args.drop)
+                    print(f"{table}: {'dropped' if args.drop else 'detached'} {detached or 'none'}")
+        else:
+            show_status()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Replay stored WhatsApp/SMS webhook events
+Resets queued provider callbacks to pending and runs them through the batch consumer
+"""
+
+import argparse
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app import app
+from models.webhook_events import WebhookEventStatus
+from utils.webhook_ingestion import replay_events, webhook_queue
+
+ALL_STATUSES = [
+    WebhookEventStatus.PENDING,
+    WebhookEventStatus.APPLIED,
+    WebhookEventStatus.ORPHANED,
+    WebhookEventStatus.FAILED,
+]
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Replay stored webhook events")
+    parser.add_argument('--status', action='append', choices=ALL_STATUSES,
+                        help="Event status to replay (repeatable, default: failed and orphaned)")
+    parser.add_argument('--provider', choices=['whatsapp', 'sms'], help="Only replay one provider")
+    parser.add_argument('--since', help="Only replay events received after this ISO date")
+    parser.add_argument('--id', type=int, action='append', dest='event_ids', help="Replay specific event IDs")
+    parser.add_argument('--dry-run', action='store_true', help="Count matching events without replaying")
+    args = parser.parse_args()
+
+    statuses = args.status or [WebhookEventStatus.FAILED, WebhookEventStatus.ORPHANED]
+    since = datetime.fromisoformat(args.since) if args.since else None
+
+    with app.app_context():
+        result = replay_events(
+            statuses=statuses,
+            provider=args.provider,
+            since=since,
+            event_ids=args.event_ids,
+            dry_run=args.dry_run
+        )
+        print(f"Matched events: {result['matched']}")
+        if not args.dry_run:
+            print(f"Processed events: {result['processed']}")
+            print(f"Queue depth: {webhook_queue.metrics()['queue_depth']}")
+
+
+if __name__ == '__main__':
+    main()
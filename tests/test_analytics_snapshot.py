@@ -0,0 +1,209 @@
+"""
+Tests for the columnar analytics snapshot: results must match the database path
+"""
+
+import random
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Flask
+from sqlalchemy import delete, func, insert, update
+
+pytest.importorskip('numpy')
+
+from app import db
+from models_unified import Feedback, FeedbackChannel, FeedbackStatus
+from models.survey_flask import SurveyFlask, QuestionFlask, ResponseFlask, QuestionResponseFlask
+from utils import cold_archive as archive_module
+from utils.analytics_snapshot import analytics_snapshot
+
+ROWS = 3000
+
+
+@pytest.fixture
+def snapshot_app(tmp_path, monkeypatch):
+    test_app = Flask(__name__)
+    test_app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(test_app)
+    monkeypatch.setattr(archive_module.cold_archive, 'root', str(tmp_path / 'archive'))
+    rng = random.Random(11)
+    now = datetime.utcnow()
+
+    with test_app.app_context():
+        Feedback.__table__.create(db.engine)
+        for model in (SurveyFlask, QuestionFlask, ResponseFlask, QuestionResponseFlask):
+            model.__table__.create(db.engine)
+
+        statuses = [FeedbackStatus.PROCESSED] * 6 + [FeedbackStatus.PENDING, FeedbackStatus.FAILED]
+        db.session.execute(insert(Feedback), [{
+            'content': 'الخدمة ' * rng.choice([5, 50, 150]),
+            'channel': rng.choice(list(FeedbackChannel)),
+            'status': rng.choice(statuses),
+            'sentiment_score': rng.uniform(-1, 1) if rng.random() < 0.8 else None,
+            'confidence_score': rng.random(),
+            'rating': rng.randint(1, 5) if rng.random() < 0.5 else None,
+            'created_at': now - timedelta(minutes=rng.randint(5, 90 * 24 * 60)),
+        } for _ in range(ROWS)])
+
+        db.session.add(SurveyFlask(id=1, uuid='s-1', title='استبيان', created_by='tester'))
+        db.session.add(QuestionFlask(id=1, survey_id=1, text='Q1', type='rating'))
+        db.session.add(QuestionFlask(id=2, survey_id=1, text='Q2', type='text'))
+        db.session.execute(insert(ResponseFlask), [{
+            'id': i, 'uuid': f'r-{i}', 'survey_id': 1, 'answers': '{}',
+            'device_type': rng.choice(['mobile', 'desktop', None]), 'is_complete': rng.random() < 0.8,
+            'duration_minutes': rng.choice([None, rng.uniform(1, 20)]),
+            'created_at': now - timedelta(minutes=rng.randint(5, 60 * 24 * 60)),
+        } for i in range(1, ROWS + 1)])
+        db.session.execute(insert(QuestionResponseFlask), [{
+            'response_id': i, 'question_id': 1, 'answer_number': float(rng.randint(1, 5)),
+        } for i in range(1, ROWS + 1, 2)] + [{
+            'response_id': i, 'question_id': 2, 'answer_text': 'جيد',
+            'sentiment_score': rng.uniform(-1, 1), 'confidence_score': rng.random(),
+        } for i in range(1, ROWS + 1, 3)])
+        db.session.commit()
+
+        analytics_snapshot.invalidate()
+        monkeypatch.setattr(analytics_snapshot, 'max_age', 0)
+        yield test_app, now
+        analytics_snapshot.invalidate()
+        db.session.remove()
+
+
+def _executive_results():
+    from api import executive_dashboard as dashboard
+
+    return {
+        'csat': dashboard.calculate_csat_score(30),
+        'nps': dashboard.calculate_nps_score(30),
+        'ces': dashboard.calculate_ces_score(30),
+        'fcr': dashboard.calculate_fcr_score(30),
+        'volume': dashboard.calculate_volume_metrics(),
+        'sentiment': dashboard.calculate_sentiment_metrics(30),
+        'trend': dashboard.get_trend_data(30),
+        'channels': dashboard.get_channel_distribution(30),
+    }
+
+
+def _live_results(time_range):
+    from utils.live_analytics import LiveAnalyticsProcessor
+
+    metrics = LiveAnalyticsProcessor().get_dashboard_metrics(time_range)
+    metrics.pop('last_updated')
+    return metrics
+
+
+def test_executive_metrics_match_database(snapshot_app, monkeypatch):
+    test_app, now = snapshot_app
+    with test_app.app_context():
+        expected = _executive_results()
+        monkeypatch.setattr(analytics_snapshot, 'enabled', True)
+        actual = _executive_results()
+
+    assert analytics_snapshot.stats()['feedback']['rows'] == ROWS
+    assert actual['sentiment'].pop('distribution') == expected['sentiment'].pop('distribution')
+    for key in ('csat', 'nps', 'ces', 'fcr', 'volume', 'sentiment'):
+        assert actual[key] == pytest.approx(expected[key]), key
+    assert actual['trend']['labels'] == expected['trend']['labels']
+    assert actual['trend']['values'] == pytest.approx(expected['trend']['values'])
+    assert actual['channels'] == expected['channels']
+
+
+@pytest.mark.parametrize('time_range', ['7d', '30d', 'all'])
+def test_live_dashboard_metrics_match_database(snapshot_app, monkeypatch, time_range):
+    test_app, now = snapshot_app
+    with test_app.app_context():
+        expected = _live_results(time_range)
+        monkeypatch.setattr(analytics_snapshot, 'enabled', True)
+        actual = _live_results(time_range)
+
+    assert actual == expected
+    assert actual['responses']['total'] > 0 and actual['csat']['count'] > 0
+
+
+def test_incremental_refresh_picks_up_inserts_and_updates(snapshot_app, monkeypatch):
+    from api.executive_dashboard import calculate_csat_score, calculate_volume_metrics
+
+    test_app, now = snapshot_app
+    monkeypatch.setattr(analytics_snapshot, 'enabled', True)
+    with test_app.app_context():
+        calculate_csat_score(30)
+        built_at = analytics_snapshot._built_at['feedback']
+
+        db.session.execute(insert(Feedback), [{
+            'content': 'ممتاز', 'channel': FeedbackChannel.EMAIL, 'status': FeedbackStatus.PROCESSED,
+            'sentiment_score': 0.9, 'created_at': now,
+        } for _ in range(20)])
+        db.session.execute(update(Feedback).where(Feedback.status == FeedbackStatus.PENDING)
+                           .values(status=FeedbackStatus.PROCESSED, updated_at=datetime.utcnow()))
+        db.session.commit()
+
+        snapshot_csat = calculate_csat_score(30)
+        snapshot_volume = calculate_volume_metrics()
+        assert analytics_snapshot._built_at['feedback'] == built_at
+        assert analytics_snapshot.stats()['feedback']['rows'] == ROWS + 20
+
+        monkeypatch.setattr(analytics_snapshot, 'enabled', False)
+        assert snapshot_csat == pytest.approx(calculate_csat_score(30))
+        assert snapshot_volume == calculate_volume_metrics()
+
+
+def test_deletes_and_archive_runs_leave_the_snapshot(snapshot_app, monkeypatch):
+    test_app, now = snapshot_app
+    monkeypatch.setattr(analytics_snapshot, 'enabled', True)
+    monkeypatch.setattr(analytics_snapshot, 'max_age', 60)
+    with test_app.app_context():
+        analytics_snapshot.feedback()
+        analytics_snapshot.responses()
+        built_at = dict(analytics_snapshot._built_at)
+
+        db.session.execute(delete(Feedback).where(Feedback.id <= 100))
+        db.session.delete(db.session.get(ResponseFlask, 2))
+        db.session.commit()
+        assert len(analytics_snapshot.feedback()) == ROWS - 100
+        assert len(analytics_snapshot.responses()) == ROWS - 1
+        assert analytics_snapshot._built_at == built_at
+
+        # Archiving deletes rows outside the session; their answers go too, so responses rebuild
+        archive_module.cold_archive.archive_before(db.engine, now - timedelta(days=30))
+        feedback_ids = analytics_snapshot.feedback().id.tolist()
+        response_ids = analytics_snapshot.responses().id.tolist()
+        assert feedback_ids == [row.id for row in db.session.query(Feedback.id).order_by(Feedback.id)]
+        assert response_ids == [row.id for row in db.session.query(ResponseFlask.id).order_by(ResponseFlask.id)]
+        assert analytics_snapshot._built_at['feedback'] == built_at['feedback']
+        assert analytics_snapshot._built_at['responses'] > built_at['responses']
+        assert db.session.query(func.count(Feedback.id)).scalar() < ROWS - 100
+
+
+def test_memory_footprint_per_row(snapshot_app, monkeypatch):
+    test_app, now = snapshot_app
+    monkeypatch.setattr(analytics_snapshot, 'enabled', True)
+    with test_app.app_context():
+        analytics_snapshot.feedback()
+        analytics_snapshot.responses()
+
+    stats = analytics_snapshot.stats()
+    assert stats['feedback']['bytes_per_row'] == 35
+    assert stats['responses']['bytes_per_row'] == 71
+
+
+@pytest.mark.performance
+def test_slicing_is_faster_than_querying(snapshot_app, monkeypatch):
+    from api.executive_dashboard import calculate_sentiment_metrics
+
+    test_app, now = snapshot_app
+    with test_app.app_context():
+        started = time.perf_counter()
+        for _ in range(5):
+            calculate_sentiment_metrics(30)
+        database_time = time.perf_counter() - started
+
+        monkeypatch.setattr(analytics_snapshot, 'enabled', True)
+        monkeypatch.setattr(analytics_snapshot, 'max_age', 60)
+        analytics_snapshot.feedback()
+        started = time.perf_counter()
+        for _ in range(5):
+            calculate_sentiment_metrics(30)
+        snapshot_time = time.perf_counter() - started
+
+    assert snapshot_time < database_time
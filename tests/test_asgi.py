@@ -0,0 +1,96 @@
+"""
+Tests for the ASGI serving mode
+"""
+
+import asyncio
+import time
+
+import httpx
+import pytest
+from flask import Flask, Response, jsonify
+from sqlalchemy import func, select
+
+from app import db
+from api.async_endpoints import async_api
+from models.webhook_events import WebhookEvent
+from utils import async_db
+from utils.asgi import AsgiApp, AsyncRoutes, WsgiBridge, build_asgi_app, json_response
+
+
+def run_requests(asgi_app, *requests):
+    """Send (method, path, kwargs) requests concurrently; responses in the same order"""
+    async def send_all():
+        transport = httpx.ASGITransport(app=asgi_app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+            return await asyncio.gather(*(client.request(method, path, **kwargs) for method, path, kwargs in requests))
+    return asyncio.run(send_all())
+
+
+@pytest.fixture
+def asgi_app(tmp_path):
+    flask_app = Flask(__name__)
+    flask_app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'asgi.db'}"
+    db.init_app(flask_app)
+
+    @flask_app.route('/flask/report')
+    def report():
+        return jsonify({'served_by': 'flask'})
+
+    @flask_app.route('/flask/stream')
+    def stream():
+        return Response((f"row {i}\n" for i in range(3)), mimetype='text/plain')
+
+    with flask_app.app_context():
+        WebhookEvent.__table__.create(db.engine)
+    yield flask_app, build_asgi_app(flask_app, async_api)
+    asyncio.run(async_db.close_async_db())
+
+
+def test_async_database_url():
+    assert str(async_db.async_database_url('sqlite:///voc.db')) == 'sqlite+aiosqlite:///voc.db'
+    url = async_db.async_database_url('postgresql://u:p@db:5432/voc?sslmode=require')
+    assert url.drivername == 'postgresql+asyncpg' and url.query == {'ssl': 'require'}
+
+
+def test_flask_routes_are_served_through_the_bridge(asgi_app):
+    _, app = asgi_app
+    report, stream, missing = run_requests(
+        app, ('GET', '/flask/report', {}), ('GET', '/flask/stream', {}), ('GET', '/nowhere', {}))
+    assert report.json() == {'served_by': 'flask'}
+    assert stream.text == 'row 0\nrow 1\nrow 2\n'
+    assert missing.status_code == 404
+
+
+def test_webhook_is_queued_through_the_async_session(asgi_app):
+    flask_app, app = asgi_app
+    async_db.init_async_db(flask_app)
+    payload = {'entry': [{'changes': [{'value': {'messages': [
+        {'id': 'wamid.1', 'from': '966501234567', 'type': 'text', 'text': {'body': 'الخدمة ممتازة'}}
+    ]}}]}]}
+
+    first, retry = run_requests(app, ('POST', '/api/surveys/webhook/whatsapp', {'json': payload}),
+                                ('POST', '/api/surveys/webhook/whatsapp', {'json': payload}))
+    assert first.status_code == retry.status_code == 200
+    assert sorted([first.json()['accepted'], retry.json()['accepted']]) == [0, 1]
+
+    sms = run_requests(app, ('POST', '/api/surveys/webhook/sms', {'data': {
+        'MessageSid': 'SM1', 'From': '+966507654321', 'Body': 'نعم'}}))[0]
+    assert sms.status_code == 200 and sms.headers['content-type'] == 'text/xml'
+    with flask_app.app_context():
+        assert db.session.scalar(select(func.count(WebhookEvent.id))) == 2
+
+
+def test_async_routes_overlap_waits():
+    routes = AsyncRoutes()
+
+    @routes.route('/slow/<int:seconds_ms>')
+    async def slow(request):
+        await asyncio.sleep(request.path_params['seconds_ms'] / 1000)
+        return json_response({'waited_ms': request.path_params['seconds_ms']})
+
+    app = AsgiApp(routes, WsgiBridge(Flask(__name__)))
+    started = time.perf_counter()
+    responses = run_requests(app, *[('GET', '/slow/200', {}) for _ in range(20)])
+    # Twenty 200 ms waits on one event loop, not one after another
+    assert time.perf_counter() - started < 1.5
+    assert all(response.json() == {'waited_ms': 200} for response in responses)
@@ -0,0 +1,150 @@
+"""
+Tests for the audience segmentation engine and its bitmap membership cache
+"""
+
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Flask
+
+from app import db
+from models.contacts import Contact, ContactGroup, ContactGroupMembership, ContactDelivery
+from utils.audience_segmentation import (
+    ContactBitmap, SegmentDefinition, SegmentEngine, compile_segment, segment_engine
+)
+
+
+@pytest.fixture
+def segment_app():
+    """Isolated in-memory database with a small contact book"""
+    test_app = Flask(__name__)
+    test_app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(test_app)
+
+    with test_app.app_context():
+        for model in (Contact, ContactGroup, ContactGroupMembership, ContactDelivery):
+            model.__table__.create(db.engine)
+
+        db.session.add_all([
+            Contact(id=1, name='أحمد', email='a@example.com', language_preference='ar', region='riyadh'),
+            Contact(id=2, name='فاطمة', phone='+966500000002', email_opt_in=False,
+                    language_preference='ar', region='jeddah'),
+            Contact(id=3, name='John', email='j@example.com', language_preference='en', region='riyadh'),
+            Contact(id=4, name='خالد', email='k@example.com', language_preference='ar', is_active=False),
+            ContactGroup(id=10, name='VIP'),
+            ContactGroupMembership(contact_id=1, group_id=10),
+            ContactGroupMembership(contact_id=3, group_id=10),
+            ContactDelivery(contact_id=3, survey_id=1, channel='email', recipient='j@example.com',
+                            created_at=datetime.utcnow() - timedelta(days=2)),
+        ])
+        db.session.commit()
+        segment_engine.invalidate()
+        yield test_app
+        db.session.remove()
+
+
+class TestContactBitmap:
+    """Compact ID set operations"""
+
+    def test_set_operations(self):
+        a = ContactBitmap.from_ids([1, 5, 9, 64])
+        b = ContactBitmap.from_ids([5, 64, 100])
+        assert list(a | b) == [1, 5, 9, 64, 100]
+        assert list(a & b) == [5, 64]
+        assert list(a - b) == [1, 9]
+        assert len(a) == 4 and 9 in a and 10 not in a
+
+    @pytest.mark.performance
+    def test_million_contact_preview_is_instant(self):
+        evens = ContactBitmap.from_ids(range(0, 1_000_000, 2))
+        thirds = ContactBitmap.from_ids(range(0, 1_000_000, 3))
+
+        start = time.perf_counter()
+        size = len((evens | thirds) - (evens & thirds))
+        elapsed = time.perf_counter() - start
+
+        assert size == 500_000 + 333_334 - 2 * 166_667
+        assert elapsed < 0.05
+        assert evens.memory_bytes <= 125_000
+
+
+class TestSegmentEngine:
+    """SQL compilation and cached membership"""
+
+    def test_definition_accepts_campaign_format(self):
+        definition = SegmentDefinition.from_config({
+            'groups': ['10'], 'filters': {'region': 'Riyadh', 'language': 'ar'}, 'exclude_recent_survey': True
+        })
+        assert definition.group_ids == [10]
+        assert definition.regions == ['riyadh']
+        assert definition.exclude_surveyed_within_days == 30
+
+    def test_compiles_to_single_query(self, segment_app):
+        with segment_app.app_context():
+            sql = str(compile_segment(SegmentDefinition(group_ids=[10], channels=['email'])))
+            assert sql.count('SELECT contacts.id') == 1
+
+    def test_filters(self, segment_app):
+        engine = SegmentEngine()
+        with segment_app.app_context():
+            assert list(engine.resolve(SegmentDefinition())) == [1, 2, 3]
+            assert list(engine.resolve(SegmentDefinition(group_ids=[10]))) == [1, 3]
+            assert list(engine.resolve(SegmentDefinition(languages=['ar']))) == [1, 2]
+            assert list(engine.resolve(SegmentDefinition(regions=['riyadh']))) == [1, 3]
+            assert list(engine.resolve(SegmentDefinition(channels=['email']))) == [1, 3]
+            assert list(engine.resolve(SegmentDefinition(channels=['sms']))) == [2]
+            assert list(engine.resolve(SegmentDefinition(exclude_surveyed_within_days=7))) == [1, 2]
+
+    def test_include_exclude_preview(self, segment_app):
+        with segment_app.app_context():
+            preview = segment_engine.preview({
+                'include': [{'groups': [10]}, {'languages': ['ar']}],
+                'exclude': [{'regions': ['jeddah']}]
+            })
+            assert preview['count'] == 2
+
+    def test_contact_changes_invalidate_cache(self, segment_app):
+        with segment_app.app_context():
+            definition = SegmentDefinition(regions=['riyadh'])
+            assert len(segment_engine.resolve(definition)) == 2
+
+            db.session.add(Contact(id=5, name='سارة', email='s@example.com', region='riyadh'))
+            db.session.commit()
+
+            assert len(segment_engine.resolve(definition)) == 3
+
+    def test_deliveries_only_invalidate_history_segments(self, segment_app):
+        with segment_app.app_context():
+            by_region = SegmentDefinition(regions=['riyadh'])
+            not_recent = SegmentDefinition(exclude_surveyed_within_days=30)
+            cached = segment_engine.resolve(by_region)
+            assert list(segment_engine.resolve(not_recent)) == [1, 2]
+
+            db.session.add(ContactDelivery(contact_id=1, survey_id=2, channel='email', recipient='a@example.com'))
+            db.session.flush()
+            # Flushed but uncommitted: nothing is dropped yet
+            assert list(segment_engine.resolve(not_recent)) == [1, 2]
+            db.session.commit()
+
+            assert segment_engine.resolve(by_region) is cached
+            assert list(segment_engine.resolve(not_recent)) == [2]
+
+
+def test_contact_edit_without_region_field_keeps_region(segment_app):
+    import contact_routes
+
+    segment_app.secret_key = 'test'
+    segment_app.add_url_rule('/contacts', 'contacts_page', lambda: '')
+    view = getattr(contact_routes.edit_contact, '__wrapped__', contact_routes.edit_contact)
+    segment_app.add_url_rule('/contacts/edit/<int:contact_id>', view_func=view, methods=['POST'])
+    client = segment_app.test_client()
+
+    assert client.post('/contacts/edit/1', data={'name': 'أحمد علي', 'is_active': 'true'}).status_code == 302
+    with segment_app.app_context():
+        assert db.session.get(Contact, 1).region == 'riyadh'
+        assert list(segment_engine.resolve(SegmentDefinition(regions=['riyadh']))) == [1, 3]
+
+    client.post('/contacts/edit/1', data={'name': 'أحمد علي', 'is_active': 'true', 'region': 'Jeddah'})
+    with segment_app.app_context():
+        assert db.session.get(Contact, 1).region == 'jeddah'
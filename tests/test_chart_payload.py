@@ -0,0 +1,141 @@
+"""
+Tests for LTTB downsampling, min/max envelopes and the compact chart payload formats
+"""
+
+import base64
+import math
+import random
+from array import array
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Flask
+from sqlalchemy import insert
+
+from app import db
+from models_unified import Feedback, FeedbackChannel, FeedbackStatus
+from utils import cold_archive as archive_module
+from utils.chart_payload import COLUMNS_FORMAT, TYPED_FORMAT, downsample, encode_columns, lttb_indices
+from utils.dashboard_performance import ArabicDashboardOptimizer
+
+
+def _decode(column):
+    values = array({'timestamp_ms': 'd', 'int32': 'i', 'float32': 'f'}[column['dtype']])
+    values.frombytes(base64.b64decode(column['data']))
+    return values.tolist()
+
+
+def test_lttb_keeps_endpoints_spikes_and_skips_gaps():
+    rng = random.Random(5)
+    values = [math.sin(i / 50) + rng.uniform(-0.05, 0.05) for i in range(5000)]
+    values[1234] = 25.0
+    values[4321] = -25.0
+    values[10:20] = [None] * 10
+
+    indices = lttb_indices(values, 200)
+    assert len(indices) == 200
+    assert indices[0] == 0 and indices[-1] == 4999
+    assert indices == sorted(indices)
+    assert 1234 in indices and 4321 in indices
+    assert not any(10 <= i < 20 for i in indices)
+    assert lttb_indices(values[:50], 200) == [i for i in range(50) if values[i] is not None]
+
+
+def test_envelope_bounds_every_source_point():
+    values = [float((i * 37) % 101) for i in range(1000)]
+    columns = {'label': [f"p{i}" for i in range(1000)], 'value': values}
+    selected, envelope = downsample(columns, 'value', 50, envelope=True)
+
+    assert len(selected['label']) == len(selected['value']) == 50
+    assert set(envelope) == {'value'}
+    assert min(envelope['value']['min']) == min(values)
+    assert max(envelope['value']['max']) == max(values)
+    for low, point, high in zip(envelope['value']['min'], selected['value'], envelope['value']['max']):
+        assert low <= point <= high
+
+
+def test_typed_payload_round_trips():
+    start = datetime(2025, 1, 1)
+    columns = {
+        'bucket': [start + timedelta(hours=i) for i in range(4)],
+        'csat': [80.0, None, 72.5, 90.0],
+        'label': ['a', 'b', 'c', 'd'],
+    }
+    payload = encode_columns(columns, TYPED_FORMAT, granularity='hour')
+    assert payload['length'] == 4 and payload['granularity'] == 'hour'
+
+    csat = _decode(payload['columns']['csat'])
+    assert payload['columns']['csat']['dtype'] == 'float32'
+    assert csat[0] == 80.0 and math.isnan(csat[1]) and csat[3] == 90.0
+    assert payload['columns']['bucket']['dtype'] == 'timestamp_ms'
+    assert _decode(payload['columns']['bucket'])[1] == (start + timedelta(hours=1)).timestamp() * 1000
+    assert payload['columns']['label'] == {'dtype': 'string', 'values': ['a', 'b', 'c', 'd']}
+
+
+def test_optimizer_uses_lttb_for_numeric_series():
+    data = [{"x": i, "y": 1.0, "label": f"البيانات {i}"} for i in range(1000)]
+    data[501]["y"] = 50.0
+    optimized = ArabicDashboardOptimizer().optimize_chart_data(data, max_points=100)
+    assert len(optimized) == 100
+    assert any(point["y"] == 50.0 for point in optimized)
+
+
+@pytest.fixture
+def hourly_app(tmp_path, monkeypatch):
+    from api.executive_dashboard import executive_bp
+    from api.dashboard_simplified import dashboard_simple_bp
+
+    test_app = Flask(__name__)
+    test_app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(test_app)
+    test_app.register_blueprint(executive_bp, url_prefix='/api/executive-dashboard')
+    test_app.register_blueprint(dashboard_simple_bp)
+    monkeypatch.setattr(archive_module.cold_archive, 'root', str(tmp_path / 'archive'))
+    rng = random.Random(8)
+    now = datetime.utcnow()
+
+    with test_app.app_context():
+        Feedback.__table__.create(db.engine)
+        db.session.execute(insert(Feedback), [{
+            'content': 'جيد', 'channel': FeedbackChannel.EMAIL, 'status': FeedbackStatus.PROCESSED,
+            'sentiment_score': rng.uniform(-1, 1), 'created_at': now - timedelta(minutes=rng.randint(0, 365 * 24 * 60)),
+        } for _ in range(6000)])
+        db.session.commit()
+        yield test_app
+        db.session.remove()
+
+
+def test_year_of_hourly_buckets_is_downsampled_and_compact(hourly_app):
+    client = hourly_app.test_client()
+    url = '/api/executive-dashboard/trends?days=365&granularity=hour'
+
+    full = client.get(url)
+    assert len(full.get_json()['series']) >= 365 * 24
+
+    banded = client.get(url + '&width=800&envelope=1').get_json()
+    assert len(banded['series']) == 800
+    assert max(banded['envelope']['volume']['max']) == max(p['volume'] for p in full.get_json()['series'])
+
+    plain = client.get(url + '&width=800')
+
+    columns = client.get(url + '&width=800', headers={'Accept': COLUMNS_FORMAT})
+    typed = client.get(url + '&width=800', headers={'Accept': TYPED_FORMAT})
+    assert columns.mimetype == COLUMNS_FORMAT and typed.mimetype == TYPED_FORMAT
+    assert 'Accept' in typed.headers['Vary']
+    assert len(_decode(typed.get_json()['columns']['volume'])) == 800
+    assert _decode(typed.get_json()['columns']['volume']) == columns.get_json()['columns']['volume']
+    assert len(typed.data) < len(plain.data) and len(columns.data) < len(plain.data) < len(full.data) / 10
+
+
+def test_chart_data_negotiates_format(hourly_app):
+    client = hourly_app.test_client()
+    url = '/api/analytics/chart-data?metric=csat&time_range=1y&granularity=hour&width=300'
+
+    default = client.get(url, headers={'Accept': '*/*'})
+    assert default.mimetype == 'application/json'
+    assert len(default.get_json()['data']['values']) == 300
+
+    compact = client.get(url + '&format=columns').get_json()
+    assert compact['data_source'] == 'real' and compact['length'] == 300
+    assert len(compact['columns']['labels']) == 300
+    assert client.get('/api/analytics/chart-data?metric=csat&granularity=fortnight').status_code == 400
@@ -0,0 +1,171 @@
+"""
+Tests for Arabic search normalization and the indexed contact search
+"""
+
+import time
+
+import pytest
+from flask import Flask
+from sqlalchemy import insert, text
+
+from app import db
+from models.contacts import Contact
+from utils.arabic_search import normalize_for_search, build_search_text
+from utils.contact_search import search_contacts, backfill_search_keys, create_search_index
+from utils.schema_migrations import run_schema_migrations
+
+
+@pytest.fixture
+def search_app():
+    """Isolated in-memory database with search indexes installed"""
+    test_app = Flask(__name__)
+    test_app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(test_app)
+
+    with test_app.app_context():
+        Contact.__table__.create(db.engine)
+        run_schema_migrations(db.engine)
+
+        db.session.add_all([
+            Contact(id=1, name='أحمد العلي', email='ahmed@example.com', company='شركة النور'),
+            Contact(id=2, name='محمد أحمدي', phone='+966500000002', email_opt_in=False),
+            Contact(id=3, name='احمد', email='a2@example.com'),
+            Contact(id=4, name='سارة الأحمد', company='Ahmad Trading', email='sara@example.com'),
+            Contact(id=5, name='أحمد المحذوف', email='old@example.com', is_active=False),
+            Contact(id=6, name='John Smith', email='John.Smith@Example.com'),
+        ])
+        db.session.commit()
+        yield test_app
+        db.session.remove()
+
+
+class TestNormalization:
+    """Spelling variants must fold to the same key"""
+
+    @pytest.mark.parametrize('variant, expected', [
+        ('أحمد', 'احمد'),
+        ('إحمَد', 'احمد'),
+        ('آمنة', 'امنه'),
+        ('مُحَمَّد', 'محمد'),
+        ('محـــمد', 'محمد'),
+        ('فاطمة', 'فاطمه'),
+        ('مصطفى', 'مصطفي'),
+        ('هيئة', 'هييه'),
+        ('مؤمن', 'مومن'),
+        ('کریم', 'كريم'),
+        ('٠٥٠١٢٣', '050123'),
+        ('۰۵۰۱۲۳', '050123'),
+        ('Ahmed@Example.COM', 'ahmed@example.com'),
+        ('  أحمد \t  العلي ', 'احمد العلي'),
+        ('', ''),
+        (None, ''),
+    ])
+    def test_folding(self, variant, expected):
+        assert normalize_for_search(variant) == expected
+
+    def test_idempotent(self):
+        key = normalize_for_search('إِسْمَاعِيلُ الطائيّ')
+        assert normalize_for_search(key) == key
+
+    def test_build_search_text_skips_empty_fields(self):
+        assert build_search_text('أحمد', None, '', 'A@B.com') == 'احمد a@b.com'
+
+
+class TestContactSearch:
+    """Prefix ranking, substring matching and write-time maintenance"""
+
+    def test_keys_maintained_on_write(self, search_app):
+        with search_app.app_context():
+            contact = db.session.get(Contact, 1)
+            assert contact.name_normalized == 'احمد العلي'
+            assert 'شركه النور' in contact.search_text
+
+            contact.name = 'أسامة'
+            db.session.commit()
+            assert contact.name_normalized == 'اسامه'
+            assert [c.id for c in search_contacts('اسامة')] == [1]
+
+    def test_prefix_ranking(self, search_app):
+        with search_app.app_context():
+            ids = [c.id for c in search_contacts('أحمد')]
+            # Exact name, then name prefix, then later word, then anywhere
+            assert ids == [3, 1, 2, 4]
+
+    def test_short_terms_match_name_prefix_only(self, search_app):
+        with search_app.app_context():
+            assert [c.id for c in search_contacts('اح')] == [3, 1]
+
+    def test_substring_matches_other_fields(self, search_app):
+        with search_app.app_context():
+            assert [c.id for c in search_contacts('النور')] == [1]
+            assert sorted(c.id for c in search_contacts('example.com')) == [1, 3, 4, 6]
+            assert [c.id for c in search_contacts('JOHN.smith')] == [6]
+            assert [c.id for c in search_contacts('٥٠٠٠')] == [2]
+
+    def test_filters_inactive_and_channel(self, search_app):
+        with search_app.app_context():
+            assert 5 not in [c.id for c in search_contacts('المحذوف')]
+            assert 2 not in [c.id for c in search_contacts('احمد', channel='email')]
+
+    def test_wildcards_are_literal(self, search_app):
+        with search_app.app_context():
+            assert search_contacts('%%%') == []
+            assert search_contacts('"ahmed') == []
+
+    def test_backfill_existing_rows(self, search_app):
+        with search_app.app_context():
+            db.session.execute(text("UPDATE contacts SET search_text = NULL, name_normalized = NULL"))
+            db.session.commit()
+
+            with db.engine.begin() as conn:
+                assert backfill_search_keys(conn) == 6
+                conn.execute(text("INSERT INTO contacts_fts(contacts_fts) VALUES ('rebuild')"))
+                create_search_index(conn)  # Already present, no-op
+
+            assert [c.id for c in search_contacts('سارة')] == [4]
+
+    def test_search_endpoint(self, search_app):
+        import contact_routes
+        from app import app
+
+        endpoint, _ = app.url_map.bind('localhost').match('/contacts/search')
+        assert app.view_functions[endpoint] is contact_routes.search_contacts
+
+        # Past the login check, against the isolated database
+        view = getattr(contact_routes.search_contacts, '__wrapped__', contact_routes.search_contacts)
+        search_app.add_url_rule('/contacts/search', view_func=view)
+        response = search_app.test_client().get('/contacts/search', query_string={'q': 'أحمد', 'limit': 2})
+        assert response.status_code == 200
+        body = response.get_json()
+        assert body['success'] and [c['id'] for c in body['contacts']] == [3, 1]
+
+
+@pytest.mark.performance
+def test_search_latency_at_scale(search_app):
+    """Type-ahead over 50k contacts stays in the low milliseconds"""
+    first_names = ['أحمد', 'محمد', 'فاطمة', 'عائشة', 'خالد', 'سارة', 'يوسف', 'مريم', 'عمر', 'ليلى']
+    family_names = ['العلي', 'القحطاني', 'الزهراني', 'الشمري', 'الدوسري', 'الغامدي', 'العتيبي']
+
+    with search_app.app_context():
+        rows = []
+        for i in range(100, 50_100):
+            name = f"{first_names[i % 10]} {family_names[i % 7]} {i}"
+            rows.append({
+                'id': i, 'name': name, 'email': f"user{i}@example.com",
+                'name_normalized': normalize_for_search(name),
+                'search_text': build_search_text(name, f"user{i}@example.com"),
+                'is_active': True, 'email_opt_in': True, 'sms_opt_in': True, 'whatsapp_opt_in': True,
+            })
+        db.session.execute(insert(Contact), rows)
+        db.session.commit()
+
+        for term in ('فاطمة', 'مح', 'القحطاني 4', 'user4999'):
+            search_contacts(term)  # Warm statement cache
+
+        start = time.perf_counter()
+        for term in ('فاطمة', 'مح', 'الشمري 12', 'user4999'):
+            results = search_contacts(term, limit=20)
+            assert results
+        elapsed_ms = (time.perf_counter() - start) * 1000 / 4
+
+        assert elapsed_ms < 50
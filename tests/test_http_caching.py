@@ -0,0 +1,122 @@
+"""
+Tests for conditional GET from data-version watermarks and response compression
+"""
+
+import gzip
+
+import pytest
+from flask import Blueprint, Flask, Response, jsonify
+from sqlalchemy import update
+
+from app import db
+from models.survey_flask import SurveyFlask
+from utils import http_caching
+from utils.http_caching import DataVersions, conditional, conditional_blueprint, init_http_caching
+
+
+@pytest.fixture
+def caching_app(monkeypatch):
+    # Long probe TTL: tags may only change through commits in this process
+    monkeypatch.setattr(http_caching, 'data_versions', DataVersions(probe_ttl=60))
+    test_app = Flask(__name__)
+    test_app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    test_app.config['COMPRESSION_MIN_BYTES'] = 200
+    db.init_app(test_app)
+    init_http_caching(test_app)
+    test_app.view_calls = 0
+
+    @test_app.route('/surveys')
+    @conditional(SurveyFlask, window=False)
+    def surveys():
+        test_app.view_calls += 1
+        return jsonify([{'id': s.id, 'title': s.title, 'responses': s.response_count}
+                        for s in SurveyFlask.query.order_by(SurveyFlask.id)])
+
+    @test_app.route('/large')
+    def large():
+        return jsonify({'answers': ['الخدمة ممتازة والموظفون متعاونون'] * 50})
+
+    @test_app.route('/small')
+    def small():
+        return jsonify({'ok': True})
+
+    @test_app.route('/streamed')
+    def streamed():
+        return Response((f'data: {i}\n\n' for i in range(100)), mimetype='application/json')
+
+    blueprint = Blueprint('reports', __name__, url_prefix='/reports')
+    conditional_blueprint(blueprint, SurveyFlask)
+
+    @blueprint.route('/count')
+    def count():
+        test_app.view_calls += 1
+        return jsonify({'count': SurveyFlask.query.count()})
+
+    test_app.register_blueprint(blueprint)
+
+    with test_app.app_context():
+        SurveyFlask.__table__.create(db.engine)
+        db.session.add(SurveyFlask(id=1, uuid='s-1', title='استبيان', created_by='tester'))
+        db.session.commit()
+        yield test_app
+        db.session.remove()
+
+
+def test_not_modified_without_running_the_view(caching_app):
+    client = caching_app.test_client()
+    first = client.get('/surveys')
+    etag = first.headers['ETag']
+    assert first.status_code == 200 and etag.startswith('W/')
+    assert first.headers['Cache-Control'] == 'private, no-cache' and first.last_modified is not None
+
+    again = client.get('/surveys', headers={'If-None-Match': etag})
+    assert again.status_code == 304 and again.data == b'' and again.headers['ETag'] == etag
+    by_date = client.get('/surveys', headers={'If-Modified-Since': first.headers['Last-Modified']})
+    assert by_date.status_code == 304
+    assert caching_app.view_calls == 1
+
+    # Another representation of the same data has its own tag
+    assert client.get('/surveys', headers={'If-None-Match': etag, 'Accept': 'text/csv'}).status_code == 200
+
+
+def test_commits_change_the_tag(caching_app):
+    client = caching_app.test_client()
+    etag = client.get('/surveys').headers['ETag']
+
+    db.session.add(SurveyFlask(id=2, uuid='s-2', title='استبيان آخر', created_by='tester'))
+    db.session.commit()
+    changed = client.get('/surveys', headers={'If-None-Match': etag})
+    assert changed.status_code == 200 and len(changed.get_json()) == 2
+
+    # Core UPDATEs through the session drop the watermark on commit, not on rollback
+    etag = changed.headers['ETag']
+    db.session.execute(update(SurveyFlask).where(SurveyFlask.id == 1).values(response_count=5))
+    db.session.rollback()
+    assert client.get('/surveys', headers={'If-None-Match': etag}).status_code == 304
+    assert http_caching.data_versions.stats['invalidations'] == 1
+    db.session.execute(update(SurveyFlask).where(SurveyFlask.id == 1).values(response_count=5))
+    db.session.commit()
+    assert http_caching.data_versions.stats['invalidations'] == 2
+
+
+def test_blueprint_routes_answer_before_the_view(caching_app):
+    client = caching_app.test_client()
+    etag = client.get('/reports/count').headers['ETag']
+    assert client.get('/reports/count', headers={'If-None-Match': etag}).status_code == 304
+    assert client.post('/reports/count', headers={'If-None-Match': etag}).status_code == 405
+    assert caching_app.view_calls == 1
+
+
+def test_compression_thresholds(caching_app):
+    client = caching_app.test_client()
+    plain = client.get('/large')
+    compressed = client.get('/large', headers={'Accept-Encoding': 'gzip'})
+    assert compressed.headers['Content-Encoding'] == 'gzip' and 'Accept-Encoding' in compressed.headers['Vary']
+    assert len(compressed.data) < len(plain.data) and gzip.decompress(compressed.data) == plain.data
+
+    assert 'Content-Encoding' not in client.get('/small', headers={'Accept-Encoding': 'gzip'}).headers
+    assert 'Content-Encoding' not in client.get('/streamed', headers={'Accept-Encoding': 'gzip'}).headers
+    assert 'Content-Encoding' not in client.get('/large', headers={'Accept-Encoding': 'identity'}).headers
+
+    caching_app.config['COMPRESSION_ENABLED'] = False
+    assert 'Content-Encoding' not in client.get('/large', headers={'Accept-Encoding': 'gzip'}).headers
@@ -0,0 +1,82 @@
+"""
+Tests for the orjson-backed JSON provider
+"""
+
+import json
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+
+import flask
+import pytest
+from flask import Flask, jsonify, render_template_string
+
+from models_unified import FeedbackChannel, FeedbackStatus
+from utils import json_provider
+from utils.json_provider import init_json_provider
+
+
+@dataclass
+class Point:
+    bucket: datetime
+    volume: int
+
+
+PAYLOAD = {
+    'text': 'الخدمة ممتازة',
+    'created_at': datetime(2025, 3, 1, 9, 30, 15, 250000),
+    'day': date(2025, 3, 1),
+    'channel': FeedbackChannel.WHATSAPP,
+    'status': FeedbackStatus.PROCESSED,
+    'series': [Point(datetime(2025, 3, 1), 4)],
+    'ratings': {5: 10, 1: 2},
+    'amount': Decimal('12.50'),
+}
+EXPECTED = {
+    'text': 'الخدمة ممتازة',
+    'created_at': '2025-03-01T09:30:15.250000',
+    'day': '2025-03-01',
+    'channel': 'whatsapp',
+    'status': 'processed',
+    'series': [{'bucket': '2025-03-01T00:00:00', 'volume': 4}],
+    'ratings': {'5': 10, '1': 2},
+    'amount': '12.50',
+}
+
+
+@pytest.fixture(params=['orjson', 'stdlib'])
+def json_app(request, monkeypatch):
+    if request.param == 'orjson':
+        pytest.importorskip('orjson')
+    else:
+        monkeypatch.setattr(json_provider, 'ORJSON_AVAILABLE', False)
+    test_app = Flask(__name__)
+    init_json_provider(test_app)
+
+    @test_app.route('/payload')
+    def payload():
+        return jsonify(PAYLOAD)
+
+    @test_app.route('/echo', methods=['POST'])
+    def echo():
+        return jsonify(flask.request.get_json())
+
+    return test_app
+
+
+def test_native_types_and_arabic_output(json_app):
+    response = json_app.test_client().get('/payload')
+    assert response.mimetype == 'application/json'
+    assert json.loads(response.data) == EXPECTED
+    # UTF-8 text, not \u escapes
+    assert 'الخدمة ممتازة'.encode('utf-8') in response.data
+
+
+def test_request_bodies_and_template_filter(json_app):
+    client = json_app.test_client()
+    assert client.post('/echo', json={'text': 'نعم', 'n': [1, 2.5]}).get_json() == {'text': 'نعم', 'n': [1, 2.5]}
+    assert client.post('/echo', data='{not json', content_type='application/json').status_code == 400
+
+    with json_app.app_context():
+        rendered = render_template_string('{{ value|tojson }}', value={'html': '</script>', 'at': PAYLOAD['day']})
+    assert '</script>' not in rendered and json.loads(rendered) == {'html': '</script>', 'at': '2025-03-01'}
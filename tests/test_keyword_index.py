@@ -0,0 +1,135 @@
+"""
+Tests for the per-day keyword postings behind trending topics
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Flask
+from sqlalchemy import func, insert, select
+
+from app import db
+from models.survey_flask import (
+    SurveyFlask, QuestionFlask, ResponseFlask, QuestionResponseFlask, KeywordPostingFlask, KeywordDayFlask,
+    KeywordFormFlask
+)
+from utils.keyword_index import (
+    extract_keywords, keyword_forms, rebuild_keyword_index, record_text_answers, trending_keywords
+)
+from utils.query_plans import capture_queries
+from utils.schema_migrations import run_schema_migrations
+from utils.survey_submission import PreparedSubmission, store_submission
+
+
+@pytest.fixture
+def keyword_app():
+    test_app = Flask(__name__)
+    test_app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(test_app)
+    now = datetime.utcnow()
+
+    with test_app.app_context():
+        for model in (SurveyFlask, QuestionFlask, ResponseFlask, QuestionResponseFlask,
+                      KeywordPostingFlask, KeywordDayFlask, KeywordFormFlask):
+            model.__table__.create(db.engine)
+        db.session.add(SurveyFlask(id=1, uuid='s-1', title='استبيان', created_by='tester'))
+        db.session.add(QuestionFlask(id=1, survey_id=1, text='رأيك؟', type='textarea'))
+
+        # Last week: "التوصيل" three times more often than the week before; "الأسعار" falls
+        texts = (['التوصيل سريع جدا'] * 12 + ['الأسعار مرتفعة'] * 2, now - timedelta(days=2)), \
+                (['التوصيل بطيء'] * 4 + ['الاسعار مرتفعة'] * 6, now - timedelta(days=10))
+        response_id = 0
+        for answers, created_at in texts:
+            for text in answers:
+                response_id += 1
+                db.session.add(ResponseFlask(id=response_id, uuid=f'r-{response_id}', survey_id=1,
+                                             answers='{}', created_at=created_at))
+                db.session.add(QuestionResponseFlask(response_id=response_id, question_id=1, answer_text=text,
+                                                     sentiment_score=0.5 if 'سريع' in text else -0.5))
+        db.session.commit()
+        yield test_app, now
+        db.session.remove()
+
+
+def test_extracted_keywords_are_normalized():
+    assert extract_keywords('الأسعار، مرتفعة في الفرع', normalize=True) == ['الاسعار', 'مرتفعه', 'الفرع']
+    assert extract_keywords('الأسعار، مرتفعة', normalize=False) == ['الأسعار', 'مرتفعة']
+    assert extract_keywords('') == []
+    assert keyword_forms('الأسعار، مرتفعة في الفرع') == [('الاسعار', 'الأسعار'), ('مرتفعه', 'مرتفعة'), ('الفرع', 'الفرع')]
+
+
+def test_backfill_then_top_k_with_growth(keyword_app):
+    test_app, now = keyword_app
+    with test_app.app_context():
+        # The startup migration seeds the index from existing answers
+        run_schema_migrations(db.engine)
+        assert db.session.query(func.sum(KeywordDayFlask.answers)).scalar() == 24
+
+        today = now.date()
+        with capture_queries(db.engine) as queries:
+            topics = trending_keywords(today - timedelta(days=6), today, limit=5)
+        assert len(queries) == 4
+
+    by_keyword = {topic['key']: topic for topic in topics}
+    assert topics[0]['keyword'] == 'التوصيل'
+    assert by_keyword['التوصيل']['frequency'] == 12 and by_keyword['التوصيل']['previous_frequency'] == 4
+    assert by_keyword['التوصيل']['growth'] == 200.0 and by_keyword['التوصيل']['trend'] == 'up'
+    assert by_keyword['التوصيل']['sentiment_score'] == pytest.approx(0.5)
+    assert by_keyword['التوصيل']['percentage'] == pytest.approx(12 / 14 * 100, abs=0.1)
+    # "الأسعار" and "الاسعار" share one posting, shown as the form customers wrote most often
+    assert by_keyword['الاسعار']['previous_frequency'] == 6 and by_keyword['الاسعار']['trend'] == 'down'
+    assert by_keyword['الاسعار']['keyword'] == 'الاسعار'
+    # Labels are shown as written, not as the normalized key
+    assert by_keyword['مرتفعه']['keyword'] == 'مرتفعة'
+
+
+def test_write_path_increments_postings(keyword_app):
+    test_app, now = keyword_app
+    with test_app.app_context():
+        rebuild_keyword_index()
+        db.session.commit()
+        before = db.session.execute(select(KeywordPostingFlask.count).where(
+            KeywordPostingFlask.keyword == 'التوصيل', KeywordPostingFlask.day == now.date() - timedelta(days=2)
+        )).scalar()
+
+        prepared = PreparedSubmission(rows=[{
+            'question_id': 1, 'answer_text': 'التوصيل ممتاز', 'answer_number': None, 'answer_json': None,
+        }], text_answers=['التوصيل ممتاز'])
+        store_submission(1, {'uuid': 'r-new', 'answers': '{}'}, prepared)
+        record_text_answers([(now - timedelta(days=2), 'التوصيل متأخر', -1.0)])
+        db.session.commit()
+
+        rows = dict(db.session.execute(select(KeywordPostingFlask.day, KeywordPostingFlask.count).where(
+            KeywordPostingFlask.keyword == 'التوصيل'
+        )).all())
+        assert rows[datetime.utcnow().date()] == 1
+        assert rows[now.date() - timedelta(days=2)] == before + 1
+
+        # A rebuild of the same range yields the same counts as incremental maintenance
+        incremental = sorted(db.session.query(KeywordPostingFlask.keyword, KeywordPostingFlask.day,
+                                              KeywordPostingFlask.count).all())
+        db.session.execute(insert(ResponseFlask), [{'id': 999, 'uuid': 'r-999', 'survey_id': 1, 'answers': '{}',
+                                                    'created_at': now - timedelta(days=2)}])
+        db.session.execute(insert(QuestionResponseFlask), [{'response_id': 999, 'question_id': 1,
+                                                            'answer_text': 'التوصيل متأخر', 'sentiment_score': -1.0}])
+        rebuild_keyword_index()
+        db.session.commit()
+        rebuilt = sorted(db.session.query(KeywordPostingFlask.keyword, KeywordPostingFlask.day,
+                                          KeywordPostingFlask.count).all())
+        assert rebuilt == incremental
+
+
+def test_live_trending_topics_reads_the_index(keyword_app):
+    from utils.live_analytics import LiveAnalyticsProcessor
+
+    test_app, now = keyword_app
+    with test_app.app_context():
+        rebuild_keyword_index()
+        db.session.commit()
+        with capture_queries(db.engine) as queries:
+            topics = LiveAnalyticsProcessor().get_trending_topics('7d', limit=2)
+        assert not any('question_responses_flask' in query.statement for query in queries)
+
+    assert [topic['topic'] for topic in topics] == ['التوصيل', 'جدا']
+    assert topics[0]['trend'] == 'up' and topics[0]['sentiment'] == 'positive'
+    assert topics[1]['growth'] is None and topics[1]['previous_frequency'] == 0
@@ -0,0 +1,178 @@
+"""
+Tests for the live dashboard feed and its Server-Sent Events streams
+"""
+
+import asyncio
+import json
+
+import pytest
+from flask import Flask
+from sqlalchemy import insert
+
+from app import db
+from models.survey_flask import SurveyFlask, QuestionFlask, ResponseFlask, QuestionResponseFlask
+from utils.asgi import StreamingResponse
+from utils.live_feed import LiveFeed, live_feed, stream_events, stream_events_async
+
+
+class CountingProcessor:
+    """Dashboard computations whose totals follow the number of calls"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def get_dashboard_metrics(self, time_range):
+        self.calls += 1
+        return {'responses': {'total': self.calls, 'trend': 'up'}, 'last_updated': f't{self.calls}'}
+
+    def get_insights_feed(self, limit):
+        return [{'id': i, 'response_text': f'answer {i}'} for i in range(self.calls, 0, -1)][:limit]
+
+
+@pytest.fixture
+def survey_app():
+    test_app = Flask(__name__)
+    test_app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(test_app)
+    with test_app.app_context():
+        for model in (SurveyFlask, QuestionFlask, ResponseFlask, QuestionResponseFlask):
+            model.__table__.create(db.engine)
+        db.session.add(SurveyFlask(id=1, uuid='s-1', title='استبيان', created_by='tester'))
+        db.session.add(QuestionFlask(id=1, survey_id=1, text='Q1', type='text'))
+        db.session.commit()
+        yield test_app
+        db.session.remove()
+
+
+def test_one_computation_fans_out_to_every_subscriber():
+    processor = CountingProcessor()
+    feed = LiveFeed(processor=processor)
+    subscriptions = [feed.subscribe() for _ in range(50)]
+    feed.refresh()
+    feed.refresh()
+
+    assert processor.calls == 2
+    for subscription in subscriptions:
+        snapshot, insight, metrics = subscription.drain()
+        assert snapshot.event == 'snapshot' and snapshot.data['metrics']['responses']['total'] == 1
+        assert insight.event == 'insight' and insight.data['id'] == 2
+        # Only the changed field; trend did not move
+        assert metrics.data == {'responses': {'total': 2}, 'last_updated': 't2'}
+
+
+def test_slow_client_is_resynced_with_a_snapshot():
+    feed = LiveFeed(max_client_events=3, processor=CountingProcessor())
+    feed.refresh()
+    slow = feed.subscribe()
+    for _ in range(5):
+        feed.refresh()
+
+    assert slow.dropped > 0
+    events = slow.drain()
+    assert [e.event for e in events] == ['snapshot']
+    assert events[0].data['metrics']['responses']['total'] == 6
+
+
+def test_reconnect_replays_missed_events():
+    feed = LiveFeed(processor=CountingProcessor())
+    feed.refresh()
+    first = feed.subscribe()
+    last_seen = first.drain()[-1].id
+    first.close()
+    feed.refresh()
+    feed.refresh()
+
+    resumed = feed.subscribe(last_event_id=last_seen)
+    assert [e.event for e in resumed.drain()] == ['insight', 'metrics', 'insight', 'metrics']
+    # An id from another process or run cannot be resumed
+    assert [e.event for e in feed.subscribe(last_event_id='other-1').drain()] == ['snapshot']
+    assert feed.subscriber_count == 2
+
+
+def test_committed_writes_are_published(survey_app):
+    subscription = live_feed.subscribe()
+    try:
+        with survey_app.app_context():
+            live_feed.refresh()
+            subscription.drain()
+
+            response = ResponseFlask(uuid='r-1', survey_id=1, answers='{}')
+            db.session.add(response)
+            db.session.flush()
+            db.session.execute(insert(QuestionResponseFlask.__table__), [
+                {'response_id': response.id, 'question_id': 1, 'answer_text': 'الخدمة ممتازة'}])
+            db.session.commit()
+
+            # A rolled back write is never announced
+            db.session.add(ResponseFlask(uuid='r-2', survey_id=1, answers='{}'))
+            db.session.flush()
+            db.session.rollback()
+
+            live_feed.refresh()
+        events = {e.event: e.data for e in subscription.drain()}
+        assert events['change'] == {'tables': ['question_responses_flask', 'responses_flask']}
+        assert events['insight']['response_text'] == 'الخدمة ممتازة'
+        assert events['metrics']['responses']['total'] == 1
+    finally:
+        subscription.close()
+
+
+def test_flask_stream_sends_heartbeats_and_unsubscribes(monkeypatch):
+    monkeypatch.setattr(live_feed, 'heartbeat', 0.01)
+    subscription = live_feed.subscribe()
+    count = live_feed.subscriber_count
+    stream = stream_events(subscription)
+
+    assert next(stream).startswith('retry: ')
+    chunk = next(stream)
+    assert chunk.startswith(': heartbeat') or chunk.startswith('id: ')
+    stream.close()
+    assert live_feed.subscriber_count == count - 1
+
+
+def test_async_stream_pushes_events_until_disconnect():
+    feed = LiveFeed(processor=CountingProcessor())
+
+    async def run():
+        disconnect = asyncio.Event()
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+            if b'event: insight' in message.get('body', b''):
+                disconnect.set()
+
+        response = StreamingResponse(stream_events_async(feed), disconnect.wait)
+        streaming = asyncio.ensure_future(response.send(send))
+        while feed.subscriber_count == 0:
+            await asyncio.sleep(0.01)
+        feed.refresh()
+        feed.refresh()
+        await asyncio.wait_for(streaming, 5)
+        return messages
+
+    messages = asyncio.run(run())
+    headers = dict(messages[0]['headers'])
+    assert headers[b'content-type'].startswith(b'text/event-stream')
+    body = b''.join(message.get('body', b'') for message in messages[1:]).decode('utf-8')
+    assert 'event: snapshot' in body and 'event: insight' in body
+    assert json.loads(body.split('event: insight\ndata: ')[1].split('\n')[0])['id'] == 2
+    assert feed.subscriber_count == 0
+
+
+def test_dashboards_poll_unless_streams_are_enabled():
+    import os
+    from flask import render_template_string
+    from utils.live_feed import init_live_feed
+
+    test_app = Flask(__name__)
+    init_live_feed(test_app)
+    with test_app.test_request_context():
+        assert render_template_string("{{ 'sse' if live_feed_sse else 'poll' }}") == 'poll'
+        test_app.config['LIVE_FEED_SSE'] = True
+        assert render_template_string("{{ 'sse' if live_feed_sse else 'poll' }}") == 'sse'
+
+    templates = os.path.join(os.path.dirname(__file__), '..', 'templates')
+    for name in ('dashboard.html', 'analytics_unified.html'):
+        with open(os.path.join(templates, name), encoding='utf-8') as f:
+            assert "'true' if live_feed_sse else 'false'" in f.read(), name
@@ -0,0 +1,119 @@
+"""
+Tests for the metrics registry, request middleware and Prometheus exposition
+"""
+
+import json
+import os
+
+import pytest
+from flask import Flask, jsonify
+
+from utils.metrics import (
+    MAX_SERIES_PER_METRIC, OVERFLOW_LABEL, MetricsRegistry, REQUESTS, REQUEST_LATENCY, init_metrics, registry
+)
+
+
+def test_histogram_buckets_and_exposition_format():
+    metrics = MetricsRegistry()
+    latency = metrics.histogram('job_seconds', 'Job time', ('job',), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.labels('import').observe(value)
+    metrics.counter('jobs_total', 'Jobs run', ('job',)).labels(job='import').inc(2)
+    metrics.gauge('queue_depth', 'Queued jobs').set(7)
+
+    text = metrics.expose()
+    assert '# TYPE job_seconds histogram' in text
+    assert 'job_seconds_bucket{job="import",le="0.1"} 2.0' in text
+    assert 'job_seconds_bucket{job="import",le="1.0"} 3.0' in text
+    assert 'job_seconds_bucket{job="import",le="+Inf"} 4.0' in text
+    assert 'job_seconds_sum{job="import"} 3.65' in text
+    assert 'job_seconds_count{job="import"} 4.0' in text
+    assert 'jobs_total{job="import"} 2.0' in text
+    assert 'queue_depth 7.0' in text
+
+    with pytest.raises(ValueError):
+        metrics.counter('jobs_total', 'Jobs run', ('queue',))
+    with pytest.raises(ValueError):
+        metrics.counter('jobs_total', 'Jobs run', ('job',)).labels('import').inc(-1)
+
+
+def test_label_cardinality_is_capped():
+    counter = MetricsRegistry().counter('hits_total', 'Hits', ('path',))
+    for i in range(MAX_SERIES_PER_METRIC + 50):
+        counter.labels(f'/item/{i}').inc()
+
+    series = dict(counter.series())
+    assert len(series) == MAX_SERIES_PER_METRIC + 1
+    assert series[(OVERFLOW_LABEL,)] == 50
+
+
+def test_middleware_records_route_templates_and_status():
+    test_app = Flask(__name__)
+
+    @test_app.route('/items/<int:item_id>')
+    def item(item_id):
+        if item_id == 0:
+            return jsonify({'error': 'missing'}), 404
+        return jsonify({'id': item_id})
+
+    init_metrics(test_app)
+    client = test_app.test_client()
+    before = REQUESTS.labels('GET', '/items/<int:item_id>', '200').get()
+    observed = REQUEST_LATENCY.labels('GET', '/items/<int:item_id>').get()[1]
+
+    # The server closing the response body is what records the request
+    for path in ('/items/1', '/items/2', '/items/0', '/nothing/here'):
+        client.get(path).close()
+
+    assert REQUESTS.labels('GET', '/items/<int:item_id>', '200').get() == before + 2
+    assert REQUESTS.labels('GET', '/items/<int:item_id>', '404').get() >= 1
+    assert REQUESTS.labels('GET', 'unmatched', '404').get() >= 1
+    assert REQUEST_LATENCY.labels('GET', '/items/<int:item_id>').get()[1] > observed
+
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.content_type.startswith('text/plain; version=0.0.4')
+    body = response.get_data(as_text=True)
+    assert 'http_requests_total{method="GET",route="/items/<int:item_id>",status="404"}' in body
+    assert 'route="/metrics"' not in body
+    assert 'process_resident_memory_bytes' in body
+
+
+def test_multiprocess_merge_and_dead_workers(tmp_path):
+    worker = MetricsRegistry()
+    worker.counter('requests_total', 'Requests', ('route',)).labels('/a').inc(3)
+    worker.histogram('latency_seconds', 'Latency', buckets=(1.0,)).observe(0.5)
+    worker.gauge('busy', 'Busy workers', multiprocess_mode='sum').set(1)
+    worker.gauge('rss_bytes', 'Memory').set(100)
+    other = worker.snapshot()
+    (tmp_path / 'metrics-99999.json').write_text(json.dumps(other), encoding='utf-8')
+
+    worker.enable_multiprocess(str(tmp_path), flush_interval=60)
+    text = worker.expose()
+    assert os.path.exists(tmp_path / f'metrics-{os.getpid()}.json')
+    assert 'requests_total{route="/a"} 6.0' in text
+    assert 'latency_seconds_count 2.0' in text
+    assert 'busy 2.0' in text
+    assert 'rss_bytes{pid="99999"} 100.0' in text
+
+    worker.mark_process_dead(99999)
+    text = worker.expose()
+    assert 'requests_total{route="/a"} 6.0' in text
+    assert 'busy 1.0' in text
+    assert 'pid="99999"' not in text
+
+
+def test_performance_monitors_feed_the_registry():
+    from utils.performance_monitor import PerformanceMonitor
+
+    monitor = PerformanceMonitor()
+    requests = registry.get('operation_requests_total')
+    before = requests.labels('export_report', '500').get()
+    monitor.track_request('export_report', 0.2, 200)
+    monitor.track_request('export_report', 2.5, 500)
+
+    assert requests.labels('export_report', '500').get() == before + 1
+    assert registry.get('operation_slow_requests_total').labels('export_report').get() >= 1
+    summary = monitor.get_performance_summary()
+    assert 'health_score' in summary and summary['recommendations'] is not None
+    assert 'operation_duration_seconds_bucket{endpoint="export_report"' in registry.expose()
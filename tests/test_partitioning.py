@@ -0,0 +1,150 @@
+"""
+Tests for monthly created_at partitioning (PostgreSQL) and its SQLite fallback
+PostgreSQL cases run when TEST_POSTGRES_URL points at a scratch database
+"""
+
+import os
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Flask
+from sqlalchemy import create_engine, insert, select, text
+
+from app import db
+from models_unified import Feedback, FeedbackChannel
+from models.survey_flask import SurveyFlask, QuestionFlask, ResponseFlask, QuestionResponseFlask
+from utils.partitioning import (
+    add_months, convert_to_partitioned, detach_partitions_before, is_partitioned, list_partitions,
+    maintain_partitions, month_ranges, parse_partition_bound, partition_name, scanned_partitions
+)
+from utils.query_plans import explain
+
+POSTGRES_URL = os.environ.get('TEST_POSTGRES_URL')
+NOW = datetime(2025, 6, 15, 12, 0)
+
+
+def test_month_arithmetic():
+    assert add_months(datetime(2024, 11, 20), 3) == datetime(2025, 2, 1)
+    assert add_months(datetime(2024, 1, 31), -1) == datetime(2023, 12, 1)
+    assert month_ranges(datetime(2024, 12, 10), datetime(2025, 1, 1)) == [
+        (datetime(2024, 12, 1), datetime(2025, 1, 1)),
+        (datetime(2025, 1, 1), datetime(2025, 2, 1)),
+    ]
+    assert partition_name('feedback', datetime(2025, 3, 1)) == 'feedback_p202503'
+
+
+def test_bound_and_plan_parsing():
+    assert parse_partition_bound(
+        "FOR VALUES FROM ('2025-05-01 00:00:00') TO ('2025-06-01 00:00:00')"
+    ) == (datetime(2025, 5, 1), datetime(2025, 6, 1), False)
+    assert parse_partition_bound('DEFAULT') == (None, None, True)
+
+    plan = [
+        "Append  (cost=0.29..16.62 rows=2 width=8)",
+        "  ->  Index Scan using feedback_p202505_created_at_idx on feedback_p202505 feedback_1",
+        "  ->  Seq Scan on feedback_p202506 feedback_2",
+    ]
+    assert scanned_partitions(plan, 'feedback') == ['feedback_p202505', 'feedback_p202506']
+
+
+def test_sqlite_falls_back_to_plain_tables():
+    test_app = Flask(__name__)
+    test_app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(test_app)
+    with test_app.app_context():
+        Feedback.__table__.create(db.engine)
+        assert maintain_partitions(db.engine, retention_months=6) == {}
+        with db.engine.begin() as conn:
+            assert not is_partitioned(conn, 'feedback')
+            assert list_partitions(conn, 'feedback') == []
+            assert convert_to_partitioned(conn, 'feedback') == []
+            assert detach_partitions_before(conn, 'feedback', NOW) == []
+        db.session.execute(insert(Feedback), [{'content': 'x', 'channel': FeedbackChannel.SMS, 'created_at': NOW}])
+        assert db.session.execute(select(Feedback.id).where(Feedback.created_at >= NOW - timedelta(days=30))).all()
+
+
+@pytest.fixture
+def pg_engine():
+    if not POSTGRES_URL:
+        pytest.skip("TEST_POSTGRES_URL not set")
+    engine = create_engine(POSTGRES_URL)
+    tables = [Feedback.__table__] + [m.__table__ for m in (SurveyFlask, QuestionFlask, ResponseFlask,
+                                                           QuestionResponseFlask)]
+    with engine.begin() as conn:
+        leftovers = conn.execute(text(
+            "SELECT tablename FROM pg_tables WHERE schemaname = current_schema() "
+            "AND (tablename LIKE 'feedback\\_p%' OR tablename LIKE 'responses\\_flask\\_p%')"
+        )).scalars().all()
+        for name in leftovers:
+            conn.execute(text(f"DROP TABLE IF EXISTS {name}"))
+        for table in reversed(tables):
+            table.drop(conn, checkfirst=True)
+        for table in tables:
+            table.create(conn)
+    yield engine
+    engine.dispose()
+
+
+def _seed_feedback(conn, months: int = 24):
+    rng = random.Random(7)
+    conn.execute(insert(Feedback), [{
+        'content': 'الخدمة جيدة', 'channel': rng.choice(list(FeedbackChannel)),
+        'created_at': NOW - timedelta(days=rng.uniform(0, months * 30)),
+    } for _ in range(5000)])
+    conn.execute(text("ANALYZE feedback"))
+
+
+def test_convert_keeps_rows_and_prunes_30_day_ranges(pg_engine):
+    with pg_engine.begin() as conn:
+        _seed_feedback(conn)
+        before = conn.execute(text("SELECT COUNT(*), MAX(id) FROM feedback")).one()
+        created = convert_to_partitioned(conn, 'feedback', months_ahead=3, now=NOW)
+        conn.execute(text("ANALYZE feedback"))
+
+    with pg_engine.begin() as conn:
+        assert is_partitioned(conn, 'feedback')
+        assert len(created) >= 24
+        assert conn.execute(text("SELECT COUNT(*), MAX(id) FROM feedback")).one() == before
+        # The id sequence survives the rebuild
+        new_id = conn.execute(insert(Feedback).returning(Feedback.id),
+                              [{'content': 'x', 'channel': FeedbackChannel.SMS, 'created_at': NOW}]).scalar()
+        assert new_id > before[1]
+
+        statement = str(select(Feedback.id).where(Feedback.created_at >= NOW - timedelta(days=30))
+                        .compile(conn, compile_kwargs={'literal_binds': True}))
+        touched = scanned_partitions(explain(conn, statement), 'feedback')
+        assert 1 <= len(touched) <= 2
+        assert 'feedback_pdefault' not in touched
+
+
+def test_maintenance_creates_upcoming_and_moves_default_rows(pg_engine):
+    with pg_engine.begin() as conn:
+        convert_to_partitioned(conn, 'feedback', months_ahead=1, now=NOW)
+        # Beyond the last partition: lands in the default partition
+        conn.execute(insert(Feedback), [{'content': 'x', 'channel': FeedbackChannel.SMS,
+                                         'created_at': datetime(2025, 9, 10)}])
+
+    report = maintain_partitions(pg_engine, months_ahead=4, now=NOW)
+    assert 'feedback_p202509' in report['feedback']['created']
+
+    with pg_engine.begin() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM feedback_pdefault")).scalar() == 0
+        assert conn.execute(text("SELECT COUNT(*) FROM feedback_p202509")).scalar() == 1
+
+
+def test_empty_responses_table_is_converted_and_retention_detaches(pg_engine):
+    report = maintain_partitions(pg_engine, months_ahead=2, retention_months=0, now=NOW)
+    assert set(report) == {'feedback', 'responses_flask'}
+
+    with pg_engine.begin() as conn:
+        assert is_partitioned(conn, 'responses_flask')
+        # uuid uniqueness is kept, widened to include the partition key
+        definition = conn.execute(text(
+            "SELECT indexdef FROM pg_indexes WHERE indexname = 'ix_responses_flask_uuid'"
+        )).scalar()
+        assert 'UNIQUE' in definition and 'created_at' in definition
+
+        detached = detach_partitions_before(conn, 'responses_flask', add_months(NOW, 1))
+        assert detached == ['responses_flask_p202506']
+        assert all(p.name != 'responses_flask_p202506' for p in list_partitions(conn, 'responses_flask'))
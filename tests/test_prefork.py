@@ -0,0 +1,72 @@
+"""
+Tests for the preload-and-fork serving profile
+"""
+
+import os
+import re
+import subprocess
+import sys
+import time
+import urllib.request
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from scripts.benchmark_startup import child_env, project_root
+from utils.slow_queries import SlowQueryRecorder
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason="requires fork")
+def test_slow_query_recorder_runs_in_forked_worker():
+    engine = create_engine('sqlite://')
+    recorder = SlowQueryRecorder(threshold_ms=0)
+    recorder.attach(engine)
+    with engine.connect() as conn:
+        conn.execute(text('SELECT 1'))
+    recorder.drain()
+    assert len(recorder.entries) == 1
+
+    pid = os.fork()
+    if pid == 0:
+        # The parent's worker thread does not exist here; without after_fork drain() never returns
+        recorder.after_fork()
+        with engine.connect() as conn:
+            conn.execute(text('SELECT 2'))
+        recorder.drain()
+        os._exit(0 if [entry['statement'] for entry in recorder.entries] == ['SELECT ?'] else 1)
+
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+    recorder.close()
+
+
+@pytest.mark.integration
+@pytest.mark.slow
+def test_gunicorn_profile_preloads_and_serves(tmp_path):
+    pytest.importorskip('gunicorn')
+    env = child_env(f"sqlite:///{tmp_path / 'serve.db'}")
+    env['METRICS_MULTIPROC_DIR'] = str(tmp_path / 'metrics')
+    log_path = tmp_path / 'gunicorn.log'
+    log = open(log_path, 'w')
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'deployment/gunicorn_conf.py',
+         '--bind', '127.0.0.1:0', '--workers', '2', '--graceful-timeout', '5'],
+        cwd=str(project_root), env=env, stdout=log, stderr=subprocess.STDOUT)
+    try:
+        # Port 0 lets the kernel pick a free port; gunicorn logs the one it bound
+        deadline = time.monotonic() + 60
+        while not (listening := re.search(r'Listening at: http://127\.0\.0\.1:(\d+)', log_path.read_text())):
+            assert time.monotonic() < deadline and server.poll() is None, "gunicorn did not bind"
+            time.sleep(0.2)
+        response = urllib.request.urlopen(f"http://127.0.0.1:{listening.group(1)}/health", timeout=30)
+        assert response.status == 200
+    finally:
+        # A worker still booting when SIGTERM arrives misses it and is only killed after the graceful timeout
+        server.terminate()
+        server.wait(timeout=60)
+        log.close()
+
+    # Checked once the server has exited and flushed its log
+    output = log_path.read_text()
+    assert 'objects frozen before fork' in output
+    assert 'Traceback' not in output
@@ -0,0 +1,82 @@
+"""
+Tests for per-request SQL accounting and N+1 detection
+"""
+
+import pytest
+from flask import Flask, jsonify
+
+from app import db
+from models.survey_flask import (
+    SurveyFlask, QuestionFlask, ResponseFlask, QuestionResponseFlask, KeywordPostingFlask, KeywordDayFlask,
+    KeywordFormFlask
+)
+from utils.query_accounting import assert_max_queries, count_queries, init_query_accounting, statement_shape
+
+
+def test_statement_shape_collapses_parameter_lists():
+    assert statement_shape('SELECT a FROM t\n  WHERE id IN (?, ?, ?)') == 'SELECT a FROM t WHERE id IN (?)'
+    assert statement_shape('SELECT a FROM t WHERE id IN (%(id_1)s, %(id_2)s)') == 'SELECT a FROM t WHERE id IN (?)'
+
+
+@pytest.fixture
+def accounting_app():
+    test_app = Flask(__name__)
+    test_app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(test_app)
+
+    @test_app.route('/surveys/<int:survey_id>/answers')
+    def answers(survey_id):
+        rows = QuestionResponseFlask.query.all()
+        # Lazy loads per row: the N+1 the detector should report
+        return jsonify([row.question.text for row in rows])
+
+    init_query_accounting(test_app)
+
+    with test_app.app_context():
+        for model in (SurveyFlask, QuestionFlask, ResponseFlask, QuestionResponseFlask,
+                      KeywordPostingFlask, KeywordDayFlask, KeywordFormFlask):
+            model.__table__.create(db.engine)
+        for survey_id in (1, 2):
+            db.session.add(SurveyFlask(id=survey_id, uuid=f's-{survey_id}', title='استبيان', created_by='tester'))
+        questions = [QuestionFlask(id=i, survey_id=1 + i % 2, text=f'سؤال {i}', type='textarea') for i in range(1, 9)]
+        db.session.add_all(questions)
+        for i, question in enumerate(questions):
+            response = ResponseFlask(survey_id=question.survey_id, answers='{}', respondent_name='سارة')
+            db.session.add(response)
+            db.session.flush()
+            db.session.add(QuestionResponseFlask(response_id=response.id, question_id=question.id,
+                                                 answer_text=f'الخدمة ممتازة {i}'))
+        db.session.commit()
+        db.session.expunge_all()
+        yield test_app
+        db.session.remove()
+
+
+def test_request_headers_and_n_plus_one(accounting_app, caplog):
+    client = accounting_app.test_client()
+    response = client.get('/surveys/1/answers')
+
+    assert response.status_code == 200
+    assert int(response.headers['X-DB-Query-Count']) == 9
+    assert response.headers['X-DB-Rows'] == '16'
+    assert response.headers['X-DB-N-Plus-One'] == '1; max=8'
+    assert 'Possible N+1 on GET /surveys/<int:survey_id>/answers' in caplog.text
+
+    with pytest.raises(AssertionError, match='N\\+1'):
+        with assert_max_queries(20):
+            client.get('/surveys/1/answers')
+
+
+def test_insights_feed_loads_context_eagerly(accounting_app):
+    from utils.live_analytics import LiveAnalyticsProcessor
+
+    with accounting_app.app_context():
+        with assert_max_queries(1):
+            insights = LiveAnalyticsProcessor().get_insights_feed(limit=50)
+        assert len(insights) == 8
+        assert {insight['survey_id'] for insight in insights} == {1, 2}
+
+        db.session.expunge_all()
+        with count_queries() as stats:
+            QuestionResponseFlask.query.filter_by(id=1).first()
+        assert stats.count == 1 and stats.rows_loaded == 1 and not stats.repeated()
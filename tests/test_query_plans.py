@@ -0,0 +1,142 @@
+"""
+Query-plan regression tests: hot dashboard and list queries must not fall back to sequential scans
+"""
+
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Flask
+from sqlalchemy import insert, select, text
+
+from app import db
+from models_unified import Feedback, FeedbackChannel, FeedbackStatus
+from models.survey_flask import SurveyFlask, QuestionFlask, ResponseFlask, QuestionResponseFlask
+from utils.query_plans import capture_queries, explain_captured, sequential_scans, explain
+from utils.schema_migrations import run_schema_migrations
+
+HOT_TABLES = ['feedback', 'responses_flask', 'question_responses_flask']
+FEEDBACK_ROWS = 20_000
+RESPONSE_ROWS = 20_000
+
+
+@pytest.fixture(scope='module')
+def seeded_app():
+    """A year of feedback and survey responses, with planner statistics collected"""
+    test_app = Flask(__name__)
+    test_app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(test_app)
+    rng = random.Random(42)
+    now = datetime.utcnow()
+
+    with test_app.app_context():
+        Feedback.__table__.create(db.engine)
+        for model in (SurveyFlask, QuestionFlask, ResponseFlask, QuestionResponseFlask):
+            model.__table__.create(db.engine)
+        run_schema_migrations(db.engine)
+
+        channels = list(FeedbackChannel)
+        statuses = [FeedbackStatus.PROCESSED] * 6 + [FeedbackStatus.PENDING, FeedbackStatus.FAILED]
+        db.session.execute(insert(Feedback), [{
+            'content': 'الخدمة جيدة',
+            'channel': rng.choice(channels),
+            'status': rng.choice(statuses),
+            'sentiment_score': rng.uniform(-1, 1) if rng.random() < 0.8 else None,
+            'confidence_score': rng.random(),
+            'rating': rng.randint(1, 5),
+            'created_at': now - timedelta(minutes=rng.randint(0, 365 * 24 * 60)),
+        } for _ in range(FEEDBACK_ROWS)])
+
+        db.session.execute(insert(SurveyFlask), [
+            {'id': i, 'uuid': f"s-{i}", 'title': f"Survey {i}", 'created_by': 'seed'} for i in range(1, 21)
+        ])
+        db.session.execute(insert(QuestionFlask), [
+            {'id': i, 'survey_id': (i - 1) // 2 + 1, 'text': 'Q', 'type': 'text' if i % 2 else 'rating'}
+            for i in range(1, 41)
+        ])
+        db.session.execute(insert(ResponseFlask), [{
+            'id': i, 'uuid': f"r-{i}", 'survey_id': rng.randint(1, 20), 'answers': '{}',
+            'is_complete': rng.random() < 0.9, 'created_at': now - timedelta(minutes=rng.randint(0, 365 * 24 * 60)),
+        } for i in range(1, RESPONSE_ROWS + 1)])
+        db.session.execute(insert(QuestionResponseFlask), [{
+            'response_id': i // 2 + 1, 'question_id': rng.randint(1, 40),
+            'answer_text': 'ممتاز' if i % 2 else None, 'answer_number': None if i % 2 else 4.0,
+            'created_at': now - timedelta(minutes=rng.randint(0, 365 * 24 * 60)),
+        } for i in range(RESPONSE_ROWS * 2 - 1)])
+        db.session.commit()
+        db.session.execute(text('ANALYZE'))
+        db.session.commit()
+        yield test_app
+        db.session.remove()
+
+
+def _assert_no_sequential_scans(plans):
+    offenders = [
+        f"{', '.join(plan.sequential_scans)}: {plan.query.statement.splitlines()[0][:120]}\n    "
+        + '\n    '.join(plan.lines)
+        for plan in plans if plan.sequential_scans
+    ]
+    assert not offenders, "Hot queries regressed to sequential scans:\n" + '\n'.join(offenders)
+
+
+def test_detector_flags_full_scans(seeded_app):
+    with seeded_app.app_context(), db.engine.connect() as conn:
+        lines = explain(conn, "SELECT * FROM feedback WHERE content = ?", ('x',))
+        assert sequential_scans(lines, 'sqlite', HOT_TABLES) == ['feedback']
+        lines = explain(conn, "SELECT * FROM feedback WHERE channel = ? AND created_at >= ?", ('EMAIL', '2024-01-01'))
+        assert sequential_scans(lines, 'sqlite', HOT_TABLES) == []
+
+
+def test_executive_dashboard_queries_use_indexes(seeded_app):
+    from api import executive_dashboard as dashboard
+
+    with seeded_app.app_context():
+        with capture_queries(db.engine) as captured:
+            dashboard.calculate_csat_score(30)
+            dashboard.calculate_nps_score(30)
+            dashboard.calculate_ces_score(30)
+            dashboard.calculate_fcr_score(30)
+            dashboard.calculate_volume_metrics()
+            dashboard.calculate_sentiment_metrics(30)
+            dashboard.get_trend_data(30)
+            dashboard.get_channel_distribution(30)
+
+        assert len(captured) > 10
+        _assert_no_sequential_scans(explain_captured(db.engine, captured, HOT_TABLES))
+
+
+def test_live_analytics_queries_use_indexes(seeded_app):
+    from utils.live_analytics import LiveAnalyticsProcessor
+
+    with seeded_app.app_context():
+        with capture_queries(db.engine) as captured:
+            processor = LiveAnalyticsProcessor()
+            processor.get_dashboard_metrics('7d')
+            processor.get_insights_feed(50)
+
+        assert captured
+        _assert_no_sequential_scans(explain_captured(db.engine, captured, HOT_TABLES))
+
+
+def test_list_queries_use_indexes(seeded_app):
+    since = datetime.utcnow() - timedelta(days=7)
+    list_queries = [
+        select(Feedback).where(Feedback.channel == FeedbackChannel.WHATSAPP, Feedback.created_at >= since)
+        .order_by(Feedback.created_at.desc()).limit(50),
+        select(Feedback).where(Feedback.status == FeedbackStatus.PENDING)
+        .order_by(Feedback.created_at.desc()).limit(50),
+        select(Feedback.sentiment_score).where(Feedback.sentiment_score.isnot(None),
+                                               Feedback.status == FeedbackStatus.PROCESSED,
+                                               Feedback.created_at >= since),
+        select(ResponseFlask).where(ResponseFlask.survey_id == 3).order_by(ResponseFlask.created_at.desc()).limit(50),
+        select(QuestionResponseFlask).where(QuestionResponseFlask.answer_text.isnot(None))
+        .order_by(QuestionResponseFlask.created_at.desc()).limit(50),
+    ]
+
+    with seeded_app.app_context():
+        with capture_queries(db.engine) as captured:
+            for query in list_queries:
+                db.session.execute(query).all()
+
+        assert len(captured) == len(list_queries)
+        _assert_no_sequential_scans(explain_captured(db.engine, captured, HOT_TABLES))
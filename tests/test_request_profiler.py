@@ -0,0 +1,96 @@
+"""
+Tests for the on-demand request profiler
+"""
+
+import os
+import time
+
+import pytest
+from flask import Flask, jsonify
+
+from utils import request_profiler as profiler_module
+from utils.request_profiler import init_request_profiler
+
+
+def crunch_numbers(seconds):
+    deadline = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < deadline:
+        total += sum(range(200))
+    return total
+
+
+@pytest.fixture
+def profiled_app(tmp_path, monkeypatch):
+    from api.admin_diagnostics import admin_diagnostics_bp
+
+    monkeypatch.setattr(profiler_module, 'request_profiler', None)
+    test_app = Flask(__name__)
+    test_app.config.update(
+        LOGIN_DISABLED=True, PROFILER_TOKEN='s3cret', PROFILER_DIR=str(tmp_path / 'profiles'),
+        PROFILER_MAX_FILES=3, PROFILER_INTERVAL_MS=1,
+    )
+    test_app.register_blueprint(admin_diagnostics_bp)
+
+    @test_app.route('/api/dashboard/metrics')
+    def metrics():
+        return jsonify({'total': crunch_numbers(0.08)})
+
+    init_request_profiler(test_app)
+    return test_app
+
+
+def test_token_header_captures_collapsed_stacks(profiled_app):
+    client = profiled_app.test_client()
+
+    assert 'X-Profile-Id' not in client.get('/api/dashboard/metrics').headers
+    assert 'X-Profile-Id' not in client.get('/api/dashboard/metrics', headers={'X-Profile': 'wrong'}).headers
+    non_ascii = client.get('/api/dashboard/metrics', query_string={'_profile': 'م'})
+    assert non_ascii.status_code == 200 and 'X-Profile-Id' not in non_ascii.headers
+
+    response = client.get('/api/dashboard/metrics', headers={'X-Profile': 's3cret'})
+    name = response.headers['X-Profile-Id']
+    assert name.endswith('.folded') and '-GET-api_dashboard_metrics-' in name
+
+    listing = client.get('/api/admin/profiles').get_json()
+    assert [profile['name'] for profile in listing['profiles']] == [name]
+    assert listing['profiles'][0]['format'] == 'collapsed' and listing['profiles'][0]['duration_ms'] >= 80
+
+    download = client.get(f'/api/admin/profiles/{name}')
+    assert download.status_code == 200
+    lines = download.get_data(as_text=True).splitlines()
+    samples = sum(int(line.rsplit(' ', 1)[1]) for line in lines)
+    in_handler = sum(int(line.rsplit(' ', 1)[1]) for line in lines
+                     if 'crunch_numbers (tests/test_request_profiler.py)' in line)
+    assert samples >= 10 and in_handler / samples > 0.8
+
+    assert client.get('/api/admin/profiles/../../etc/passwd').status_code == 404
+    assert client.get('/api/admin/profiles/missing.folded').status_code == 404
+
+
+def test_cprofile_mode_and_retention(profiled_app):
+    client = profiled_app.test_client()
+
+    response = client.get('/api/dashboard/metrics?_profile=s3cret&_profile_mode=cprofile')
+    name = response.headers['X-Profile-Id']
+    assert name.endswith(('.pstats', '.folded'))
+
+    for _ in range(4):
+        client.get('/api/dashboard/metrics', headers={'X-Profile': 's3cret'})
+    directory = profiler_module.request_profiler.directory
+    assert len(os.listdir(directory)) == 3
+
+
+def test_one_in_n_sampling(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiler_module, 'request_profiler', None)
+    test_app = Flask(__name__)
+    test_app.config.update(PROFILER_SAMPLE_RATE=2, PROFILER_DIR=str(tmp_path))
+
+    @test_app.route('/surveys/responses')
+    def responses():
+        return 'ok'
+
+    init_request_profiler(test_app)
+    client = test_app.test_client()
+    profiled = ['X-Profile-Id' in client.get('/surveys/responses').headers for _ in range(4)]
+    assert profiled == [False, True, False, True]
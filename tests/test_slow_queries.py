@@ -0,0 +1,85 @@
+"""
+Tests for the slow query log and its admin endpoint
+"""
+
+import json
+
+import pytest
+from flask import Flask, jsonify
+from sqlalchemy import text
+
+from app import db
+from utils import slow_queries
+from utils.slow_queries import SlowQueryRecorder, fingerprint, parameter_shape
+
+
+def test_fingerprint_and_parameter_shape():
+    assert fingerprint("SELECT * FROM t WHERE a = 'x''y' AND b = 42\n AND c IN (?, ?)") == \
+        'SELECT * FROM t WHERE a = ? AND b = ? AND c IN (?)'
+    assert fingerprint('SELECT col1 FROM t2') == 'SELECT col1 FROM t2'
+    assert parameter_shape({'id': 3, 'name': 'x'}) == {'id': 'int', 'name': 'str'}
+    assert parameter_shape([(1, 'a'), (2, 'b')], executemany=True) == {'rows': 2, 'row': ['int', 'str']}
+
+
+@pytest.fixture
+def recorder_app(tmp_path, monkeypatch):
+    from api.admin_diagnostics import admin_diagnostics_bp
+
+    test_app = Flask(__name__)
+    test_app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'slow.db'}"
+    test_app.config['LOGIN_DISABLED'] = True
+    db.init_app(test_app)
+    test_app.register_blueprint(admin_diagnostics_bp)
+
+    @test_app.route('/items/<int:item_id>')
+    def item(item_id):
+        row = db.session.execute(text('SELECT id, name FROM items WHERE id = :id'), {'id': item_id}).first()
+        db.session.execute(text(f'SELECT count(*) FROM items WHERE id > {item_id}')).scalar()
+        return jsonify({'name': row.name if row else None})
+
+    with test_app.app_context():
+        db.session.execute(text('CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)'))
+        db.session.execute(text('INSERT INTO items (name) VALUES (:name)'), [{'name': f'n{i}'} for i in range(20)])
+        db.session.commit()
+
+        # Every statement counts as slow
+        recorder = SlowQueryRecorder(threshold_ms=0, log_path=str(tmp_path / 'logs' / 'slow.jsonl'))
+        recorder.attach(db.engine)
+        monkeypatch.setattr(slow_queries, 'slow_query_recorder', recorder)
+        yield test_app, recorder, tmp_path
+        recorder.close()
+        db.session.remove()
+
+
+def test_slow_queries_are_aggregated_with_plans(recorder_app):
+    test_app, recorder, tmp_path = recorder_app
+    client = test_app.test_client()
+    for item_id in (1, 2, 3, 4):
+        assert client.get(f'/items/{item_id}').status_code == 200
+    recorder.drain()
+
+    data = client.get('/api/admin/slow-queries?recent=2').get_json()
+    assert data['success'] and data['threshold_ms'] == 0
+    by_statement = {group['statement']: group for group in data['fingerprints']}
+
+    lookup = by_statement['SELECT id, name FROM items WHERE id = ?']
+    assert lookup['count'] == 4 and lookup['p50_ms'] <= lookup['p95_ms'] <= lookup['max_ms']
+    assert lookup['routes'] == ['/items/<int:item_id>']
+    assert lookup['caller'][0].startswith('tests/test_slow_queries.py:') and lookup['caller'][0].endswith(' item')
+    assert any('SEARCH items USING INTEGER PRIMARY KEY' in line for line in lookup['plan'])
+    # Inlined literals fold into the same fingerprint
+    assert by_statement['SELECT count(*) FROM items WHERE id > ?']['count'] == 4
+    assert len(data['recent']) == 2 and 'plan' in data['recent'][0]
+
+    lines = (tmp_path / 'logs' / 'slow.jsonl').read_text(encoding='utf-8').splitlines()
+    entries = [json.loads(line) for line in lines]
+    assert len(entries) == len(recorder.entries)
+    assert all(entry['parameters'] in (['int'], []) for entry in entries)
+
+
+def test_fast_queries_are_not_recorded(recorder_app):
+    test_app, recorder, _ = recorder_app
+    recorder.threshold = 60.0
+    test_app.test_client().get('/items/1')
+    recorder.drain()
+    assert len(recorder.entries) == 0
@@ -0,0 +1,39 @@
+"""
+Cold-start budget: a fresh worker imports the app quickly, lean, and without touching the schema
+"""
+
+import os
+import sqlite3
+import subprocess
+import sys
+
+from scripts.benchmark_startup import child_env, measure, project_root
+
+# Generous defaults so slow CI machines pass; tighten per environment
+STARTUP_BUDGET_SECONDS = float(os.environ.get('STARTUP_BUDGET_SECONDS', '6'))
+STARTUP_RSS_BUDGET_MB = float(os.environ.get('STARTUP_RSS_BUDGET_MB', '250'))
+
+
+def test_cold_start_is_within_budget(tmp_path):
+    database_url = f"sqlite:///{tmp_path / 'startup.db'}"
+    result = measure('main', database_url)
+
+    assert result['loaded'] == [], f"heavy modules imported at startup: {result['loaded']}"
+    assert result['seconds'] < STARTUP_BUDGET_SECONDS
+    assert result['rss_bytes'] / 2 ** 20 < STARTUP_RSS_BUDGET_MB
+    # Importing a worker leaves the database alone
+    tables = sqlite3.connect(tmp_path / 'startup.db').execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table'").fetchall()
+    assert tables == []
+
+
+def test_init_db_command_creates_schema(tmp_path):
+    database_url = f"sqlite:///{tmp_path / 'schema.db'}"
+    result = subprocess.run([sys.executable, '-m', 'flask', '--app', 'app', 'init-db'],
+                            cwd=str(project_root), env=child_env(database_url),
+                            capture_output=True, text=True, timeout=300)
+    assert result.returncode == 0, result.stderr[-2000:]
+
+    tables = {name for (name,) in sqlite3.connect(tmp_path / 'schema.db').execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert {'surveys_flask', 'responses_flask', 'contacts'} <= tables
@@ -0,0 +1,208 @@
+"""
+Tests for the group-commit survey submission write buffer
+"""
+
+import os
+import subprocess
+import threading
+import time
+
+import pytest
+from flask import Flask
+
+from app import db
+from models.survey_flask import (
+    SurveyFlask, QuestionFlask, ResponseFlask, QuestionResponseFlask, KeywordPostingFlask, KeywordDayFlask,
+    KeywordFormFlask
+)
+from utils.submission_buffer import (
+    BufferedSubmission, BufferFull, DurabilityMode, SubmissionWriteBuffer, _Pending
+)
+from utils.survey_submission import load_survey_for_submission, prepare_answers, store_submission
+
+
+@pytest.fixture
+def buffer_app(tmp_path):
+    """File-backed SQLite so the writer thread uses its own connection"""
+    test_app = Flask(__name__)
+    test_app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'buffer.db'}"
+    test_app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'connect_args': {'timeout': 30}}
+    db.init_app(test_app)
+
+    with test_app.app_context():
+        for model in (SurveyFlask, QuestionFlask, ResponseFlask, QuestionResponseFlask,
+                      KeywordPostingFlask, KeywordDayFlask, KeywordFormFlask):
+            model.__table__.create(db.engine)
+        survey = SurveyFlask(id=1, uuid='survey-uuid', title='Survey', status='published', created_by='tester')
+        survey.questions = [
+            QuestionFlask(id=1, text='Comment', type='text'),
+            QuestionFlask(id=2, text='Rating', type='rating'),
+        ]
+        db.session.add(survey)
+        db.session.commit()
+        db.session.remove()
+    yield test_app
+
+
+def _submission(**overrides):
+    survey = load_survey_for_submission('survey-uuid')
+    prepared = prepare_answers(survey.questions, {'question_1': 'ممتاز', 'question_2': '5'})
+    fields = dict(answers='{}', is_complete=True, completion_percentage=100.0, duration_minutes=2.0)
+    fields.update(overrides)
+    return BufferedSubmission.build(survey.id, fields, prepared)
+
+
+def test_group_commit_from_concurrent_clients(buffer_app):
+    buffer = SubmissionWriteBuffer(durability=DurabilityMode.COMMIT, flush_interval=0.02, analyze=False)
+    buffer.start(buffer_app)
+    uuids = []
+
+    def client():
+        with buffer_app.app_context():
+            for _ in range(10):
+                uuids.append(buffer.submit(_submission()))
+            db.session.remove()
+
+    threads = [threading.Thread(target=client) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    buffer.stop()
+
+    with buffer_app.app_context():
+        assert ResponseFlask.query.count() == 50
+        assert QuestionResponseFlask.query.count() == 100
+        survey = db.session.get(SurveyFlask, 1)
+        assert survey.response_count == 50
+        assert survey.average_duration == pytest.approx(2.0)
+    assert len(set(uuids)) == 50
+    assert buffer.stats['batches'] < 50
+
+
+def test_journal_replay_is_idempotent(buffer_app, tmp_path):
+    journal = str(tmp_path / 'journal.jsonl')
+    crashed = SubmissionWriteBuffer(durability=DurabilityMode.JOURNAL, journal_path=journal, analyze=False)
+    with buffer_app.app_context():
+        acknowledged = [crashed.submit(_submission()) for _ in range(3)]
+    # The writer never ran; a restarted process replays the journal
+    assert os.path.getsize(crashed.process_journal_path) > 0
+
+    with buffer_app.app_context():
+        # One of them made it to the database before the crash
+        crashed.flush_batch([crashed._queue.get_nowait()])
+
+        restarted = SubmissionWriteBuffer(durability=DurabilityMode.JOURNAL, journal_path=journal, analyze=False)
+        assert restarted.replay_journal() == 2
+        assert restarted.replay_journal() == 0
+        assert sorted(r.uuid for r in ResponseFlask.query) == sorted(acknowledged)
+        assert db.session.get(SurveyFlask, 1).response_count == 3
+        assert not os.path.exists(crashed.process_journal_path)
+
+
+def test_workers_keep_separate_journals(buffer_app, tmp_path):
+    journal = str(tmp_path / 'journal.jsonl')
+    exited = subprocess.Popen(['true'])
+    exited.wait()
+    with buffer_app.app_context():
+        lost = _submission()
+        live = _submission()
+    # A worker that died with an uncommitted entry, and a running worker (our parent) with one in flight
+    (tmp_path / f'journal.{exited.pid}.jsonl').write_text(lost.to_json() + '\n', encoding='utf-8')
+    (tmp_path / f'journal.{os.getppid()}.jsonl').write_text(live.to_json() + '\n', encoding='utf-8')
+
+    buffer = SubmissionWriteBuffer(durability=DurabilityMode.JOURNAL, journal_path=journal, analyze=False)
+    with buffer_app.app_context():
+        assert buffer.replay_journal() == 1
+        assert buffer.replay_journal() == 0
+        buffer.submit(_submission())
+        buffer.flush_batch([buffer._queue.get_nowait()])
+        committed = {r.uuid for r in ResponseFlask.query}
+        assert lost.uuid in committed and live.uuid not in committed
+
+    # Idle truncation and replay leave the running worker's journal alone
+    assert os.path.getsize(buffer.process_journal_path) == 0
+    assert not (tmp_path / f'journal.{exited.pid}.jsonl').exists()
+    assert (tmp_path / f'journal.{os.getppid()}.jsonl').read_text(encoding='utf-8') == live.to_json() + '\n'
+
+
+def test_bounded_buffer_rejects_when_full(buffer_app):
+    buffer = SubmissionWriteBuffer(max_size=2, durability=DurabilityMode.MEMORY)
+    with buffer_app.app_context():
+        buffer.submit(_submission())
+        buffer.submit(_submission())
+        with pytest.raises(BufferFull):
+            buffer.submit(_submission())
+    assert buffer.stats == {'accepted': 2, 'rejected': 1, 'written': 0, 'batches': 0, 'failed': 0}
+
+
+def test_bad_submission_is_isolated(buffer_app):
+    buffer = SubmissionWriteBuffer(durability=DurabilityMode.MEMORY, analyze=False)
+    with buffer_app.app_context():
+        good = [_Pending(_submission(), wait=True) for _ in range(3)]
+        bad = _Pending(_submission(answers=None), wait=True)  # answers is NOT NULL
+
+        buffer.flush_batch(good[:2] + [bad] + good[2:])
+
+        assert ResponseFlask.query.count() == 3
+        assert bad.error and all(p.error is None and p.done.is_set() for p in good)
+        assert buffer.stats['failed'] == 1
+
+
+@pytest.mark.performance
+def test_buffered_throughput_beats_direct_path(buffer_app):
+    """Sustained submits/s from 8 clients against file-backed SQLite"""
+    def run(submit, seconds=1.0):
+        count = [0]
+        deadline = time.monotonic() + seconds
+
+        def client():
+            with buffer_app.app_context():
+                while time.monotonic() < deadline:
+                    submit()
+                    count[0] += 1
+                db.session.remove()
+
+        threads = [threading.Thread(target=client) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return count[0] / seconds
+
+    with buffer_app.app_context():
+        survey = load_survey_for_submission('survey-uuid')
+        questions = list(survey.questions)
+    form = {'question_1': 'ممتاز', 'question_2': '5'}
+    fields = dict(answers='{}', is_complete=True, completion_percentage=100.0)
+
+    direct = run(lambda: store_submission(1, dict(fields), prepare_answers(questions, form)))
+
+    buffer = SubmissionWriteBuffer(durability=DurabilityMode.COMMIT, analyze=False)
+    buffer.start(buffer_app)
+    buffered = run(lambda: buffer.submit(BufferedSubmission.build(1, fields, prepare_answers(questions, form))))
+    buffer.stop()
+
+    assert buffered > direct * 1.2
+
+
+def test_commit_timeout_is_acknowledged_not_failed(buffer_app, monkeypatch):
+    from app import submit_survey_response
+    from utils import submission_buffer as buffer_module
+
+    buffer = SubmissionWriteBuffer(durability=DurabilityMode.COMMIT, flush_interval=0.02, commit_timeout=0.05,
+                                   analyze=False)
+    monkeypatch.setattr(buffer_module, 'submission_buffer', buffer)
+    buffer_app.add_url_rule('/api/survey/<uuid>/submit', view_func=submit_survey_response, methods=['POST'])
+
+    # The writer is not running yet, so the commit wait times out while the submission stays queued
+    response = buffer_app.test_client().post('/api/survey/survey-uuid/submit',
+                                             data={'question_1': 'ممتاز', 'question_2': '5'})
+    assert response.status_code == 202
+    body = response.get_json()
+    assert body['success'] and body['accepted']
+
+    buffer.start(buffer_app)
+    buffer.stop()
+    with buffer_app.app_context():
+        assert [r.uuid for r in ResponseFlask.query.all()] == [body['response_id']]
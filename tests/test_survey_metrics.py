@@ -0,0 +1,158 @@
+"""
+Tests for incrementally maintained survey metrics and the drift reconciler
+"""
+
+import time
+from datetime import datetime
+
+import pytest
+from flask import Flask
+from sqlalchemy import insert
+
+from app import db
+from models.survey_flask import SurveyFlask, QuestionFlask, ResponseFlask, QuestionResponseFlask
+from utils.response_processor import SurveyResponseProcessor
+from utils.survey_metrics import record_response, reconcile_survey_metrics
+from utils.survey_submission import PreparedSubmission, store_submission
+
+
+@pytest.fixture
+def metrics_app():
+    """Isolated in-memory database with two empty surveys"""
+    test_app = Flask(__name__)
+    test_app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(test_app)
+
+    with test_app.app_context():
+        for model in (SurveyFlask, QuestionFlask, ResponseFlask, QuestionResponseFlask):
+            model.__table__.create(db.engine)
+        db.session.add_all([
+            SurveyFlask(id=1, title='Survey', created_by='tester', updated_at=datetime(2024, 1, 1)),
+            SurveyFlask(id=2, title='Other', created_by='tester'),
+        ])
+        db.session.commit()
+        yield test_app
+        db.session.remove()
+
+
+def _add_response(survey_id, is_complete=True, duration=None):
+    response = ResponseFlask(survey_id=survey_id, answers='{}', is_complete=is_complete,
+                             duration_minutes=duration)
+    db.session.add(response)
+    db.session.flush()
+    record_response(survey_id, is_complete, duration)
+    db.session.commit()
+    return response
+
+
+class TestIncrementalMetrics:
+    """SQL-side running sums"""
+
+    def test_counts_rates_and_average(self, metrics_app):
+        with metrics_app.app_context():
+            _add_response(1, True, 4.0)
+            _add_response(1, True, 2.0)
+            _add_response(1, False)
+            _add_response(1, True)
+
+            survey = db.session.get(SurveyFlask, 1)
+            db.session.refresh(survey)
+            assert survey.response_count == 4
+            assert survey.completed_count == 3
+            assert survey.completion_rate == pytest.approx(0.75)
+            assert survey.average_duration == pytest.approx(3.0)
+            assert db.session.get(SurveyFlask, 2).response_count == 0
+
+    def test_responses_do_not_bump_updated_at(self, metrics_app):
+        with metrics_app.app_context():
+            _add_response(1)
+            survey = db.session.get(SurveyFlask, 1)
+            db.session.refresh(survey)
+            assert survey.updated_at == datetime(2024, 1, 1)
+
+    def test_processor_does_not_count_again(self, metrics_app, monkeypatch):
+        monkeypatch.setenv('OPENAI_API_KEY', 'test-key')  # Analyzer client is built eagerly
+        with metrics_app.app_context():
+            response = ResponseFlask(survey_id=1, answers='{}', is_complete=True, duration_minutes=6.0)
+            db.session.add(response)
+            db.session.flush()
+
+            processor = SurveyResponseProcessor()
+            processor._update_survey_metrics(response)
+            processor._update_survey_metrics(response)
+
+            submitted = store_submission(1, {'uuid': 'r-submitted', 'answers': '{}', 'is_complete': True,
+                                             'duration_minutes': 2.0}, PreparedSubmission(rows=[]))
+            processor._update_survey_metrics(submitted)
+
+            survey = db.session.get(SurveyFlask, 1)
+            db.session.refresh(survey)
+            assert (survey.response_count, survey.average_duration) == (2, 4.0)
+
+    def test_reconciler_corrects_drift(self, metrics_app):
+        with metrics_app.app_context():
+            _add_response(1, True, 5.0)
+            _add_response(1, False)
+            assert reconcile_survey_metrics() == 0
+
+            survey = db.session.get(SurveyFlask, 1)
+            survey.response_count = 10
+            survey.completed_count = 0
+            db.session.commit()
+
+            assert reconcile_survey_metrics() == 1
+            db.session.commit()
+            db.session.refresh(survey)
+            assert (survey.response_count, survey.completed_count) == (2, 1)
+            assert survey.completion_rate == pytest.approx(0.5)
+            assert survey.average_duration == pytest.approx(5.0)
+
+    def test_reconciler_keeps_concurrent_increments(self, metrics_app):
+        class SubmitAfterRead:
+            """A response commits between the reconciler's read and its write"""
+            def execute(self, statement, *params):
+                result = db.session.execute(statement, *params)
+                if statement.is_select:
+                    result = result.all()
+                    _add_response(1, True, 1.0)
+                return result
+
+        with metrics_app.app_context():
+            _add_response(1, True, 3.0)
+            survey = db.session.get(SurveyFlask, 1)
+            survey.response_count = 10
+            db.session.commit()
+
+            assert reconcile_survey_metrics(SubmitAfterRead()) == 1
+            db.session.commit()
+            db.session.refresh(survey)
+            assert (survey.response_count, survey.completed_count) == (2, 2)
+            assert survey.average_duration == pytest.approx(2.0)
+
+
+@pytest.mark.performance
+def test_submit_cost_is_independent_of_survey_size(metrics_app):
+    """Recording a response costs the same with 10 or 20k existing responses"""
+    def time_submits(survey_id, count=200):
+        start = time.perf_counter()
+        for _ in range(count):
+            record_response(survey_id, True, 1.0)
+        db.session.commit()
+        return (time.perf_counter() - start) / count
+
+    with metrics_app.app_context():
+        db.session.execute(insert(ResponseFlask), [
+            {'uuid': f"r-{i}", 'survey_id': 1 if i < 20_000 else 2, 'answers': '{}', 'is_complete': True,
+             'duration_minutes': 1.0, 'completion_percentage': 100.0, 'language_used': 'ar',
+             'started_at': datetime.utcnow(), 'created_at': datetime.utcnow()}
+            for i in range(20_010)
+        ])
+        db.session.commit()
+        reconcile_survey_metrics()
+        db.session.commit()
+
+        time_submits(2, 20)  # Warm up
+        small = time_submits(2)
+        large = time_submits(1)
+
+        assert large < small * 3 + 0.001
@@ -0,0 +1,123 @@
+"""
+Tests for the compiled, versioned public survey render cache
+"""
+
+import json
+import os
+import time
+
+import pytest
+from flask import Flask
+
+from app import db
+from models.survey_flask import SurveyFlask, QuestionFlask
+from utils.survey_render_cache import SurveyRenderCache, compile_survey, survey_render_cache
+from utils.template_filters import register_filters
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def render_app(tmp_path):
+    """Isolated app rendering the real survey_public.html template"""
+    test_app = Flask(__name__, template_folder=os.path.join(ROOT, 'templates'),
+                     static_folder=os.path.join(ROOT, 'static'))
+    test_app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    test_app.config['SURVEY_RENDER_CACHE_DIR'] = str(tmp_path)
+    db.init_app(test_app)
+    register_filters(test_app)
+
+    with test_app.app_context():
+        for model in (SurveyFlask, QuestionFlask):
+            model.__table__.create(db.engine)
+        survey = SurveyFlask(id=1, uuid='survey-uuid', short_id='abc12345', title='Service survey',
+                             title_ar='استبيان الخدمة', status='published', created_by='tester')
+        survey.questions = [
+            QuestionFlask(id=1, text='Rate us', type='rating', order_index=1),
+            QuestionFlask(id=2, text='Pick one', type='multiple_choice', order_index=0,
+                          options=json.dumps(['سريع', {'value': 'slow', 'text': 'بطيء'}])),
+        ]
+        db.session.add(survey)
+        db.session.commit()
+        survey_render_cache.invalidate()
+        yield test_app
+        db.session.remove()
+
+
+def test_compiled_payload_is_immutable(render_app):
+    with render_app.app_context():
+        compiled = compile_survey(db.session.get(SurveyFlask, 1))
+        assert compiled.display_title == 'استبيان الخدمة'
+        assert [q.id for q in compiled.questions] == [2, 1]
+        assert compiled.questions[0].options[1]['text'] == 'بطيء'
+        with pytest.raises(Exception):
+            compiled.display_title = 'changed'
+        with pytest.raises(TypeError):
+            compiled.questions[0].options[0]['value'] = 'x'
+        # The ORM row is untouched
+        assert db.session.get(QuestionFlask, 2).options.startswith('[')
+
+
+def test_page_rendered_once_and_reused(render_app):
+    cache = SurveyRenderCache()
+    with render_app.test_request_context():
+        probe = cache.probe('survey-uuid')
+        html = cache.get_page(probe)
+        assert 'استبيان الخدمة' in html and 'بطيء' in html and 'value="slow"' in html
+        assert cache.get_page(probe) is html
+        assert cache.stats == {'hits': 1, 'disk_hits': 0, 'renders': 1}
+
+
+def test_file_tier_shared_between_processes(render_app):
+    with render_app.test_request_context():
+        first, second = SurveyRenderCache(), SurveyRenderCache()
+        html = first.get_page(first.probe('survey-uuid'))
+        assert second.get_page(second.probe('survey-uuid')) == html
+        assert second.stats['renders'] == 0 and second.stats['disk_hits'] == 1
+
+
+def test_edits_change_version(render_app):
+    with render_app.test_request_context():
+        before = survey_render_cache.probe('survey-uuid')
+        survey_render_cache.get_page(before)
+
+        question = db.session.get(QuestionFlask, 1)
+        question.text = 'How satisfied are you?'
+        db.session.commit()
+
+        after = survey_render_cache.probe('survey-uuid')
+        assert after.version != before.version
+        assert 'How satisfied are you?' in survey_render_cache.get_page(after)
+        assert len(os.listdir(render_app.config['SURVEY_RENDER_CACHE_DIR'])) == 1
+
+
+def test_short_id_map(render_app):
+    cache = SurveyRenderCache()
+    with render_app.app_context():
+        assert cache.resolve_short_id('abc12345') == 'survey-uuid'
+        db.session.execute(db.text("UPDATE surveys_flask SET short_id = NULL"))
+        assert cache.resolve_short_id('abc12345') == 'survey-uuid'
+        assert cache.resolve_short_id('missing') is None
+
+
+def test_inactive_survey_probe(render_app):
+    with render_app.app_context():
+        survey = db.session.get(SurveyFlask, 1)
+        survey.status = 'closed'
+        db.session.commit()
+        assert survey_render_cache.probe('survey-uuid').is_active is False
+
+
+@pytest.mark.performance
+def test_cached_hit_is_fast(render_app):
+    """Warm hits skip the ORM, JSON parsing and template rendering"""
+    with render_app.test_request_context():
+        probe = survey_render_cache.probe('survey-uuid')
+        survey_render_cache.get_page(probe)
+
+        start = time.perf_counter()
+        for _ in range(1000):
+            survey_render_cache.get_page(survey_render_cache.probe('survey-uuid'))
+        per_hit_ms = (time.perf_counter() - start) * 1000 / 1000
+
+        assert per_hit_ms < 0.1
@@ -0,0 +1,128 @@
+"""
+Tests for stemmed Arabic full-text search over feedback and text answers
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Flask
+from sqlalchemy import insert
+
+from app import db
+from models.survey_flask import (
+    SurveyFlask, QuestionFlask, ResponseFlask, QuestionResponseFlask, KeywordPostingFlask, KeywordDayFlask,
+    KeywordFormFlask
+)
+from models_unified import Feedback, FeedbackChannel, FeedbackStatus
+from utils.arabic_search import highlight, light_stem, search_terms, search_tokens
+from utils.schema_migrations import run_schema_migrations
+from utils.survey_submission import prepare_answers, store_submission
+from utils.text_search import search
+
+
+def test_light_stem_folds_affixes_and_spelling():
+    assert search_tokens('والخدمات') == search_tokens('الخدمة') == search_tokens('خدمه') == ['خدم']
+    assert search_tokens('للعملاء بالتوصيل') == ['عملاء', 'توصيل']
+    assert light_stem('وصل') == 'وصل' and light_stem('delivery') == 'delivery'
+    assert search_terms('خدمة الخدمات Fast') == ['خدم', 'fast']
+
+
+def test_highlight_marks_original_words_and_escapes():
+    marked = highlight('كانت الخدمةُ <ممتازة> والخدمات سريعة', search_terms('خدمات'))
+    assert marked == 'كانت <mark>الخدمةُ</mark> &lt;ممتازة&gt; <mark>والخدمات</mark> سريعة'
+
+    excerpt = highlight('م ' * 200 + 'التوصيل' + ' ن' * 200, search_terms('توصيل'), max_length=60)
+    assert excerpt.startswith('…') and excerpt.endswith('…') and '<mark>التوصيل</mark>' in excerpt
+
+
+@pytest.fixture
+def search_app():
+    from api.search import search_bp
+
+    test_app = Flask(__name__)
+    test_app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(test_app)
+    test_app.register_blueprint(search_bp)
+    now = datetime.utcnow()
+
+    with test_app.app_context():
+        Feedback.__table__.create(db.engine)
+        for model in (SurveyFlask, QuestionFlask, ResponseFlask, QuestionResponseFlask,
+                      KeywordPostingFlask, KeywordDayFlask, KeywordFormFlask):
+            model.__table__.create(db.engine)
+
+        # Rows written before the index existed, through Core (no ORM listener)
+        db.session.execute(insert(Feedback), [{
+            'content': f'التوصيل متأخر جدا رقم {i}' if i % 2 else f'الموظفين ممتازين رقم {i}',
+            'channel': FeedbackChannel.EMAIL if i % 3 else FeedbackChannel.WHATSAPP,
+            'status': FeedbackStatus.PROCESSED, 'created_at': now - timedelta(hours=i),
+        } for i in range(90)])
+        db.session.commit()
+        run_schema_migrations(db.engine)
+        yield test_app
+        db.session.remove()
+
+
+def test_backfilled_rows_rank_and_page_by_keyset(search_app):
+    with search_app.app_context():
+        db.session.add(Feedback(content='التوصيل التوصيل والتوصيل', channel=FeedbackChannel.SMS))
+        db.session.commit()
+
+        first = search('توصيل', limit=20)
+        assert first['terms'] == ['توصيل']
+        # Highest term frequency relative to length ranks first
+        assert first['results'][0]['highlight'].count('<mark>') == 3
+
+        seen, cursor, pages = [], None, 0
+        while True:
+            page = search('التوصيلات', limit=20, cursor=cursor)
+            seen += [result['id'] for result in page['results']]
+            pages += 1
+            cursor = page['next_cursor']
+            if cursor is None:
+                break
+        assert pages == 3 and len(seen) == len(set(seen)) == 46
+
+        scores = [result['score'] for result in search('توصيل', limit=100)['results']]
+        assert scores == sorted(scores, reverse=True)
+        assert search('توصيل ممتاز')['results'] == []
+        whatsapp = search('توصيل', limit=100, channel='whatsapp')['results']
+        assert len(whatsapp) == 15 and all(result['channel'] == 'whatsapp' for result in whatsapp)
+
+
+def test_index_follows_updates_and_deletes(search_app):
+    with search_app.app_context():
+        feedback = Feedback(content='الأسعار مرتفعة', channel=FeedbackChannel.EMAIL)
+        db.session.add(feedback)
+        db.session.commit()
+        assert [r['id'] for r in search('اسعار')['results']] == [feedback.id]
+
+        feedback.content = 'الخدمة سريعة'
+        db.session.commit()
+        assert search('اسعار')['results'] == []
+        assert feedback.id in [r['id'] for r in search('السريعه')['results']]
+
+        db.session.delete(feedback)
+        db.session.commit()
+        assert search('سريعة')['results'] == []
+
+
+def test_answers_search_api(search_app):
+    client = search_app.test_client()
+    with search_app.app_context():
+        db.session.add(SurveyFlask(id=1, uuid='s-1', title='استبيان', created_by='tester'))
+        db.session.add(QuestionFlask(id=1, survey_id=1, text='رأيك؟', type='textarea'))
+        db.session.commit()
+        form = {'question_1': 'التطبيق بطيء عند الدفع'}
+        store_submission(1, {'uuid': 'r-1', 'answers': '{}'}, prepare_answers(QuestionFlask.query.all(), form))
+
+    response = client.get('/api/search?q=تطبيقات الدفع&source=answers&survey_id=1')
+    data = response.get_json()
+    assert response.status_code == 200 and len(data['results']) == 1
+    assert data['results'][0]['highlight'] == '<mark>التطبيق</mark> بطيء عند <mark>الدفع</mark>'
+    assert client.get('/api/search?q=الدفع&source=answers&survey_id=2').get_json()['results'] == []
+
+    assert client.get('/api/search?q=').status_code == 400
+    assert client.get('/api/search?q=الدفع&source=contacts').status_code == 400
+    assert client.get('/api/search?q=الدفع&cursor=not-a-cursor').status_code == 400
+    assert client.get('/api/search?q=الدفع&channel=pigeon').status_code == 400
@@ -0,0 +1,182 @@
+"""
+Tests for the time-bucketed series engine and the charts built on it
+"""
+
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Flask
+from sqlalchemy import func, insert
+
+from app import db
+from models_unified import Feedback, FeedbackChannel, FeedbackStatus
+from models.survey_flask import SurveyFlask, ResponseFlask
+from utils import cold_archive as archive_module
+from utils.query_plans import capture_queries
+from utils.time_series import GRANULARITIES, bucket_starts, bucketed_totals, fill_series, truncate
+
+# A Sunday, 80 days after January 1st: every week and month bucket in the fixture holds data
+NOW = datetime(2026, 3, 22, 12, 0)
+
+
+class FrozenDatetime(datetime):
+    """datetime whose utcnow() is NOW, for the views under test"""
+
+    @classmethod
+    def utcnow(cls):
+        return NOW
+
+
+def test_truncation_and_bucket_ranges():
+    value = datetime(2024, 12, 31, 17, 45, 12)
+    assert truncate(value, 'hour') == datetime(2024, 12, 31, 17)
+    assert truncate(value, 'day') == datetime(2024, 12, 31)
+    assert truncate(value, 'week') == datetime(2024, 12, 30)  # Monday
+    assert truncate(value, 'month') == datetime(2024, 12, 1)
+    assert bucket_starts(datetime(2024, 11, 20), datetime(2025, 2, 1), 'month') == [
+        datetime(2024, 11, 1), datetime(2024, 12, 1), datetime(2025, 1, 1)
+    ]
+    assert len(bucket_starts(datetime(2025, 1, 1, 5), datetime(2025, 1, 2), 'hour')) == 19
+    with pytest.raises(ValueError):
+        truncate(value, 'fortnight')
+
+
+@pytest.fixture
+def series_app(tmp_path, monkeypatch):
+    from api import dashboard_simplified, executive_dashboard
+    from api.dashboard_simplified import dashboard_simple_bp
+    from api.executive_dashboard import executive_bp
+
+    test_app = Flask(__name__)
+    test_app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(test_app)
+    test_app.register_blueprint(executive_bp, url_prefix='/api/executive-dashboard')
+    test_app.register_blueprint(dashboard_simple_bp)
+    monkeypatch.setattr(archive_module.cold_archive, 'root', str(tmp_path / 'archive'))
+    for module in (executive_dashboard, dashboard_simplified):
+        monkeypatch.setattr(module, 'datetime', FrozenDatetime)
+    rng = random.Random(3)
+    now = NOW
+
+    with test_app.app_context():
+        Feedback.__table__.create(db.engine)
+        SurveyFlask.__table__.create(db.engine)
+        ResponseFlask.__table__.create(db.engine)
+        db.session.execute(insert(Feedback), [{
+            'content': 'الخدمة ' * rng.choice([5, 50, 150]),
+            'channel': rng.choice(list(FeedbackChannel)),
+            'status': rng.choice([FeedbackStatus.PROCESSED] * 3 + [FeedbackStatus.PENDING]),
+            'sentiment_score': rng.uniform(-1, 1) if rng.random() < 0.8 else None,
+            'rating': rng.randint(1, 5) if rng.random() < 0.4 else None,
+            # Leave a few empty days to exercise gap filling
+            'created_at': now - timedelta(days=rng.choice([d for d in range(400) if d % 9]), minutes=rng.randint(0, 1439)),
+        } for _ in range(4000)])
+        db.session.add(SurveyFlask(id=1, uuid='s-1', title='استبيان', created_by='tester'))
+        db.session.execute(insert(ResponseFlask), [{
+            'uuid': f'r-{i}', 'survey_id': 1, 'answers': '{}', 'is_complete': i % 4 != 0,
+            'created_at': now - timedelta(days=rng.randint(0, 80)),
+        } for i in range(500)])
+        db.session.commit()
+        yield test_app, now
+        db.session.remove()
+
+
+@pytest.mark.parametrize('granularity', GRANULARITIES)
+def test_sql_buckets_match_python_truncation(series_app, granularity):
+    test_app, now = series_app
+    start, end = now - timedelta(days=120), now
+    with test_app.app_context():
+        totals = bucketed_totals(db.session, Feedback.created_at, {'volume': func.count(Feedback.id)},
+                                 start, end, granularity)
+        expected = {}
+        for (created_at,) in db.session.query(Feedback.created_at).filter(Feedback.created_at >= start):
+            bucket = truncate(created_at, granularity)
+            expected[bucket] = expected.get(bucket, 0) + 1
+
+    assert {bucket: values['volume'] for bucket, values in totals.items()} == expected
+    series = fill_series(totals, start, end, granularity, ['volume'])
+    assert [point['bucket'] for point in series] == bucket_starts(start, end, granularity)
+    assert sum(point['volume'] for point in series) == sum(expected.values())
+
+
+def test_trend_data_is_one_query_and_matches_per_day_counts(series_app):
+    from api.executive_dashboard import get_trend_data
+
+    test_app, now = series_app
+    with test_app.app_context():
+        with capture_queries(db.engine) as queries:
+            trend = get_trend_data(365)
+        assert len(queries) == 1
+
+        first_day = (now - timedelta(days=365)).replace(hour=0, minute=0, second=0, microsecond=0)
+        rows = db.session.query(Feedback.created_at, Feedback.sentiment_score).filter(
+            Feedback.status == FeedbackStatus.PROCESSED, Feedback.sentiment_score.isnot(None),
+            Feedback.created_at >= first_day
+        ).all()
+
+    assert len(trend['labels']) == len(trend['values']) == 365
+    for offset in (0, 9, 100, 364):
+        day = first_day + timedelta(days=offset)
+        scores = [s for created_at, s in rows if day <= created_at < day + timedelta(days=1)]
+        expected = sum(1 for s in scores if s > 0.1) / len(scores) * 100 if scores else 0
+        assert trend['values'][offset] == pytest.approx(expected)
+    assert trend['values'].count(0) >= 30
+
+
+def test_series_metrics_match_per_row_scoring(series_app):
+    from api.executive_dashboard import _archived_row_totals, feedback_series
+
+    test_app, now = series_app
+    start = truncate(now - timedelta(days=90), 'week')
+    with test_app.app_context():
+        series = feedback_series(start, now, 'week')
+        rows = db.session.query(Feedback).filter(Feedback.created_at >= start).all()
+
+    # The Python scoring used for archived rows must agree with the SQL expressions
+    totals = {}
+    for feedback in rows:
+        row_totals = _archived_row_totals({
+            'status': feedback.status.value, 'sentiment_score': feedback.sentiment_score,
+            'confidence_score': feedback.confidence_score, 'rating': feedback.rating,
+            'content': feedback.content, 'channel': feedback.channel.value,
+        })
+        bucket = totals.setdefault(truncate(feedback.created_at, 'week'), dict.fromkeys(row_totals, 0))
+        for name, value in row_totals.items():
+            bucket[name] += value
+
+    assert len(series) >= 13
+    for point in series:
+        if not point['volume']:
+            assert point['bucket'] not in totals
+            continue
+        expected = totals[point['bucket']]
+        assert point['volume'] == expected['volume']
+        assert point['nps'] == pytest.approx((expected['promoters'] - expected['detractors']) / expected['nps_total'] * 100)
+        assert point['ces'] == pytest.approx(expected['effort_sum'] / expected['effort_total'])
+        assert point['sentiment'] == pytest.approx(expected['sentiment_sum'] / expected['scored'])
+
+
+def test_trend_endpoint_validates_granularity(series_app):
+    test_app, now = series_app
+    client = test_app.test_client()
+    response = client.get('/api/executive-dashboard/trends?days=90&granularity=week')
+    assert response.status_code == 200
+    payload = response.get_json()
+    assert len(payload['series']) in (13, 14) and sum(p['volume'] for p in payload['series']) > 0
+    assert client.get('/api/executive-dashboard/trends?granularity=fortnight').status_code == 400
+
+
+def test_chart_data_uses_stored_series(series_app):
+    test_app, now = series_app
+    client = test_app.test_client()
+
+    csat = client.get('/api/analytics/chart-data?metric=csat&time_range=90d').get_json()
+    assert csat['data_source'] == 'real'
+    assert len(csat['data']['labels']) in (13, 14)
+
+    completion = client.get('/api/analytics/chart-data?metric=completion&time_range=1y').get_json()
+    values = [v for v in completion['data']['values'] if v is not None]
+    assert 3 <= len(values) <= 4 and all(70 <= v <= 80 for v in values)
+    assert len(completion['data']['labels']) in (12, 13)
+
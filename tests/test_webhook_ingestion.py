@@ -0,0 +1,202 @@
+"""
+Tests for the batched, idempotent WhatsApp/SMS webhook ingestion pipeline
+"""
+
+import time
+import pytest
+from flask import Flask
+
+from app import db
+from models_unified import Base, FeedbackChannel
+from models.survey_delivery import (
+    SurveyTemplate, SurveyCampaign, SurveyDelivery, SurveyResponse, DeliveryStatus
+)
+from models.webhook_events import WebhookEvent, WebhookEventStatus
+from utils.webhook_ingestion import (
+    WebhookEventQueue, WebhookBatchConsumer, parse_whatsapp_payload, parse_sms_form, replay_events, webhook_queue
+)
+from api.survey_distribution import webhook_bp
+
+
+@pytest.fixture
+def ingestion_app():
+    """Isolated in-memory database with the queue and delivery tables"""
+    test_app = Flask(__name__)
+    test_app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(test_app)
+    test_app.register_blueprint(webhook_bp)
+
+    with test_app.app_context():
+        WebhookEvent.__table__.create(db.engine)
+        Base.metadata.create_all(db.engine, tables=[
+            SurveyTemplate.__table__, SurveyCampaign.__table__,
+            SurveyDelivery.__table__, SurveyResponse.__table__
+        ])
+
+        db.session.add(SurveyCampaign(id=1, template_id=1, name='حملة', target_audience={},
+                                      channels_config={}, delivered_count=0, response_count=0))
+        db.session.add(SurveyDelivery(id=1, campaign_id=1, channel=FeedbackChannel.WHATSAPP,
+                                      status=DeliveryStatus.SENT, delivery_token='tok-1',
+                                      recipient_whatsapp='+966501234567', recipient_id='cust_001'))
+        db.session.add(SurveyDelivery(id=2, campaign_id=1, channel=FeedbackChannel.SMS,
+                                      status=DeliveryStatus.SENT, delivery_token='tok-2',
+                                      recipient_phone='+966507654321', recipient_id='cust_002'))
+        db.session.commit()
+        yield test_app
+        db.session.remove()
+
+
+def whatsapp_reply(message_id, sender='966501234567', text='الخدمة ممتازة'):
+    return {'entry': [{'changes': [{'value': {'messages': [
+        {'id': message_id, 'from': sender, 'type': 'text', 'text': {'body': text}}
+    ]}}]}]}
+
+
+def whatsapp_status(message_id, status, token='tok-1'):
+    return {'entry': [{'changes': [{'value': {'statuses': [
+        {'id': message_id, 'status': status, 'biz_opaque_callback_data': token}
+    ]}}]}]}
+
+
+class TestWebhookParsing:
+    """Provider payload normalization"""
+
+    def test_status_transitions_have_distinct_dedup_keys(self):
+        sent = parse_whatsapp_payload(whatsapp_status('wamid.1', 'sent'))
+        read = parse_whatsapp_payload(whatsapp_status('wamid.1', 'read'))
+        assert sent[0].provider_message_id != read[0].provider_message_id
+        assert sent[0].delivery_token == 'tok-1'
+
+    def test_sms_inbound_and_status(self):
+        inbound = parse_sms_form({'MessageSid': 'SM1', 'From': '+966507654321', 'Body': 'جيد'})
+        status = parse_sms_form({'MessageSid': 'SM2', 'MessageStatus': 'delivered'})
+        assert inbound[0].event_type == 'message'
+        assert status[0].event_type == 'status'
+        assert parse_sms_form({'Body': 'no sid'}) == []
+
+
+class TestWebhookIngestion:
+    """Acknowledge path, dedup and batch application"""
+
+    def test_provider_retries_are_deduplicated(self, ingestion_app):
+        queue = WebhookEventQueue()
+        with ingestion_app.app_context():
+            first = queue.enqueue(parse_whatsapp_payload(whatsapp_reply('wamid.A')))
+            retry = queue.enqueue(parse_whatsapp_payload(whatsapp_reply('wamid.A')))
+
+            assert first['accepted'] == 1
+            assert retry == {'received': 1, 'accepted': 0, 'duplicates': 1}
+            assert db.session.query(WebhookEvent).count() == 1
+
+    def test_batch_applies_replies_and_statuses(self, ingestion_app):
+        queue = WebhookEventQueue()
+        with ingestion_app.app_context():
+            queue.enqueue(parse_whatsapp_payload(whatsapp_status('wamid.out', 'read')))
+            queue.enqueue(parse_whatsapp_payload(whatsapp_status('wamid.out', 'sent')))
+            queue.enqueue(parse_whatsapp_payload(whatsapp_reply('wamid.B')))
+            queue.enqueue(parse_sms_form({'MessageSid': 'SM1', 'From': '+966507654321', 'Body': 'سيء'}))
+            queue.enqueue(parse_sms_form({'MessageSid': 'SM9', 'From': '+10000000000', 'Body': '?'}))
+
+            consumed = WebhookBatchConsumer(queue=queue).drain()
+            assert consumed == 5
+
+            deliveries = {d.id: d for d in db.session.query(SurveyDelivery).all()}
+            assert deliveries[1].status == DeliveryStatus.DELIVERED
+            assert deliveries[2].status == DeliveryStatus.DELIVERED
+
+            responses = {r.delivery_id: r for r in db.session.query(SurveyResponse).all()}
+            assert responses[1].responses == {'wamid.B': 'الخدمة ممتازة'}
+            assert responses[2].submission_channel == FeedbackChannel.SMS
+
+            campaign = db.session.get(SurveyCampaign, 1)
+            assert campaign.response_count == 2
+            assert campaign.delivered_count == 2
+
+            orphaned = db.session.query(WebhookEvent).filter_by(status=WebhookEventStatus.ORPHANED).count()
+            assert orphaned == 1
+            assert queue.metrics()['queue_depth'] == 0
+
+    def test_replay_is_idempotent(self, ingestion_app):
+        queue = WebhookEventQueue()
+        with ingestion_app.app_context():
+            queue.enqueue(parse_whatsapp_payload(whatsapp_reply('wamid.C')))
+            WebhookBatchConsumer(queue=queue).drain()
+
+            result = replay_events(statuses=[WebhookEventStatus.APPLIED])
+            assert result == {'matched': 1, 'processed': 1}
+
+            assert db.session.query(SurveyResponse).count() == 1
+            assert db.session.get(SurveyCampaign, 1).response_count == 1
+
+    def test_bad_event_does_not_fail_its_batch(self, ingestion_app, monkeypatch):
+        queue = WebhookEventQueue()
+        with ingestion_app.app_context():
+            queue.enqueue(parse_whatsapp_payload(whatsapp_reply('wamid.D1')))
+            db.session.add(WebhookEvent(provider='whatsapp', provider_message_id='wamid.bad', event_type='message',
+                                        delivery_token='tok-1', payload='{not json'))
+            db.session.commit()
+            queue.enqueue(parse_sms_form({'MessageSid': 'SM5', 'From': '+966507654321', 'Body': 'جيد'}))
+
+            consumer = WebhookBatchConsumer(queue=queue)
+            assert consumer.drain() == 3
+            events = {e.provider_message_id: e for e in db.session.query(WebhookEvent).all()}
+            assert events['wamid.D1'].status == events['SM5'].status == WebhookEventStatus.APPLIED
+            assert events['wamid.D1'].attempts == events['SM5'].attempts == 1
+            assert events['wamid.bad'].status == WebhookEventStatus.PENDING and events['wamid.bad'].attempts == 1
+            assert db.session.query(SurveyResponse).count() == 2
+
+            # The failed event waits out the retry delay, then is parked after MAX_ATTEMPTS
+            assert consumer.drain() == 0
+            monkeypatch.setattr('utils.webhook_ingestion.RETRY_DELAY_SECONDS', 0)
+            monkeypatch.setattr('utils.webhook_ingestion.MAX_ATTEMPTS', 3)
+            consumer.drain()
+            db.session.expire_all()
+            bad = db.session.query(WebhookEvent).filter_by(provider_message_id='wamid.bad').one()
+            assert bad.status == WebhookEventStatus.FAILED and bad.attempts == 3
+
+    def test_endpoints_acknowledge_and_consumer_applies(self, ingestion_app, monkeypatch):
+        from app import app
+        assert 'survey_webhooks.whatsapp_webhook' in {rule.endpoint for rule in app.url_map.iter_rules()}
+
+        monkeypatch.setattr(webhook_queue, '_saturation', (0.0, False))
+        client = ingestion_app.test_client()
+        response = client.post('/api/surveys/webhook/whatsapp', json=whatsapp_reply('wamid.http'))
+        assert response.status_code == 200 and response.get_json()['accepted'] == 1
+        response = client.post('/api/surveys/webhook/sms', data={'MessageSid': 'SM5', 'MessageStatus': 'delivered'})
+        assert response.status_code == 200 and response.mimetype == 'text/xml'
+
+        with ingestion_app.app_context():
+            assert WebhookBatchConsumer(queue=webhook_queue).drain() == 2
+            response = db.session.query(SurveyResponse).filter_by(delivery_id=1).one()
+            assert response.responses == {'wamid.http': 'الخدمة ممتازة'}
+
+    def test_saturated_queue_defers_providers(self, ingestion_app, monkeypatch):
+        monkeypatch.setattr(webhook_queue, 'high_watermark', 1)
+        monkeypatch.setattr(webhook_queue, '_saturation', (0.0, False))
+        client = ingestion_app.test_client()
+        assert client.post('/api/surveys/webhook/whatsapp', json=whatsapp_reply('wamid.D1')).status_code == 200
+
+        monkeypatch.setattr(webhook_queue, '_saturation', (0.0, False))
+        deferred = client.post('/api/surveys/webhook/whatsapp', json=whatsapp_reply('wamid.D2'))
+        assert deferred.status_code == 503 and deferred.headers['Retry-After']
+        assert client.post('/api/surveys/webhook/sms', data={'MessageSid': 'SM6', 'Body': 'x'}).status_code == 503
+        with ingestion_app.app_context():
+            assert db.session.query(WebhookEvent).count() == 1
+
+    @pytest.mark.performance
+    def test_sustains_1k_events_per_second(self, ingestion_app):
+        queue = WebhookEventQueue()
+        events = []
+        for i in range(1000):
+            payload = whatsapp_reply(f'wamid.load.{i}') if i % 2 else whatsapp_status(f'wamid.load.{i}', 'delivered')
+            events.extend(parse_whatsapp_payload(payload))
+
+        with ingestion_app.app_context():
+            start = time.perf_counter()
+            for offset in range(0, len(events), 50):
+                queue.enqueue(events[offset:offset + 50])
+            WebhookBatchConsumer(queue=queue).drain()
+            elapsed = time.perf_counter() - start
+
+            assert db.session.query(WebhookEvent).filter_by(status=WebhookEventStatus.APPLIED).count() == 1000
+            assert elapsed < 1.0, f"1000 events took {elapsed:.2f}s"
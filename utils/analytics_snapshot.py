@@ -0,0 +1,372 @@
+"""
+Analytics Snapshot
+In-process columnar copy of the dashboard fields, held in NumPy arrays and refreshed incrementally
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set
+
+from sqlalchemy import and_, case, func, or_, select
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+from models_unified import Feedback, FeedbackChannel, FeedbackStatus
+from models.survey_flask import QuestionFlask, ResponseFlask, QuestionResponseFlask
+from utils.write_tracking import on_delete
+
+logger = logging.getLogger(__name__)
+
+CHANNELS: List[FeedbackChannel] = list(FeedbackChannel)
+STATUSES: List[FeedbackStatus] = list(FeedbackStatus)
+CHANNEL_CODES = {channel: code for code, channel in enumerate(CHANNELS)}
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+
+# Rows changed this close to the high-water mark are re-read, covering transactions
+# that committed after a later updated_at was already observed
+REFRESH_OVERLAP = timedelta(seconds=5)
+MICROS_PER_DAY = 86_400_000_000
+
+# Deletes leave no updated_at behind: rows deleted from these tables are pruned from the frame,
+# while a deleted answer changes its response's aggregates and so rebuilds the responses frame
+PRUNED_BY = {'feedback': Feedback.__table__, 'responses': ResponseFlask.__table__}
+REBUILT_BY = {'responses': {QuestionResponseFlask.__tablename__}}
+
+# Column layouts. Bytes per row (and so MB per million rows):
+#   feedback  35 = id 8 + created 8 + sentiment 8 + confidence 4 + content_length 4
+#                  + channel 1 + status 1 + rating 1
+#   responses 71 = id 8 + created 8 + survey_id 4 + device 2 + complete 1 + duration 8
+#                  + rating_sum 8 + rating_count 4 + sentiment_sum 8 + confidence_sum 8
+#                  + sentiment_count 4 + positive 4 + negative 4
+# A refresh builds the next arrays before swapping, so peak usage is about twice that.
+FEEDBACK_COLUMNS = {
+    'id': 'i8', 'created': 'i8', 'sentiment': 'f8', 'confidence': 'f4',
+    'content_length': 'i4', 'channel': 'i1', 'status': 'i1', 'rating': 'i1',
+}
+RESPONSE_COLUMNS = {
+    'id': 'i8', 'created': 'i8', 'survey_id': 'i4', 'device': 'i2', 'complete': '?', 'duration': 'f8',
+    'rating_sum': 'f8', 'rating_count': 'i4', 'sentiment_sum': 'f8', 'confidence_sum': 'f8',
+    'sentiment_count': 'i4', 'positive': 'i4', 'negative': 'i4',
+}
+
+
+def to_micros(value: datetime) -> int:
+    """Naive UTC datetime to int64 microseconds since the epoch"""
+    return (value - datetime(1970, 1, 1)) // timedelta(microseconds=1)
+
+
+def _micros_array(values) -> 'np.ndarray':
+    return np.array(values, dtype='datetime64[us]').astype(np.int64)
+
+
+class ColumnFrame:
+    """Immutable set of equal-length column arrays, sorted by id"""
+
+    layout: Dict[str, str] = {}
+
+    def __init__(self, columns: Optional[Dict[str, 'np.ndarray']] = None, **labels):
+        self.columns = columns or {name: np.empty(0, dtype) for name, dtype in self.layout.items()}
+        self.__dict__.update(labels)
+
+    def __len__(self) -> int:
+        return len(self.columns['id'])
+
+    def __getattr__(self, name):
+        try:
+            return self.__dict__['columns'][name]
+        except KeyError:
+            raise AttributeError(name)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in self.columns.values())
+
+    def window(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+               end_inclusive: bool = False) -> 'np.ndarray':
+        """Boolean mask of rows created in [start, end) (or [start, end] when end_inclusive)"""
+        mask = np.ones(len(self), dtype=bool)
+        if start is not None:
+            mask &= self.created >= to_micros(start)
+        if end is not None:
+            mask &= self.created <= to_micros(end) if end_inclusive else self.created < to_micros(end)
+        return mask
+
+    def daily_bins(self, mask: 'np.ndarray', first_day: datetime, days: int,
+                   weights: Optional['np.ndarray'] = None) -> 'np.ndarray':
+        """Per-day counts (or weight sums) of masked rows for days starting at first_day"""
+        offsets = self.created - to_micros(first_day)
+        mask = mask & (offsets >= 0) & (offsets < days * MICROS_PER_DAY)
+        bins = offsets[mask] // MICROS_PER_DAY
+        return np.bincount(bins, weights=None if weights is None else weights[mask], minlength=days)
+
+    def merged(self, incoming: Dict[str, 'np.ndarray'], **labels) -> 'ColumnFrame':
+        """New frame with incoming rows replacing same-id rows and the rest appended"""
+        ids = self.id
+        if len(ids):
+            positions = np.searchsorted(ids, incoming['id'])
+            exists = positions < len(ids)
+            exists[exists] = ids[positions[exists]] == incoming['id'][exists]
+        else:
+            positions = np.zeros(len(incoming['id']), dtype=np.int64)
+            exists = np.zeros(len(incoming['id']), dtype=bool)
+
+        columns = {}
+        for name, array in self.columns.items():
+            updated = array.copy()
+            updated[positions[exists]] = incoming[name][exists]
+            columns[name] = np.concatenate([updated, incoming[name][~exists]])
+        order = np.argsort(columns['id'], kind='stable')
+        if np.any(order != np.arange(len(order))):
+            columns = {name: array[order] for name, array in columns.items()}
+        return type(self)(columns, **labels)
+
+    def restricted_to(self, ids: 'np.ndarray') -> 'ColumnFrame':
+        """Frame without the rows whose id is not in ids"""
+        keep = np.isin(self.id, ids)
+        if keep.all():
+            return self
+        labels = {name: value for name, value in self.__dict__.items() if name != 'columns'}
+        return type(self)({name: array[keep] for name, array in self.columns.items()}, **labels)
+
+
+class FeedbackFrame(ColumnFrame):
+    """Feedback columns: channel/status are codes into CHANNELS/STATUSES, rating 0 means none"""
+    layout = FEEDBACK_COLUMNS
+
+
+class ResponseFrame(ColumnFrame):
+    """Survey responses with their question answers pre-aggregated per response"""
+    layout = RESPONSE_COLUMNS
+
+    def __init__(self, columns=None, device_types: Optional[List[str]] = None):
+        super().__init__(columns, device_types=list(device_types or []))
+
+
+class AnalyticsSnapshot:
+    """Lazily built, incrementally refreshed snapshot of feedback and survey responses"""
+
+    def __init__(self, max_age: float = 5.0, rebuild_interval: float = 3600.0):
+        self.enabled = False
+        self.max_age = max_age
+        self.rebuild_interval = rebuild_interval
+        self._frames: Dict[str, ColumnFrame] = {}
+        self._watermarks: Dict[str, Optional[datetime]] = {}
+        self._refreshed_at: Dict[str, float] = {}
+        self._built_at: Dict[str, float] = {}
+        self._refresh_ms: Dict[str, float] = {}
+        self._pruning: Set[str] = set()
+        self._rebuilding: Set[str] = set()
+        self._locks = {'feedback': threading.Lock(), 'responses': threading.Lock()}
+
+    @property
+    def available(self) -> bool:
+        return self.enabled and NUMPY_AVAILABLE
+
+    def feedback(self) -> Optional[FeedbackFrame]:
+        return self._get('feedback')
+
+    def responses(self) -> Optional[ResponseFrame]:
+        return self._get('responses')
+
+    def invalidate(self):
+        """Drop the frames so the next access rebuilds them"""
+        self._frames.clear()
+        self._watermarks.clear()
+        self._built_at.clear()
+        self._refreshed_at.clear()
+        self._pruning.clear()
+        self._rebuilding.clear()
+
+    def mark_stale(self):
+        """Make the next access pull new rows instead of trusting max_age (after a known write)"""
+        self._refreshed_at.clear()
+
+    def drop_deleted(self, tables: Set[str]):
+        """After a commit deleted rows from tables, drop them from the frames on their next access"""
+        for name, table in PRUNED_BY.items():
+            if tables & REBUILT_BY.get(name, set()):
+                self._rebuilding.add(name)
+            elif table.name in tables:
+                self._pruning.add(name)
+            else:
+                continue
+            self._refreshed_at.pop(name, None)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return {
+            name: {
+                'rows': len(frame),
+                'bytes': frame.nbytes,
+                'bytes_per_row': frame.nbytes / len(frame) if len(frame) else 0,
+                'age_seconds': time.monotonic() - self._refreshed_at.get(name, 0),
+                'refresh_ms': self._refresh_ms.get(name, 0.0),
+            }
+            for name, frame in self._frames.items()
+        }
+
+    def _get(self, name: str) -> Optional[ColumnFrame]:
+        """Current frame, refreshed first when older than max_age"""
+        if not self.available:
+            return None
+        current = self._frames.get(name)
+        if current is not None and time.monotonic() - self._refreshed_at.get(name, 0) < self.max_age:
+            return current
+        # One thread refreshes; the others keep serving the previous frame
+        lock = self._locks[name]
+        if not lock.acquire(blocking=current is None):
+            return current
+        try:
+            if current is not None and time.monotonic() - self._refreshed_at.get(name, 0) < self.max_age:
+                return self._frames[name]
+            self.refresh(name)
+        except Exception as e:
+            logger.error(f"Analytics snapshot refresh failed for {name}: {e}")
+            if current is None:
+                return None
+        finally:
+            lock.release()
+        return self._frames.get(name)
+
+    def refresh(self, name: str):
+        """Pull rows changed since the high-water mark (or everything when a rebuild is due)"""
+        from app import db
+
+        started = time.monotonic()
+        rebuild = (name not in self._frames or name in self._rebuilding
+                   or started - self._built_at.get(name, 0) >= self.rebuild_interval)
+        prune = not rebuild and name in self._pruning
+        # Cleared before reading, so a delete that commits meanwhile is handled by the next refresh
+        self._rebuilding.discard(name)
+        self._pruning.discard(name)
+        since = None if rebuild else self._watermarks.get(name)
+        current = None if rebuild else self._frames[name]
+
+        with db.engine.connect() as conn:
+            if name == 'feedback':
+                frame, watermark = self._load_feedback(conn, current, since)
+            else:
+                frame, watermark = self._load_responses(conn, current, since)
+            if prune:
+                table = PRUNED_BY[name]
+                ids = conn.execute(select(table.c.id)).scalars().all()
+                frame = frame.restricted_to(np.array(ids, dtype='i8'))
+
+        self._frames[name] = frame
+        self._watermarks[name] = watermark or self._watermarks.get(name)
+        self._refreshed_at[name] = time.monotonic()
+        self._refresh_ms[name] = (self._refreshed_at[name] - started) * 1000
+        if rebuild:
+            self._built_at[name] = self._refreshed_at[name]
+            logger.info(f"Analytics snapshot built for {name}: {len(frame)} rows, {frame.nbytes / 1e6:.1f} MB "
+                        f"in {self._refresh_ms[name]:.0f} ms")
+
+    def _load_feedback(self, conn, current: Optional[FeedbackFrame], since: Optional[datetime]):
+        query = select(
+            Feedback.id, Feedback.created_at, Feedback.sentiment_score, Feedback.confidence_score,
+            func.coalesce(func.length(Feedback.content), 0), Feedback.channel, Feedback.status,
+            Feedback.rating, Feedback.updated_at
+        )
+        if since:
+            query = query.where(or_(Feedback.updated_at >= since - REFRESH_OVERLAP,
+                                    Feedback.id > int(current.id[-1]) if len(current) else True))
+        rows = conn.execute(query.order_by(Feedback.id)).all()
+
+        incoming = {
+            'id': np.array([r[0] for r in rows], dtype='i8'),
+            'created': _micros_array([r[1] for r in rows]),
+            'sentiment': np.array([np.nan if r[2] is None else r[2] for r in rows], dtype='f8'),
+            'confidence': np.array([r[3] or 0.0 for r in rows], dtype='f4'),
+            'content_length': np.array([r[4] for r in rows], dtype='i4'),
+            'channel': np.array([CHANNEL_CODES.get(r[5], -1) for r in rows], dtype='i1'),
+            'status': np.array([STATUS_CODES.get(r[6], -1) for r in rows], dtype='i1'),
+            'rating': np.array([r[7] or 0 for r in rows], dtype='i1'),
+        }
+        watermark = max((r[8] for r in rows if r[8]), default=None)
+        frame = (current or FeedbackFrame()).merged(incoming)
+        return frame, watermark
+
+    def _load_responses(self, conn, current: Optional[ResponseFrame], since: Optional[datetime]):
+        query = select(
+            ResponseFlask.id, ResponseFlask.created_at, ResponseFlask.survey_id, ResponseFlask.device_type,
+            ResponseFlask.is_complete, ResponseFlask.duration_minutes, ResponseFlask.updated_at
+        )
+        answers_changed = None
+        if since:
+            answers_changed = select(QuestionResponseFlask.response_id).where(
+                QuestionResponseFlask.updated_at >= since - REFRESH_OVERLAP
+            )
+            query = query.where(or_(
+                ResponseFlask.updated_at >= since - REFRESH_OVERLAP,
+                ResponseFlask.id > int(current.id[-1]) if len(current) else True,
+                ResponseFlask.id.in_(answers_changed)
+            ))
+        rows = conn.execute(query.order_by(ResponseFlask.id)).all()
+
+        is_rating = and_(QuestionFlask.type.in_(['rating', 'nps']), QuestionResponseFlask.answer_number.isnot(None))
+        has_sentiment = and_(QuestionResponseFlask.sentiment_score.isnot(None),
+                             QuestionResponseFlask.answer_text.isnot(None))
+        sentiment = QuestionResponseFlask.sentiment_score
+        aggregates = select(
+            QuestionResponseFlask.response_id,
+            func.sum(case((is_rating, QuestionResponseFlask.answer_number), else_=0.0)),
+            func.count(case((is_rating, 1))),
+            func.sum(case((has_sentiment, sentiment), else_=0.0)),
+            func.sum(case((has_sentiment, func.coalesce(QuestionResponseFlask.confidence_score, 0.0)), else_=0.0)),
+            func.count(case((has_sentiment, 1))),
+            func.count(case((and_(has_sentiment, sentiment > 0.1), 1))),
+            func.count(case((and_(has_sentiment, sentiment < -0.1), 1))),
+        ).join(QuestionFlask, QuestionFlask.id == QuestionResponseFlask.question_id)
+        if since:
+            aggregates = aggregates.where(QuestionResponseFlask.response_id.in_([r[0] for r in rows]))
+        by_response = {r[0]: r[1:] for r in conn.execute(aggregates.group_by(QuestionResponseFlask.response_id))}
+
+        device_types = list(current.device_types) if current is not None else []
+        device_codes = {device: code for code, device in enumerate(device_types)}
+        for row in rows:
+            if row[3] is not None and row[3] not in device_codes:
+                device_codes[row[3]] = len(device_types)
+                device_types.append(row[3])
+
+        empty = (0.0, 0, 0.0, 0.0, 0, 0, 0)
+        answers = [by_response.get(r[0], empty) for r in rows]
+        incoming = {
+            'id': np.array([r[0] for r in rows], dtype='i8'),
+            'created': _micros_array([r[1] for r in rows]),
+            'survey_id': np.array([r[2] for r in rows], dtype='i4'),
+            'device': np.array([device_codes.get(r[3], -1) for r in rows], dtype='i2'),
+            'complete': np.array([bool(r[4]) for r in rows], dtype='?'),
+            'duration': np.array([r[5] or 0.0 for r in rows], dtype='f8'),
+        }
+        for index, name in enumerate(['rating_sum', 'rating_count', 'sentiment_sum', 'confidence_sum',
+                                      'sentiment_count', 'positive', 'negative']):
+            incoming[name] = np.array([a[index] or 0 for a in answers], dtype=RESPONSE_COLUMNS[name])
+
+        watermark = max((r[6] for r in rows if r[6]), default=None)
+        frame = (current or ResponseFrame()).merged(incoming, device_types=device_types)
+        return frame, watermark
+
+
+# Process-wide snapshot, configured by init_analytics_snapshot()
+analytics_snapshot = AnalyticsSnapshot()
+
+
+@on_delete
+def _drop_deleted_rows(tables: Set[str]):
+    analytics_snapshot.drop_deleted(tables)
+
+
+def init_analytics_snapshot(app) -> AnalyticsSnapshot:
+    """Apply ANALYTICS_SNAPSHOT_* settings to the shared snapshot"""
+    analytics_snapshot.enabled = app.config.get('ANALYTICS_SNAPSHOT_ENABLED', False)
+    analytics_snapshot.max_age = app.config.get('ANALYTICS_SNAPSHOT_MAX_AGE', 5)
+    analytics_snapshot.rebuild_interval = app.config.get('ANALYTICS_SNAPSHOT_REBUILD_INTERVAL', 3600)
+    if analytics_snapshot.enabled and not NUMPY_AVAILABLE:
+        logger.warning("ANALYTICS_SNAPSHOT_ENABLED is set but numpy is not installed; serving from the database")
+    return analytics_snapshot
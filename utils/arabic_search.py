@@ -0,0 +1,126 @@
+"""
+Arabic search normalization
+Deterministic folding used for search keys so spelling variants of a name match each other
+"""
+
+import html
+import re
+from typing import Iterable, List
+
+# Character folding applied with str.translate (single pass, C speed)
+_FOLD_MAP = {
+    # Alef variants -> bare alef
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا',
+    # Taa marbuta -> haa, alef maqsura / yaa hamza -> yaa, waw hamza -> waw
+    'ة': 'ه', 'ى': 'ي', 'ئ': 'ي', 'ؤ': 'و',
+    # Persian/Urdu letter forms common in pasted text
+    'ک': 'ك', 'ی': 'ي',
+}
+
+# Arabic-Indic and Eastern Arabic-Indic digits -> ASCII
+_FOLD_MAP.update({chr(0x0660 + i): str(i) for i in range(10)})
+_FOLD_MAP.update({chr(0x06F0 + i): str(i) for i in range(10)})
+
+_TRANSLATION = str.maketrans(_FOLD_MAP)
+
+# Harakat, superscript alef, Quranic marks and tatweel are dropped entirely
+_DELETE_PATTERN = re.compile(r'[\u0610-\u061A\u064B-\u065F\u0670\u06D6-\u06ED\u0640]')
+_WHITESPACE_PATTERN = re.compile(r'\s+')
+_WORD_PATTERN = re.compile(r'\w+')
+# Words of the original text, marks included so highlighting keeps them intact
+_RAW_WORD_PATTERN = re.compile(r'[\w\u0610-\u061A\u064B-\u065F\u0670\u06D6-\u06ED\u0640]+')
+_ARABIC_LETTER = re.compile(r'[\u0621-\u064A]')
+
+# Light stemming affixes (Light10-style), written in folded form: ة is already ه and ى is ي
+_STEM_PREFIXES = ('وال', 'بال', 'كال', 'فال', 'لل', 'ال')
+_STEM_SUFFIXES = ('ها', 'ان', 'ات', 'ون', 'ين', 'يه', 'ه', 'ي')
+
+
+def normalize_for_search(text) -> str:
+    """
+    Fold text into its search key
+
+    "أحمد", "احمد" and "إحمَد" all become "احمد"; Latin text is casefolded
+    so "Ahmed@Example.com" matches "ahmed@example.com".
+    """
+    if not text:
+        return ""
+    text = _DELETE_PATTERN.sub('', str(text))
+    text = text.translate(_TRANSLATION).casefold()
+    return _WHITESPACE_PATTERN.sub(' ', text).strip()
+
+
+def build_search_text(*parts) -> str:
+    """Combine several fields into one normalized, space-separated search key"""
+    return ' '.join(filter(None, (normalize_for_search(part) for part in parts)))
+
+
+def prefix_upper_bound(prefix: str) -> str:
+    """Exclusive upper bound for an index-friendly range scan of a prefix"""
+    return prefix + '\U0010ffff'
+
+
+def light_stem(word: str) -> str:
+    """
+    Strip common Arabic prefixes and suffixes from a folded word
+
+    "والخدمات" and "الخدمه" both become "خدم"; stems keep at least two letters
+    and non-Arabic words are returned unchanged.
+    """
+    if not _ARABIC_LETTER.match(word):
+        return word
+    if len(word) > 3 and word.startswith('و'):
+        word = word[1:]
+    for prefix in _STEM_PREFIXES:
+        if word.startswith(prefix) and len(word) - len(prefix) > 1:
+            word = word[len(prefix):]
+            break
+    for suffix in _STEM_SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) > 1:
+            word = word[:-len(suffix)]
+    return word
+
+
+def search_tokens(text) -> List[str]:
+    """Folded, stemmed words of a text in order"""
+    return [light_stem(word) for word in _WORD_PATTERN.findall(normalize_for_search(text))]
+
+
+def build_search_document(*parts) -> str:
+    """Space-separated stems stored for full-text indexing"""
+    return ' '.join(token for part in parts for token in search_tokens(part))
+
+
+def search_terms(query) -> List[str]:
+    """Distinct stems of a search query, in query order"""
+    return list(dict.fromkeys(search_tokens(query)))
+
+
+def highlight(text, terms: Iterable[str], max_length: int = 200, tag: str = 'mark') -> str:
+    """
+    HTML-escaped excerpt of text with words matching any of the stemmed terms wrapped in <tag>
+
+    The excerpt is centred on the first match when the text is longer than max_length.
+    """
+    text = str(text or '')
+    terms = set(terms)
+    matches = [m for m in _RAW_WORD_PATTERN.finditer(text) if terms & set(search_tokens(m.group()))]
+
+    start, end = 0, len(text)
+    if len(text) > max_length:
+        first = matches[0].start() if matches else 0
+        start = max(0, min(first - max_length // 4, len(text) - max_length))
+        end = start + max_length
+
+    pieces = ['…'] if start > 0 else []
+    position = start
+    for match in matches:
+        if match.start() < start or match.end() > end:
+            continue
+        pieces.append(html.escape(text[position:match.start()]))
+        pieces.append(f"<{tag}>{html.escape(match.group())}</{tag}>")
+        position = match.end()
+    pieces.append(html.escape(text[position:end]))
+    if end < len(text):
+        pieces.append('…')
+    return ''.join(pieces)
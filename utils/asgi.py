@@ -0,0 +1,334 @@
+"""
+ASGI Serving
+Native async routes on the event loop, with every other path handed to the Flask WSGI app on a thread pool
+"""
+
+import asyncio
+import io
+import json
+import logging
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+from urllib.parse import parse_qsl
+
+from utils.json_provider import dumps_bytes
+from utils.metrics import IN_PROGRESS, KNOWN_METHODS, REQUEST_LATENCY, REQUESTS, registry
+
+logger = logging.getLogger(__name__)
+
+MAX_BODY_BYTES = 10 * 1024 * 1024
+
+
+class AsgiRequest:
+    """The parts of an HTTP request the async endpoints read"""
+
+    def __init__(self, scope: Dict[str, Any], receive: Callable, path_params: Optional[Dict[str, Any]] = None):
+        self.scope = scope
+        self._receive = receive
+        self._body: Optional[bytes] = None
+        self.method: str = scope['method']
+        self.path: str = scope['path']
+        self.path_params = path_params or {}
+        self.args = dict(parse_qsl(scope.get('query_string', b'').decode('latin-1')))
+        self.headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope['headers']}
+
+    async def body(self) -> bytes:
+        if self._body is None:
+            chunks, size, more = [], 0, True
+            while more:
+                message = await self._receive()
+                if message['type'] == 'http.disconnect':
+                    break
+                chunk = message.get('body', b'')
+                size += len(chunk)
+                if size > MAX_BODY_BYTES:
+                    raise ValueError("Request body too large")
+                chunks.append(chunk)
+                more = message.get('more_body', False)
+            self._body = b''.join(chunks)
+        return self._body
+
+    async def json(self) -> Any:
+        """Parsed JSON body, None when missing or invalid (as get_json(silent=True))"""
+        try:
+            return json.loads(await self.body() or b'null')
+        except ValueError:
+            return None
+
+    async def form(self) -> Dict[str, str]:
+        return dict(parse_qsl((await self.body()).decode('utf-8')))
+
+    async def wait_disconnect(self):
+        """Return once the client has gone (for streaming responses; the body must already be read)"""
+        while (await self._receive())['type'] != 'http.disconnect':
+            pass
+
+
+@dataclass
+class AsgiResponse:
+    body: bytes = b''
+    status: int = 200
+    content_type: str = 'application/json'
+    headers: Dict[str, str] = field(default_factory=dict)
+
+    async def send(self, send: Callable):
+        headers = [(b'content-type', self.content_type.encode('latin-1')),
+                   (b'content-length', str(len(self.body)).encode('latin-1'))]
+        headers += [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in self.headers.items()]
+        await send({'type': 'http.response.start', 'status': self.status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': self.body})
+
+
+@dataclass
+class StreamingResponse:
+    """Response whose body chunks come from an async iterator, stopped when the client disconnects"""
+    chunks: AsyncIterator[str]
+    disconnected: Callable[[], Awaitable[None]]
+    status: int = 200
+    content_type: str = 'text/event-stream; charset=utf-8'
+    headers: Dict[str, str] = field(default_factory=dict)
+
+    async def send(self, send: Callable):
+        headers = [(b'content-type', self.content_type.encode('latin-1'))]
+        headers += [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in self.headers.items()]
+        await send({'type': 'http.response.start', 'status': self.status, 'headers': headers})
+
+        async def pump():
+            async for chunk in self.chunks:
+                await send({'type': 'http.response.body', 'body': chunk.encode('utf-8'), 'more_body': True})
+            await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+
+        streaming = asyncio.ensure_future(pump())
+        watching = asyncio.ensure_future(self.disconnected())
+        try:
+            await asyncio.wait({streaming, watching}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in (streaming, watching):
+                task.cancel()
+            await asyncio.gather(streaming, watching, return_exceptions=True)
+            await self.chunks.aclose()
+        if streaming.done() and not streaming.cancelled() and streaming.exception():
+            logger.warning(f"Streaming response ended with an error: {streaming.exception()}")
+
+
+def json_response(data: Any, status: int = 200, headers: Optional[Dict[str, str]] = None) -> AsgiResponse:
+    return AsgiResponse(dumps_bytes(data), status, 'application/json', headers or {})
+
+
+Handler = Callable[[AsgiRequest], Awaitable[Union[AsgiResponse, StreamingResponse]]]
+
+
+class AsyncRoutes:
+    """Route table for async endpoints, declared like a blueprint: @routes.route('/path', methods=[...])"""
+
+    _CONVERTERS = {'int': (r'\d+', int), 'string': (r'[^/]+', str)}
+
+    def __init__(self):
+        self.routes: List[Tuple[str, 're.Pattern', Tuple[str, ...], Dict[str, Callable], Handler]] = []
+
+    def route(self, rule: str, methods=('GET',)):
+        pattern, converters = '', {}
+        for literal, converter, name in re.findall(r'([^<]*)(?:<(?:(\w+):)?(\w+)>)?', rule):
+            pattern += re.escape(literal)
+            if name:
+                regex, convert = self._CONVERTERS[converter or 'string']
+                pattern += f'(?P<{name}>{regex})'
+                converters[name] = convert
+        compiled = re.compile(f'^{pattern}$')
+
+        def decorator(handler: Handler) -> Handler:
+            self.routes.append((rule, compiled, tuple(method.upper() for method in methods), converters, handler))
+            return handler
+        return decorator
+
+    def match(self, method: str, path: str) -> Optional[Tuple[str, Handler, Dict[str, Any]]]:
+        """(rule, handler, path parameters) of the first matching route"""
+        for rule, pattern, methods, converters, handler in self.routes:
+            if method not in methods:
+                continue
+            found = pattern.match(path)
+            if found:
+                return rule, handler, {name: converters[name](value) for name, value in found.groupdict().items()}
+        return None
+
+
+class WsgiBridge:
+    """
+    Run a WSGI app on a thread pool for ASGI requests
+
+    Response chunks are streamed back as the app produces them and the WSGI iterable is
+    always closed, so Flask teardown and the metrics middleware run as under gunicorn.
+    """
+
+    def __init__(self, wsgi_app: Callable, threads: int = 10):
+        self.wsgi_app = wsgi_app
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='wsgi')
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable):
+        request = AsgiRequest(scope, receive)
+        try:
+            body = await request.body()
+        except ValueError:
+            await AsgiResponse(b'Request body too large', 413, 'text/plain').send(send)
+            return
+        loop = asyncio.get_running_loop()
+        messages: 'asyncio.Queue' = asyncio.Queue()
+        environ = self._environ(scope, body)
+
+        def emit(message):
+            loop.call_soon_threadsafe(messages.put_nowait, message)
+
+        def write(chunk):
+            emit({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+
+        def start_response(status, headers, exc_info=None):
+            emit({'type': 'http.response.start', 'status': int(status.split(' ', 1)[0]),
+                  'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]})
+            return write
+
+        def run():
+            iterable = None
+            try:
+                iterable = self.wsgi_app(environ, start_response)
+                for chunk in iterable:
+                    if chunk:
+                        write(chunk)
+            except Exception as e:
+                logger.error(f"WSGI request failed under ASGI: {e}")
+                emit(e)
+            finally:
+                if hasattr(iterable, 'close'):
+                    iterable.close()
+                emit(None)
+
+        task = loop.run_in_executor(self.executor, run)
+        started = False
+        while True:
+            message = await messages.get()
+            if message is None:
+                break
+            if isinstance(message, Exception):
+                if not started:
+                    await task
+                    await AsgiResponse(b'Internal Server Error', 500, 'text/plain').send(send)
+                    return
+                break
+            started = started or message['type'] == 'http.response.start'
+            await send(message)
+        await task
+        if started:
+            await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+
+    @staticmethod
+    def _environ(scope: Dict[str, Any], body: bytes) -> Dict[str, Any]:
+        server = scope.get('server') or ('localhost', 80)
+        client = scope.get('client') or ('', 0)
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+            'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+            'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+            'SERVER_NAME': server[0],
+            'SERVER_PORT': str(server[1]),
+            'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+            'REMOTE_ADDR': client[0],
+            'CONTENT_LENGTH': str(len(body)),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': True,
+            'wsgi.run_once': False,
+        }
+        for name, value in scope['headers']:
+            name = name.decode('latin-1').upper().replace('-', '_')
+            value = value.decode('latin-1')
+            if name == 'CONTENT_TYPE':
+                environ['CONTENT_TYPE'] = value
+            elif name != 'CONTENT_LENGTH':
+                key = f'HTTP_{name}'
+                environ[key] = f"{environ[key]},{value}" if key in environ else value
+        return environ
+
+
+class AsgiApp:
+    """Async routes first, the Flask app for everything else; lifespan runs startup and shutdown hooks"""
+
+    def __init__(self, routes: AsyncRoutes, fallback: Callable, on_startup=(), on_shutdown=()):
+        self.routes = routes
+        self.fallback = fallback
+        self.on_startup = list(on_startup)
+        self.on_shutdown = list(on_shutdown)
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+        matched = self.routes.match(scope['method'], scope['path'])
+        if matched is None:
+            await self.fallback(scope, receive, send)
+            return
+        rule, handler, path_params = matched
+        # Same request metrics as the WSGI middleware records for Flask routes
+        registry.ensure_process()
+        method = scope['method'] if scope['method'] in KNOWN_METHODS else 'OTHER'
+        started = time.perf_counter()
+        IN_PROGRESS.inc()
+        response = None
+        try:
+            response = await handler(AsgiRequest(scope, receive, path_params))
+        except Exception as e:
+            logger.error(f"Async endpoint {scope['path']} failed: {e}")
+            response = json_response({'success': False, 'error': 'Internal server error'}, 500)
+        finally:
+            if response is not None:
+                await response.send(send)
+            REQUEST_LATENCY.labels(method, rule).observe(time.perf_counter() - started)
+            REQUESTS.labels(method, rule, str(response.status if response else 500)).inc()
+            IN_PROGRESS.dec()
+
+    async def _lifespan(self, receive: Callable, send: Callable):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                try:
+                    for hook in self.on_startup:
+                        await hook()
+                except Exception as e:
+                    await send({'type': 'lifespan.startup.failed', 'message': str(e)})
+                    return
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                for hook in self.on_shutdown:
+                    try:
+                        await hook()
+                    except Exception as e:
+                        logger.warning(f"ASGI shutdown hook failed: {e}")
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+def build_asgi_app(flask_app, routes: AsyncRoutes) -> AsgiApp:
+    """Mount the async routes alongside flask_app, sharing its database and models"""
+    from utils import async_db
+
+    # The stream runs on the event loop here, so dashboards can hold it open
+    flask_app.config['LIVE_FEED_SSE'] = True
+
+    async def startup():
+        async_db.init_async_db(flask_app)
+
+    bridge = WsgiBridge(flask_app, threads=flask_app.config.get('ASGI_WSGI_THREADS', 10))
+
+    async def shutdown():
+        await async_db.close_async_db()
+        bridge.executor.shutdown(wait=False)
+
+    return AsgiApp(routes, bridge, on_startup=[startup], on_shutdown=[shutdown])
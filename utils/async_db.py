@@ -0,0 +1,63 @@
+"""
+Async Database Access
+Async engine and session factory over the Flask app's database, for the ASGI endpoints
+"""
+
+import logging
+from typing import Optional
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+
+logger = logging.getLogger(__name__)
+
+# Async driver for each sync backend the app is deployed on
+ASYNC_DRIVERS = {
+    'postgresql': 'postgresql+asyncpg',
+    'sqlite': 'sqlite+aiosqlite',
+}
+# Engine options that carry over from SQLALCHEMY_ENGINE_OPTIONS
+POOL_OPTIONS = ('pool_size', 'max_overflow', 'pool_timeout', 'pool_recycle', 'pool_pre_ping')
+
+async_engine: Optional[AsyncEngine] = None
+async_session: Optional[async_sessionmaker] = None
+
+
+def async_database_url(url: str):
+    """The same database through its async driver (postgresql -> asyncpg, sqlite -> aiosqlite)"""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend}")
+    parsed = parsed.set(drivername=ASYNC_DRIVERS[backend])
+    # asyncpg takes ssl=, not libpq's sslmode=
+    if backend == 'postgresql' and 'sslmode' in parsed.query:
+        query = dict(parsed.query)
+        query['ssl'] = query.pop('sslmode')
+        parsed = parsed.set(query=query)
+    return parsed
+
+
+def init_async_db(app) -> async_sessionmaker:
+    """Create the process-wide async engine and session factory from the app's database settings"""
+    global async_engine, async_session
+
+    url = async_database_url(app.config.get('ASYNC_DATABASE_URL') or app.config['SQLALCHEMY_DATABASE_URI'])
+    options = {}
+    if url.get_backend_name() != 'sqlite':
+        engine_options = app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {}
+        options = {key: value for key, value in engine_options.items() if key in POOL_OPTIONS}
+
+    async_engine = create_async_engine(url, **options)
+    # Same mapped models as the Flask session; objects stay readable after commit
+    async_session = async_sessionmaker(async_engine, expire_on_commit=False)
+    logger.info(f"Async database engine ready ({url.drivername})")
+    return async_session
+
+
+async def close_async_db():
+    global async_engine, async_session
+    if async_engine is not None:
+        await async_engine.dispose()
+    async_engine = None
+    async_session = None
@@ -0,0 +1,177 @@
+"""
+Chart Payload
+LTTB downsampling with min/max envelopes and compact column/typed-array encodings for chart series
+"""
+
+import base64
+import logging
+import math
+import sys
+from array import array
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from flask import Response, jsonify
+
+logger = logging.getLogger(__name__)
+
+# Media types a client can ask for in Accept; the first is the default for */*
+JSON_FORMAT = 'application/json'
+COLUMNS_FORMAT = 'application/vnd.voc.columns+json'
+TYPED_FORMAT = 'application/vnd.voc.typed+json'
+PAYLOAD_FORMATS = (JSON_FORMAT, COLUMNS_FORMAT, TYPED_FORMAT)
+
+MAX_WIDTH = 10000
+
+
+def negotiate_format(request) -> str:
+    """Payload format for the request's Accept header (?format=columns|typed overrides it)"""
+    override = request.args.get('format')
+    if override in ('columns', 'typed'):
+        return COLUMNS_FORMAT if override == 'columns' else TYPED_FORMAT
+    return request.accept_mimetypes.best_match(PAYLOAD_FORMATS, default=JSON_FORMAT) or JSON_FORMAT
+
+
+def requested_width(request) -> Optional[int]:
+    """Target point count from ?width= (chart width in pixels), None to keep every point"""
+    width = request.args.get('width', type=int)
+    if not width or width <= 0:
+        return None
+    return min(width, MAX_WIDTH)
+
+
+def _bucket_bounds(count: int, threshold: int) -> List[Tuple[int, int]]:
+    """LTTB buckets over count points: first and last alone, the rest split evenly"""
+    every = (count - 2) / (threshold - 2)
+    bounds = [(0, 1)]
+    for i in range(threshold - 2):
+        bounds.append((int(i * every) + 1, min(int((i + 1) * every) + 1, count - 1)))
+    bounds.append((count - 1, count))
+    return bounds
+
+
+def lttb_indices(values: Sequence[Optional[float]], threshold: int,
+                 xs: Optional[Sequence[float]] = None) -> List[int]:
+    """
+    Indices kept by Largest-Triangle-Three-Buckets downsampling to threshold points
+
+    None values are gaps: they are never selected. xs defaults to the point positions.
+    """
+    points = [i for i, value in enumerate(values) if value is not None]
+    if threshold >= len(points):
+        return points
+    if threshold <= 2:
+        return [points[0], points[-1]][:max(threshold, 0)]
+
+    x = (lambda i: xs[i]) if xs is not None else (lambda i: i)
+    bounds = _bucket_bounds(len(points), threshold)
+    selected = [points[0]]
+    anchor = points[0]
+    for bucket in range(1, threshold - 1):
+        start, end = bounds[bucket]
+        next_start, next_end = bounds[bucket + 1]
+        following = points[next_start:next_end]
+        avg_x = sum(x(i) for i in following) / len(following)
+        avg_y = sum(values[i] for i in following) / len(following)
+
+        ax, ay = x(anchor), values[anchor]
+        best, best_area = points[start], -1.0
+        for i in points[start:end]:
+            area = abs((ax - avg_x) * (values[i] - ay) - (ax - x(i)) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = i, area
+        selected.append(best)
+        anchor = best
+    selected.append(points[-1])
+    return selected
+
+
+def _spans(indices: List[int], length: int) -> List[Tuple[int, int]]:
+    """Source index range each selected point stands for, covering 0..length contiguously"""
+    spans = []
+    for position, index in enumerate(indices):
+        start = 0 if position == 0 else (indices[position - 1] + index) // 2 + 1
+        end = length if position == len(indices) - 1 else (index + indices[position + 1]) // 2 + 1
+        spans.append((start, end))
+    return spans
+
+
+def _is_numeric(column: Sequence[Any]) -> bool:
+    return any(isinstance(v, (int, float)) and not isinstance(v, bool) for v in column) and \
+        all(v is None or (isinstance(v, (int, float)) and not isinstance(v, bool)) for v in column)
+
+
+def downsample(columns: Dict[str, List[Any]], by: str, width: int,
+               envelope: bool = False) -> Tuple[Dict[str, List[Any]], Optional[Dict[str, Dict[str, list]]]]:
+    """
+    Keep at most width rows of the column table, chosen by LTTB on the `by` column
+
+    With envelope=True also returns {column: {'min': [...], 'max': [...]}} for every numeric column,
+    the extremes of the source rows each kept row stands for, so peaks survive downsampling.
+    """
+    length = len(columns[by])
+    indices = lttb_indices(columns[by], width)
+    if len(indices) == length:
+        indices = list(range(length))
+    selected = {name: [column[i] for i in indices] for name, column in columns.items()}
+    if not envelope:
+        return selected, None
+
+    bands = {}
+    spans = _spans(indices, length)
+    for name, column in columns.items():
+        if not _is_numeric(column):
+            continue
+        lows, highs = [], []
+        for start, end in spans:
+            window = [v for v in column[start:end] if v is not None]
+            lows.append(min(window) if window else None)
+            highs.append(max(window) if window else None)
+        bands[name] = {'min': lows, 'max': highs}
+    return selected, bands
+
+
+def _typed_column(column: List[Any]) -> Dict[str, Any]:
+    """
+    Little-endian typed array as base64: Float64Array of epoch ms for timestamps, Int32Array for counts,
+    Float32Array (NaN for gaps) for other numbers; text columns stay plain lists
+    """
+    if column and all(isinstance(v, datetime) for v in column):
+        dtype, typecode, column = 'timestamp_ms', 'd', [v.timestamp() * 1000 for v in column]
+    elif all(isinstance(v, int) and not isinstance(v, bool) and -2 ** 31 <= v < 2 ** 31 for v in column):
+        dtype, typecode = 'int32', 'i'
+    elif _is_numeric(column):
+        dtype, typecode = 'float32', 'f'
+    else:
+        return {'dtype': 'string', 'values': column}
+
+    data = array(typecode, (math.nan if v is None else v for v in column))
+    if sys.byteorder != 'little':
+        data.byteswap()
+    return {'dtype': dtype, 'data': base64.b64encode(data.tobytes()).decode('ascii')}
+
+
+def encode_columns(columns: Dict[str, List[Any]], fmt: str,
+                   envelope: Optional[Dict[str, Dict[str, list]]] = None, **meta) -> Dict[str, Any]:
+    """Column-table body for the compact formats"""
+    if fmt == TYPED_FORMAT:
+        body = {name: _typed_column(column) for name, column in columns.items()}
+        bands = {name: {side: _typed_column(values) for side, values in band.items()}
+                 for name, band in (envelope or {}).items()}
+    else:
+        # Timestamps are serialized by the app's JSON provider
+        body = dict(columns)
+        bands = envelope or {}
+
+    payload = dict(meta, length=len(next(iter(columns.values()), [])), columns=body)
+    if envelope is not None:
+        payload['envelope'] = bands
+    return payload
+
+
+def chart_response(payload: Dict[str, Any], fmt: str) -> Response:
+    """JSON response carrying the negotiated media type"""
+    response = jsonify(payload)
+    response.mimetype = fmt
+    response.vary.add('Accept')
+    return response
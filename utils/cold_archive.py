@@ -0,0 +1,445 @@
+"""
+Cold Data Archive
+Moves old feedback and survey responses into compressed monthly files on local disk
+and reads them back for historical reports
+"""
+
+import copy
+import gzip
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import DateTime, delete, func, select
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+from utils.partitioning import add_months, month_start
+from utils.write_tracking import notify_committed
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = 'manifest.json'
+ARCHIVE_BATCH_SIZE = 5000
+DEFAULT_CACHE_CHUNKS = 48
+SUMMARY_CACHE_SIZE = 2048
+
+_MISSING = object()
+
+
+def archived_tables():
+    """Archivable tables by name; question responses follow their parent response"""
+    from models_unified import Feedback
+    from models.survey_flask import ResponseFlask, QuestionResponseFlask
+    return {
+        'feedback': Feedback.__table__,
+        'responses_flask': ResponseFlask.__table__,
+        'question_responses_flask': QuestionResponseFlask.__table__,
+    }
+
+
+@dataclass
+class ArchiveChunk:
+    """One compressed file holding a month of archived rows"""
+    table: str
+    month: str  # YYYY-MM
+    file: str
+    format: str
+    rows: int
+    min_created: str
+    max_created: str
+    first_id: int  # probed to tell whether the rows were deleted
+    channels: Dict[str, int] = field(default_factory=dict)
+    pending: bool = True  # listed, but its rows' delete has not committed yet
+
+    @property
+    def lower(self) -> datetime:
+        return datetime.strptime(self.month, '%Y-%m')
+
+    @property
+    def upper(self) -> datetime:
+        return add_months(self.lower, 1)
+
+    @property
+    def key(self) -> Tuple:
+        """Identity of the file's contents: a re-written part gets a different key"""
+        return (self.file, self.rows, self.first_id, self.max_created)
+
+
+def _default_format() -> str:
+    if PARQUET_AVAILABLE:
+        return 'parquet'
+    return 'jsonl.zst' if ZSTD_AVAILABLE else 'jsonl.gz'
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+class ColdArchive:
+    """Month-chunked archive with a manifest indexed by table, month and channel"""
+
+    def __init__(self, root: Optional[str] = None, file_format: Optional[str] = None,
+                 cache_chunks: int = DEFAULT_CACHE_CHUNKS):
+        self.root = root
+        self.file_format = file_format or _default_format()
+        self.cache_chunks = cache_chunks
+        self._lock = threading.Lock()
+        self._manifest: Optional[Dict[str, Any]] = None
+        self._manifest_mtime = None
+        # Decoded columns per chunk and per-chunk summaries, keyed by ArchiveChunk.key (LRU)
+        self._cache_lock = threading.Lock()
+        self._columns: 'OrderedDict[Tuple, Dict[str, list]]' = OrderedDict()
+        self._summaries: 'OrderedDict[Tuple, Any]' = OrderedDict()
+        self.stats = {'chunk_reads': 0, 'column_hits': 0, 'summary_hits': 0}
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.root)
+
+    # Manifest
+
+    def _manifest_path(self) -> str:
+        return os.path.join(self.root, MANIFEST_NAME)
+
+    def _load_manifest(self) -> Dict[str, Any]:
+        """Cached manifest, re-read when another process has rewritten it"""
+        path = self._manifest_path()
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return {'version': 1, 'tables': {}}
+        if self._manifest is None or mtime != self._manifest_mtime:
+            with open(path, encoding='utf-8') as f:
+                self._manifest = json.load(f)
+            self._manifest_mtime = mtime
+        return self._manifest
+
+    def _save_manifest(self, manifest: Dict[str, Any]):
+        os.makedirs(self.root, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix='.manifest-')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=1)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._manifest_path())
+        self._manifest = None
+
+    def watermark(self, table: str) -> Optional[datetime]:
+        """Rows created before this instant live in the archive, None if nothing is archived"""
+        if not self.enabled:
+            return None
+        value = self._load_manifest()['tables'].get(table, {}).get('watermark')
+        return datetime.fromisoformat(value) if value else None
+
+    def covers(self, table: str, start: Optional[datetime]) -> bool:
+        """Whether a range starting at start (None = unbounded) reaches into archived data"""
+        watermark = self.watermark(table)
+        return watermark is not None and (start is None or start < watermark)
+
+    def chunks(self, table: str, start: Optional[datetime] = None, end: Optional[datetime] = None,
+               channels: Optional[Iterable[str]] = None) -> List[ArchiveChunk]:
+        """Committed chunks overlapping [start, end), optionally holding any of the channels"""
+        watermark = self.watermark(table)
+        if watermark is None:
+            return []
+        wanted = set(channels) if channels else None
+        selected = []
+        for entry in self._load_manifest()['tables'][table]['chunks']:
+            chunk = ArchiveChunk(**entry)
+            if chunk.pending:
+                continue
+            if start and chunk.upper <= start or end and chunk.lower >= end:
+                continue
+            if wanted and chunk.channels and not wanted & set(chunk.channels):
+                continue
+            selected.append(chunk)
+        return selected
+
+    # Reading
+
+    def iter_rows(self, table: str, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                  channels: Optional[Iterable[str]] = None,
+                  columns: Optional[Sequence[str]] = None) -> Iterator[Dict[str, Any]]:
+        """Archived rows with created_at in [start, end); datetimes decoded, enums as their values"""
+        wanted = set(channels) if channels else None
+        for chunk in self.chunks(table, start, end, channels):
+            yield from self._chunk_rows(table, chunk, start, end, wanted, columns)
+
+    def summaries(self, table: str, start: Optional[datetime], end: Optional[datetime],
+                  summarize: Callable[[Iterator[Dict[str, Any]]], Any], key: Hashable,
+                  channels: Optional[Iterable[str]] = None,
+                  columns: Optional[Sequence[str]] = None) -> List[Any]:
+        """
+        summarize(rows) over the archived rows in [start, end), one result per chunk
+
+        Chunks wholly inside the range are summarized once per manifest entry and key, and
+        the result is reused by later calls; treat results as read-only. Chunks cut by the
+        range are summarized from their rows in range each time.
+        """
+        wanted = set(channels) if channels else None
+        results = []
+        for chunk in self.chunks(table, start, end, channels):
+            if start and chunk.lower < start or end and chunk.upper > end:
+                results.append(summarize(self._chunk_rows(table, chunk, start, end, wanted, columns)))
+                continue
+            cache_key = (chunk.key, key, tuple(sorted(wanted)) if wanted else None)
+            with self._cache_lock:
+                summary = self._summaries.get(cache_key, _MISSING)
+                if summary is not _MISSING:
+                    self._summaries.move_to_end(cache_key)
+                    self.stats['summary_hits'] += 1
+            if summary is _MISSING:
+                summary = summarize(self._chunk_rows(table, chunk, None, None, wanted, columns))
+                with self._cache_lock:
+                    self._summaries[cache_key] = summary
+                    while len(self._summaries) > SUMMARY_CACHE_SIZE:
+                        self._summaries.popitem(last=False)
+            results.append(summary)
+        return results
+
+    def _chunk_rows(self, table: str, chunk: ArchiveChunk, start: Optional[datetime], end: Optional[datetime],
+                    wanted: Optional[set], columns: Optional[Sequence[str]]) -> Iterator[Dict[str, Any]]:
+        """Rows of one chunk in [start, end) holding a wanted channel, built from its cached columns"""
+        table_columns = archived_tables()[table].columns
+        names = list(columns) if columns else [c.name for c in table_columns]
+        needed = names + [c for c in ('created_at', 'channel') if c not in names and c in table_columns]
+        data = self._chunk_columns(table, chunk, needed)
+
+        created = data['created_at']
+        channel = data.get('channel')
+        selected = [data[name] for name in names]
+        for i in range(chunk.rows):
+            if start and created[i] < start or end and created[i] >= end:
+                continue
+            if wanted and (channel is None or channel[i] not in wanted):
+                continue
+            yield {name: values[i] for name, values in zip(names, selected)}
+
+    def _chunk_columns(self, table: str, chunk: ArchiveChunk, names: List[str]) -> Dict[str, list]:
+        """Decoded values of the named columns of a chunk, decompressed once and kept while recently used"""
+        with self._cache_lock:
+            cached = self._columns.get(chunk.key)
+            if cached is not None:
+                self._columns.move_to_end(chunk.key)
+                if all(name in cached for name in names):
+                    self.stats['column_hits'] += 1
+                    return cached
+        # Read what was cached before too, so one entry keeps every column asked for
+        read = list(dict.fromkeys(names + list(cached or ())))
+        datetime_columns = {c.name for c in archived_tables()[table].columns if isinstance(c.type, DateTime)}
+        data: Dict[str, list] = {name: [] for name in read}
+        for row in self._read_chunk(chunk, read):
+            for name in read:
+                value = row[name]
+                if name in datetime_columns and isinstance(value, str):
+                    value = datetime.fromisoformat(value)
+                data[name].append(value)
+        self.stats['chunk_reads'] += 1
+        with self._cache_lock:
+            self._columns[chunk.key] = data
+            self._columns.move_to_end(chunk.key)
+            while len(self._columns) > self.cache_chunks:
+                self._columns.popitem(last=False)
+        return data
+
+    def _read_chunk(self, chunk: ArchiveChunk, columns: Optional[List[str]]) -> Iterator[Dict[str, Any]]:
+        path = os.path.join(self.root, chunk.file)
+        if chunk.format == 'parquet':
+            if not PARQUET_AVAILABLE:
+                raise RuntimeError(f"pyarrow is required to read archived chunk {chunk.file}")
+            yield from pq.read_table(path, columns=columns).to_pylist()
+            return
+        with open(path, 'rb') as f:
+            payload = f.read()
+        if chunk.format == 'jsonl.zst':
+            if not ZSTD_AVAILABLE:
+                raise RuntimeError(f"zstandard is required to read archived chunk {chunk.file}")
+            payload = zstandard.ZstdDecompressor().decompress(payload)
+        else:
+            payload = gzip.decompress(payload)
+        for line in payload.decode('utf-8').splitlines():
+            row = json.loads(line)
+            yield {k: row.get(k) for k in columns} if columns else row
+
+    # Writing
+
+    def _write_chunk(self, path: str, rows: List[Dict[str, Any]]):
+        """Write and fsync one chunk file atomically"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + '.tmp'
+        if self.file_format == 'parquet':
+            pq.write_table(pa.Table.from_pylist(rows), tmp_path, compression='zstd')
+        else:
+            payload = ''.join(json.dumps(row, ensure_ascii=False) + '\n' for row in rows).encode('utf-8')
+            if self.file_format == 'jsonl.zst':
+                payload = zstandard.ZstdCompressor(level=9).compress(payload)
+            else:
+                payload = gzip.compress(payload, compresslevel=9)
+            with open(tmp_path, 'wb') as f:
+                f.write(payload)
+        with open(tmp_path, 'rb') as f:
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def archive_before(self, engine, cutoff: datetime, tables: Sequence[str] = ('feedback', 'responses_flask'),
+                       batch_size: int = ARCHIVE_BATCH_SIZE) -> Dict[str, int]:
+        """
+        Move rows created before cutoff (rounded down to a month) into the archive, one month
+        per transaction. Chunks are fsync'd and listed as pending before their rows are deleted,
+        and only become readable once the delete commits, so readers never see a row twice.
+        """
+        if not self.enabled:
+            raise RuntimeError("Cold archive is not configured (ARCHIVE_DIR)")
+        cutoff = month_start(cutoff)
+        moved = {}
+        with self._lock:
+            for table_name in tables:
+                table = archived_tables()[table_name]
+                with engine.connect() as conn:
+                    self._recover(conn, self._related(table_name))
+                    oldest = conn.execute(select(func.min(table.c.created_at))
+                                          .where(table.c.created_at < cutoff)).scalar()
+                moved[table_name] = 0
+                if oldest is None:
+                    continue
+                lower = month_start(oldest)
+                while lower < cutoff:
+                    moved[table_name] += self._archive_month(engine, table_name, lower, batch_size)
+                    lower = add_months(lower, 1)
+                logger.info(f"Archived {moved[table_name]} {table_name} rows created before {cutoff:%Y-%m}")
+        return moved
+
+    @staticmethod
+    def _related(table_name: str) -> List[str]:
+        """The table plus the child rows that are archived along with it"""
+        return [table_name, 'question_responses_flask'] if table_name == 'responses_flask' else [table_name]
+
+    def _editable_manifest(self) -> Dict[str, Any]:
+        return copy.deepcopy(self._load_manifest())
+
+    def _recover(self, conn, names: List[str]):
+        """
+        Resolve chunks left pending by an interrupted run: if their rows are still in the
+        database the delete never committed and the chunk is dropped, otherwise it is
+        marked committed and the watermark catches up to it.
+        """
+        manifest = self._editable_manifest()
+        changed = False
+        for name in names:
+            entry = manifest['tables'].get(name)
+            if not entry:
+                continue
+            table = archived_tables()[name]
+            kept = []
+            for data in entry['chunks']:
+                chunk = ArchiveChunk(**data)
+                if chunk.pending:
+                    changed = True
+                    if conn.execute(select(table.c.id).where(table.c.id == chunk.first_id)).first():
+                        continue
+                    data['pending'] = False
+                    entry['watermark'] = max(entry['watermark'] or '', chunk.upper.isoformat())
+                kept.append(data)
+            entry['chunks'] = kept
+        if changed:
+            self._save_manifest(manifest)
+
+    def _archive_month(self, engine, table_name: str, lower: datetime, batch_size: int) -> int:
+        """Archive one month in batches of batch_size rows, each written as its own part file"""
+        tables = archived_tables()
+        table = tables[table_name]
+        upper = add_months(lower, 1)
+        manifest = self._editable_manifest()
+        names = self._related(table_name)
+        entries = {name: manifest['tables'].setdefault(name, {'watermark': None, 'chunks': []}) for name in names}
+        archived_ids: Dict[str, List[int]] = {name: [] for name in names}
+
+        with engine.begin() as conn:
+            # Streamed, so only one batch of the month is held in memory at a time
+            result = conn.execution_options(yield_per=batch_size).execute(
+                select(table).where(table.c.created_at >= lower, table.c.created_at < upper)
+                .order_by(table.c.created_at)
+            )
+            for batch in result.partitions():
+                parts = {table_name: [dict(row._mapping) for row in batch]}
+                if table_name == 'responses_flask':
+                    child_table = tables['question_responses_flask']
+                    parts['question_responses_flask'] = [dict(row._mapping) for row in conn.execute(
+                        select(child_table).where(child_table.c.response_id.in_([r['id'] for r in parts[table_name]]))
+                    )]
+                for name, rows in parts.items():
+                    if rows:
+                        entries[name]['chunks'].append(asdict(self._store(name, lower, rows, entries[name]['chunks'])))
+                        archived_ids[name].extend(row['id'] for row in rows)
+            self._save_manifest(manifest)
+
+            # Children first: they reference the responses being removed
+            for name in reversed(names):
+                ids = archived_ids[name]
+                for start in range(0, len(ids), batch_size):
+                    conn.execute(delete(tables[name]).where(tables[name].c.id.in_(ids[start:start + batch_size])))
+
+        # Caches over the hot tables (snapshot, ETags) drop the archived rows
+        moved = [name for name in names if archived_ids[name]]
+        notify_committed(moved, deleted=moved)
+
+        for name in names:
+            entry = entries[name]
+            for data in entry['chunks']:
+                data['pending'] = False
+            entry['watermark'] = max(entry['watermark'] or '', upper.isoformat())
+        self._save_manifest(manifest)
+        return len(archived_ids[table_name])
+
+    def _store(self, table_name: str, lower: datetime, rows: List[Dict[str, Any]],
+               existing: List[Dict[str, Any]]) -> ArchiveChunk:
+        """Write rows as the next part file for the month, returns its manifest entry"""
+        month = f"{lower:%Y-%m}"
+        part = sum(1 for c in existing if c['month'] == month)
+        relative = os.path.join(table_name, f"{month}-part{part}.{self.file_format}")
+        encoded = [{k: _encode_value(v) for k, v in row.items()} for row in rows]
+        self._write_chunk(os.path.join(self.root, relative), encoded)
+
+        channels: Dict[str, int] = {}
+        for row in encoded:
+            if row.get('channel'):
+                channels[row['channel']] = channels.get(row['channel'], 0) + 1
+        created = [row['created_at'] for row in encoded]
+        return ArchiveChunk(table_name, month, relative, self.file_format, len(rows),
+                            min(created), max(created), encoded[0]['id'], channels)
+
+
+# Process-wide archive, configured by init_cold_archive()
+cold_archive = ColdArchive()
+
+
+def init_cold_archive(app) -> ColdArchive:
+    """Point the shared archive at ARCHIVE_DIR ("" leaves archive reads disabled)"""
+    cold_archive.root = app.config.get('ARCHIVE_DIR') or None
+    cold_archive.cache_chunks = app.config.get('ARCHIVE_CACHE_CHUNKS', DEFAULT_CACHE_CHUNKS)
+    return cold_archive
@@ -0,0 +1,173 @@
+"""
+Contact search index
+Arabic-normalized type-ahead search backed by pg_trgm on PostgreSQL and FTS5 on SQLite
+"""
+
+import logging
+from typing import List, Optional
+
+from sqlalchemy import bindparam, case, func, select, text, update
+
+from app import db
+from models.contacts import Contact
+from utils.arabic_search import normalize_for_search, build_search_text, prefix_upper_bound
+
+logger = logging.getLogger(__name__)
+
+# Trigram indexes cannot answer shorter queries
+MIN_SUBSTRING_LENGTH = 3
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def _escape_like(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _prefix_condition(column, prefix: str, dialect: str):
+    """Prefix match that can use a btree index on the given dialect"""
+    if dialect == 'postgresql':
+        # Served by the text_pattern_ops index regardless of database collation
+        return column.like(f"{_escape_like(prefix)}%", escape='\\')
+    # SQLite compares with BINARY collation, so a code-point range is exact
+    return (column >= prefix) & (column < prefix_upper_bound(prefix))
+
+
+def _substring_condition(key: str, dialect: str):
+    """Substring match over the combined search key"""
+    if dialect == 'sqlite':
+        fts_query = '"' + key.replace('"', '""') + '"'
+        return Contact.id.in_(
+            select(text('rowid')).select_from(text('contacts_fts'))
+            .where(text('contacts_fts MATCH :fts_query').bindparams(fts_query=fts_query))
+        )
+    # pg_trgm's GIN index accelerates unanchored LIKE
+    return Contact.search_text.like(f"%{_escape_like(key)}%", escape='\\')
+
+
+def _rank(key: str, dialect: str):
+    """0 exact name, 1 name prefix, 2 later word in name starts with key, 3 anywhere"""
+    return case(
+        (Contact.name_normalized == key, 0),
+        (_prefix_condition(Contact.name_normalized, key, dialect), 1),
+        (Contact.name_normalized.like(f"% {_escape_like(key)}%", escape='\\'), 2),
+        else_=3
+    )
+
+
+def search_contacts(term: str, limit: int = 20, channel: Optional[str] = None) -> List[Contact]:
+    """
+    Type-ahead contact search
+
+    Terms shorter than three characters only match the start of the name
+    (index range scan); longer terms match anywhere in name, company,
+    email or phone through the trigram index. Results are ranked so that
+    name prefixes come first.
+    """
+    key = normalize_for_search(term)
+    dialect = db.session.get_bind().dialect.name
+
+    query = Contact.query.filter(Contact.is_active == True)
+
+    if key:
+        if len(key) >= MIN_SUBSTRING_LENGTH:
+            query = query.filter(_substring_condition(key, dialect))
+        else:
+            query = query.filter(_prefix_condition(Contact.name_normalized, key, dialect))
+        query = query.order_by(_rank(key, dialect), func.length(Contact.name_normalized), Contact.id)
+    else:
+        query = query.order_by(Contact.name_normalized, Contact.id)
+
+    if channel == 'email':
+        query = query.filter(Contact.email_opt_in == True)
+    elif channel == 'sms':
+        query = query.filter(Contact.sms_opt_in == True)
+    elif channel == 'whatsapp':
+        query = query.filter(Contact.whatsapp_opt_in == True)
+
+    return query.limit(limit).all()
+
+
+def backfill_search_keys(conn) -> int:
+    """Populate search keys for rows written before the columns existed"""
+    contacts = Contact.__table__
+    updated = 0
+
+    while True:
+        rows = conn.execute(
+            select(contacts.c.id, contacts.c.name, contacts.c.company, contacts.c.email, contacts.c.phone)
+            .where(contacts.c.search_text.is_(None))
+            .order_by(contacts.c.id)
+            .limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+
+        params = [{
+            'row_id': row.id,
+            'name_normalized': normalize_for_search(row.name),
+            # Empty string marks the row as processed even with no searchable text
+            'search_text': build_search_text(row.name, row.company, row.email, row.phone)
+        } for row in rows]
+
+        conn.execute(
+            update(contacts)
+            .where(contacts.c.id == bindparam('row_id'))
+            .values(name_normalized=bindparam('name_normalized'),
+                    search_text=bindparam('search_text')),
+            params
+        )
+        updated += len(params)
+
+    if updated:
+        logger.info(f"Backfilled search keys for {updated} contacts")
+    return updated
+
+
+def create_search_index(conn):
+    """Create the dialect-specific substring and prefix indexes"""
+    dialect = conn.dialect.name
+
+    if dialect == 'postgresql':
+        try:
+            with conn.begin_nested():
+                conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+                conn.execute(text(
+                    "CREATE INDEX IF NOT EXISTS ix_contacts_search_trgm "
+                    "ON contacts USING gin (search_text gin_trgm_ops)"
+                ))
+        except Exception as e:
+            logger.warning(f"pg_trgm unavailable, contact search will scan: {e}")
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_contacts_name_prefix "
+            "ON contacts (name_normalized text_pattern_ops)"
+        ))
+
+    elif dialect == 'sqlite':
+        exists = conn.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'contacts_fts'"
+        )).first()
+        if exists:
+            return
+
+        conn.execute(text(
+            "CREATE VIRTUAL TABLE contacts_fts USING fts5("
+            "search_text, content='contacts', content_rowid='id', tokenize='trigram')"
+        ))
+        conn.execute(text(
+            "CREATE TRIGGER contacts_fts_ai AFTER INSERT ON contacts BEGIN "
+            "INSERT INTO contacts_fts(rowid, search_text) VALUES (new.id, new.search_text); END"
+        ))
+        conn.execute(text(
+            "CREATE TRIGGER contacts_fts_ad AFTER DELETE ON contacts BEGIN "
+            "INSERT INTO contacts_fts(contacts_fts, rowid, search_text) "
+            "VALUES ('delete', old.id, old.search_text); END"
+        ))
+        conn.execute(text(
+            "CREATE TRIGGER contacts_fts_au AFTER UPDATE OF search_text ON contacts BEGIN "
+            "INSERT INTO contacts_fts(contacts_fts, rowid, search_text) "
+            "VALUES ('delete', old.id, old.search_text); "
+            "INSERT INTO contacts_fts(rowid, search_text) VALUES (new.id, new.search_text); END"
+        ))
+        conn.execute(text("INSERT INTO contacts_fts(contacts_fts) VALUES ('rebuild')"))
+        logger.info("Created contacts_fts search index")
@@ -12,8 +12,19 @@ from datetime import datetime, timedelta
 import psutil
 import os
 
+from utils.metrics import registry
+
 logger = logging.getLogger(__name__)
 
+# Distributions for the registry; current_metrics keeps only the latest value of each
+DASHBOARD_TIMINGS = registry.histogram('dashboard_timing_seconds', 'Dashboard timings by measurement',
+                                       ('measurement',))
+WEBSOCKET_CONNECTIONS = registry.gauge('dashboard_websocket_connections', 'Open dashboard WebSocket connections',
+                                       multiprocess_mode='sum')
+WEBSOCKET_FAILURES = registry.counter('dashboard_websocket_failures_total', 'Failed dashboard WebSocket connections')
+ARABIC_PROCESSING_RATE = registry.gauge('dashboard_arabic_processing_rate', 'Arabic texts processed per second',
+                                        multiprocess_mode='max')
+
 @dataclass
 class PerformanceMetrics:
     """Performance metrics data structure"""
@@ -87,7 +98,7 @@ class PerformanceMonitor:
         metrics = PerformanceMetrics()
         
         # System metrics
-        metrics.cpu_usage = psutil.cpu_percent()
+        metrics.cpu_usage = psutil.cpu_percent(interval=None)
         memory_info = psutil.virtual_memory()
         metrics.memory_usage = memory_info.percent
         metrics.memory_mb = memory_info.used / 1024 / 1024
@@ -112,17 +123,26 @@ class PerformanceMonitor:
             
             response_time = end_time - start_time
             self.current_metrics.api_response_time = response_time
+            DASHBOARD_TIMINGS.labels('api_response').observe(response_time)
             
             return result
         except Exception as e:
             end_time = time.time()
             self.current_metrics.api_response_time = end_time - start_time
+            DASHBOARD_TIMINGS.labels('api_response').observe(end_time - start_time)
             raise e
     
     def measure_websocket_latency(self, start_timestamp: float):
         """Measure WebSocket message latency"""
         latency = time.time() - start_timestamp
         self.current_metrics.websocket_latency = latency
+        DASHBOARD_TIMINGS.labels('websocket_latency').observe(latency)
+        return latency
+    
+    def measure_push_latency(self, published_at: float):
+        """Measure time from a live feed event's computation to its write to a dashboard stream"""
+        latency = time.time() - published_at
+        DASHBOARD_TIMINGS.labels('push_latency').observe(latency)
         return latency
     
     async def measure_database_query_time(self, query_func, *args, **kwargs):
@@ -134,11 +154,13 @@ class PerformanceMonitor:
             
             query_time = end_time - start_time
             self.current_metrics.database_query_time = query_time
+            DASHBOARD_TIMINGS.labels('database_query').observe(query_time)
             
             return result
         except Exception as e:
             end_time = time.time()
             self.current_metrics.database_query_time = end_time - start_time
+            DASHBOARD_TIMINGS.labels('database_query').observe(end_time - start_time)
             raise e
     
     def measure_arabic_processing_performance(self, text_count: int, processing_time: float):
@@ -146,14 +168,17 @@ class PerformanceMonitor:
         if processing_time > 0:
             processing_rate = text_count / processing_time
             self.current_metrics.arabic_text_processing_rate = processing_rate
+            ARABIC_PROCESSING_RATE.set(processing_rate)
     
     def record_dashboard_load_time(self, load_time: float):
         """Record dashboard load time"""
         self.current_metrics.dashboard_load_time = load_time
+        DASHBOARD_TIMINGS.labels('dashboard_load').observe(load_time)
     
     def record_chart_render_time(self, render_time: float):
         """Record chart rendering time"""
         self.current_metrics.chart_render_time = render_time
+        DASHBOARD_TIMINGS.labels('chart_render').observe(render_time)
     
     def record_websocket_connection(self, connected: bool, failed: bool = False):
         """Record WebSocket connection events"""
@@ -161,9 +186,11 @@ class PerformanceMonitor:
             self.current_metrics.active_websocket_connections += 1
         else:
             self.current_metrics.active_websocket_connections = max(0, self.current_metrics.active_websocket_connections - 1)
+        WEBSOCKET_CONNECTIONS.set(self.current_metrics.active_websocket_connections)
         
         if failed:
             self.current_metrics.failed_connections += 1
+            WEBSOCKET_FAILURES.inc()
     
     async def check_performance_alerts(self, metrics: PerformanceMetrics):
         """Check for performance threshold violations"""
@@ -380,6 +407,13 @@ class ArabicDashboardOptimizer:
         if len(data) <= max_points:
             return data
         
+        # Keep the visually significant points when there is a numeric series to judge by
+        value_key = next((key for key in ('y', 'value', 'values') if isinstance(data[0].get(key), (int, float))), None)
+        if value_key is not None:
+            from utils.chart_payload import lttb_indices
+            values = [point.get(value_key) if isinstance(point.get(value_key), (int, float)) else None for point in data]
+            return [data[i] for i in lttb_indices(values, max_points)]
+        
         # Sample data points evenly
         step = len(data) // max_points
         optimized_data = []
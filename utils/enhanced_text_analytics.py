@@ -9,7 +9,6 @@ import time
 import os
 from typing import Dict, Any, List, Optional
 from datetime import datetime
-from openai import OpenAI
 from simple_arabic_analyzer import SimpleArabicAnalyzer
 
 logger = logging.getLogger(__name__)
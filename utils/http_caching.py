@@ -0,0 +1,272 @@
+"""
+HTTP Caching
+Conditional GET from data-version watermarks, and gzip/brotli compression of JSON and HTML responses
+"""
+
+import gzip
+import hashlib
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import wraps
+from typing import Callable, Dict, Iterable, Optional, Set, Tuple
+
+from flask import Response, current_app, g, make_response, request
+from sqlalchemy import func, select
+
+from utils.write_tracking import on_commit
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    try:
+        import brotlicffi as brotli
+        BROTLI_AVAILABLE = True
+    except ImportError:
+        brotli = None
+        BROTLI_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROBE_TTL = 2.0
+
+
+@dataclass(frozen=True)
+class Validators:
+    etag: str
+    last_modified: Optional[datetime]
+    cache_control: str
+
+
+class DataVersions:
+    """
+    Per-table watermarks: row count and newest updated_at (or created_at)
+
+    Commits in this process drop the affected watermarks at once; writes from other
+    workers are seen when the cached watermark is older than probe_ttl seconds.
+    """
+
+    def __init__(self, probe_ttl: float = DEFAULT_PROBE_TTL):
+        self.probe_ttl = probe_ttl
+        self._marks: Dict[str, Tuple[float, Tuple[int, Optional[datetime]]]] = {}
+        self._lock = threading.Lock()
+        self.stats = {'probes': 0, 'invalidations': 0}
+
+    def invalidate(self, tables: Iterable[str]):
+        with self._lock:
+            for name in tables:
+                if self._marks.pop(name, None) is not None:
+                    self.stats['invalidations'] += 1
+
+    def watermark(self, table) -> Tuple[int, Optional[datetime]]:
+        """(row count, newest change) of a Table, probed with one aggregate query when stale"""
+        from app import db
+
+        cached = self._marks.get(table.name)
+        if cached and time.monotonic() - cached[0] < self.probe_ttl:
+            return cached[1]
+        changed = table.c.get('updated_at', table.c.get('created_at'))
+        columns = [func.count()] + ([func.max(changed)] if changed is not None else [])
+        try:
+            row = db.session.execute(select(*columns).select_from(table)).one()
+        except Exception:
+            # Leave the session usable for the view, which then runs unvalidated
+            db.session.rollback()
+            raise
+        mark = (row[0], row[1] if changed is not None else None)
+        self.stats['probes'] += 1
+        with self._lock:
+            self._marks[table.name] = (time.monotonic(), mark)
+        return mark
+
+
+# Global data version tracker
+data_versions = DataVersions()
+
+
+@on_commit
+def _invalidate_written(tables: Set[str]):
+    data_versions.invalidate(tables)
+
+
+def _template_token(app) -> str:
+    """Newest template mtime: a deploy that changes pages changes every tag, equally in every worker"""
+    newest = 0.0
+    for root, _, files in os.walk(os.path.join(app.root_path, app.template_folder or 'templates')):
+        for name in files:
+            newest = max(newest, os.path.getmtime(os.path.join(root, name)))
+    return f"{app.config.get('VERSION', '')}-{int(newest)}"
+
+
+def _viewer_token() -> str:
+    """Language and signed-in user: pages and messages differ by both"""
+    user = ''
+    try:
+        from flask_login import current_user
+        if current_user and current_user.is_authenticated:
+            user = str(current_user.get_id())
+    except Exception:
+        pass
+    try:
+        from utils.language_manager import language_manager
+        language = language_manager.get_current_language()
+    except Exception:
+        language = ''
+    return f"{language}:{user}"
+
+
+def validators_for(tables=(), key: str = '', per_viewer: bool = True, window: bool = True) -> Validators:
+    """Validators for the current request from table watermarks plus a view-specific key"""
+    config = current_app.config
+    parts = [current_app.extensions.get('http_caching_token', ''), key]
+    newest = None
+    seconds = config.get('CONDITIONAL_GET_WINDOW_SECONDS', 60)
+    windowed = bool(window and seconds)
+    if windowed:
+        # Views over relative time windows ("last 24h") change without writes
+        parts.append(str(int(time.time() // seconds)))
+    for table in tables:
+        table = getattr(table, '__table__', table)
+        count, changed = data_versions.watermark(table)
+        parts.append(f"{table.name}:{count}:{changed}")
+        if changed is not None and (newest is None or changed > newest):
+            newest = changed
+    if per_viewer:
+        parts += [request.full_path, request.headers.get('Accept', ''), _viewer_token()]
+    etag = hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()[:20]
+    # A windowed view can change with no newer row, so only its ETag is a safe validator
+    last_modified = newest.replace(tzinfo=timezone.utc) if newest is not None and not windowed else None
+    return Validators(etag, last_modified, 'private, no-cache' if per_viewer else 'public, no-cache')
+
+
+def _applies() -> bool:
+    return request.method in ('GET', 'HEAD') and current_app.config.get('CONDITIONAL_GET_ENABLED', True)
+
+
+def _is_current(validators: Validators) -> bool:
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(validators.etag)
+    if request.if_modified_since and validators.last_modified:
+        return validators.last_modified.replace(microsecond=0) <= request.if_modified_since
+    return False
+
+
+def _apply(response: Response, validators: Validators) -> Response:
+    # Weak: the gzip and brotli encodings of one body share the tag
+    response.set_etag(validators.etag, weak=True)
+    if validators.last_modified is not None:
+        response.last_modified = validators.last_modified
+    response.headers['Cache-Control'] = validators.cache_control
+    if validators.cache_control.startswith('private'):
+        response.vary.add('Cookie')
+    return response
+
+
+def _not_modified(validators: Validators) -> Response:
+    return _apply(Response(status=304), validators)
+
+
+def conditional(*tables, key: Optional[Callable[..., Optional[str]]] = None, per_viewer: bool = True,
+                window: bool = True):
+    """
+    Answer If-None-Match / If-Modified-Since with 304 before the view runs its queries
+
+    tables are the models or Tables the view reads; key(**view_args) adds a view-specific
+    version and returning None from it skips validation (e.g. for a missing resource).
+    window=False for views with no relative time ranges, whose tags then only change on writes.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(*args, **kwargs):
+            if not _applies():
+                return view(*args, **kwargs)
+            try:
+                extra = key(*args, **kwargs) if key else ''
+                validators = validators_for(tables, extra, per_viewer, window) if extra is not None else None
+            except Exception as e:
+                logger.warning(f"Could not compute validators for {request.path}: {e}")
+                validators = None
+            if validators is None:
+                return view(*args, **kwargs)
+            if _is_current(validators):
+                return _not_modified(validators)
+            response = make_response(view(*args, **kwargs))
+            return _apply(response, validators) if response.status_code == 200 else response
+        return wrapped
+    return decorator
+
+
+def conditional_blueprint(blueprint, *tables):
+    """conditional() for every GET route of a blueprint"""
+
+    @blueprint.before_request
+    def _check_not_modified():
+        if not _applies():
+            return None
+        try:
+            g.http_validators = validators_for(tables)
+        except Exception as e:
+            logger.warning(f"Could not compute validators for {request.path}: {e}")
+            return None
+        if _is_current(g.http_validators):
+            return _not_modified(g.http_validators)
+        return None
+
+    @blueprint.after_request
+    def _set_validators(response):
+        validators = g.pop('http_validators', None)
+        if validators is not None and response.status_code == 200:
+            _apply(response, validators)
+        return response
+
+    return blueprint
+
+
+def _compressible(response: Response) -> bool:
+    mimetype = response.mimetype or ''
+    return mimetype == 'text/html' or mimetype.endswith('json')
+
+
+def compress_response(response: Response) -> Response:
+    """gzip or brotli (when installed and accepted) for JSON and HTML bodies above the size threshold"""
+    config = current_app.config
+    if (not config.get('COMPRESSION_ENABLED', True) or response.direct_passthrough or response.is_streamed
+            or not 200 <= response.status_code < 300 or response.status_code == 204
+            or 'Content-Encoding' in response.headers or not _compressible(response)):
+        return response
+    response.vary.add('Accept-Encoding')
+
+    offered = ['br', 'gzip'] if BROTLI_AVAILABLE else ['gzip']
+    encoding = request.accept_encodings.best_match(offered)
+    if encoding is None:
+        return response
+    data = response.get_data()
+    if len(data) < config.get('COMPRESSION_MIN_BYTES', 1024):
+        return response
+
+    if encoding == 'br':
+        compressed = brotli.compress(data, quality=config.get('COMPRESSION_BROTLI_QUALITY', 4))
+    else:
+        compressed = gzip.compress(data, compresslevel=config.get('COMPRESSION_GZIP_LEVEL', 6), mtime=0)
+    if len(compressed) >= len(data):
+        return response
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_http_caching(app) -> DataVersions:
+    """Apply CONDITIONAL_GET_* / COMPRESSION_* settings and install the compression hook"""
+    data_versions.probe_ttl = app.config.get('CONDITIONAL_GET_PROBE_TTL', DEFAULT_PROBE_TTL)
+    app.extensions['http_caching_token'] = _template_token(app)
+    app.after_request(compress_response)
+    if app.config.get('COMPRESSION_ENABLED', True) and not BROTLI_AVAILABLE:
+        logger.info("brotli not installed; responses are compressed with gzip only")
+    return data_versions
@@ -2,6 +2,8 @@
 Simplified import utilities to reduce code duplication
 """
 
+import os
+
 def safe_import_replit_auth():
     """Safely import Replit Auth with fallback"""
     try:
@@ -25,4 +27,16 @@ def get_template_helpers():
             return "Operation completed successfully"
         def get_error_message(key):
             return "An error occurred"
-        return get_success_message, get_error_message
\ No newline at end of file
+        return get_success_message, get_error_message
+def get_openai_client(**options):
+    """OpenAI client; the SDK is imported here on first use rather than at startup (~1s, ~40MB)"""
+    from openai import OpenAI
+    options.setdefault('api_key', os.environ.get("OPENAI_API_KEY"))
+    return OpenAI(**options)
+
+
+def get_async_openai_client(**options):
+    """AsyncOpenAI client for the ASGI endpoints, imported on first use like get_openai_client"""
+    from openai import AsyncOpenAI
+    options.setdefault('api_key', os.environ.get("OPENAI_API_KEY"))
+    return AsyncOpenAI(**options)
@@ -0,0 +1,108 @@
+"""
+JSON Serialization
+Flask JSON provider backed by orjson (stdlib fallback) with datetime, Enum and dataclass support
+"""
+
+import dataclasses
+import decimal
+import enum
+import json
+import logging
+import uuid
+from datetime import date, datetime, time
+from typing import Any
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Non-str dict keys are stringified as json.dumps does; numpy arrays from the analytics snapshot pass natively
+_ORJSON_OPTIONS = (orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY) if ORJSON_AVAILABLE else 0
+
+
+def json_default(value: Any) -> Any:
+    """Types either encoder lacks; datetimes are ISO 8601 like orjson's native output"""
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return dataclasses.asdict(value)
+    if isinstance(value, (decimal.Decimal, uuid.UUID)):
+        return str(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if hasattr(value, '__html__'):
+        return str(value.__html__())
+    if hasattr(value, 'tolist'):  # numpy scalars and arrays on the stdlib path
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _stdlib_dumps(obj: Any, indent: bool = False, sort_keys: bool = False) -> str:
+    return json.dumps(obj, ensure_ascii=False, default=json_default, sort_keys=sort_keys,
+                      indent=2 if indent else None, separators=None if indent else (',', ':'))
+
+
+def dumps_bytes(obj: Any, indent: bool = False, sort_keys: bool = False) -> bytes:
+    """UTF-8 JSON (Arabic unescaped) for responses and streams"""
+    if ORJSON_AVAILABLE:
+        option = _ORJSON_OPTIONS | (orjson.OPT_INDENT_2 if indent else 0) | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        try:
+            return orjson.dumps(obj, default=json_default, option=option)
+        except orjson.JSONEncodeError as e:
+            # Integers beyond 64 bits, mixed-type keys under sort: what json.dumps accepts still serializes
+            logger.debug(f"orjson could not serialize response, using the stdlib encoder: {e}")
+    return _stdlib_dumps(obj, indent, sort_keys).encode('utf-8')
+
+
+def dumps(obj: Any, indent: bool = False, sort_keys: bool = False) -> str:
+    return dumps_bytes(obj, indent, sort_keys).decode('utf-8')
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    app.json for jsonify, request.get_json and the tojson filter
+
+    Output is UTF-8 with non-ASCII text as is; datetimes are ISO 8601 instead of the
+    HTTP dates of Flask's default provider. Calls with encoder arguments (indent, cls,
+    default) keep the stdlib path so their semantics are unchanged.
+    """
+
+    ensure_ascii = False
+    sort_keys = False
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if kwargs:
+            kwargs.setdefault('ensure_ascii', self.ensure_ascii)
+            kwargs.setdefault('sort_keys', self.sort_keys)
+            kwargs.setdefault('default', json_default)
+            return json.dumps(obj, **kwargs)
+        return dumps(obj, sort_keys=self.sort_keys)
+
+    def loads(self, s: 'str | bytes', **kwargs: Any) -> Any:
+        if ORJSON_AVAILABLE and not kwargs:
+            # orjson.JSONDecodeError is a ValueError, so get_json's bad request handling is unchanged
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(dumps_bytes(obj, indent, self.sort_keys) + b'\n', mimetype=self.mimetype)
+
+
+def init_json_provider(app) -> FastJSONProvider:
+    """Install the provider as app.json; JSON_SORT_KEYS restores Flask's sorted keys"""
+    app.json = FastJSONProvider(app)
+    app.json.sort_keys = app.config.get('JSON_SORT_KEYS', False)
+    if not ORJSON_AVAILABLE:
+        logger.info("orjson not installed; JSON responses use the stdlib encoder")
+    return app.json
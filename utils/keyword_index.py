@@ -0,0 +1,275 @@
+"""
+Keyword Index
+Per-day keyword postings for text answers, maintained at write time and queried as a SQL top-K
+"""
+
+import logging
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, select, update
+
+from app import db
+from models.survey_flask import (
+    KeywordDayFlask, KeywordFormFlask, KeywordPostingFlask, QuestionResponseFlask, ResponseFlask
+)
+from utils.arabic_search import normalize_for_search
+
+logger = logging.getLogger(__name__)
+
+STOPWORDS = frozenset({
+    'في', 'من', 'إلى', 'على', 'هذا', 'هذه', 'التي', 'الذي', 'كان', 'كانت',
+    'هو', 'هي', 'أن', 'إن', 'لا', 'نعم', 'قد', 'لقد', 'كل', 'بعض',
+    'the', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of',
+    'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'have', 'has'
+})
+NORMALIZED_STOPWORDS = frozenset(normalize_for_search(word) for word in STOPWORDS)
+PUNCTUATION = '.,!?;:"()[]{}،؛؟'
+
+KEYWORDS_PER_ANSWER = 5
+MAX_KEYWORD_LENGTH = 100
+
+# Growth (percent) beyond which a topic counts as rising or falling
+TREND_THRESHOLD = 10.0
+
+
+def extract_keywords(text: Optional[str], limit: int = KEYWORDS_PER_ANSWER, normalize: bool = False) -> List[str]:
+    """Most frequent non-stopword words of a text; normalize=True folds them into index keys"""
+    if normalize:
+        return [key for key, form in keyword_forms(text, limit)]
+    if not text:
+        return []
+    words = text.lower().split()
+    keywords = [word.strip(PUNCTUATION) for word in words if len(word) > 2 and word not in STOPWORDS]
+    return [word for word, count in Counter(keywords).most_common(limit)]
+
+
+def keyword_forms(text: Optional[str], limit: int = KEYWORDS_PER_ANSWER) -> List[Tuple[str, str]]:
+    """(index key, most frequent surface form) of a text's most frequent non-stopword keys"""
+    if not text:
+        return []
+    keys = Counter()
+    forms = defaultdict(Counter)
+    for word in text.split():
+        surface = word.strip(PUNCTUATION)
+        key = normalize_for_search(surface).strip(PUNCTUATION)[:MAX_KEYWORD_LENGTH]
+        if len(key) > 2 and key not in NORMALIZED_STOPWORDS:
+            keys[key] += 1
+            forms[key][surface[:MAX_KEYWORD_LENGTH]] += 1
+    return [(key, forms[key].most_common(1)[0][0]) for key, count in keys.most_common(limit)]
+
+
+def _dialect_insert(executor):
+    """INSERT construct with ON CONFLICT support for the executor's dialect, None if unsupported"""
+    bind = executor.get_bind() if hasattr(executor, 'get_bind') else executor
+    name = bind.dialect.name
+    if name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif name == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return None
+    return dialect_insert
+
+
+def _increment(executor, table, keys: List[str], rows: List[Dict[str, Any]], counters: List[str]):
+    """Add counters to existing rows and insert the missing ones (upsert where supported)"""
+    dialect_insert = _dialect_insert(executor)
+    if dialect_insert is not None:
+        statement = dialect_insert(table)
+        statement = statement.on_conflict_do_update(
+            index_elements=keys,
+            set_={name: table.c[name] + statement.excluded[name] for name in counters}
+        )
+        executor.execute(statement, rows)
+        return
+
+    for row in rows:
+        match = [table.c[key] == row[key] for key in keys]
+        result = executor.execute(
+            update(table).where(*match).values({name: table.c[name] + row[name] for name in counters})
+        )
+        if not result.rowcount:
+            executor.execute(insert(table), [row])
+
+
+def _postings(entries: Iterable[Tuple[datetime, str, Optional[float]]]):
+    """Aggregate (created_at, text, sentiment) answers into posting, day and surface form rows"""
+    postings = defaultdict(lambda: [0, 0.0])
+    days = Counter()
+    forms = Counter()
+    for created_at, text, sentiment in entries:
+        if not text:
+            continue
+        day = created_at.date()
+        days[day] += 1
+        for keyword, form in keyword_forms(text):
+            posting = postings[(keyword, day)]
+            posting[0] += 1
+            posting[1] += sentiment or 0.0
+            forms[(keyword, form)] += 1
+
+    posting_rows = [
+        {'keyword': keyword, 'day': day, 'count': count, 'sentiment_sum': sentiment_sum}
+        for (keyword, day), (count, sentiment_sum) in postings.items()
+    ]
+    day_rows = [{'day': day, 'answers': answers} for day, answers in days.items()]
+    form_rows = [{'keyword': keyword, 'form': form, 'count': count} for (keyword, form), count in forms.items()]
+    return posting_rows, day_rows, form_rows
+
+
+def record_text_answers(entries: Iterable[Tuple[datetime, str, Optional[float]]], executor=None) -> int:
+    """
+    Index newly written text answers
+
+    entries are (response created_at, answer text, sentiment score). Runs in the
+    caller's transaction with SQL-side increments, so concurrent writers never
+    lose counts. Returns the number of posting rows touched.
+    """
+    executor = executor if executor is not None else db.session
+    posting_rows, day_rows, form_rows = _postings(entries)
+    if not day_rows:
+        return 0
+    # Stable key order keeps concurrent upserts from deadlocking on PostgreSQL
+    posting_rows.sort(key=lambda row: (row['keyword'], row['day']))
+    day_rows.sort(key=lambda row: row['day'])
+    form_rows.sort(key=lambda row: (row['keyword'], row['form']))
+    if posting_rows:
+        _increment(executor, KeywordPostingFlask.__table__, ['keyword', 'day'], posting_rows, ['count', 'sentiment_sum'])
+        _increment(executor, KeywordFormFlask.__table__, ['keyword', 'form'], form_rows, ['count'])
+    _increment(executor, KeywordDayFlask.__table__, ['day'], day_rows, ['answers'])
+    return len(posting_rows)
+
+
+def rebuild_keyword_index(executor=None, start_day: Optional[date] = None, end_day: Optional[date] = None,
+                          batch_size: int = 5000) -> int:
+    """
+    Recompute postings for [start_day, end_day] (inclusive, open-ended when None) from stored answers
+
+    Backfill and repair job: replaces the days in range. Answers written to those days while it
+    runs may be counted twice, so run it for closed days or at quiet times. Surface form counts
+    are not per day: a full rebuild replaces them, a ranged one adds to them (they only pick the
+    displayed form). Returns answers indexed.
+    """
+    executor = executor if executor is not None else db.session
+    postings = KeywordPostingFlask.__table__
+    days = KeywordDayFlask.__table__
+    answers = QuestionResponseFlask.__table__
+    responses = ResponseFlask.__table__
+
+    posting_filter, day_filter, answer_filter = [], [], []
+    if start_day is not None:
+        posting_filter.append(postings.c.day >= start_day)
+        day_filter.append(days.c.day >= start_day)
+        answer_filter.append(responses.c.created_at >= datetime.combine(start_day, datetime.min.time()))
+    if end_day is not None:
+        posting_filter.append(postings.c.day <= end_day)
+        day_filter.append(days.c.day <= end_day)
+        answer_filter.append(responses.c.created_at < datetime.combine(end_day + timedelta(days=1), datetime.min.time()))
+
+    executor.execute(delete(postings).where(*posting_filter))
+    executor.execute(delete(days).where(*day_filter))
+    if start_day is None and end_day is None:
+        executor.execute(delete(KeywordFormFlask.__table__))
+
+    query = (
+        select(answers.c.id, responses.c.created_at, answers.c.answer_text, answers.c.sentiment_score)
+        .select_from(answers.join(responses, responses.c.id == answers.c.response_id))
+        .where(answers.c.answer_text.isnot(None), answers.c.answer_text != '', *answer_filter)
+        .order_by(answers.c.id)
+        .limit(batch_size)
+    )
+
+    # Keyset batches keep memory flat on large tables
+    indexed = 0
+    last_id = 0
+    while True:
+        rows = executor.execute(query.where(answers.c.id > last_id)).all()
+        if not rows:
+            break
+        record_text_answers(((row.created_at, row.answer_text, row.sentiment_score) for row in rows), executor)
+        indexed += len(rows)
+        last_id = rows[-1].id
+
+    logger.info(f"Keyword index rebuilt from {indexed} text answers")
+    return indexed
+
+
+def _window_counts(start_day: Optional[date], end_day: date, keywords: Optional[List[str]] = None,
+                   limit: Optional[int] = None):
+    postings = KeywordPostingFlask.__table__
+    total = func.sum(postings.c.count)
+    query = select(postings.c.keyword, total.label('frequency'), func.sum(postings.c.sentiment_sum).label('sentiment_sum')) \
+        .where(postings.c.day <= end_day)
+    if start_day is not None:
+        query = query.where(postings.c.day >= start_day)
+    if keywords is not None:
+        query = query.where(postings.c.keyword.in_(keywords))
+    query = query.group_by(postings.c.keyword).order_by(total.desc(), postings.c.keyword)
+    if limit is not None:
+        query = query.limit(limit)
+    return db.session.execute(query).all()
+
+
+def _answers_in(start_day: Optional[date], end_day: date) -> int:
+    query = select(func.coalesce(func.sum(KeywordDayFlask.answers), 0)).where(KeywordDayFlask.day <= end_day)
+    if start_day is not None:
+        query = query.where(KeywordDayFlask.day >= start_day)
+    return db.session.execute(query).scalar()
+
+
+def display_forms(keywords: List[str]) -> Dict[str, str]:
+    """Most frequently written surface form of each index key (keys never seen in a form map to themselves)"""
+    forms = KeywordFormFlask.__table__
+    rows = db.session.execute(
+        select(forms.c.keyword, forms.c.form).where(forms.c.keyword.in_(keywords))
+        .order_by(forms.c.keyword, forms.c.count.desc(), forms.c.form)
+    ).all()
+    display = {}
+    for keyword, form in rows:
+        display.setdefault(keyword, form)
+    return {keyword: display.get(keyword, keyword) for keyword in keywords}
+
+
+def trending_keywords(start_day: Optional[date], end_day: date, limit: int = 10) -> List[Dict[str, Any]]:
+    """
+    Top keywords in [start_day, end_day] with growth against the window of equal length before it
+
+    'keyword' is the form shown to users and 'key' the normalized index key the counts are grouped by.
+    start_day None means all time; growth is then not defined and every trend is "stable".
+    """
+    current = _window_counts(start_day, end_day, limit=limit)
+    if not current:
+        return []
+    display = display_forms([row.keyword for row in current])
+
+    previous = {}
+    if start_day is not None:
+        span = (end_day - start_day).days + 1
+        previous_rows = _window_counts(start_day - timedelta(days=span), start_day - timedelta(days=1),
+                                       keywords=[row.keyword for row in current])
+        previous = {row.keyword: row.frequency for row in previous_rows}
+
+    total_answers = _answers_in(start_day, end_day)
+    topics = []
+    for row in current:
+        before = previous.get(row.keyword, 0)
+        growth = ((row.frequency - before) / before * 100) if before else None
+        if start_day is None:
+            trend = 'stable'
+        elif growth is None:
+            trend = 'up'  # New this window
+        else:
+            trend = 'up' if growth > TREND_THRESHOLD else 'down' if growth < -TREND_THRESHOLD else 'stable'
+        topics.append({
+            'keyword': display[row.keyword],
+            'key': row.keyword,
+            'frequency': int(row.frequency),
+            'previous_frequency': int(before),
+            'growth': round(growth, 1) if growth is not None else None,
+            'trend': trend,
+            'percentage': round(row.frequency / total_answers * 100, 1) if total_answers else 0,
+            'sentiment_score': float(row.sentiment_sum) / row.frequency,
+        })
+    return topics
@@ -7,11 +7,18 @@ import json
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
 from sqlalchemy import func, and_, or_
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, contains_eager
 from app import db
 from models.survey_flask import SurveyFlask, ResponseFlask, QuestionResponseFlask, QuestionFlask
+from utils.analytics_snapshot import analytics_snapshot, to_micros
+from utils.keyword_index import extract_keywords, trending_keywords
 import logging
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 logger = logging.getLogger(__name__)
 
 
@@ -35,6 +42,10 @@ class LiveAnalyticsProcessor:
             # Calculate time filter
             start_date = self._get_start_date(time_range)
             
+            frame = analytics_snapshot.responses()
+            if frame is not None:
+                return self._dashboard_metrics_from_frame(frame, start_date, time_range)
+            
             # Base query for responses in time range
             base_query = self.db.query(ResponseFlask)
             if start_date:
@@ -89,25 +100,134 @@ class LiveAnalyticsProcessor:
             logger.error(f"Error calculating dashboard metrics: {e}")
             return self._get_fallback_metrics()
     
-    def get_insights_feed(self, limit: int = 50) -> List[Dict[str, Any]]:
+    def _dashboard_metrics_from_frame(self, frame, start_date: Optional[datetime], time_range: str) -> Dict[str, Any]:
+        """Same metrics as get_dashboard_metrics, computed from the columnar snapshot"""
+        in_range = frame.created >= to_micros(start_date) if start_date else np.ones(len(frame), dtype=bool)
+        total_responses = int(in_range.sum())
+        response_change = self._calculate_percentage_change(
+            total_responses, self._get_previous_period_responses(time_range)
+        )
+        
+        # CSAT from rating answers on a 5-point scale
+        rating_count = int(frame.rating_count[in_range].sum())
+        csat = {"average": 0.0, "total_ratings": 0, "change_percentage": 0.0}
+        if rating_count:
+            csat_percentage = float(frame.rating_sum[in_range].sum()) / rating_count / 5 * 100
+            csat = {
+                "average": round(csat_percentage, 1),
+                "total_ratings": rating_count,
+                "change_percentage": self._calculate_percentage_change(
+                    csat_percentage, self._get_previous_period_csat(start_date)
+                )
+            }
+        
+        # Sentiment of text answers
+        sentiment_count = int(frame.sentiment_count[in_range].sum())
+        sentiment = {
+            "average_sentiment": 0.0,
+            "average_confidence": 0.0,
+            "distribution": {"positive": 0, "neutral": 0, "negative": 0},
+            "change_percentage": 0.0
+        }
+        if sentiment_count:
+            avg_sentiment = float(frame.sentiment_sum[in_range].sum()) / sentiment_count
+            positive = int(frame.positive[in_range].sum())
+            negative = int(frame.negative[in_range].sum())
+            counts = {"positive": positive, "neutral": sentiment_count - positive - negative, "negative": negative}
+            sentiment = {
+                "average_sentiment": round(avg_sentiment, 2),
+                "average_confidence": round(float(frame.confidence_sum[in_range].sum()) / sentiment_count, 2),
+                "distribution": {key: round((count / sentiment_count) * 100, 1) for key, count in counts.items()},
+                "change_percentage": self._calculate_percentage_change(
+                    avg_sentiment, self._get_previous_period_sentiment(start_date)
+                )
+            }
+        
+        # Completion and duration
+        completion = {"completion_rate": 0.0, "average_duration": 0.0, "change_percentage": 0.0}
+        if total_responses:
+            completed = in_range & frame.complete
+            completion_rate = int(completed.sum()) / total_responses * 100
+            durations = frame.duration[completed & (frame.duration != 0)]
+            completion = {
+                "completion_rate": round(completion_rate, 1),
+                "average_duration": round(float(durations.mean()) if len(durations) else 0.0, 1),
+                "change_percentage": self._calculate_percentage_change(
+                    completion_rate, self._get_previous_period_completion(start_date)
+                )
+            }
+        
+        # Device type as a channel proxy, busiest first (ties keep first-seen order)
+        channel_performance = []
+        devices = frame.device[in_range]
+        if total_responses:
+            codes, first_seen, counts = np.unique(devices, return_index=True, return_counts=True)
+            complete = frame.complete[in_range]
+            duration = frame.duration[in_range]
+            for code, _, count in sorted(zip(codes, first_seen, counts), key=lambda c: (-c[2], c[1])):
+                selected = devices == code
+                with_duration = duration[selected & (duration != 0)]
+                channel_performance.append({
+                    "channel": frame.device_types[code] if code >= 0 else "غير محدد",
+                    "response_count": int(count),
+                    "completion_rate": round(int(complete[selected].sum()) / int(count) * 100, 1),
+                    "average_duration": round(float(with_duration.mean()) if len(with_duration) else 0, 1),
+                    "percentage_of_total": round((int(count) / total_responses) * 100, 1)
+                })
+        
+        return {
+            "csat": {
+                "score": csat["average"],
+                "count": csat["total_ratings"],
+                "change_percentage": csat["change_percentage"],
+                "trend": "up" if csat["change_percentage"] > 0 else "down" if csat["change_percentage"] < 0 else "stable"
+            },
+            "responses": {
+                "total": total_responses,
+                "change_percentage": response_change,
+                "trend": "up" if response_change > 0 else "down" if response_change < 0 else "stable"
+            },
+            "sentiment": {
+                "score": sentiment["average_sentiment"],
+                "confidence": sentiment["average_confidence"],
+                "distribution": sentiment["distribution"],
+                "change_percentage": sentiment["change_percentage"]
+            },
+            "completion": {
+                "rate": completion["completion_rate"],
+                "average_duration": completion["average_duration"],
+                "change_percentage": completion["change_percentage"]
+            },
+            "channels": channel_performance,
+            "last_updated": datetime.utcnow().isoformat(),
+            "time_range": time_range
+        }
+    
+    def get_insights_feed(self, limit: int = 50, session: Optional[Session] = None) -> List[Dict[str, Any]]:
         """
         Get real-time insights feed from recent responses
         
         Args:
             limit: Maximum number of insights to return
+            session: Session to read with (default: the Flask-SQLAlchemy session)
             
         Returns:
             List of recent response insights with text analytics
         """
         try:
             # Get recent responses with text content
-            recent_responses = self.db.query(QuestionResponseFlask)\
+            recent_responses = (session or self.db).query(QuestionResponseFlask)\
                 .join(ResponseFlask)\
                 .join(QuestionFlask)\
                 .filter(
                     QuestionResponseFlask.answer_text.isnot(None),
                     QuestionResponseFlask.answer_text != ""
                 )\
+                .options(
+                    # Load the context read below with the rows instead of one query per row
+                    contains_eager(QuestionResponseFlask.response).joinedload(ResponseFlask.survey),
+                    contains_eager(QuestionResponseFlask.question)
+                )\
                 .order_by(QuestionResponseFlask.created_at.desc())\
                 .limit(limit).all()
             
@@ -137,7 +257,7 @@ class LiveAnalyticsProcessor:
                     "respondent_name": survey_response.respondent_name or "مجهول",
                     "device_type": survey_response.device_type or "غير محدد",
                     "language_used": survey_response.language_used,
-                    "created_at": response.created_at.isoformat(),
+                    "created_at": response.created_at,
                     "time_ago": self._format_time_ago(response.created_at)
                 }
                 insights.append(insight)
@@ -162,50 +282,23 @@ class LiveAnalyticsProcessor:
         try:
             start_date = self._get_start_date(time_range)
             
-            # Get text responses in time range
-            text_responses = self.db.query(QuestionResponseFlask)\
-                .join(ResponseFlask)\
-                .filter(
-                    QuestionResponseFlask.answer_text.isnot(None),
-                    QuestionResponseFlask.answer_text != ""
-                )
-            
-            if start_date:
-                text_responses = text_responses.filter(ResponseFlask.created_at >= start_date)
-            
-            text_responses = text_responses.all()
-            
-            # Extract and count keywords
-            keyword_counts = {}
-            keyword_sentiments = {}
-            
-            for response in text_responses:
-                keywords = self._extract_keywords(response.answer_text)
-                sentiment = response.sentiment_score or 0.0
-                
-                for keyword in keywords:
-                    if keyword not in keyword_counts:
-                        keyword_counts[keyword] = 0
-                        keyword_sentiments[keyword] = []
-                    
-                    keyword_counts[keyword] += 1
-                    keyword_sentiments[keyword].append(sentiment)
-            
-            # Sort by frequency and calculate average sentiment
-            trending_topics = []
-            for keyword, count in sorted(keyword_counts.items(), key=lambda x: x[1], reverse=True)[:limit]:
-                avg_sentiment = sum(keyword_sentiments[keyword]) / len(keyword_sentiments[keyword])
-                
-                trending_topics.append({
-                    "topic": keyword,
-                    "frequency": count,
-                    "percentage": round((count / len(text_responses)) * 100, 1) if text_responses else 0,
-                    "sentiment": self._classify_sentiment(avg_sentiment),
-                    "sentiment_score": round(avg_sentiment, 2),
-                    "trend": "up"  # Could be enhanced with historical comparison
-                })
-            
-            return trending_topics
+            # Top-K over the per-day keyword postings, compared with the window before it
+            end_day = datetime.utcnow().date()
+            start_day = start_date.date() if start_date else None
+            
+            return [
+                {
+                    "topic": topic["keyword"],
+                    "frequency": topic["frequency"],
+                    "percentage": topic["percentage"],
+                    "sentiment": self._classify_sentiment(topic["sentiment_score"]),
+                    "sentiment_score": round(topic["sentiment_score"], 2),
+                    "trend": topic["trend"],
+                    "growth": topic["growth"],
+                    "previous_frequency": topic["previous_frequency"]
+                }
+                for topic in trending_keywords(start_day, end_day, limit)
+            ]
             
         except Exception as e:
             logger.error(f"Error getting trending topics: {e}")
@@ -428,25 +521,7 @@ class LiveAnalyticsProcessor:
     
     def _extract_keywords(self, text: str) -> List[str]:
         """Extract keywords from text (simple implementation)"""
-        if not text:
-            return []
-        
-        # Simple keyword extraction - can be enhanced with NLP libraries
-        common_words = {
-            'في', 'من', 'إلى', 'على', 'هذا', 'هذه', 'التي', 'الذي', 'كان', 'كانت',
-            'هو', 'هي', 'أن', 'إن', 'لا', 'نعم', 'قد', 'لقد', 'كل', 'بعض',
-            'the', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of',
-            'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'have', 'has'
-        }
-        
-        words = text.lower().split()
-        keywords = [word.strip('.,!?;:"()[]{}') for word in words 
-                   if len(word) > 2 and word not in common_words]
-        
-        # Return most frequent words (simple approach)
-        from collections import Counter
-        word_counts = Counter(keywords)
-        return [word for word, count in word_counts.most_common(5)]
+        return extract_keywords(text)
     
     def _format_time_ago(self, timestamp: datetime) -> str:
         """Format timestamp as 'time ago' string"""
@@ -0,0 +1,457 @@
+"""
+Live Dashboard Feed
+In-process pub/sub that recomputes dashboard metrics once per change and pushes them to every open dashboard
+"""
+
+import asyncio
+import logging
+import os
+import select
+import threading
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional, Set
+
+from sqlalchemy import text
+
+from utils.json_provider import dumps
+from utils.metrics import registry
+from utils.write_tracking import on_commit
+
+logger = logging.getLogger(__name__)
+
+# Writes to these tables change the dashboard metrics or the insights feed
+WATCHED_TABLES = frozenset({'responses_flask', 'question_responses_flask', 'feedback'})
+NOTIFY_CHANNEL = 'voc_live_feed'
+HEARTBEAT = ': heartbeat\n\n'
+RETRY_MS = 3000  # EventSource reconnect delay sent to browsers
+
+# Metric fields that change on every computation without the data changing
+_VOLATILE_FIELDS = frozenset({'last_updated'})
+
+LIVE_FEED_SUBSCRIBERS = registry.gauge('live_feed_subscribers', 'Open live dashboard streams',
+                                       multiprocess_mode='sum')
+LIVE_FEED_DROPPED = registry.counter('live_feed_dropped_events_total', 'Events dropped for slow live dashboard clients')
+LIVE_FEED_REFRESHES = registry.counter('live_feed_refreshes_total', 'Dashboard recomputations triggered by writes')
+
+
+@dataclass(frozen=True)
+class LiveEvent:
+    """One Server-Sent Event: snapshot, change (tables written), metrics (changed fields) or insight"""
+    id: str
+    event: str
+    data: Any
+    published_at: float
+
+    def encode(self) -> str:
+        return f"id: {self.id}\nevent: {self.event}\ndata: {dumps(self.data)}\n\n"
+
+
+def metric_delta(previous: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Any]:
+    """Fields of current that differ from previous, nested dicts compared field by field"""
+    delta = {}
+    for key, value in current.items():
+        if key in _VOLATILE_FIELDS:
+            continue
+        before = previous.get(key)
+        if isinstance(value, dict) and isinstance(before, dict):
+            changed = metric_delta(before, value)
+            if changed:
+                delta[key] = changed
+        elif value != before:
+            delta[key] = value
+    return delta
+
+
+class Subscription:
+    """
+    One dashboard's bounded event queue
+
+    A client that falls more than max_events behind loses its oldest events and is sent a
+    fresh snapshot instead, so a stalled browser never holds memory or blocks publishing.
+    """
+
+    def __init__(self, feed: 'LiveFeed', max_events: int, waker: Optional[Callable[[], None]] = None):
+        self.feed = feed
+        self.max_events = max_events
+        self.dropped = 0
+        self.closed = False
+        self._events: deque = deque()
+        self._lagged = False
+        self._condition = threading.Condition()
+        self._waker = waker
+
+    def put(self, event: LiveEvent):
+        with self._condition:
+            if len(self._events) >= self.max_events:
+                self._events.popleft()
+                self.dropped += 1
+                self._lagged = True
+                LIVE_FEED_DROPPED.inc()
+            self._events.append(event)
+            self._condition.notify()
+        if self._waker is not None:
+            self._waker()
+
+    def drain(self) -> List[LiveEvent]:
+        """Queued events without waiting; a client that lagged gets the current snapshot instead"""
+        with self._condition:
+            if self._lagged:
+                self._lagged = False
+                self._events.clear()
+                snapshot = self.feed.snapshot_event()
+                return [snapshot] if snapshot else []
+            events = list(self._events)
+            self._events.clear()
+            return events
+
+    def get(self, timeout: float) -> List[LiveEvent]:
+        """Wait up to timeout for events; an empty list means it is time for a heartbeat"""
+        with self._condition:
+            if not self._events and not self.closed:
+                self._condition.wait(timeout)
+        return self.drain()
+
+    def close(self):
+        self.feed.unsubscribe(self)
+        with self._condition:
+            self.closed = True
+            self._condition.notify()
+
+
+class LiveFeed:
+    """
+    Dashboard state shared by all streams of this process
+
+    Committed writes to WATCHED_TABLES mark the feed changed; a publisher thread coalesces a
+    burst of changes, computes metrics and new insights once, and fans the result out to every
+    subscription. With no subscribers nothing is computed.
+    """
+
+    def __init__(self, max_client_events: int = 100, replay_size: int = 256, debounce: float = 0.5,
+                 time_range: str = '7d', insights_limit: int = 20, heartbeat: float = 15.0,
+                 max_stream_seconds: float = 0, processor=None):
+        self.max_client_events = max_client_events
+        self.heartbeat = heartbeat
+        self.max_stream_seconds = max_stream_seconds
+        self.debounce = debounce
+        self.time_range = time_range
+        self.insights_limit = insights_limit
+        self.relay: Optional['PostgresRelay'] = None
+        self.stats = {'refreshes': 0, 'published': 0, 'changes': 0}
+        self._processor = processor
+        self._lock = threading.Lock()
+        self._subscribers: Set[Subscription] = set()
+        self._replay: deque = deque(maxlen=replay_size)
+        # Event ids are "<stream>-<sequence>"; a Last-Event-ID from another process or run forces a snapshot
+        self._stream = uuid.uuid4().hex[:8]
+        self._sequence = 0
+        self._metrics: Optional[Dict[str, Any]] = None
+        self._insights: List[Dict[str, Any]] = []
+        self._stale = True
+        self._changed_tables: Set[str] = set()
+        self._changed = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._app = None
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self, last_event_id: Optional[str] = None,
+                  waker: Optional[Callable[[], None]] = None) -> Subscription:
+        """Register a client; it first receives what it missed since last_event_id, or a snapshot"""
+        subscription = Subscription(self, self.max_client_events, waker)
+        with self._lock:
+            self._subscribers.add(subscription)
+            missed = self._replay_after(last_event_id)
+            stale = self._stale
+        LIVE_FEED_SUBSCRIBERS.inc()
+        if missed is None:
+            snapshot = self.snapshot_event()
+            if snapshot is not None:
+                subscription.put(snapshot)
+        else:
+            for live_event in missed:
+                subscription.put(live_event)
+        if stale:
+            # Nothing was computed while nobody was watching
+            self.notify_change()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            if subscription not in self._subscribers:
+                return
+            self._subscribers.discard(subscription)
+        LIVE_FEED_SUBSCRIBERS.dec()
+
+    def snapshot_event(self) -> Optional[LiveEvent]:
+        """Full current state under the latest event id, None before the first computation"""
+        with self._lock:
+            if self._metrics is None:
+                return None
+            return LiveEvent(self._event_id(self._sequence), 'snapshot',
+                             {'metrics': self._metrics, 'insights': self._insights}, time.time())
+
+    def notify_change(self, tables: Iterable[str] = ()):
+        """A write committed; the publisher thread recomputes once for however many arrive together"""
+        with self._lock:
+            self._changed_tables.update(tables)
+        self.stats['changes'] += 1
+        self._changed.set()
+
+    def refresh(self) -> List[LiveEvent]:
+        """Compute metrics and the insights feed once and publish what changed (needs an app context)"""
+        from utils.analytics_snapshot import analytics_snapshot
+
+        processor = self._processor
+        if processor is None:
+            from utils.live_analytics import LiveAnalyticsProcessor
+            processor = self._processor = LiveAnalyticsProcessor()
+        analytics_snapshot.mark_stale()
+        metrics = processor.get_dashboard_metrics(self.time_range)
+        insights = processor.get_insights_feed(self.insights_limit)
+        self.stats['refreshes'] += 1
+        LIVE_FEED_REFRESHES.inc()
+
+        now = time.time()
+        with self._lock:
+            previous = self._metrics
+            tables, self._changed_tables = self._changed_tables, set()
+            self._metrics, self._stale = metrics, False
+            if previous is None:
+                self._insights = insights
+                events = [LiveEvent(self._event_id(self._sequence), 'snapshot',
+                                    {'metrics': metrics, 'insights': insights}, now)]
+            else:
+                known = {insight['id'] for insight in self._insights}
+                self._insights = insights
+                # Which tables were written, for views this feed does not compute (executive dashboard)
+                events = [self._next_event('change', {'tables': sorted(tables)}, now)] if tables else []
+                events += [self._next_event('insight', insight, now)
+                           for insight in reversed(insights) if insight['id'] not in known]
+                delta = metric_delta(previous, metrics)
+                if delta:
+                    delta['last_updated'] = metrics.get('last_updated')
+                    events.append(self._next_event('metrics', delta, now))
+                self._replay.extend(events)
+            subscribers = list(self._subscribers)
+
+        for subscription in subscribers:
+            for live_event in events:
+                subscription.put(live_event)
+        self.stats['published'] += len(events) * len(subscribers)
+        return events
+
+    def start(self, app):
+        """Start this process's publisher thread (and the PostgreSQL relay when configured)"""
+        self._app = app
+        if self._thread is not None and self._thread.is_alive():
+            return
+        # A worker forked from a preloading master needs event ids of its own
+        self._stream = uuid.uuid4().hex[:8]
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='live-feed', daemon=True)
+        self._thread.start()
+        if self.relay is not None:
+            self.relay.start()
+
+    def close(self, timeout: float = 5.0):
+        self._stop.set()
+        self._changed.set()
+        if self.relay is not None:
+            self.relay.close()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            if not self._changed.wait(timeout=1.0):
+                continue
+            # Let the rest of a burst of writes land so it costs one computation
+            self._stop.wait(self.debounce)
+            self._changed.clear()
+            if self._stop.is_set():
+                break
+            if not self._subscribers:
+                self._stale = True
+                continue
+            try:
+                with self._app.app_context():
+                    self.refresh()
+            except Exception as e:
+                logger.warning(f"Live feed refresh failed: {e}")
+
+    def _event_id(self, sequence: int) -> str:
+        return f"{self._stream}-{sequence}"
+
+    def _next_event(self, name: str, data: Any, published_at: float) -> LiveEvent:
+        self._sequence += 1
+        return LiveEvent(self._event_id(self._sequence), name, data, published_at)
+
+    def _replay_after(self, last_event_id: Optional[str]) -> Optional[List[LiveEvent]]:
+        """Events after last_event_id, or None when they cannot all be replayed"""
+        if not last_event_id:
+            return None
+        stream, _, sequence = last_event_id.rpartition('-')
+        if stream != self._stream or not sequence.isdigit() or int(sequence) > self._sequence:
+            return None
+        sequence = int(sequence)
+        if sequence == self._sequence:
+            return []
+        if not self._replay or self._event_sequence(self._replay[0]) > sequence + 1:
+            return None
+        return [e for e in self._replay if self._event_sequence(e) > sequence]
+
+    @staticmethod
+    def _event_sequence(live_event: LiveEvent) -> int:
+        return int(live_event.id.rpartition('-')[2])
+
+
+class PostgresRelay:
+    """Carries change notifications between worker processes with LISTEN/NOTIFY"""
+
+    def __init__(self, feed: LiveFeed, engine, channel: str = NOTIFY_CHANNEL):
+        self.feed = feed
+        self.engine = engine
+        self.channel = channel
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def publish(self, tables: Iterable[str]):
+        """Tell the other workers; the payload carries our pid so we skip our own notification"""
+        try:
+            with self.engine.connect() as conn:
+                conn.execute(text("SELECT pg_notify(:channel, :payload)"),
+                             {'channel': self.channel, 'payload': f"{os.getpid()}:{','.join(sorted(tables))}"})
+                conn.commit()
+        except Exception as e:
+            logger.warning(f"Live feed NOTIFY failed: {e}")
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._listen, name='live-feed-listen', daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self._stop.set()
+
+    def _listen(self):
+        while not self._stop.is_set():
+            connection = None
+            try:
+                connection = self.engine.raw_connection()
+                driver_connection = connection.driver_connection
+                driver_connection.autocommit = True
+                with driver_connection.cursor() as cursor:
+                    cursor.execute(f'LISTEN "{self.channel}"')
+                while not self._stop.is_set():
+                    if select.select([driver_connection], [], [], 1.0) == ([], [], []):
+                        continue
+                    driver_connection.poll()
+                    while driver_connection.notifies:
+                        notification = driver_connection.notifies.pop(0)
+                        pid, _, tables = notification.payload.partition(':')
+                        if pid != str(os.getpid()):
+                            self.feed.notify_change(tables.split(','))
+            except Exception as e:
+                logger.warning(f"Live feed LISTEN connection lost, reconnecting: {e}")
+                self._stop.wait(5)
+            finally:
+                if connection is not None:
+                    connection.invalidate()
+
+
+# Global live feed instance
+live_feed = LiveFeed()
+
+
+def _record_push_latency(events: List[LiveEvent]):
+    from utils.dashboard_performance import performance_monitor
+    for live_event in events:
+        performance_monitor.measure_push_latency(live_event.published_at)
+
+
+def stream_events(subscription: Subscription) -> Iterator[str]:
+    """
+    Server-Sent Events text for a subscription (Flask streaming response)
+
+    Heartbeat comments keep proxies from closing an idle stream and surface a gone client
+    as a write error. With max_stream_seconds the stream ends and the browser reconnects
+    with Last-Event-ID, which frees synchronous workers without losing events.
+    """
+    feed = subscription.feed
+    deadline = time.monotonic() + feed.max_stream_seconds if feed.max_stream_seconds else None
+    try:
+        yield f"retry: {RETRY_MS}\n\n"
+        while deadline is None or time.monotonic() < deadline:
+            events = subscription.get(feed.heartbeat)
+            if not events:
+                yield HEARTBEAT
+                continue
+            yield ''.join(live_event.encode() for live_event in events)
+            _record_push_latency(events)
+    finally:
+        subscription.close()
+
+
+async def stream_events_async(feed: LiveFeed, last_event_id: Optional[str] = None) -> AsyncIterator[str]:
+    """Server-Sent Events on the event loop (ASGI mode): no thread is held while a dashboard waits"""
+    loop = asyncio.get_running_loop()
+    wake = asyncio.Event()
+    subscription = feed.subscribe(last_event_id, waker=lambda: loop.call_soon_threadsafe(wake.set))
+    try:
+        yield f"retry: {RETRY_MS}\n\n"
+        while True:
+            try:
+                await asyncio.wait_for(wake.wait(), feed.heartbeat)
+            except asyncio.TimeoutError:
+                yield HEARTBEAT
+                continue
+            wake.clear()
+            events = subscription.drain()
+            if events:
+                yield ''.join(live_event.encode() for live_event in events)
+                _record_push_latency(events)
+    finally:
+        subscription.close()
+
+
+@on_commit
+def _publish_committed(tables: Set[str]):
+    watched = tables & WATCHED_TABLES
+    if watched:
+        live_feed.notify_change(watched)
+        if live_feed.relay is not None:
+            live_feed.relay.publish(watched)
+
+
+def init_live_feed(app) -> LiveFeed:
+    """Configure the feed from LIVE_FEED_*; the publisher starts with the background services"""
+    live_feed.max_client_events = app.config.get('LIVE_FEED_CLIENT_QUEUE', 100)
+    live_feed.debounce = app.config.get('LIVE_FEED_DEBOUNCE_SECONDS', 0.5)
+    live_feed.time_range = app.config.get('LIVE_FEED_TIME_RANGE', '7d')
+    live_feed.insights_limit = app.config.get('LIVE_FEED_INSIGHTS_LIMIT', 20)
+    live_feed.heartbeat = app.config.get('LIVE_FEED_HEARTBEAT_SECONDS', 15)
+    live_feed.max_stream_seconds = app.config.get('LIVE_FEED_MAX_STREAM_SECONDS', 0)
+
+    @app.context_processor
+    def inject_live_feed():
+        return {'live_feed_sse': app.config.get('LIVE_FEED_SSE', False)}
+
+    if app.config.get('LIVE_FEED_PG_NOTIFY'):
+        from app import db
+        with app.app_context():
+            engine = db.engine
+        if engine.dialect.name == 'postgresql':
+            live_feed.relay = PostgresRelay(live_feed, engine)
+        else:
+            logger.warning("LIVE_FEED_PG_NOTIFY needs PostgreSQL; live feed changes stay in-process")
+    return live_feed
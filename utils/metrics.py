@@ -0,0 +1,502 @@
+"""
+Metrics Registry
+Counters, gauges and fixed-bucket histograms with WSGI request metrics and Prometheus text exposition
+"""
+
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Label combinations per metric; beyond this new combinations share one overflow series
+MAX_SERIES_PER_METRIC = 500
+OVERFLOW_LABEL = '__other__'
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+ROUTE_ENVIRON_KEY = 'voc.metrics.route'
+KNOWN_METHODS = frozenset(['GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'])
+
+# How a gauge is combined across worker processes
+GAUGE_MODES = ('all', 'sum', 'max', 'min')
+
+
+class _CounterValue:
+    __slots__ = ('_value', '_lock')
+
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        with self._lock:
+            self._value += amount
+
+    def get(self) -> float:
+        return self._value
+
+
+class _GaugeValue:
+    __slots__ = ('_value', '_lock')
+
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def set(self, value: float):
+        self._value = float(value)
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.inc(-amount)
+
+    def get(self) -> float:
+        return self._value
+
+
+class _HistogramValue:
+    __slots__ = ('_upper_bounds', '_counts', '_sum', '_lock')
+
+    def __init__(self, upper_bounds: Tuple[float, ...]):
+        self._upper_bounds = upper_bounds
+        self._counts = [0] * (len(upper_bounds) + 1)  # Last slot is +Inf
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self._upper_bounds, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def get(self) -> Tuple[List[int], float]:
+        """(per-bucket counts, sum); buckets are not cumulative"""
+        with self._lock:
+            return list(self._counts), self._sum
+
+
+class Metric:
+    """A named metric family; labels() returns the series for one label combination"""
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values, **named):
+        """Series for the label values, given positionally or by name"""
+        key = tuple(str(v) for v in values) if values else tuple(str(named[n]) for n in self.labelnames)
+        if len(key) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        # Lock-free fast path: dict lookups are atomic
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                if key not in self._children and len(self._children) >= MAX_SERIES_PER_METRIC:
+                    key = (OVERFLOW_LABEL,) * len(key)
+                child = self._children.get(key)
+                if child is None:
+                    child = self._children[key] = self._new_child()
+        return child
+
+    def series(self) -> List[Tuple[Tuple[str, ...], Any]]:
+        return [(key, child.get()) for key, child in list(self._children.items())]
+
+    def clear(self):
+        with self._lock:
+            self._children = {}
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def _new_child(self):
+        return _CounterValue()
+
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=(), multiprocess_mode: str = 'all'):
+        super().__init__(name, documentation, labelnames)
+        if multiprocess_mode not in GAUGE_MODES:
+            raise ValueError(f"multiprocess_mode must be one of {GAUGE_MODES}")
+        self.multiprocess_mode = multiprocess_mode
+
+    def _new_child(self):
+        return _GaugeValue()
+
+    def set(self, value: float):
+        self.labels().set(value)
+
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+    def dec(self, amount: float = 1.0):
+        self.labels().dec(amount)
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(float(b) for b in buckets))
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def time(self, *label_values):
+        """Context manager observing the elapsed seconds of its block"""
+        return _Timer(self.labels(*label_values))
+
+
+class _Timer:
+    def __init__(self, child):
+        self._child = child
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._child.observe(time.perf_counter() - self._start)
+
+
+def _format_value(value: float) -> str:
+    if value in (float('inf'), float('-inf')):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"') for v in values)
+    return '{' + ','.join(f'{n}="{v}"' for n, v in zip(names, escaped)) + '}'
+
+
+class MetricsRegistry:
+    """
+    Process-wide metric families
+
+    In multiprocess mode every process flushes its values to <directory>/metrics-<pid>.json
+    every flush_interval seconds; exposition merges all files, so any worker can serve /metrics.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+        self.multiprocess_dir: Optional[str] = None
+        self.flush_interval = 1.0
+        self._pid = os.getpid()
+        self._flusher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def _get_or_create(self, cls, name, documentation, labelnames, **options) -> Metric:
+        metric = self._metrics.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(name)
+                if metric is None:
+                    metric = self._metrics[name] = cls(name, documentation, labelnames, **options)
+        if not isinstance(metric, cls) or metric.labelnames != tuple(labelnames):
+            raise ValueError(f"Metric {name} already registered as a different type or label set")
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+              multiprocess_mode: str = 'all') -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames, multiprocess_mode=multiprocess_mode)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def get(self, name: str) -> Optional[Metric]:
+        return self._metrics.get(name)
+
+    def add_collector(self, collector: Callable[[], None]):
+        """Callable run before every exposition, e.g. to refresh gauges from the system"""
+        if collector not in self._collectors:
+            self._collectors.append(collector)
+
+    def clear(self):
+        """Drop every recorded value (families stay registered)"""
+        for metric in list(self._metrics.values()):
+            metric.clear()
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """JSON-serializable view of every family and its series"""
+        families = {}
+        for name, metric in list(self._metrics.items()):
+            family = {'type': metric.kind, 'help': metric.documentation, 'labelnames': list(metric.labelnames),
+                      'series': [[list(key), value] for key, value in metric.series()]}
+            if isinstance(metric, Histogram):
+                family['buckets'] = list(metric.buckets)
+            if isinstance(metric, Gauge):
+                family['mode'] = metric.multiprocess_mode
+            families[name] = family
+        return families
+
+    # Multiprocess mode
+
+    def enable_multiprocess(self, directory: str, flush_interval: float = 1.0):
+        os.makedirs(directory, exist_ok=True)
+        self.multiprocess_dir = directory
+        self.flush_interval = flush_interval
+        self._start_flusher()
+
+    def _start_flusher(self):
+        self._stop = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, name='metrics-flusher', daemon=True)
+        self._flusher.start()
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.warning(f"Metrics flush failed: {e}")
+
+    def _path(self, pid: int) -> str:
+        return os.path.join(self.multiprocess_dir, f"metrics-{pid}.json")
+
+    def flush(self):
+        """Write this process's values for other workers' scrapes"""
+        if not self.multiprocess_dir:
+            return
+        path = self._path(os.getpid())
+        temporary = f"{path}.tmp"
+        with open(temporary, 'w', encoding='utf-8') as handle:
+            json.dump(self.snapshot(), handle)
+        os.replace(temporary, path)
+
+    def ensure_process(self):
+        """After a fork, forget the parent's values and restart flushing under the new pid"""
+        pid = os.getpid()
+        if pid == self._pid:
+            return
+        self._pid = pid
+        self.clear()
+        if self.multiprocess_dir:
+            self._start_flusher()
+
+    def mark_process_dead(self, pid: int):
+        """Drop a dead worker's gauges; its counters and histograms keep counting toward totals"""
+        if not self.multiprocess_dir:
+            return
+        path = self._path(pid)
+        try:
+            with open(path, encoding='utf-8') as handle:
+                families = json.load(handle)
+        except (OSError, ValueError):
+            return
+        families = {name: family for name, family in families.items() if family['type'] != 'gauge'}
+        with open(path, 'w', encoding='utf-8') as handle:
+            json.dump(families, handle)
+
+    def _merged(self) -> Dict[str, Dict[str, Any]]:
+        """Families from every process file, combined per metric type"""
+        self.flush()
+        merged: Dict[str, Dict[str, Any]] = {}
+        for path in sorted(glob.glob(os.path.join(self.multiprocess_dir, 'metrics-*.json'))):
+            pid = os.path.basename(path)[len('metrics-'):-len('.json')]
+            try:
+                with open(path, encoding='utf-8') as handle:
+                    families = json.load(handle)
+            except (OSError, ValueError):
+                continue
+            for name, family in families.items():
+                target = merged.setdefault(name, dict(family, series={}))
+                mode = family.get('mode', 'all')
+                labelnames = list(family['labelnames'])
+                if family['type'] == 'gauge' and mode == 'all':
+                    target['labelnames'] = labelnames + ['pid']
+                for key, value in family['series']:
+                    key = tuple(key) + ((pid,) if family['type'] == 'gauge' and mode == 'all' else ())
+                    current = target['series'].get(key)
+                    if current is None:
+                        target['series'][key] = value
+                    elif family['type'] == 'histogram':
+                        counts = [a + b for a, b in zip(current[0], value[0])]
+                        target['series'][key] = [counts, current[1] + value[1]]
+                    elif family['type'] == 'gauge' and mode in ('max', 'min'):
+                        target['series'][key] = (max if mode == 'max' else min)(current, value)
+                    else:
+                        target['series'][key] = current + value
+        for family in merged.values():
+            family['series'] = list(family['series'].items())
+        return merged
+
+    def expose(self) -> str:
+        """Prometheus text exposition format (0.0.4)"""
+        for collector in list(self._collectors):
+            try:
+                collector()
+            except Exception as e:
+                logger.warning(f"Metrics collector failed: {e}")
+
+        if self.multiprocess_dir:
+            families = self._merged()
+        else:
+            families = self.snapshot()
+            for family in families.values():
+                family['series'] = [(tuple(key), value) for key, value in family['series']]
+
+        lines = []
+        for name in sorted(families):
+            family = families[name]
+            labelnames = family['labelnames']
+            lines.append(f"# HELP {name} {family['help']}")
+            lines.append(f"# TYPE {name} {family['type']}")
+            for key, value in sorted(family['series']):
+                if family['type'] == 'histogram':
+                    counts, total = value
+                    cumulative = 0
+                    for upper, count in zip(family['buckets'] + [float('inf')], counts):
+                        cumulative += count
+                        labels = _format_labels(labelnames + ['le'], list(key) + [_format_value(upper)])
+                        lines.append(f"{name}_bucket{labels} {_format_value(cumulative)}")
+                    labels = _format_labels(labelnames, key)
+                    lines.append(f"{name}_sum{labels} {_format_value(total)}")
+                    lines.append(f"{name}_count{labels} {_format_value(cumulative)}")
+                else:
+                    lines.append(f"{name}{_format_labels(labelnames, key)} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+REQUESTS = registry.counter('http_requests_total', 'HTTP requests by route, method and status',
+                            ('method', 'route', 'status'))
+REQUEST_LATENCY = registry.histogram('http_request_duration_seconds', 'HTTP request latency until the body is sent',
+                                     ('method', 'route'))
+IN_PROGRESS = registry.gauge('http_requests_in_progress', 'HTTP requests being served', multiprocess_mode='sum')
+
+
+class _RecordingIterable:
+    """Response body wrapper that records the request once the server closes it"""
+
+    def __init__(self, iterable: Iterable[bytes], on_close: Callable[[], None]):
+        self._iterable = iterable
+        self._on_close = on_close
+
+    def __iter__(self):
+        return iter(self._iterable)
+
+    def close(self):
+        try:
+            if hasattr(self._iterable, 'close'):
+                self._iterable.close()
+        finally:
+            self._on_close()
+
+
+class MetricsMiddleware:
+    """WSGI middleware recording per-route latency and status for every request"""
+
+    def __init__(self, wsgi_app, metrics_registry: MetricsRegistry = registry, skip_paths: Sequence[str] = ('/metrics',)):
+        self.wsgi_app = wsgi_app
+        self.registry = metrics_registry
+        self.skip_paths = frozenset(skip_paths)
+
+    def __call__(self, environ, start_response):
+        if environ.get('PATH_INFO') in self.skip_paths:
+            return self.wsgi_app(environ, start_response)
+
+        self.registry.ensure_process()
+        started = time.perf_counter()
+        status = ['500']
+
+        def recording_start_response(status_line, headers, exc_info=None):
+            status[0] = status_line.split(' ', 1)[0]
+            return start_response(status_line, headers, exc_info)
+
+        def record():
+            method = environ.get('REQUEST_METHOD', 'GET')
+            method = method if method in KNOWN_METHODS else 'OTHER'
+            route = environ.get(ROUTE_ENVIRON_KEY, 'unmatched')
+            REQUEST_LATENCY.labels(method, route).observe(time.perf_counter() - started)
+            REQUESTS.labels(method, route, status[0]).inc()
+            IN_PROGRESS.dec()
+
+        IN_PROGRESS.inc()
+        try:
+            body = self.wsgi_app(environ, recording_start_response)
+        except Exception:
+            record()
+            raise
+        return _RecordingIterable(body, record)
+
+
+def collect_process_metrics():
+    """Refresh process and host gauges without blocking (cpu_percent compares with the last call)"""
+    if not PSUTIL_AVAILABLE:
+        return
+    process = psutil.Process()
+    registry.gauge('process_resident_memory_bytes', 'Resident memory of the process').set(process.memory_info().rss)
+    registry.gauge('process_cpu_seconds', 'User and system CPU time of the process').set(
+        sum(process.cpu_times()[:2]))
+    registry.gauge('system_cpu_percent', 'Host CPU utilisation since the previous sample',
+                   multiprocess_mode='max').set(psutil.cpu_percent(interval=None))
+    registry.gauge('system_memory_percent', 'Host memory in use', multiprocess_mode='max').set(
+        psutil.virtual_memory().percent)
+
+
+def init_metrics(app) -> MetricsRegistry:
+    """Wrap the app with request metrics and serve the registry at METRICS_PATH"""
+    if not app.config.get('METRICS_ENABLED', True):
+        return registry
+    from flask import Response, request
+
+    multiprocess_dir = app.config.get('METRICS_MULTIPROC_DIR')
+    if multiprocess_dir and registry.multiprocess_dir != multiprocess_dir:
+        registry.enable_multiprocess(multiprocess_dir, app.config.get('METRICS_FLUSH_INTERVAL', 1.0))
+    registry.add_collector(collect_process_metrics)
+    path = app.config.get('METRICS_PATH', '/metrics')
+
+    @app.before_request
+    def _tag_metrics_route():
+        # Route templates keep label cardinality bounded; unmatched paths share one series
+        request.environ[ROUTE_ENVIRON_KEY] = request.url_rule.rule if request.url_rule else 'unmatched'
+
+    def metrics_endpoint():
+        return Response(registry.expose(), content_type=CONTENT_TYPE)
+
+    app.add_url_rule(path, 'metrics', metrics_endpoint)
+    app.wsgi_app = MetricsMiddleware(app.wsgi_app, registry, skip_paths=(path,))
+    return registry
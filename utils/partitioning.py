@@ -0,0 +1,325 @@
+"""
+Table Partitioning
+Monthly created_at range partitions for feedback and survey responses on PostgreSQL
+"""
+
+import logging
+import re
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from utils.schema_migrations import table_exists
+
+logger = logging.getLogger(__name__)
+
+# Tables that grow without bound and are read by created_at ranges
+PARTITIONED_TABLES: Dict[str, str] = {
+    'feedback': 'created_at',
+    'responses_flask': 'created_at',
+}
+
+DEFAULT_MONTHS_AHEAD = 3
+DEFAULT_MAINTENANCE_INTERVAL = 24 * 60 * 60
+
+# Serializes partition DDL across workers (pg_advisory_xact_lock key)
+_MAINTENANCE_LOCK_KEY = 0x766F6370
+
+_BOUND_PATTERN = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+_maintenance_thread: Optional[threading.Thread] = None
+_maintenance_lock = threading.Lock()
+
+
+@dataclass
+class PartitionInfo:
+    """One attached partition and its [lower, upper) created_at range"""
+    name: str
+    lower: Optional[datetime] = None
+    upper: Optional[datetime] = None
+    is_default: bool = False
+
+
+def month_start(value: datetime) -> datetime:
+    return datetime(value.year, value.month, 1)
+
+
+def add_months(value: datetime, months: int) -> datetime:
+    """First day of the month `months` away from value's month"""
+    index = value.year * 12 + value.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def month_ranges(start: datetime, end: datetime) -> List[Tuple[datetime, datetime]]:
+    """[lower, upper) monthly bounds covering start through end inclusive"""
+    ranges = []
+    lower = month_start(start)
+    while lower <= end:
+        upper = add_months(lower, 1)
+        ranges.append((lower, upper))
+        lower = upper
+    return ranges
+
+
+def partition_name(table: str, lower: datetime) -> str:
+    return f"{table}_p{lower:%Y%m}"
+
+
+def default_partition_name(table: str) -> str:
+    return f"{table}_pdefault"
+
+
+def supports_partitioning(conn) -> bool:
+    """Native declarative partitioning is PostgreSQL only; SQLite keeps plain tables"""
+    return conn.dialect.name == 'postgresql'
+
+
+def is_partitioned(conn, table: str) -> bool:
+    if not supports_partitioning(conn):
+        return False
+    return conn.execute(text(
+        "SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid "
+        "WHERE c.relname = :table AND pg_table_is_visible(c.oid)"
+    ), {'table': table}).first() is not None
+
+
+def parse_partition_bound(bound: str) -> Tuple[Optional[datetime], Optional[datetime], bool]:
+    """Decode pg_get_expr(relpartbound) into (lower, upper, is_default)"""
+    if bound.strip().upper() == 'DEFAULT':
+        return None, None, True
+    match = _BOUND_PATTERN.search(bound)
+    if not match:
+        return None, None, False
+    return datetime.fromisoformat(match.group(1)), datetime.fromisoformat(match.group(2)), False
+
+
+def list_partitions(conn, table: str) -> List[PartitionInfo]:
+    """Attached partitions of a partitioned table, oldest first, default last"""
+    if not supports_partitioning(conn):
+        return []
+    rows = conn.execute(text(
+        "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) "
+        "FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = :table AND pg_table_is_visible(p.oid)"
+    ), {'table': table})
+    partitions = [PartitionInfo(name, *parse_partition_bound(bound)) for name, bound in rows]
+    return sorted(partitions, key=lambda p: (p.is_default, p.lower or datetime.min))
+
+
+def _has_default_partition(conn, table: str) -> bool:
+    return any(p.is_default for p in list_partitions(conn, table))
+
+
+def create_partition(conn, table: str, lower: datetime) -> bool:
+    """Create the month partition starting at lower, returns False if it already exists"""
+    column = PARTITIONED_TABLES[table]
+    lower = month_start(lower)
+    upper = add_months(lower, 1)
+    name = partition_name(table, lower)
+    if any(p.name == name for p in list_partitions(conn, table)):
+        return False
+
+    bounds = {'lower': lower, 'upper': upper}
+    default = default_partition_name(table)
+    stray_rows = _has_default_partition(conn, table) and conn.execute(text(
+        f"SELECT 1 FROM {default} WHERE {column} >= :lower AND {column} < :upper LIMIT 1"
+    ), bounds).first() is not None
+
+    if stray_rows:
+        # Rows for this month landed in the default partition; PostgreSQL refuses the
+        # new partition until they move, so detach, create, move, and re-attach
+        conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {default}"))
+    conn.execute(text(
+        f"CREATE TABLE {name} PARTITION OF {table} "
+        f"FOR VALUES FROM ('{lower:%Y-%m-%d %H:%M:%S}') TO ('{upper:%Y-%m-%d %H:%M:%S}')"
+    ))
+    if stray_rows:
+        moved = conn.execute(text(
+            f"WITH moved AS (DELETE FROM {default} WHERE {column} >= :lower AND {column} < :upper RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved"
+        ), bounds).rowcount
+        conn.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {default} DEFAULT"))
+        logger.info(f"Moved {moved} rows from {default} into {name}")
+    logger.info(f"Created partition {name}")
+    return True
+
+
+def ensure_partitions(conn, table: str, months_ahead: int = DEFAULT_MONTHS_AHEAD,
+                      now: Optional[datetime] = None) -> List[str]:
+    """Create partitions from the current month through months_ahead, returns the new names"""
+    if not is_partitioned(conn, table):
+        return []
+    now = now or datetime.utcnow()
+    created = []
+    for lower, _ in month_ranges(now, add_months(now, months_ahead)):
+        if create_partition(conn, table, lower):
+            created.append(partition_name(table, lower))
+    return created
+
+
+def _index_definitions(conn, table: str, column: str) -> List[str]:
+    """Secondary index DDL of the plain table, adjusted to be valid on its partitioned replacement"""
+    rows = conn.execute(text(
+        "SELECT indexname, indexdef FROM pg_indexes WHERE tablename = :table AND schemaname = current_schema()"
+    ), {'table': table})
+    definitions = []
+    for name, definition in rows:
+        if name == f"{table}_pkey":
+            continue
+        if definition.startswith('CREATE UNIQUE INDEX') and column not in definition:
+            # Unique indexes on a partitioned table must include the partition key
+            definition = re.sub(r"\(([^()]*)\)", rf"(\1, {column})", definition, count=1)
+        definitions.append(definition)
+    return definitions
+
+
+def convert_to_partitioned(conn, table: str, months_ahead: int = DEFAULT_MONTHS_AHEAD,
+                           now: Optional[datetime] = None) -> List[str]:
+    """
+    Rebuild an existing table as a monthly range-partitioned table, returns the partitions created.
+    The primary key becomes (id, created_at) and foreign keys pointing at the table are dropped,
+    since PostgreSQL cannot enforce them against a key that excludes the partition column.
+    """
+    if not supports_partitioning(conn) or is_partitioned(conn, table):
+        return []
+    column = PARTITIONED_TABLES[table]
+    legacy = f"{table}_unpartitioned"
+    now = now or datetime.utcnow()
+
+    index_definitions = _index_definitions(conn, table, column)
+    sequence = conn.execute(text("SELECT pg_get_serial_sequence(:table, 'id')"), {'table': table}).scalar()
+    oldest = conn.execute(text(f"SELECT MIN({column}) FROM {table}")).scalar() or now
+
+    # Generated columns (e.g. the search tsvector) keep their expression and are recomputed on copy
+    columns = conn.execute(text(
+        "SELECT column_name, is_generated FROM information_schema.columns "
+        "WHERE table_name = :table AND table_schema = current_schema() ORDER BY ordinal_position"
+    ), {'table': table}).all()
+    stored = ', '.join(name for name, generated in columns if generated != 'ALWAYS')
+    including = ' INCLUDING GENERATED' if any(generated == 'ALWAYS' for _, generated in columns) else ''
+
+    conn.execute(text(f"ALTER TABLE {table} RENAME TO {legacy}"))
+    conn.execute(text(f"ALTER INDEX IF EXISTS {table}_pkey RENAME TO {legacy}_pkey"))
+    conn.execute(text(
+        f"CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS INCLUDING COMMENTS INCLUDING STORAGE{including}) "
+        f"PARTITION BY RANGE ({column})"
+    ))
+    conn.execute(text(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id, {column})"))
+
+    created = []
+    for lower, _ in month_ranges(min(oldest, now), add_months(now, months_ahead)):
+        create_partition(conn, table, lower)
+        created.append(partition_name(table, lower))
+    conn.execute(text(f"CREATE TABLE {default_partition_name(table)} PARTITION OF {table} DEFAULT"))
+
+    copied = conn.execute(text(f"INSERT INTO {table} ({stored}) SELECT {stored} FROM {legacy}")).rowcount
+    if sequence:
+        conn.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY {table}.id"))
+
+    dropped_keys = conn.execute(text(
+        "SELECT conrelid::regclass::text, conname FROM pg_constraint "
+        "WHERE contype = 'f' AND confrelid = CAST(:legacy AS regclass)"
+    ), {'legacy': legacy}).all()
+    conn.execute(text(f"DROP TABLE {legacy} CASCADE"))
+    for referencing, name in dropped_keys:
+        logger.warning(f"Dropped foreign key {referencing}.{name} referencing partitioned {table}")
+
+    for definition in index_definitions:
+        conn.execute(text(definition))
+
+    logger.info(f"Partitioned {table}: {copied} rows across {len(created)} monthly partitions")
+    return created
+
+
+def detach_partitions_before(conn, table: str, cutoff: datetime, drop: bool = False) -> List[str]:
+    """Detach (and optionally drop) partitions whose whole range ends on or before cutoff"""
+    detached = []
+    for partition in list_partitions(conn, table):
+        if partition.is_default or partition.upper is None or partition.upper > cutoff:
+            continue
+        conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {partition.name}"))
+        if drop:
+            conn.execute(text(f"DROP TABLE {partition.name}"))
+        detached.append(partition.name)
+        logger.info(f"{'Dropped' if drop else 'Detached'} partition {partition.name}")
+    return detached
+
+
+def scanned_partitions(plan_lines: Iterable[str], table: str) -> List[str]:
+    """Partitions of table that an EXPLAIN plan reads (those left after pruning)"""
+    pattern = re.compile(rf"\bon ({re.escape(table)}_p(?:\d{{6}}|default))\b")
+    scanned = []
+    for line in plan_lines:
+        for name in pattern.findall(line):
+            if name not in scanned:
+                scanned.append(name)
+    return scanned
+
+
+def maintain_partitions(engine, months_ahead: int = DEFAULT_MONTHS_AHEAD, retention_months: int = 0,
+                        drop_detached: bool = False, convert_empty: bool = True,
+                        now: Optional[datetime] = None) -> Dict[str, Dict[str, List[str]]]:
+    """
+    Create upcoming partitions and apply retention for every partitioned table.
+    Empty unpartitioned tables (fresh installs) are converted in place; tables that
+    already hold data are left for scripts/manage_partitions.py convert.
+    """
+    if engine.dialect.name != 'postgresql':
+        logger.debug(f"Partitioning not supported on {engine.dialect.name}; using plain created_at indexes")
+        return {}
+
+    now = now or datetime.utcnow()
+    report = {}
+    with engine.begin() as conn:
+        conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {'key': _MAINTENANCE_LOCK_KEY})
+        for table in PARTITIONED_TABLES:
+            if not table_exists(conn, table):
+                continue
+            if not is_partitioned(conn, table):
+                if not convert_empty or conn.execute(text(f"SELECT 1 FROM {table} LIMIT 1")).first():
+                    logger.warning(f"{table} is not partitioned; run scripts/manage_partitions.py convert")
+                    continue
+                convert_to_partitioned(conn, table, months_ahead, now)
+
+            entry = {'created': ensure_partitions(conn, table, months_ahead, now), 'detached': []}
+            if retention_months:
+                cutoff = add_months(now, -retention_months)
+                entry['detached'] = detach_partitions_before(conn, table, cutoff, drop=drop_detached)
+            report[table] = entry
+    return report
+
+
+def start_background_partition_maintenance(app, interval: int = DEFAULT_MAINTENANCE_INTERVAL) -> threading.Thread:
+    """Keep upcoming partitions created and retention applied (one thread per process)"""
+    global _maintenance_thread
+
+    with _maintenance_lock:
+        if _maintenance_thread and _maintenance_thread.is_alive():
+            return _maintenance_thread
+
+        from app import db
+
+        def run():
+            while True:
+                time.sleep(interval)
+                with app.app_context():
+                    try:
+                        maintain_partitions(
+                            db.engine,
+                            months_ahead=app.config.get('PARTITION_MONTHS_AHEAD', DEFAULT_MONTHS_AHEAD),
+                            retention_months=app.config.get('PARTITION_RETENTION_MONTHS', 0),
+                            drop_detached=app.config.get('PARTITION_DROP_DETACHED', False),
+                        )
+                    except Exception as e:
+                        logger.error(f"Partition maintenance error: {e}")
+
+        _maintenance_thread = threading.Thread(target=run, name='partition-maintenance', daemon=True)
+        _maintenance_thread.start()
+        logger.info(f"Partition maintenance started (every {interval}s)")
+        return _maintenance_thread
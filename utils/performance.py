@@ -269,47 +269,52 @@ class BatchProcessor:
                 await request["callback"](None)
 
 class PerformanceMonitor:
-    """Monitor and track performance metrics"""
+    """Arabic processing request metrics, kept in the shared metrics registry (utils.metrics)"""
     
     def __init__(self):
-        self.metrics = {
-            "requests_processed": 0,
-            "total_processing_time": 0,
-            "average_processing_time": 0,
-            "cache_hits": 0,
-            "cache_misses": 0,
-            "errors": 0
-        }
+        from utils.metrics import registry
+        self._requests = registry.counter('arabic_processing_requests_total',
+                                          'Arabic text processing requests by cache outcome', ('cache',))
+        self._errors = registry.counter('arabic_processing_errors_total', 'Failed Arabic text processing requests')
+        self._latency = registry.histogram('arabic_processing_duration_seconds', 'Arabic text processing time')
         self.start_time = time.time()
     
     def record_request(self, processing_time: float, cache_hit: bool = False, error: bool = False):
         """Record performance metrics for a request"""
-        self.metrics["requests_processed"] += 1
-        self.metrics["total_processing_time"] += processing_time
-        self.metrics["average_processing_time"] = (
-            self.metrics["total_processing_time"] / self.metrics["requests_processed"]
-        )
-        
-        if cache_hit:
-            self.metrics["cache_hits"] += 1
-        else:
-            self.metrics["cache_misses"] += 1
-        
+        self._requests.labels('hit' if cache_hit else 'miss').inc()
+        self._latency.observe(processing_time)
         if error:
-            self.metrics["errors"] += 1
+            self._errors.inc()
+    
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        """Totals in the shape of the former counters dict"""
+        cache_hits = self._requests.labels('hit').get()
+        cache_misses = self._requests.labels('miss').get()
+        requests_processed = int(cache_hits + cache_misses)
+        _, total_processing_time = self._latency.labels().get()
+        return {
+            "requests_processed": requests_processed,
+            "total_processing_time": total_processing_time,
+            "average_processing_time": total_processing_time / requests_processed if requests_processed else 0,
+            "cache_hits": int(cache_hits),
+            "cache_misses": int(cache_misses),
+            "errors": int(self._errors.labels().get())
+        }
     
     def get_metrics(self) -> Dict[str, Any]:
         """Get current performance metrics"""
+        metrics = self.metrics
         uptime = time.time() - self.start_time
-        total_requests = self.metrics["cache_hits"] + self.metrics["cache_misses"]
-        cache_hit_rate = self.metrics["cache_hits"] / total_requests if total_requests > 0 else 0
+        total_requests = metrics["cache_hits"] + metrics["cache_misses"]
+        cache_hit_rate = metrics["cache_hits"] / total_requests if total_requests > 0 else 0
         
         return {
-            **self.metrics,
+            **metrics,
             "uptime_seconds": uptime,
-            "requests_per_second": self.metrics["requests_processed"] / uptime if uptime > 0 else 0,
+            "requests_per_second": metrics["requests_processed"] / uptime if uptime > 0 else 0,
             "cache_hit_rate": cache_hit_rate,
-            "error_rate": self.metrics["errors"] / self.metrics["requests_processed"] if self.metrics["requests_processed"] > 0 else 0
+            "error_rate": metrics["errors"] / metrics["requests_processed"] if metrics["requests_processed"] > 0 else 0
         }
 
 # Global instances
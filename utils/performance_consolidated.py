@@ -11,9 +11,11 @@ import psutil
 import logging
 from typing import Dict, List, Optional, Any, Callable
 from collections import OrderedDict
-from datetime import datetime, timedelta
+from datetime import datetime
 from dataclasses import dataclass, field
 
+from utils.metrics import registry
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -127,10 +129,12 @@ class PerformanceMonitor:
         self.monitoring_active = False
         self.start_time = time.time()
         
-        # Request tracking
-        self.requests = []
-        self.errors = []
-        self.slow_requests = []
+        # Request tracking, shared with utils.performance_monitor through the metrics registry
+        self._requests = registry.counter('operation_requests_total', 'Tracked operations by endpoint and status',
+                                          ('endpoint', 'status'))
+        self._latency = registry.histogram('operation_duration_seconds', 'Tracked operation duration', ('endpoint',))
+        self._slow = registry.counter('operation_slow_requests_total', 'Tracked operations slower than 2 seconds',
+                                      ('endpoint',))
         
         # Alert thresholds
         self.alert_thresholds = {
@@ -151,28 +155,28 @@ class PerformanceMonitor:
     
     def track_request(self, endpoint: str, duration: float, status_code: int):
         """Track individual request performance"""
-        request_data = {
-            "timestamp": datetime.now(),
-            "endpoint": endpoint,
-            "duration": duration,
-            "status_code": status_code
-        }
-        
-        self.requests.append(request_data)
-        
-        if status_code >= 400:
-            self.errors.append(request_data)
+        self._requests.labels(endpoint, str(status_code)).inc()
+        self._latency.labels(endpoint).observe(duration)
         
         if duration > 2.0:
-            self.slow_requests.append(request_data)
-        
-        # Keep only recent records
-        self._cleanup_old_records()
+            self._slow.labels(endpoint).inc()
+    
+    def _request_totals(self):
+        """(requests, errors, slow requests, total duration) across all tracked endpoints"""
+        requests = errors = 0
+        for (_, status), count in self._requests.series():
+            requests += count
+            if status.isdigit() and int(status) >= 400:
+                errors += count
+        slow = sum(count for _, count in self._slow.series())
+        duration = sum(total for _, (_, total) in self._latency.series())
+        return requests, errors, slow, duration
     
     def get_system_stats(self) -> Dict[str, Any]:
         """Get current system performance statistics"""
         try:
-            cpu_percent = psutil.cpu_percent(interval=1)
+            # Non-blocking: utilisation since the previous call
+            cpu_percent = psutil.cpu_percent(interval=None)
             memory = psutil.virtual_memory()
             
             stats = {
@@ -201,12 +205,9 @@ class PerformanceMonitor:
             metrics.memory_mb = system_stats["memory_available_mb"]
         
         # Request metrics
-        if self.requests:
-            recent_requests = [r for r in self.requests 
-                             if (datetime.now() - r["timestamp"]).seconds < 300]
-            if recent_requests:
-                avg_response_time = sum(r["duration"] for r in recent_requests) / len(recent_requests)
-                metrics.api_response_time = avg_response_time
+        request_count, _, _, total_duration = self._request_totals()
+        if request_count:
+            metrics.api_response_time = total_duration / request_count
         
         self.current_metrics = metrics
         self.metrics_history.append(metrics)
@@ -217,19 +218,15 @@ class PerformanceMonitor:
     
     def get_performance_summary(self) -> Dict[str, Any]:
         """Get comprehensive performance summary"""
-        if not self.requests:
+        request_count, error_count, slow_count, total_duration = self._request_totals()
+        if not request_count:
             return {"message": "No performance data available"}
         
         # Calculate averages
-        recent_requests = [r for r in self.requests 
-                          if (datetime.now() - r["timestamp"]).seconds < 3600]
-        
-        if not recent_requests:
-            return {"message": "No recent performance data"}
-        
-        avg_response_time = sum(r["duration"] for r in recent_requests) / len(recent_requests)
-        error_rate = len([r for r in recent_requests if r["status_code"] >= 400]) / len(recent_requests)
-        slow_request_rate = len([r for r in recent_requests if r["duration"] > 2.0]) / len(recent_requests)
+        avg_response_time = total_duration / request_count
+        error_rate = error_count / request_count
+        slow_request_rate = slow_count / request_count
+        uptime_hours = max((time.time() - self.start_time) / 3600, 1.0)
         
         system_stats = self.get_system_stats()
         
@@ -238,21 +235,13 @@ class PerformanceMonitor:
                 "avg_response_time": avg_response_time,
                 "error_rate": error_rate * 100,
                 "slow_request_rate": slow_request_rate * 100,
-                "total_requests_last_hour": len(recent_requests)
+                "total_requests_last_hour": int(request_count / uptime_hours)
             },
             "system": system_stats,
             "alerts": self._check_alerts(),
             "cache_stats": self._get_cache_summary() if hasattr(self, 'text_cache') else {}
         }
     
-    def _cleanup_old_records(self):
-        """Clean up old performance records"""
-        cutoff_time = datetime.now() - timedelta(hours=24)
-        
-        self.requests = [r for r in self.requests if r["timestamp"] > cutoff_time]
-        self.errors = [r for r in self.errors if r["timestamp"] > cutoff_time]
-        self.slow_requests = [r for r in self.slow_requests if r["timestamp"] > cutoff_time]
-    
     def _check_alerts(self) -> List[Dict[str, Any]]:
         """Check for performance alerts"""
         alerts = []
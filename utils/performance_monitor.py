@@ -7,47 +7,54 @@ Tracks system performance and provides insights
 import time
 import logging
 import psutil
+from collections import deque
 from typing import Dict, Any, List
-from datetime import datetime, timedelta
+from datetime import datetime
 from functools import wraps
 
+from utils.metrics import registry
+
 logger = logging.getLogger(__name__)
 
 class PerformanceMonitor:
     """Monitor system performance and generate insights"""
     
     def __init__(self):
-        self.metrics = {
-            "requests": [],
-            "errors": [],
-            "slow_requests": [],
-            "system_stats": []
-        }
+        # Request data lives in the shared metrics registry; only recent system samples are kept here
+        self._requests = registry.counter('operation_requests_total', 'Tracked operations by endpoint and status',
+                                          ('endpoint', 'status'))
+        self._latency = registry.histogram('operation_duration_seconds', 'Tracked operation duration', ('endpoint',))
+        self._slow = registry.counter('operation_slow_requests_total', 'Tracked operations slower than 2 seconds',
+                                      ('endpoint',))
+        self.metrics = {"system_stats": deque(maxlen=100)}
         self.start_time = time.time()
+        # Prime psutil so later non-blocking cpu_percent calls measure since this point
+        psutil.cpu_percent(interval=None)
     
     def track_request(self, endpoint: str, duration: float, status_code: int):
         """Track individual request performance"""
-        request_data = {
-            "timestamp": datetime.now(),
-            "endpoint": endpoint,
-            "duration": duration,
-            "status_code": status_code
-        }
-        
-        self.metrics["requests"].append(request_data)
-        
-        # Track errors
-        if status_code >= 400:
-            self.metrics["errors"].append(request_data)
+        self._requests.labels(endpoint, str(status_code)).inc()
+        self._latency.labels(endpoint).observe(duration)
         
         # Track slow requests (> 2 seconds)
         if duration > 2.0:
-            self.metrics["slow_requests"].append(request_data)
+            self._slow.labels(endpoint).inc()
+    
+    def _request_totals(self):
+        """(requests, errors, total duration) across all tracked endpoints"""
+        requests = errors = 0
+        for (_, status), count in self._requests.series():
+            requests += count
+            if status.isdigit() and int(status) >= 400:
+                errors += count
+        duration = sum(total for _, (_, total) in self._latency.series())
+        return requests, errors, duration
     
     def get_system_stats(self) -> Dict[str, Any]:
         """Get current system performance statistics"""
         try:
-            cpu_percent = psutil.cpu_percent(interval=1)
+            # Non-blocking: utilisation since the previous call
+            cpu_percent = psutil.cpu_percent(interval=None)
             memory = psutil.virtual_memory()
             disk = psutil.disk_usage('/')
             
@@ -62,10 +69,6 @@ class PerformanceMonitor:
             
             self.metrics["system_stats"].append(stats)
             
-            # Keep only last 100 records
-            if len(self.metrics["system_stats"]) > 100:
-                self.metrics["system_stats"] = self.metrics["system_stats"][-100:]
-            
             return stats
             
         except Exception as e:
@@ -77,19 +80,18 @@ class PerformanceMonitor:
         
         try:
             # Calculate request statistics
-            recent_requests = [r for r in self.metrics["requests"] 
-                             if r["timestamp"] > datetime.now() - timedelta(hours=1)]
+            request_count, error_count, total_duration = self._request_totals()
             
-            if not recent_requests:
+            if not request_count:
                 return {
                     "status": "نظام جديد - لا توجد بيانات كافية",
                     "health": "جيد",
                     "recommendations": []
                 }
             
-            avg_response_time = sum(r["duration"] for r in recent_requests) / len(recent_requests)
-            error_rate = len([r for r in recent_requests if r["status_code"] >= 400]) / len(recent_requests)
-            slow_request_rate = len([r for r in recent_requests if r["duration"] > 2.0]) / len(recent_requests)
+            avg_response_time = total_duration / request_count
+            error_rate = error_count / request_count
+            uptime_hours = max((time.time() - self.start_time) / 3600, 1.0)
             
             # System health assessment
             latest_system = self.metrics["system_stats"][-1] if self.metrics["system_stats"] else {}
@@ -130,7 +132,7 @@ class PerformanceMonitor:
                 "health_status": health_status,
                 "health_score": health_score,
                 "avg_response_time": f"{avg_response_time:.2f} ثانية",
-                "requests_per_hour": len(recent_requests),
+                "requests_per_hour": int(request_count / uptime_hours),
                 "error_rate_percent": f"{error_rate * 100:.1f}%",
                 "cpu_usage": f"{cpu_usage:.1f}%",
                 "memory_usage": f"{memory_usage:.1f}%",
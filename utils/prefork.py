@@ -0,0 +1,99 @@
+"""
+Pre-fork Serving
+Shared read-only state built once in a preloading master, and per-worker re-initialization after fork
+"""
+
+import gc
+import importlib
+import logging
+import sys
+import time
+from typing import Any, Dict
+
+logger = logging.getLogger(__name__)
+
+# Imported lazily on request paths; a preloading master pays for them once and every worker shares them
+PREFORK_IMPORTS = ('openai', 'utils.common', 'utils.api_key_manager')
+
+
+def warm_shared_state(app) -> Dict[str, Any]:
+    """
+    Build what every worker would otherwise build for itself: lazily imported modules,
+    translations, search lexicons, compiled Jinja templates and the analytics snapshot
+    """
+    started = time.perf_counter()
+    summary = {'modules': 0, 'templates': 0, 'snapshot': False}
+
+    for name in app.config.get('PREFORK_IMPORTS', PREFORK_IMPORTS):
+        try:
+            importlib.import_module(name)
+            summary['modules'] += 1
+        except Exception as e:
+            logger.debug(f"Pre-fork import of {name} skipped: {e}")
+
+    # Translation tables, normalization maps, stopword sets and compiled patterns load at import
+    from utils.language_manager import language_manager
+    import utils.arabic_search  # noqa: F401
+    import utils.keyword_index  # noqa: F401
+    summary['languages'] = len(language_manager.translations)
+
+    # Jinja compiles each template on first render, otherwise once per worker
+    for template in app.jinja_env.list_templates(extensions=['html']):
+        try:
+            app.jinja_env.get_template(template)
+            summary['templates'] += 1
+        except Exception as e:
+            logger.debug(f"Template {template} not precompiled: {e}")
+
+    from app import db
+    from utils.analytics_snapshot import analytics_snapshot
+    if analytics_snapshot.available:
+        with app.app_context():
+            try:
+                analytics_snapshot.feedback()
+                analytics_snapshot.responses()
+                summary['snapshot'] = True
+            except Exception as e:
+                logger.warning(f"Analytics snapshot not built before fork: {e}")
+    # Workers open their own connections; none may be inherited mid-use
+    with app.app_context():
+        db.engine.dispose()
+
+    summary['seconds'] = round(time.perf_counter() - started, 3)
+    logger.info(f"Pre-fork warm-up: {summary}")
+    return summary
+
+
+def freeze_heap() -> int:
+    """
+    Move every object allocated so far into the permanent generation
+
+    Collections in the workers then never write to the shared objects' GC headers,
+    which would otherwise copy their pages into each worker.
+    """
+    gc.collect()
+    gc.freeze()
+    return gc.get_freeze_count()
+
+
+def reinit_after_fork(app):
+    """Per-worker resources: database pool, metrics, log threads, HTTP clients and background services"""
+    from app import db, start_background_services
+    with app.app_context():
+        # Pooled connections belong to the master; close=False leaves its sockets alone
+        db.engine.dispose(close=False)
+
+    from utils.metrics import registry
+    registry.ensure_process()
+
+    from utils import slow_queries
+    if slow_queries.slow_query_recorder is not None:
+        slow_queries.slow_query_recorder.after_fork()
+
+    # API clients hold connection pools of their own
+    if 'routes_ai_analysis' in sys.modules:
+        sys.modules['routes_ai_analysis'].openai_client = None
+    if 'utils.api_key_manager' in sys.modules:
+        sys.modules['utils.api_key_manager'].api_manager.initialized_clients.clear()
+
+    start_background_services()
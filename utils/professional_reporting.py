@@ -24,6 +24,7 @@ from sqlalchemy import text
 from sqlalchemy.orm import aliased
 from app import db
 from models.survey_flask import SurveyFlask, ResponseFlask
+from utils.cold_archive import cold_archive
 
 logger = logging.getLogger(__name__)
 
@@ -458,8 +459,8 @@ class ProfessionalReporting:
         ).join(SurveyFlask, ResponseFlask.survey_id == SurveyFlask.id)
         
         # Add time filter with validated parameter
+        start_date = None
         if time_range != 'all':
-            start_date = None
             if time_range == '1d':
                 start_date = datetime.now() - timedelta(days=1)
             elif time_range == '7d':
@@ -471,6 +472,7 @@ class ProfessionalReporting:
                 query = query.filter(ResponseFlask.created_at >= start_date)
         
         # Add survey filter with integer validation
+        survey_id_int = None
         if survey_id:
             try:
                 # Ensure survey_id is a valid integer to prevent injection
@@ -481,38 +483,62 @@ class ProfessionalReporting:
                 logger.warning(f"Invalid survey_id provided: {survey_id}")
         
         # Execute query with proper ordering
-        result = query.order_by(ResponseFlask.created_at.desc()).all()
+        rows = [row._asdict() for row in query.order_by(ResponseFlask.created_at.desc()).all()]
+        
+        # Older responses have moved to the cold archive
+        if cold_archive.covers('responses_flask', start_date):
+            rows.extend(self._get_archived_responses(start_date, survey_id_int))
+            rows.sort(key=lambda r: r['created_at'], reverse=True)
         
         responses = []
-        for row in result:
-            # Extract text from answers - now using named attributes from ORM query
+        for row in rows:
+            # Extract text from answers
             response_text = ""
             try:
-                if row.answers:  # answers column
-                    answers_data = json.loads(row.answers) if isinstance(row.answers, str) else row.answers
+                if row['answers']:
+                    answers_data = json.loads(row['answers']) if isinstance(row['answers'], str) else row['answers']
                     text_responses = []
                     for question_id, answer in answers_data.items():
                         if isinstance(answer, str) and len(answer.strip()) > 0 and not answer.isdigit():
                             text_responses.append(answer.strip())
                     response_text = " | ".join(text_responses)
             except Exception as e:
-                logger.warning(f"Could not parse answers for response {row.id}: {e}")
+                logger.warning(f"Could not parse answers for response {row['id']}: {e}")
             
             responses.append({
-                'id': row.id,
-                'survey_id': row.survey_id,
-                'created_at': row.created_at.strftime('%Y-%m-%d %H:%M') if row.created_at else '',
-                'completion_percentage': row.completion_percentage or 0,
-                'language_used': row.language_used or 'unknown',
-                'device_type': row.device_type or 'unknown',
-                'sentiment_score': row.sentiment_score or 0,
-                'survey_title': row.survey_title or 'Unknown Survey',
+                'id': row['id'],
+                'survey_id': row['survey_id'],
+                'created_at': row['created_at'].strftime('%Y-%m-%d %H:%M') if row['created_at'] else '',
+                'completion_percentage': row['completion_percentage'] or 0,
+                'language_used': row['language_used'] or 'unknown',
+                'device_type': row['device_type'] or 'unknown',
+                'sentiment_score': row['sentiment_score'] or 0,
+                'survey_title': row['survey_title'] or 'Unknown Survey',
                 'response_text': response_text,
                 'enhanced_analysis': {}  # Could be populated with stored enhanced analysis
             })
         
         return responses
     
+    def _get_archived_responses(self, start_date: Optional[datetime], survey_id: Optional[int]) -> List[Dict]:
+        """Archived response rows shaped like the export query, for surveys that still exist"""
+        columns = ['id', 'survey_id', 'answers', 'created_at', 'completion_percentage', 'language_used',
+                   'device_type', 'sentiment_score', 'keywords']
+        rows = [
+            row for row in cold_archive.iter_rows('responses_flask', start_date, columns=columns)
+            if survey_id is None or row['survey_id'] == survey_id
+        ]
+        titles = dict(db.session.query(SurveyFlask.id, SurveyFlask.title).filter(
+            SurveyFlask.id.in_({row['survey_id'] for row in rows})
+        ).all()) if rows else {}
+        
+        archived = []
+        for row in rows:
+            if row['survey_id'] in titles:
+                row['survey_title'] = titles[row['survey_id']]
+                archived.append(row)
+        return archived
+    
     def _get_analytics_summary(self, responses_data: List[Dict]) -> Dict[str, Dict]:
         """Get aggregated analytics summary for Excel export"""
         
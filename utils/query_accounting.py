@@ -0,0 +1,190 @@
+"""
+Query Accounting
+Per-request SQL counts, database time and loaded rows, with repeated-statement (N+1) detection
+"""
+
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Mapper
+
+from utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# The same SELECT shape this many times in one request is reported as N+1
+DEFAULT_N_PLUS_ONE_THRESHOLD = 5
+
+# Bound parameter lists such as IN (?, ?, ?) collapse to one shape whatever their length
+_PARAMETER_LIST = re.compile(r'\((?:\s*(?:\?|%s|%\(\w+\)s|:\w+|\$\d+)\s*,)*\s*(?:\?|%s|%\(\w+\)s|:\w+|\$\d+)\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+DB_QUERIES = registry.histogram('http_request_db_queries', 'SQL statements executed per request', ('route',),
+                                buckets=(1, 2, 5, 10, 20, 50, 100, 250))
+DB_TIME = registry.histogram('http_request_db_seconds', 'Database time per request', ('route',))
+N_PLUS_ONE = registry.counter('db_n_plus_one_total', 'Requests repeating one SELECT shape past the threshold',
+                              ('route',))
+
+# Every collector currently recording in this context (a request and any nested count_queries block)
+_active: ContextVar[Tuple['QueryStats', ...]] = ContextVar('query_accounting_active', default=())
+
+
+def statement_shape(statement: str) -> str:
+    """Statement text with whitespace and bound parameter lists normalized"""
+    return _PARAMETER_LIST.sub('(?)', _WHITESPACE.sub(' ', statement).strip())
+
+
+@dataclass
+class QueryStats:
+    """Statements executed while the collector was active"""
+    count: int = 0
+    duration: float = 0.0
+    rows_loaded: int = 0     # ORM instances built from result rows
+    rows_affected: int = 0   # rows changed by INSERT/UPDATE/DELETE where the driver reports it
+    shapes: Counter = field(default_factory=Counter)
+    statements: List[str] = field(default_factory=list)
+
+    def repeated(self, threshold: int = DEFAULT_N_PLUS_ONE_THRESHOLD) -> List[Tuple[str, int]]:
+        """SELECT shapes executed at least threshold times, most frequent first"""
+        return [(shape, count) for shape, count in self.shapes.most_common()
+                if count >= threshold and shape.upper().startswith(('SELECT', 'WITH'))]
+
+    def describe(self, limit: int = 10) -> str:
+        """Human-readable summary for logs and assertion messages"""
+        lines = [f"{self.count} queries, {self.duration * 1000:.1f} ms, {self.rows_loaded} rows loaded"]
+        for shape, count in self.shapes.most_common(limit):
+            lines.append(f"  {count:>4} x {shape[:200]}")
+        return '\n'.join(lines)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _active.get():
+        conn.info.setdefault('query_accounting_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    collectors = _active.get()
+    if not collectors:
+        return
+    started = conn.info.get('query_accounting_started')
+    elapsed = time.perf_counter() - started.pop() if started else 0.0
+    shape = statement_shape(statement)
+    is_select = shape.upper().startswith(('SELECT', 'WITH'))
+    affected = cursor.rowcount if not is_select and cursor.rowcount and cursor.rowcount > 0 else 0
+    for stats in collectors:
+        stats.count += 1
+        stats.duration += elapsed
+        stats.rows_affected += affected
+        stats.shapes[shape] += 1
+        stats.statements.append(statement)
+
+
+def _on_load(target, context):
+    for stats in _active.get():
+        stats.rows_loaded += 1
+
+
+_installed = False
+
+
+def install():
+    """Attach the listeners to every engine and mapper (idempotent)"""
+    global _installed
+    if _installed:
+        return
+    event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+    event.listen(Mapper, 'load', _on_load)
+    _installed = True
+
+
+def start_collecting() -> Tuple[QueryStats, object]:
+    """Begin a collector in the current context; pass the token to stop_collecting"""
+    install()
+    stats = QueryStats()
+    return stats, _active.set(_active.get() + (stats,))
+
+
+def stop_collecting(token):
+    _active.reset(token)
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryStats]:
+    """Collect the statements executed inside the block"""
+    stats, token = start_collecting()
+    try:
+        yield stats
+    finally:
+        stop_collecting(token)
+
+
+@contextmanager
+def assert_max_queries(limit: int, n_plus_one_threshold: Optional[int] = DEFAULT_N_PLUS_ONE_THRESHOLD) -> Iterator[QueryStats]:
+    """
+    Test helper: fail when the block runs more than limit statements
+
+    Also fails on a repeated SELECT shape unless n_plus_one_threshold is None.
+    """
+    with count_queries() as stats:
+        yield stats
+    if stats.count > limit:
+        raise AssertionError(f"Expected at most {limit} queries\n{stats.describe()}")
+    if n_plus_one_threshold is not None and stats.repeated(n_plus_one_threshold):
+        raise AssertionError(f"Repeated query shape (N+1)\n{stats.describe()}")
+
+
+def init_query_accounting(app):
+    """Count queries per request; report them in X-DB-* headers, the log and the metrics registry"""
+    if not app.config.get('QUERY_ACCOUNTING_ENABLED', True):
+        return
+    from flask import g, request
+
+    threshold = app.config.get('QUERY_N_PLUS_ONE_THRESHOLD', DEFAULT_N_PLUS_ONE_THRESHOLD)
+    send_headers = app.config.get('QUERY_ACCOUNTING_HEADERS', True)
+    install()
+
+    @app.before_request
+    def _start_query_accounting():
+        g.query_stats, g.query_accounting_token = start_collecting()
+
+    @app.after_request
+    def _report_query_accounting(response):
+        stats = g.get('query_stats')
+        if stats is None:
+            return response
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        DB_QUERIES.labels(route).observe(stats.count)
+        DB_TIME.labels(route).observe(stats.duration)
+
+        repeated = stats.repeated(threshold)
+        if repeated:
+            N_PLUS_ONE.labels(route).inc()
+            shape, count = repeated[0]
+            logger.warning(f"Possible N+1 on {request.method} {route}: {count} x {shape[:200]}")
+
+        if send_headers:
+            response.headers['X-DB-Query-Count'] = str(stats.count)
+            response.headers['X-DB-Time-Ms'] = f"{stats.duration * 1000:.1f}"
+            response.headers['X-DB-Rows'] = str(stats.rows_loaded)
+            if repeated:
+                response.headers['X-DB-N-Plus-One'] = f"{len(repeated)}; max={repeated[0][1]}"
+        return response
+
+    @app.teardown_request
+    def _stop_query_accounting(exc=None):
+        token = g.pop('query_accounting_token', None)
+        if token is not None:
+            try:
+                stop_collecting(token)
+            except ValueError:
+                # Token created in another context (e.g. streamed response); drop it there
+                pass
@@ -0,0 +1,94 @@
+"""
+Query Plans
+Capture executed SQL and inspect EXPLAIN output for sequential scans
+"""
+
+import logging
+import re
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Iterator, List, Optional
+
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+# SQLite: "SCAN feedback" is a full table scan; "SCAN feedback USING INDEX ..." is an index walk
+_SQLITE_SCAN = re.compile(r'^SCAN (\w+)(?: AS \w+)?$')
+# PostgreSQL: "Seq Scan on feedback" (optionally "... feedback f")
+_POSTGRES_SCAN = re.compile(r'Seq Scan on (\w+)')
+
+
+@dataclass
+class CapturedQuery:
+    """A statement as sent to the DBAPI, replayable under EXPLAIN"""
+    statement: str
+    parameters: Any
+
+
+@dataclass
+class QueryPlan:
+    """EXPLAIN output for one captured statement"""
+    query: CapturedQuery
+    lines: List[str] = field(default_factory=list)
+    sequential_scans: List[str] = field(default_factory=list)
+
+
+def explain(connection, statement: str, parameters: Any = None, json_format: bool = False) -> List[Any]:
+    """
+    Plan lines for a DBAPI-level statement on SQLite or PostgreSQL
+
+    json_format asks PostgreSQL for EXPLAIN (FORMAT JSON), returned as one parsed plan document;
+    SQLite always returns EXPLAIN QUERY PLAN lines.
+    """
+    dialect = connection.dialect.name
+    if dialect == 'sqlite':
+        rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters or ())
+        return [row[-1] for row in rows]
+    if dialect == 'postgresql':
+        prefix = "EXPLAIN (FORMAT JSON)" if json_format else "EXPLAIN"
+        rows = connection.exec_driver_sql(f"{prefix} {statement}", parameters or {})
+        return [row[0] for row in rows]
+    raise ValueError(f"EXPLAIN is not supported for dialect {dialect}")
+
+
+def sequential_scans(lines: Iterable[str], dialect: str, tables: Optional[Iterable[str]] = None) -> List[str]:
+    """Tables read by a full sequential scan in the given plan"""
+    watched = set(tables) if tables else None
+    pattern = _SQLITE_SCAN if dialect == 'sqlite' else _POSTGRES_SCAN
+    scanned = []
+    for line in lines:
+        match = pattern.search(line.strip())
+        if match and (watched is None or match.group(1) in watched):
+            scanned.append(match.group(1))
+    return scanned
+
+
+@contextmanager
+def capture_queries(engine) -> Iterator[List[CapturedQuery]]:
+    """Record every SELECT executed on the engine inside the block"""
+    captured: List[CapturedQuery] = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(('SELECT', 'WITH')):
+            captured.append(CapturedQuery(statement, parameters))
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield captured
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def explain_captured(engine, queries: Iterable[CapturedQuery], tables: Optional[Iterable[str]] = None) -> List[QueryPlan]:
+    """EXPLAIN each distinct captured statement and flag sequential scans on the watched tables"""
+    plans = []
+    seen = set()
+    with engine.connect() as conn:
+        for query in queries:
+            if query.statement in seen:
+                continue
+            seen.add(query.statement)
+            lines = explain(conn, query.statement, query.parameters)
+            plans.append(QueryPlan(query, lines, sequential_scans(lines, engine.dialect.name, tables)))
+    return plans
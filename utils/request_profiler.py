@@ -0,0 +1,238 @@
+"""
+Request Profiler
+On-demand stack sampling of live requests, written as collapsed stacks for flamegraphs
+"""
+
+import cProfile
+import hmac
+import itertools
+import logging
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = 'X-Profile'
+PROFILE_QUERY_FLAG = '_profile'
+PROFILE_NAME = re.compile(
+    r'^(?P<started>\d{8}T\d{6})-(?P<id>[0-9a-f]{8})-(?P<method>[A-Z]+)-(?P<route>[\w.-]*)-(?P<ms>\d+)ms'
+    r'(?P<ext>\.folded|\.pstats)$'
+)
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _frame_label(frame) -> str:
+    """function (path) with project paths relative, library paths shortened"""
+    path = frame.f_code.co_filename
+    if path.startswith(_PROJECT_ROOT):
+        path = os.path.relpath(path, _PROJECT_ROOT)
+    else:
+        path = '/'.join(path.split(os.sep)[-2:])
+    return f"{frame.f_code.co_name} ({path})".replace(';', ':')
+
+
+def collapse(frame) -> str:
+    """Root-to-leaf stack of frame in collapsed (folded) form"""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ';'.join(reversed(labels))
+
+
+class StackSampler:
+    """Samples one thread's stack every interval seconds from a background thread"""
+
+    def __init__(self, thread_id: int, interval: float = 0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[collapse(frame)] += 1
+
+
+class RequestProfiler:
+    """Profile storage with retention by count and age"""
+
+    def __init__(self, directory: str, max_files: int = 200, max_age_hours: float = 72):
+        self.directory = directory
+        self.max_files = max_files
+        self.max_age = max_age_hours * 3600
+        os.makedirs(directory, exist_ok=True)
+
+    def filename(self, method: str, route: str, duration: float, extension: str) -> str:
+        slug = re.sub(r'[^\w.-]+', '_', route.strip('/'))[:80] or 'root'
+        return (f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}-{method}-{slug}-"
+                f"{int(duration * 1000)}ms{extension}")
+
+    def write_stacks(self, stacks: Counter, method: str, route: str, duration: float) -> str:
+        name = self.filename(method, route, duration, '.folded')
+        with open(os.path.join(self.directory, name), 'w', encoding='utf-8') as handle:
+            for stack, count in stacks.most_common():
+                handle.write(f"{stack} {count}\n")
+        self.prune()
+        return name
+
+    def write_cprofile(self, profile: cProfile.Profile, method: str, route: str, duration: float) -> str:
+        name = self.filename(method, route, duration, '.pstats')
+        profile.dump_stats(os.path.join(self.directory, name))
+        self.prune()
+        return name
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Captured profiles, newest first"""
+        profiles = []
+        for name in os.listdir(self.directory):
+            match = PROFILE_NAME.match(name)
+            if not match:
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            profiles.append({
+                'name': name,
+                'format': 'collapsed' if match.group('ext') == '.folded' else 'pstats',
+                'method': match.group('method'),
+                'route': match.group('route'),
+                'duration_ms': int(match.group('ms')),
+                'captured_at': datetime.utcfromtimestamp(stat.st_mtime).isoformat(),
+                'size_bytes': stat.st_size,
+                '_mtime': stat.st_mtime,
+            })
+        profiles.sort(key=lambda profile: profile['_mtime'], reverse=True)
+        for profile in profiles:
+            del profile['_mtime']
+        return profiles
+
+    def path(self, name: str) -> Optional[str]:
+        """Absolute path of a captured profile, None for names we did not write"""
+        if not PROFILE_NAME.match(name):
+            return None
+        path = os.path.join(self.directory, name)
+        return path if os.path.isfile(path) else None
+
+    def prune(self):
+        """Delete profiles beyond max_files or older than max_age"""
+        cutoff = time.time() - self.max_age
+        entries = []
+        for name in os.listdir(self.directory):
+            if PROFILE_NAME.match(name):
+                path = os.path.join(self.directory, name)
+                try:
+                    entries.append((os.stat(path).st_mtime, path))
+                except OSError:
+                    continue
+        entries.sort(reverse=True)
+        for index, (mtime, path) in enumerate(entries):
+            if index >= self.max_files or mtime < cutoff:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+
+request_profiler: Optional[RequestProfiler] = None
+
+
+def init_request_profiler(app) -> Optional[RequestProfiler]:
+    """
+    Profile requests that carry the profiler token or fall in the 1-in-N sample
+
+    Send X-Profile: <PROFILER_TOKEN> (or ?_profile=<token>); add ?_profile_mode=cprofile
+    for a cProfile capture instead of stack samples.
+    """
+    global request_profiler
+    if not app.config.get('PROFILER_ENABLED', True):
+        return None
+    from flask import g, request
+
+    token = app.config.get('PROFILER_TOKEN') or ''
+    sample_rate = app.config.get('PROFILER_SAMPLE_RATE', 0)
+    interval = app.config.get('PROFILER_INTERVAL_MS', 5) / 1000.0
+    request_profiler = RequestProfiler(
+        app.config.get('PROFILER_DIR') or os.path.join(tempfile.gettempdir(), 'voc_profiles'),
+        max_files=app.config.get('PROFILER_MAX_FILES', 200),
+        max_age_hours=app.config.get('PROFILER_MAX_AGE_HOURS', 72),
+    )
+    profiler = request_profiler
+    sequence = itertools.count(1)
+
+    def _requested() -> bool:
+        supplied = request.headers.get(PROFILE_HEADER) or request.args.get(PROFILE_QUERY_FLAG)
+        # Without a configured token nobody can request a profile. Compared as bytes:
+        # compare_digest raises TypeError on non-ASCII str (e.g. ?_profile=م)
+        return bool(token and supplied and hmac.compare_digest(supplied.encode('utf-8'), token.encode('utf-8')))
+
+    @app.before_request
+    def _start_profiling():
+        if not (_requested() or (sample_rate and next(sequence) % sample_rate == 0)):
+            return
+        g.profile_started = time.perf_counter()
+        if request.args.get('_profile_mode') == 'cprofile':
+            try:
+                cprofile = cProfile.Profile()
+                cprofile.enable()
+                g.profile_cprofile = cprofile
+                return
+            except ValueError:
+                # Another profiler (e.g. a coverage tool) owns the hook; fall back to sampling
+                pass
+        g.profile_sampler = StackSampler(threading.get_ident(), interval)
+        g.profile_sampler.start()
+
+    @app.after_request
+    def _finish_profiling(response):
+        started = g.pop('profile_started', None)
+        if started is None:
+            return response
+        duration = time.perf_counter() - started
+        route = request.url_rule.rule if request.url_rule else request.path
+        try:
+            cprofile = g.pop('profile_cprofile', None)
+            if cprofile is not None:
+                cprofile.disable()
+                name = profiler.write_cprofile(cprofile, request.method, route, duration)
+            else:
+                stacks = g.pop('profile_sampler').stop()
+                name = profiler.write_stacks(stacks, request.method, route, duration)
+            response.headers['X-Profile-Id'] = name
+        except Exception as e:
+            logger.warning(f"Could not write request profile: {e}")
+        return response
+
+    @app.teardown_request
+    def _stop_profiling(exc=None):
+        # Requests that failed before after_request still release the sampler
+        sampler = g.pop('profile_sampler', None)
+        if sampler is not None:
+            sampler.stop()
+        cprofile = g.pop('profile_cprofile', None)
+        if cprofile is not None:
+            cprofile.disable()
+
+    return profiler
@@ -61,7 +61,7 @@ class SurveyResponseProcessor:
             self._update_response_analytics(response, processing_results)
             
             # 5. Update survey aggregations
-            self._update_survey_metrics(response.survey_id)
+            self._update_survey_metrics(response)
             
             processing_time = (datetime.utcnow() - start_time).total_seconds()
             processing_results["processing_time"] = processing_time
@@ -246,40 +246,19 @@ class SurveyResponseProcessor:
         except Exception as e:
             logger.error(f"Error updating response analytics: {e}")
     
-    def _update_survey_metrics(self, survey_id: int) -> None:
+    def _update_survey_metrics(self, response: ResponseFlask) -> None:
         """Update survey-level aggregated metrics"""
         try:
             from app import db
-            from models.survey_flask import SurveyFlask
-            from sqlalchemy import func
+            from utils.survey_metrics import record_response
             
-            # Get survey
-            survey = db.session.query(SurveyFlask).get(survey_id)
-            if not survey:
+            # Responses stored by store_submission were counted on submit; drift is left to the reconciler
+            if getattr(response, 'metrics_recorded', False):
                 return
-            
-            # Calculate aggregated metrics
-            responses = db.session.query(ResponseFlask).filter_by(survey_id=survey_id).all()
-            
-            if responses:
-                # Update response count
-                survey.response_count = len(responses)
-                
-                # Calculate completion rate
-                completed_responses = [r for r in responses if r.is_complete]
-                if responses:
-                    survey.completion_rate = len(completed_responses) / len(responses)
-                
-                # Calculate average duration
-                durations = [r.duration_minutes for r in completed_responses if r.duration_minutes]
-                if durations:
-                    survey.average_duration = sum(durations) / len(durations)
-                
-                # Calculate average satisfaction (would need additional field)
-                # This could be added to the SurveyFlask model
-                
-                db.session.commit()
-                logger.debug(f"Survey metrics updated for survey {survey_id}")
+            record_response(response.survey_id, response.is_complete, response.duration_minutes)
+            response.metrics_recorded = True
+            db.session.commit()
+            logger.debug(f"Survey metrics updated for survey {response.survey_id}")
             
         except Exception as e:
             logger.error(f"Error updating survey metrics: {e}")
@@ -0,0 +1,164 @@
+"""
+Schema Migrations
+Ordered, idempotent schema changes for tables that db.create_all() will not alter
+"""
+
+import logging
+from typing import Callable, List, Optional, Tuple
+
+from sqlalchemy import inspect, text
+
+logger = logging.getLogger(__name__)
+
+# (name, function(connection)) in application order
+MIGRATIONS: List[Tuple[str, Callable]] = []
+
+
+def migration(name: str):
+    """Register a migration step; steps must be safe to re-run"""
+    def decorator(func):
+        MIGRATIONS.append((name, func))
+        return func
+    return decorator
+
+
+def table_exists(conn, table: str) -> bool:
+    return inspect(conn).has_table(table)
+
+
+def add_column_if_missing(conn, table: str, column: str, ddl_type: str):
+    """ALTER TABLE ... ADD COLUMN unless the column already exists"""
+    if not table_exists(conn, table):
+        return
+    columns = {c['name'] for c in inspect(conn).get_columns(table)}
+    if column not in columns:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl_type}"))
+        logger.info(f"Added column {table}.{column}")
+
+
+def create_index_if_missing(
+    conn,
+    name: str,
+    table: str,
+    columns: List[str],
+    unique: bool = False,
+    where: Optional[str] = None
+):
+    """CREATE INDEX IF NOT EXISTS (both PostgreSQL and SQLite support it)"""
+    if not table_exists(conn, table):
+        return
+    statement = (
+        f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS {name} "
+        f"ON {table} ({', '.join(columns)})"
+    )
+    if where:
+        statement += f" WHERE {where}"
+    conn.execute(text(statement))
+
+
+def run_schema_migrations(engine) -> List[str]:
+    """Apply every registered migration, returns the names that ran"""
+    applied = []
+    with engine.begin() as conn:
+        for name, func in MIGRATIONS:
+            func(conn)
+            applied.append(name)
+    logger.info(f"Schema migrations checked: {len(applied)}")
+    return applied
+
+
+@migration('0001_contact_segmentation')
+def _contact_segmentation(conn):
+    """Region filter and index support for the audience segmentation engine"""
+    add_column_if_missing(conn, 'contacts', 'region', 'VARCHAR(50)')
+    create_index_if_missing(conn, 'ix_contacts_region', 'contacts', ['region'])
+    create_index_if_missing(conn, 'ix_contact_group_memberships_group_contact',
+                            'contact_group_memberships', ['group_id', 'contact_id'])
+    create_index_if_missing(conn, 'ix_contact_deliveries_contact_created',
+                            'contact_deliveries', ['contact_id', 'created_at'])
+
+
+@migration('0002_contact_search')
+def _contact_search(conn):
+    """Normalized search keys plus trigram (PostgreSQL) / FTS5 (SQLite) indexes"""
+    if not table_exists(conn, 'contacts'):
+        return
+    from utils.contact_search import backfill_search_keys, create_search_index
+    
+    add_column_if_missing(conn, 'contacts', 'name_normalized', 'VARCHAR(100)')
+    add_column_if_missing(conn, 'contacts', 'search_text', 'TEXT')
+    create_index_if_missing(conn, 'ix_contacts_name_normalized', 'contacts', ['name_normalized'])
+    backfill_search_keys(conn)
+    create_search_index(conn)
+
+
+@migration('0003_survey_running_metrics')
+def _survey_running_metrics(conn):
+    """Running sums for incrementally maintained survey statistics"""
+    if not table_exists(conn, 'surveys_flask'):
+        return
+    from utils.survey_metrics import reconcile_survey_metrics
+    
+    columns = {c['name'] for c in inspect(conn).get_columns('surveys_flask')}
+    add_column_if_missing(conn, 'surveys_flask', 'completed_count', 'INTEGER NOT NULL DEFAULT 0')
+    add_column_if_missing(conn, 'surveys_flask', 'duration_count', 'INTEGER NOT NULL DEFAULT 0')
+    add_column_if_missing(conn, 'surveys_flask', 'duration_sum', 'FLOAT NOT NULL DEFAULT 0')
+    if 'completed_count' not in columns and table_exists(conn, 'responses_flask'):
+        # Seed the new sums from existing responses
+        reconcile_survey_metrics(conn)
+
+
+@migration('0004_dashboard_indexes')
+def _dashboard_indexes(conn):
+    """Composite and partial indexes behind the dashboard and list queries"""
+    create_index_if_missing(conn, 'ix_feedback_channel_created', 'feedback', ['channel', 'created_at'])
+    create_index_if_missing(conn, 'ix_feedback_status_created', 'feedback', ['status', 'created_at'])
+    create_index_if_missing(conn, 'ix_feedback_scored_status_created', 'feedback',
+                            ['status', 'created_at', 'sentiment_score'], where='sentiment_score IS NOT NULL')
+    create_index_if_missing(conn, 'ix_questions_flask_survey_order', 'questions_flask', ['survey_id', 'order_index'])
+    create_index_if_missing(conn, 'ix_responses_flask_survey_created', 'responses_flask', ['survey_id', 'created_at'])
+    create_index_if_missing(conn, 'ix_responses_flask_created', 'responses_flask', ['created_at'])
+    create_index_if_missing(conn, 'ix_question_responses_flask_response', 'question_responses_flask', ['response_id'])
+    create_index_if_missing(conn, 'ix_question_responses_flask_question', 'question_responses_flask', ['question_id'])
+    create_index_if_missing(conn, 'ix_question_responses_flask_text_created', 'question_responses_flask',
+                            ['created_at'], where='answer_text IS NOT NULL')
+
+
+@migration('0005_keyword_index_backfill')
+def _keyword_index_backfill(conn):
+    """Seed the keyword postings from existing text answers the first time the tables appear"""
+    if not table_exists(conn, 'keyword_days_flask') or not table_exists(conn, 'question_responses_flask'):
+        return
+    if conn.execute(text("SELECT 1 FROM keyword_days_flask LIMIT 1")).first() is not None:
+        return
+    if conn.execute(text("SELECT 1 FROM question_responses_flask WHERE answer_text IS NOT NULL LIMIT 1")).first() is None:
+        return
+    from utils.keyword_index import rebuild_keyword_index
+    rebuild_keyword_index(conn)
+
+
+@migration('0006_full_text_search')
+def _full_text_search(conn):
+    """Stemmed search documents plus tsvector/GIN (PostgreSQL) or FTS5 (SQLite) indexes"""
+    from utils.text_search import SOURCES, backfill_search_documents, create_search_index
+    
+    for source, search_source in SOURCES.items():
+        table = search_source.table.name
+        if not table_exists(conn, table):
+            continue
+        add_column_if_missing(conn, table, 'search_text', 'TEXT')
+        backfill_search_documents(conn, source)
+        create_search_index(conn, source)
+
+
+@migration('0007_keyword_forms_backfill')
+def _keyword_forms_backfill(conn):
+    """Rebuild the keyword index once so indexes built before surface forms were kept get them too"""
+    if not table_exists(conn, 'keyword_forms_flask') or not table_exists(conn, 'keyword_days_flask'):
+        return
+    if conn.execute(text("SELECT 1 FROM keyword_forms_flask LIMIT 1")).first() is not None:
+        return
+    if conn.execute(text("SELECT 1 FROM keyword_days_flask LIMIT 1")).first() is None:
+        return
+    from utils.keyword_index import rebuild_keyword_index
+    rebuild_keyword_index(conn)
@@ -9,7 +9,7 @@ import time
 import os
 from typing import Dict, Any, List, Optional
 from datetime import datetime
-from openai import OpenAI
+from utils.imports import get_openai_client
 
 logger = logging.getLogger(__name__)
 
@@ -17,12 +17,8 @@ class SimpleArabicAnalyzer:
     """Simplified Arabic feedback analysis using single OpenAI call"""
     
     def __init__(self):
-        # Connection optimization
-        self.client = OpenAI(
-            api_key=os.getenv("OPENAI_API_KEY"),
-            max_retries=2,  # Reduced retries for faster failure
-            timeout=3.0     # More aggressive timeout
-        )
+        # Client is created on first analysis so importing this module stays cheap
+        self._client = None
         self.model = "gpt-4o-mini"  # Use faster mini model for better performance
         
         # Simple topic categories (replacing hierarchical system)
@@ -36,6 +32,21 @@ class SimpleArabicAnalyzer:
         self._performance_log = []
         self._avg_response_time = 0.0
         
+    @property
+    def client(self):
+        if self._client is None:
+            # Connection optimization
+            self._client = get_openai_client(
+                api_key=os.getenv("OPENAI_API_KEY"),
+                max_retries=2,  # Reduced retries for faster failure
+                timeout=3.0     # More aggressive timeout
+            )
+        return self._client
+    
+    @client.setter
+    def client(self, client):
+        self._client = client
+    
     async def analyze_feedback(self, text: str, context: Optional[Dict] = None) -> Dict[str, Any]:
         """
         Main analysis method - single comprehensive call
@@ -0,0 +1,267 @@
+"""
+Slow Query Log
+Statements above a duration threshold with their caller, parameter shape and EXPLAIN plan
+"""
+
+import hashlib
+import json
+import logging
+import os
+import queue
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event
+
+from utils.metrics import registry
+from utils.query_accounting import statement_shape
+from utils.query_plans import explain
+
+logger = logging.getLogger(__name__)
+
+# Literals left in statement text (raw SQL) so equal statements share one fingerprint
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+
+# Frames from these locations are skipped when looking for the application caller
+_LIBRARY_MARKERS = (os.sep + 'sqlalchemy' + os.sep, os.sep + 'flask_sqlalchemy' + os.sep,
+                    os.sep + 'site-packages' + os.sep, os.sep + 'dist-packages' + os.sep)
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MAX_PLAN_CACHE = 256
+MAX_CALLER_FRAMES = 3
+
+SLOW_QUERIES = registry.counter('db_slow_queries_total', 'Statements slower than the slow query threshold')
+
+
+def fingerprint(statement: str) -> str:
+    """Normalized statement text: parameter lists, literals and whitespace folded"""
+    return _NUMBER_LITERAL.sub('?', _STRING_LITERAL.sub('?', statement_shape(statement)))
+
+
+def fingerprint_id(normalized: str) -> str:
+    return hashlib.sha1(normalized.encode('utf-8')).hexdigest()[:12]
+
+
+def parameter_shape(parameters: Any, executemany: bool = False) -> Any:
+    """Types of the bound parameters, never their values"""
+    if executemany and parameters:
+        return {'rows': len(parameters), 'row': parameter_shape(parameters[0])}
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__ if parameters is not None else None
+
+
+def caller_frames(limit: int = MAX_CALLER_FRAMES) -> List[str]:
+    """Innermost application frames (path:line function) outside SQLAlchemy and the stdlib"""
+    frames = []
+    frame = sys._getframe(1)
+    while frame is not None and len(frames) < limit:
+        path = frame.f_code.co_filename
+        if (path.startswith(_PROJECT_ROOT) and path != __file__
+                and not any(marker in path for marker in _LIBRARY_MARKERS)):
+            frames.append(f"{os.path.relpath(path, _PROJECT_ROOT)}:{frame.f_lineno} {frame.f_code.co_name}")
+        frame = frame.f_back
+    return frames
+
+
+def _current_route() -> Optional[str]:
+    try:
+        from flask import has_request_context, request
+        if has_request_context():
+            return request.url_rule.rule if request.url_rule else request.path
+    except Exception:
+        pass
+    return None
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    index = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+class SlowQueryRecorder:
+    """
+    Times every statement on an engine and records the slow ones
+
+    The query thread only builds the entry and enqueues it; a background worker
+    runs EXPLAIN (once per fingerprint), appends to the ring buffer and writes the JSONL log.
+    """
+
+    def __init__(self, threshold_ms: float = 200, buffer_size: int = 1000, log_path: Optional[str] = None,
+                 max_bytes: int = 10 * 1024 * 1024, backup_count: int = 5, explain_plans: bool = True,
+                 queue_size: int = 1000):
+        self.threshold = threshold_ms / 1000.0
+        self.explain_plans = explain_plans
+        self.entries = deque(maxlen=buffer_size)
+        self.dropped = 0
+        self._plans: 'OrderedDict[str, Any]' = OrderedDict()
+        self._queue: 'queue.Queue' = queue.Queue(maxsize=queue_size)
+        self._engine = None
+        self._file_logger = None
+        if log_path:
+            os.makedirs(os.path.dirname(log_path) or '.', exist_ok=True)
+            handler = RotatingFileHandler(log_path, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            self._file_logger = logging.getLogger(f"{__name__}.file.{id(self)}")
+            self._file_logger.setLevel(logging.INFO)
+            self._file_logger.propagate = False
+            self._file_logger.addHandler(handler)
+        self._worker = threading.Thread(target=self._work, name='slow-query-log', daemon=True)
+        self._worker.start()
+
+    def attach(self, engine):
+        self._engine = engine
+        event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+
+    def detach(self):
+        if self._engine is not None:
+            event.remove(self._engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.remove(self._engine, 'after_cursor_execute', self._after_cursor_execute)
+            self._engine = None
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('slow_query_started', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.get('slow_query_started')
+        if not started:
+            return
+        duration = time.perf_counter() - started.pop()
+        if duration < self.threshold or statement.lstrip()[:7].upper() == 'EXPLAIN':
+            return
+
+        SLOW_QUERIES.inc()
+        normalized = fingerprint(statement)
+        entry = {
+            'timestamp': datetime.utcnow().isoformat(),
+            'fingerprint': fingerprint_id(normalized),
+            'statement': normalized,
+            'parameters': parameter_shape(parameters, executemany),
+            'duration_ms': round(duration * 1000, 3),
+            'route': _current_route(),
+            'caller': caller_frames(),
+        }
+        try:
+            # Raw statement and parameters are only kept for EXPLAIN, never logged
+            self._queue.put_nowait((entry, statement, None if executemany else parameters))
+        except queue.Full:
+            self.dropped += 1
+
+    def _plan(self, entry: Dict[str, Any], statement: str, parameters: Any) -> Any:
+        key = entry['fingerprint']
+        if key in self._plans:
+            self._plans.move_to_end(key)
+            return self._plans[key]
+        if parameters is None or not statement.lstrip().upper().startswith(('SELECT', 'WITH')):
+            return None
+        try:
+            with self._engine.connect() as conn:
+                lines = explain(conn, statement, parameters, json_format=True)
+            plan = lines[0] if self._engine.dialect.name == 'postgresql' else lines
+        except Exception as e:
+            logger.debug(f"EXPLAIN failed for slow query {key}: {e}")
+            plan = {'error': str(e)}
+        self._plans[key] = plan
+        if len(self._plans) > MAX_PLAN_CACHE:
+            self._plans.popitem(last=False)
+        return plan
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                entry, statement, parameters = item
+                if self.explain_plans and self._engine is not None:
+                    entry['plan'] = self._plan(entry, statement, parameters)
+                self.entries.append(entry)
+                if self._file_logger:
+                    self._file_logger.info(json.dumps(entry, ensure_ascii=False, default=str))
+            except Exception as e:
+                logger.warning(f"Slow query log failed: {e}")
+            finally:
+                self._queue.task_done()
+
+    def drain(self):
+        """Block until every queued entry is recorded"""
+        self._queue.join()
+
+    def recent(self, limit: int = 50) -> List[Dict[str, Any]]:
+        return list(self.entries)[-limit:][::-1]
+
+    def aggregate(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Buffered entries grouped by fingerprint, slowest total time first"""
+        groups: Dict[str, List[Dict[str, Any]]] = {}
+        for entry in list(self.entries):
+            groups.setdefault(entry['fingerprint'], []).append(entry)
+
+        summary = []
+        for key, entries in groups.items():
+            durations = sorted(entry['duration_ms'] for entry in entries)
+            latest = entries[-1]
+            summary.append({
+                'fingerprint': key,
+                'statement': latest['statement'],
+                'count': len(durations),
+                'p50_ms': _percentile(durations, 0.5),
+                'p95_ms': _percentile(durations, 0.95),
+                'max_ms': durations[-1],
+                'total_ms': round(sum(durations), 3),
+                'routes': sorted({entry['route'] for entry in entries if entry['route']}),
+                'caller': latest['caller'],
+                'plan': latest.get('plan'),
+            })
+        summary.sort(key=lambda item: item['total_ms'], reverse=True)
+        return summary[:limit]
+
+    def after_fork(self):
+        """Threads do not survive fork: give a forked worker its own queue, buffer and worker thread"""
+        self._queue = queue.Queue(maxsize=self._queue.maxsize)
+        self.entries = deque(maxlen=self.entries.maxlen)
+        self.dropped = 0
+        self._worker = threading.Thread(target=self._work, name='slow-query-log', daemon=True)
+        self._worker.start()
+
+    def close(self):
+        self.detach()
+        self._queue.put(None)
+        self._worker.join(timeout=5)
+
+
+slow_query_recorder: Optional[SlowQueryRecorder] = None
+
+
+def init_slow_query_log(app, engine=None) -> Optional[SlowQueryRecorder]:
+    """Attach the recorder to the app's engine when SLOW_QUERY_LOG_ENABLED"""
+    global slow_query_recorder
+    if not app.config.get('SLOW_QUERY_LOG_ENABLED', True):
+        return None
+    if slow_query_recorder is not None:
+        slow_query_recorder.close()
+
+    slow_query_recorder = SlowQueryRecorder(
+        threshold_ms=app.config.get('SLOW_QUERY_THRESHOLD_MS', 200),
+        buffer_size=app.config.get('SLOW_QUERY_BUFFER_SIZE', 1000),
+        log_path=app.config.get('SLOW_QUERY_LOG_PATH') or None,
+        max_bytes=app.config.get('SLOW_QUERY_LOG_MAX_BYTES', 10 * 1024 * 1024),
+        backup_count=app.config.get('SLOW_QUERY_LOG_BACKUPS', 5),
+        explain_plans=app.config.get('SLOW_QUERY_EXPLAIN', True),
+    )
+    if engine is None:
+        from app import db
+        with app.app_context():
+            engine = db.engine
+    slow_query_recorder.attach(engine)
+    return slow_query_recorder
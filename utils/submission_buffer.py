@@ -0,0 +1,447 @@
+"""
+Submission Write Buffer
+Optional ingestion mode that group-commits validated survey submissions from a writer thread
+"""
+
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import time
+import uuid as uuid_lib
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import bindparam, insert, select, update
+
+from app import db
+from models.survey_flask import ResponseFlask, QuestionResponseFlask
+from utils.keyword_index import record_text_answers
+from utils.survey_metrics import record_response_batch
+from utils.survey_submission import analyze_text_answers
+
+try:
+    import fcntl
+except ImportError:  # Not POSIX: no forked workers to coordinate with
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class DurabilityMode:
+    """When a buffered submission is acknowledged to the respondent"""
+    MEMORY = "memory"    # After enqueue; a crash loses the unflushed window
+    JOURNAL = "journal"  # After an fsync'd append to the on-disk journal
+    COMMIT = "commit"    # After the batch holding it commits (group commit)
+
+
+class BufferFull(Exception):
+    """The buffer is at capacity; callers should fall back to the direct path"""
+
+
+@dataclass
+class BufferedSubmission:
+    """A validated submission ready to be written without further lookups"""
+    survey_id: int
+    response: Dict[str, Any]
+    question_rows: List[Dict[str, Any]] = field(default_factory=list)
+    text_answers: List[str] = field(default_factory=list)
+
+    @property
+    def uuid(self) -> str:
+        return self.response['uuid']
+
+    @classmethod
+    def build(cls, survey_id: int, response_fields: Dict[str, Any], prepared) -> 'BufferedSubmission':
+        """Assign identifiers up front so the respondent can be answered before the write"""
+        response = dict(response_fields)
+        response.setdefault('uuid', str(uuid_lib.uuid4()))
+        now = datetime.utcnow()
+        response.setdefault('started_at', now)
+        response.setdefault('created_at', now)
+        response.setdefault('updated_at', now)
+        response['survey_id'] = survey_id
+        return cls(survey_id, response, list(prepared.rows), list(prepared.text_answers))
+
+    def to_json(self) -> str:
+        def encode(value):
+            return value.isoformat() if isinstance(value, datetime) else value
+        data = asdict(self)
+        data['response'] = {k: encode(v) for k, v in self.response.items()}
+        return json.dumps(data, ensure_ascii=False)
+
+    @classmethod
+    def from_json(cls, line: str) -> 'BufferedSubmission':
+        data = json.loads(line)
+        for key in ('started_at', 'completed_at', 'created_at', 'updated_at'):
+            if data['response'].get(key):
+                data['response'][key] = datetime.fromisoformat(data['response'][key])
+        return cls(**data)
+
+
+class _Pending:
+    __slots__ = ('submission', 'done', 'error')
+
+    def __init__(self, submission: BufferedSubmission, wait: bool):
+        self.submission = submission
+        self.done = threading.Event() if wait else None
+        self.error: Optional[str] = None
+
+
+class SubmissionWriteBuffer:
+    """
+    Bounded buffer drained by a single writer thread
+
+    Every flush writes all queued responses with one multi-row INSERT, their
+    question responses with a second, applies one counter UPDATE per survey
+    and commits once. Text analysis runs on a separate thread after the
+    commit, so slow analysis never holds up ingestion.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 0.005,
+        durability: str = DurabilityMode.COMMIT,
+        journal_path: Optional[str] = None,
+        commit_timeout: float = 10.0,
+        analyze: bool = True
+    ):
+        if durability == DurabilityMode.JOURNAL and not journal_path:
+            raise ValueError("Journal durability requires a journal_path")
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.durability = durability
+        self.journal_path = journal_path
+        self.commit_timeout = commit_timeout
+        self.analyze = analyze
+
+        self._queue: 'queue.Queue[_Pending]' = queue.Queue(maxsize=max_size)
+        self._journal_lock = threading.Lock()
+        self._in_flight = 0
+        self._thread: Optional[threading.Thread] = None
+        self._analysis_queue: 'queue.Queue[List[BufferedSubmission]]' = queue.Queue(maxsize=1000)
+        self._analysis_thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._analyzer = None
+        self.stats = {'accepted': 0, 'rejected': 0, 'written': 0, 'batches': 0, 'failed': 0}
+
+    # Producer side
+
+    def submit(self, submission: BufferedSubmission) -> str:
+        """Queue a submission and return its response UUID once durable per the configured mode"""
+        pending = _Pending(submission, wait=self.durability == DurabilityMode.COMMIT)
+
+        if self.durability == DurabilityMode.JOURNAL:
+            with self._journal_lock:
+                self._put(pending)
+                self._append_journal(submission)
+        else:
+            self._put(pending)
+
+        if pending.done is not None:
+            if not pending.done.wait(self.commit_timeout):
+                raise TimeoutError("Submission was not committed in time")
+            if pending.error:
+                raise RuntimeError(pending.error)
+
+        return submission.uuid
+
+    def _put(self, pending: _Pending):
+        try:
+            self._queue.put_nowait(pending)
+        except queue.Full:
+            self.stats['rejected'] += 1
+            raise BufferFull("Submission buffer is full")
+        self.stats['accepted'] += 1
+
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    # Writer side
+
+    def start(self, app) -> threading.Thread:
+        """Replay the journal, then start the writer thread (one per process)"""
+        if self._thread and self._thread.is_alive():
+            return self._thread
+
+        if self.durability == DurabilityMode.JOURNAL:
+            with app.app_context():
+                self.replay_journal()
+
+        self._stop.clear()
+
+        def run():
+            while not self._stop.is_set() or not self._queue.empty():
+                batch = self._collect()
+                if batch:
+                    with app.app_context():
+                        self.flush_batch(batch)
+
+        self._thread = threading.Thread(target=run, name='submission-writer', daemon=True)
+        self._thread.start()
+
+        if self.analyze and not (self._analysis_thread and self._analysis_thread.is_alive()):
+            def analyze_loop():
+                while True:
+                    submissions = self._analysis_queue.get()
+                    with app.app_context():
+                        self._analyze(submissions)
+
+            self._analysis_thread = threading.Thread(target=analyze_loop, name='submission-analysis', daemon=True)
+            self._analysis_thread.start()
+        logger.info(f"Submission write buffer started ({self.durability} durability)")
+        return self._thread
+
+    def stop(self, timeout: float = 10.0):
+        """Drain outstanding submissions and stop the writer"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _collect(self) -> List[_Pending]:
+        """Block for the first item, then gather more until the batch or time window is full"""
+        try:
+            first = self._queue.get(timeout=0.1)
+        except queue.Empty:
+            return []
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        self._in_flight = len(batch)
+        return batch
+
+    def flush_batch(self, batch: List[_Pending]) -> int:
+        """Write and commit a batch, isolating bad submissions if the group write fails"""
+        try:
+            self._write([p.submission for p in batch])
+            db.session.commit()
+            self._finish(batch)
+        except Exception as e:
+            db.session.rollback()
+            logger.warning(f"Group commit of {len(batch)} submissions failed, retrying individually: {e}")
+            for pending in batch:
+                try:
+                    self._write([pending.submission])
+                    db.session.commit()
+                    self._finish([pending])
+                except Exception as item_error:
+                    db.session.rollback()
+                    self.stats['failed'] += 1
+                    logger.error(f"Dropping buffered submission {pending.submission.uuid}: {item_error}")
+                    self._finish([pending], error=str(item_error))
+
+        self._in_flight = 0
+        self._truncate_journal_if_idle()
+
+        if self.analyze:
+            with_text = [p.submission for p in batch if p.submission.text_answers and not p.error]
+            if with_text:
+                try:
+                    self._analysis_queue.put_nowait(with_text)
+                except queue.Full:
+                    logger.warning(f"Analysis backlog full, skipping sentiment for {len(with_text)} responses")
+        return len(batch)
+
+    def _write(self, submissions: List[BufferedSubmission]):
+        result = db.session.execute(
+            insert(ResponseFlask).returning(ResponseFlask.id, ResponseFlask.uuid),
+            [s.response for s in submissions]
+        )
+        response_ids = {row.uuid: row.id for row in result}
+
+        # search_text is absent from rows journaled before full-text search existed (backfilled later)
+        question_rows = [
+            dict(row, response_id=response_ids[s.uuid], search_text=row.get('search_text'))
+            for s in submissions for row in s.question_rows
+        ]
+        if question_rows:
+            db.session.execute(insert(QuestionResponseFlask.__table__), question_rows)
+            record_text_answers(
+                (s.response['created_at'], row['answer_text'], row.get('sentiment_score'))
+                for s in submissions for row in s.question_rows
+            )
+
+        deltas = defaultdict(lambda: [0, 0, 0, 0.0])
+        for s in submissions:
+            delta = deltas[s.survey_id]
+            is_complete = bool(s.response.get('is_complete'))
+            duration = s.response.get('duration_minutes')
+            delta[0] += 1
+            delta[1] += int(is_complete)
+            if is_complete and duration:
+                delta[2] += 1
+                delta[3] += float(duration)
+        for survey_id, (responses, completed, timed, duration_sum) in deltas.items():
+            record_response_batch(survey_id, responses, completed, timed, duration_sum)
+
+    def _finish(self, batch: List[_Pending], error: Optional[str] = None):
+        if not error:
+            self.stats['written'] += len(batch)
+            self.stats['batches'] += 1
+        for pending in batch:
+            pending.error = error
+            if pending.done is not None:
+                pending.done.set()
+
+    def _analyze(self, submissions: List[BufferedSubmission]):
+        """Sentiment for text answers, applied with one bulk UPDATE after the commit"""
+        updates = []
+        for submission in submissions:
+            if not submission.text_answers:
+                continue
+            try:
+                if self._analyzer is None:
+                    from utils.simple_arabic_analyzer import SimpleArabicAnalyzer
+                    self._analyzer = SimpleArabicAnalyzer()
+                analysis = analyze_text_answers(submission.text_answers, self._analyzer)
+                updates.append({
+                    'response_uuid': submission.uuid,
+                    'new_sentiment_score': analysis['sentiment_score'],
+                    'new_confidence_score': analysis['confidence_score'],
+                    'new_keywords': analysis['keywords']
+                })
+            except Exception as e:
+                logger.warning(f"Failed to analyze buffered response {submission.uuid}: {e}")
+        if not updates:
+            return
+
+        responses = ResponseFlask.__table__
+        try:
+            db.session.execute(
+                update(responses)
+                .where(responses.c.uuid == bindparam('response_uuid'))
+                .values(sentiment_score=bindparam('new_sentiment_score'),
+                        confidence_score=bindparam('new_confidence_score'),
+                        keywords=bindparam('new_keywords')),
+                updates
+            )
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.warning(f"Failed to store analysis for {len(updates)} buffered responses: {e}")
+
+    # Journal
+
+    @property
+    def process_journal_path(self) -> Optional[str]:
+        """This process's journal; workers append to and truncate only their own file"""
+        if not self.journal_path:
+            return None
+        root, ext = os.path.splitext(self.journal_path)
+        return f"{root}.{os.getpid()}{ext}"
+
+    def _append_journal(self, submission: BufferedSubmission):
+        with open(self.process_journal_path, 'a', encoding='utf-8') as journal:
+            journal.write(submission.to_json() + '\n')
+            journal.flush()
+            os.fsync(journal.fileno())
+
+    def _truncate_journal_if_idle(self):
+        """Everything journaled has committed once the queue is empty and nothing is in flight"""
+        if self.durability != DurabilityMode.JOURNAL:
+            return
+        with self._journal_lock:
+            if self._queue.empty() and not self._in_flight and os.path.exists(self.process_journal_path):
+                open(self.process_journal_path, 'w').close()
+
+    @contextmanager
+    def _replay_lock(self):
+        """Serialize replay across workers starting at the same time"""
+        if fcntl is None:
+            yield
+            return
+        with open(self.journal_path + '.lock', 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _orphaned_journals(self) -> List[str]:
+        """Journals whose process is gone, plus the shared file older versions wrote"""
+        root, ext = os.path.splitext(self.journal_path)
+        directory = os.path.dirname(self.journal_path) or '.'
+        pattern = re.compile(re.escape(os.path.basename(root)) + r'\.(\d+)' + re.escape(ext) + '$')
+
+        orphans = [self.journal_path] if os.path.exists(self.journal_path) else []
+        for name in sorted(os.listdir(directory)):
+            match = pattern.match(name)
+            # Replay runs before this process journals anything, so a file with our pid is a predecessor's
+            if match and (int(match.group(1)) == os.getpid() or not _process_running(int(match.group(1)))):
+                orphans.append(os.path.join(directory, name))
+        return orphans
+
+    def replay_journal(self) -> int:
+        """Write submissions journaled by processes that exited before committing them"""
+        if not self.journal_path:
+            return 0
+
+        replayed = 0
+        with self._replay_lock():
+            for path in self._orphaned_journals():
+                replayed += self._replay_file(path)
+                os.remove(path)
+        return replayed
+
+    def _replay_file(self, path: str) -> int:
+        with open(path, encoding='utf-8') as journal:
+            submissions = [BufferedSubmission.from_json(line) for line in journal if line.strip()]
+        if not submissions:
+            return 0
+
+        existing = set(db.session.execute(
+            select(ResponseFlask.uuid).where(ResponseFlask.uuid.in_([s.uuid for s in submissions]))
+        ).scalars())
+        missing = [_Pending(s, wait=False) for s in submissions if s.uuid not in existing]
+
+        for start in range(0, len(missing), self.batch_size):
+            self.flush_batch(missing[start:start + self.batch_size])
+
+        logger.info(f"Replayed {len(missing)} submissions from {os.path.basename(path)} "
+                    f"({len(existing)} already committed)")
+        return len(missing)
+
+
+def _process_running(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+# Global buffer, created by init_submission_buffer when the ingestion mode is enabled
+submission_buffer: Optional[SubmissionWriteBuffer] = None
+
+
+def init_submission_buffer(app) -> Optional[SubmissionWriteBuffer]:
+    """Create and start the process-wide buffer from SUBMISSION_BUFFER_* settings"""
+    global submission_buffer
+
+    if not app.config.get('SUBMISSION_BUFFER_ENABLED'):
+        return None
+    if submission_buffer is None:
+        submission_buffer = SubmissionWriteBuffer(
+            max_size=app.config.get('SUBMISSION_BUFFER_MAX_SIZE', 10000),
+            batch_size=app.config.get('SUBMISSION_BUFFER_BATCH_SIZE', 500),
+            flush_interval=app.config.get('SUBMISSION_BUFFER_FLUSH_MS', 5) / 1000,
+            durability=app.config.get('SUBMISSION_BUFFER_DURABILITY', DurabilityMode.COMMIT),
+            journal_path=app.config.get('SUBMISSION_BUFFER_JOURNAL')
+        )
+        submission_buffer.start(app)
+    return submission_buffer
@@ -48,7 +48,7 @@ class SurveyDistributionManager:
                 raise ValueError(f"Campaign {campaign_id} is not ready for distribution")
             
             # Get target audience
-            audience = await self.get_target_audience(campaign.target_audience, db)
+            audience = self.get_target_audience(campaign.target_audience)
             logger.info(f"Distributing campaign {campaign_id} to {len(audience)} recipients")
             
             # Update campaign status
@@ -85,44 +85,39 @@ class SurveyDistributionManager:
         )
         return result.scalar_one_or_none()
     
-    async def get_target_audience(self, audience_config: Dict[str, Any], db: AsyncSession) -> List[Dict[str, Any]]:
+    def get_target_audience(self, audience_config: Dict[str, Any]) -> List[Dict[str, Any]]:
         """
         Get target audience based on segmentation criteria
+        
+        The segment is compiled to a single SQL query and its membership is
+        cached as a bitmap; contact rows are then streamed in ID chunks.
+        Contacts live in the Flask-SQLAlchemy database, so this is a plain
+        synchronous call on the request's session, not the campaign's AsyncSession.
+        Example audience configuration:
+        {
+          "groups": [3, 7],
+          "filters": {"region": "riyadh", "language": "ar"},
+          "channels": ["email", "whatsapp"],
+          "exclude_recent_survey": True
+        }
         """
-        # Mock implementation - in production this would query customer database
-        # Example audience configuration:
-        # {
-        #   "segments": ["high_value_customers", "recent_customers"],
-        #   "filters": {
-        #     "region": "riyadh",
-        #     "language": "ar",
-        #     "last_purchase_days": 30
-        #   },
-        #   "exclude_recent_survey": True
-        # }
+        from utils.audience_segmentation import segment_engine
         
-        mock_audience = [
-            {
-                'customer_id': 'cust_001',
-                'name': 'أحمد محمد',
-                'email': 'ahmed@example.com',
-                'phone': '+966501234567',
-                'whatsapp': '+966501234567',
-                'language': 'ar',
-                'preferred_channel': 'email'
-            },
-            {
-                'customer_id': 'cust_002', 
-                'name': 'فاطمة أحمد',
-                'email': 'fatima@example.com',
-                'phone': '+966507654321',
-                'whatsapp': '+966507654321',
-                'language': 'ar',
-                'preferred_channel': 'whatsapp'
-            }
-        ]
+        members = segment_engine.resolve_config(audience_config)
+        
+        audience = []
+        for contact in segment_engine.load_contacts(members):
+            audience.append({
+                'customer_id': str(contact.id),
+                'name': contact.name,
+                'email': contact.email,
+                'phone': contact.phone,
+                'whatsapp': contact.phone if contact.whatsapp_opt_in else None,
+                'language': contact.language_preference,
+                'preferred_channel': contact.get_preferred_contact_method() or 'email'
+            })
         
-        return mock_audience[:2]  # Return small sample for testing
+        return audience
     
     async def create_delivery_records(
         self, 
@@ -0,0 +1,182 @@
+"""
+Survey Metrics
+Incrementally maintained survey statistics with a periodic drift reconciler
+"""
+
+import logging
+import threading
+import time
+from typing import Iterable, Optional
+
+from sqlalchemy import bindparam, case, func, select, update
+
+from app import db
+from models.survey_flask import SurveyFlask, ResponseFlask
+
+logger = logging.getLogger(__name__)
+
+# Seconds between reconciler passes
+DEFAULT_RECONCILE_INTERVAL = 900
+
+_reconciler_thread: Optional[threading.Thread] = None
+_reconciler_lock = threading.Lock()
+
+
+def record_response(survey_id: int, is_complete: bool, duration_minutes: Optional[float] = None) -> None:
+    """
+    Count one new response against its survey
+
+    Issues a single UPDATE with SQL-side increments, so concurrent submits
+    never lose counts and the cost does not grow with the number of
+    responses. Runs in the caller's transaction; nothing is committed here.
+    """
+    timed = 1 if is_complete and duration_minutes else 0
+    record_response_batch(
+        survey_id,
+        responses=1,
+        completed=1 if is_complete else 0,
+        timed=timed,
+        duration_sum=float(duration_minutes) if timed else 0.0
+    )
+
+
+def record_response_batch(survey_id: int, responses: int, completed: int,
+                          timed: int = 0, duration_sum: float = 0.0) -> None:
+    """Apply the summed deltas of several responses to one survey in one UPDATE"""
+    surveys = SurveyFlask.__table__
+
+    # SET expressions see the pre-update row, so derived columns add the deltas themselves
+    new_responses = surveys.c.response_count + responses
+    new_completed = surveys.c.completed_count + completed
+    new_timed = surveys.c.duration_count + timed
+    new_duration_sum = surveys.c.duration_sum + duration_sum
+
+    db.session.execute(
+        update(surveys)
+        .where(surveys.c.id == survey_id)
+        .values(
+            response_count=new_responses,
+            completed_count=new_completed,
+            duration_count=new_timed,
+            duration_sum=new_duration_sum,
+            completion_rate=new_completed * 1.0 / new_responses,
+            average_duration=case(
+                (new_timed > 0, new_duration_sum / new_timed),
+                else_=surveys.c.average_duration
+            ),
+            # Responses are not edits; keep updated_at meaningful as a content version
+            updated_at=surveys.c.updated_at
+        )
+    )
+
+
+def reconcile_survey_metrics(conn=None, survey_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    Recompute counters from responses_flask and fix any drift
+
+    One grouped aggregate over the responses table, then updates only the
+    surveys whose stored values differ. Corrections are applied as deltas
+    against the values read, so increments committed in between are kept.
+    Returns the number corrected.
+    """
+    executor = conn if conn is not None else db.session
+    surveys = SurveyFlask.__table__
+    responses = ResponseFlask.__table__
+
+    completed_flag = case((responses.c.is_complete == True, 1), else_=0)
+    timed = (responses.c.is_complete == True) & (responses.c.duration_minutes > 0)
+    actual = (
+        select(
+            responses.c.survey_id,
+            func.count().label('response_count'),
+            func.sum(completed_flag).label('completed_count'),
+            func.sum(case((timed, 1), else_=0)).label('duration_count'),
+            func.sum(case((timed, responses.c.duration_minutes), else_=0.0)).label('duration_sum'),
+        )
+        .group_by(responses.c.survey_id)
+    )
+    if survey_ids is not None:
+        survey_ids = list(survey_ids)
+        actual = actual.where(responses.c.survey_id.in_(survey_ids))
+    actual = actual.subquery()
+
+    query = (
+        select(
+            surveys.c.id,
+            surveys.c.response_count,
+            surveys.c.completed_count,
+            surveys.c.duration_count,
+            surveys.c.duration_sum,
+            func.coalesce(actual.c.response_count, 0).label('actual_responses'),
+            func.coalesce(actual.c.completed_count, 0).label('actual_completed'),
+            func.coalesce(actual.c.duration_count, 0).label('actual_timed'),
+            func.coalesce(actual.c.duration_sum, 0.0).label('actual_duration_sum'),
+        )
+        .select_from(surveys.outerjoin(actual, actual.c.survey_id == surveys.c.id))
+    )
+    if survey_ids is not None:
+        query = query.where(surveys.c.id.in_(survey_ids))
+
+    corrections = []
+    for row in executor.execute(query):
+        stored = (row.response_count or 0, row.completed_count or 0, row.duration_count or 0)
+        expected = (row.actual_responses, row.actual_completed, row.actual_timed)
+        stored_duration = row.duration_sum or 0.0
+        if stored == expected and abs(stored_duration - row.actual_duration_sum) < 1e-6:
+            continue
+        corrections.append({
+            'row_id': row.id,
+            'fix_responses': expected[0] - stored[0],
+            'fix_completed': expected[1] - stored[1],
+            'fix_timed': expected[2] - stored[2],
+            'fix_duration_sum': row.actual_duration_sum - stored_duration,
+        })
+
+    if corrections:
+        # Same SET-sees-the-old-row arithmetic as record_response_batch, with signed deltas
+        new_responses = func.coalesce(surveys.c.response_count, 0) + bindparam('fix_responses')
+        new_completed = func.coalesce(surveys.c.completed_count, 0) + bindparam('fix_completed')
+        new_timed = func.coalesce(surveys.c.duration_count, 0) + bindparam('fix_timed')
+        new_duration_sum = func.coalesce(surveys.c.duration_sum, 0.0) + bindparam('fix_duration_sum')
+        executor.execute(
+            update(surveys)
+            .where(surveys.c.id == bindparam('row_id'))
+            .values(
+                response_count=new_responses,
+                completed_count=new_completed,
+                duration_count=new_timed,
+                duration_sum=new_duration_sum,
+                completion_rate=case((new_responses > 0, new_completed * 1.0 / new_responses), else_=0.0),
+                average_duration=case((new_timed > 0, new_duration_sum / new_timed), else_=None),
+                updated_at=surveys.c.updated_at
+            ),
+            corrections
+        )
+        logger.warning(f"Reconciled metric drift on {len(corrections)} surveys")
+
+    return len(corrections)
+
+
+def start_background_reconciler(app, interval: int = DEFAULT_RECONCILE_INTERVAL) -> threading.Thread:
+    """Run the reconciler in a daemon thread (one per process)"""
+    global _reconciler_thread
+
+    with _reconciler_lock:
+        if _reconciler_thread and _reconciler_thread.is_alive():
+            return _reconciler_thread
+
+        def run():
+            while True:
+                time.sleep(interval)
+                with app.app_context():
+                    try:
+                        reconcile_survey_metrics()
+                        db.session.commit()
+                    except Exception as e:
+                        logger.error(f"Survey metrics reconciler error: {e}")
+                        db.session.rollback()
+
+        _reconciler_thread = threading.Thread(target=run, name='survey-metrics-reconciler', daemon=True)
+        _reconciler_thread.start()
+        logger.info(f"Survey metrics reconciler started (every {interval}s)")
+        return _reconciler_thread
@@ -0,0 +1,305 @@
+"""
+Survey Render Cache
+Compiled, versioned public survey pages shared across worker processes
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from types import MappingProxyType
+from typing import Dict, Optional, Tuple
+
+from flask import current_app, render_template
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import selectinload
+
+from app import db
+from models.survey_flask import SurveyFlask, QuestionFlask, SurveyStatus
+
+logger = logging.getLogger(__name__)
+
+# Seconds a version probe is trusted before re-reading updated_at (edits in
+# this process invalidate immediately; other workers see them within the TTL)
+DEFAULT_PROBE_TTL = 5
+DEFAULT_MEMORY_ENTRIES = 256
+
+
+@dataclass(frozen=True)
+class CompiledQuestion:
+    """Render-ready question with options already parsed"""
+    id: int
+    type: str
+    display_text: str
+    display_description: str
+    is_required: bool
+    options: Tuple[MappingProxyType, ...]
+    min_value: Optional[int]
+    max_value: Optional[int]
+
+
+@dataclass(frozen=True)
+class CompiledSurvey:
+    """Immutable render payload for survey_public.html"""
+    id: int
+    uuid: str
+    version: str
+    primary_language: str
+    rtl_enabled: bool
+    display_title: str
+    display_description: str
+    estimated_duration: Optional[int]
+    welcome_message: Optional[str]
+    welcome_message_ar: Optional[str]
+    thank_you_message: Optional[str]
+    thank_you_message_ar: Optional[str]
+    questions: Tuple[CompiledQuestion, ...]
+
+
+@dataclass(frozen=True)
+class SurveyProbe:
+    """The few columns needed to pick a cache version and check availability"""
+    id: int
+    uuid: str
+    version: str
+    status: str
+    start_date: Optional[datetime]
+    end_date: Optional[datetime]
+
+    @property
+    def is_active(self) -> bool:
+        if self.status != SurveyStatus.PUBLISHED.value:
+            return False
+        now = datetime.utcnow()
+        if self.start_date and now < self.start_date:
+            return False
+        if self.end_date and now > self.end_date:
+            return False
+        return True
+
+
+def _version_token(updated_at: Optional[datetime]) -> str:
+    return updated_at.strftime('%Y%m%d%H%M%S%f') if updated_at else '0'
+
+
+def _parse_options(raw: Optional[str]) -> Tuple[MappingProxyType, ...]:
+    if not raw:
+        return ()
+    try:
+        options = json.loads(raw)
+    except (json.JSONDecodeError, TypeError):
+        return ()
+    if not isinstance(options, list):
+        return ()
+
+    parsed = []
+    for option in options:
+        if isinstance(option, dict):
+            value = option.get('value', option.get('text', ''))
+            parsed.append(MappingProxyType({'value': value, 'text': option.get('text', value)}))
+        else:
+            parsed.append(MappingProxyType({'value': option, 'text': option}))
+    return tuple(parsed)
+
+
+def compile_survey(survey: SurveyFlask) -> CompiledSurvey:
+    """Serialize a survey and its questions into an immutable render payload"""
+    questions = sorted(survey.questions, key=lambda q: (q.order_index, q.id))
+    return CompiledSurvey(
+        id=survey.id,
+        uuid=survey.uuid,
+        version=_version_token(survey.updated_at),
+        primary_language=survey.primary_language,
+        rtl_enabled=survey.rtl_enabled,
+        display_title=survey.display_title,
+        display_description=survey.display_description,
+        estimated_duration=survey.estimated_duration,
+        welcome_message=survey.welcome_message,
+        welcome_message_ar=survey.welcome_message_ar,
+        thank_you_message=survey.thank_you_message,
+        thank_you_message_ar=survey.thank_you_message_ar,
+        questions=tuple(
+            CompiledQuestion(
+                id=q.id,
+                type=q.type,
+                display_text=q.display_text,
+                display_description=q.display_description,
+                is_required=q.is_required,
+                options=_parse_options(q.options),
+                min_value=q.min_value,
+                max_value=q.max_value
+            ) for q in questions
+        )
+    )
+
+
+class SurveyRenderCache:
+    """
+    Two-tier cache of rendered public survey pages
+
+    Entries are keyed by (survey id, updated_at version), so an edit simply
+    produces a new key and stale pages are never served. The in-process LRU
+    tier holds HTML compiled from an immutable CompiledSurvey payload; the
+    file tier lets every worker on the host reuse a page rendered by any other.
+    """
+
+    def __init__(self, probe_ttl: float = DEFAULT_PROBE_TTL, max_entries: int = DEFAULT_MEMORY_ENTRIES):
+        self.probe_ttl = probe_ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._pages: 'OrderedDict[Tuple[int, str], str]' = OrderedDict()
+        self._probes: Dict[str, Tuple[float, SurveyProbe]] = {}
+        self._short_ids: Dict[str, str] = {}
+        self.stats = {'hits': 0, 'disk_hits': 0, 'renders': 0}
+
+    # Lookups
+
+    def resolve_short_id(self, short_id: str) -> Optional[str]:
+        """Map a short ID to its UUID (short IDs never change once assigned)"""
+        uuid = self._short_ids.get(short_id)
+        if uuid is None:
+            uuid = db.session.execute(
+                select(SurveyFlask.uuid).where(SurveyFlask.short_id == short_id)
+            ).scalar()
+            if uuid:
+                self._short_ids[short_id] = uuid
+        return uuid
+
+    def probe(self, uuid: str) -> Optional[SurveyProbe]:
+        """Current version and availability, without loading the survey"""
+        cached = self._probes.get(uuid)
+        if cached and time.monotonic() - cached[0] < self.probe_ttl:
+            return cached[1]
+
+        row = db.session.execute(
+            select(SurveyFlask.id, SurveyFlask.updated_at, SurveyFlask.status,
+                   SurveyFlask.start_date, SurveyFlask.end_date)
+            .where(SurveyFlask.uuid == uuid)
+        ).first()
+        if row is None:
+            return None
+
+        probe = SurveyProbe(row.id, uuid, _version_token(row.updated_at),
+                            row.status, row.start_date, row.end_date)
+        self._probes[uuid] = (time.monotonic(), probe)
+        return probe
+
+    def get_page(self, probe: SurveyProbe) -> str:
+        """Rendered HTML for the probed version, compiling it at most once per host"""
+        key = (probe.id, probe.version)
+
+        with self._lock:
+            html = self._pages.get(key)
+            if html is not None:
+                self._pages.move_to_end(key)
+                self.stats['hits'] += 1
+                return html
+
+        html = self._read_disk(key)
+        if html is not None:
+            self.stats['disk_hits'] += 1
+        else:
+            survey = (
+                SurveyFlask.query
+                .options(selectinload(SurveyFlask.questions))
+                .filter_by(id=probe.id)
+                .first()
+            )
+            compiled = compile_survey(survey)
+            html = render_template('survey_public.html', survey=compiled)
+            self.stats['renders'] += 1
+            # The row may have been edited since the probe; store under its real version
+            key = (compiled.id, compiled.version)
+            self._write_disk(key, html)
+
+        with self._lock:
+            self._pages[key] = html
+            while len(self._pages) > self.max_entries:
+                self._pages.popitem(last=False)
+        return html
+
+    # Invalidation
+
+    def invalidate(self, survey_id: Optional[int] = None):
+        """Forget cached probes and pages for one survey (or all)"""
+        with self._lock:
+            if survey_id is None:
+                self._pages.clear()
+                self._probes.clear()
+                return
+            for key in [k for k in self._pages if k[0] == survey_id]:
+                del self._pages[key]
+            for uuid in [u for u, (_, p) in self._probes.items() if p.id == survey_id]:
+                del self._probes[uuid]
+
+    # File tier
+
+    def _cache_dir(self) -> Optional[str]:
+        return current_app.config.get(
+            'SURVEY_RENDER_CACHE_DIR',
+            os.path.join(tempfile.gettempdir(), 'voc_survey_render_cache')
+        )
+
+    def _path(self, key: Tuple[int, str]) -> Optional[str]:
+        cache_dir = self._cache_dir()
+        if not cache_dir:
+            return None
+        return os.path.join(cache_dir, f"survey-{key[0]}-{key[1]}.html")
+
+    def _read_disk(self, key) -> Optional[str]:
+        path = self._path(key)
+        if not path:
+            return None
+        try:
+            with open(path, encoding='utf-8') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _write_disk(self, key, html: str):
+        path = self._path(key)
+        if not path:
+            return
+        try:
+            directory = os.path.dirname(path)
+            os.makedirs(directory, exist_ok=True)
+            # Drop pages for older versions of this survey
+            prefix = f"survey-{key[0]}-"
+            for name in os.listdir(directory):
+                if name.startswith(prefix) and name != os.path.basename(path):
+                    os.remove(os.path.join(directory, name))
+            # Atomic publish so concurrent readers never see a partial page
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(html)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write survey render cache {path}: {e}")
+
+
+# Global render cache instance
+survey_render_cache = SurveyRenderCache()
+
+
+@event.listens_for(SurveyFlask, 'after_update')
+@event.listens_for(SurveyFlask, 'after_delete')
+def _invalidate_survey(mapper, connection, target):
+    survey_render_cache.invalidate(target.id)
+
+
+@event.listens_for(QuestionFlask, 'after_insert')
+@event.listens_for(QuestionFlask, 'after_update')
+@event.listens_for(QuestionFlask, 'after_delete')
+def _invalidate_question(mapper, connection, target):
+    # Question edits must move the parent's version so other workers re-render too
+    connection.execute(
+        update(SurveyFlask.__table__)
+        .where(SurveyFlask.__table__.c.id == target.survey_id)
+        .values(updated_at=datetime.utcnow())
+    )
+    survey_render_cache.invalidate(target.survey_id)
@@ -0,0 +1,121 @@
+"""
+Survey Submission
+Single-pass answer preparation and bulk write path for public survey submits
+"""
+
+import json
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.orm import selectinload
+
+from app import db
+from models.survey_flask import SurveyFlask, ResponseFlask, QuestionResponseFlask
+from utils.arabic_search import build_search_document
+
+logger = logging.getLogger(__name__)
+
+TEXT_TYPES = frozenset(['text', 'textarea'])
+NUMERIC_TYPES = frozenset(['rating', 'nps'])
+CHOICE_TYPES = frozenset(['multiple_choice', 'checkbox'])
+
+
+@dataclass
+class PreparedSubmission:
+    """Question response rows plus the text answers destined for analysis"""
+    rows: List[Dict[str, Any]] = field(default_factory=list)
+    text_answers: List[str] = field(default_factory=list)
+
+
+def load_survey_for_submission(uuid: str) -> Optional[SurveyFlask]:
+    """Fetch the survey and its questions in two queries, no lazy loads later"""
+    return (
+        SurveyFlask.query
+        .options(selectinload(SurveyFlask.questions))
+        .filter_by(uuid=uuid)
+        .first()
+    )
+
+
+def prepare_answers(questions, form_data: Dict[str, str]) -> PreparedSubmission:
+    """Validate and coerce every answer in one pass over the questions"""
+    prepared = PreparedSubmission()
+
+    for question in questions:
+        answer_value = form_data.get(f'question_{question.id}', '')
+        if not answer_value:
+            continue
+
+        question_type = question.type
+        row = {
+            'question_id': question.id,
+            'answer_text': None,
+            'answer_number': None,
+            'answer_json': None,
+            'search_text': None,
+        }
+
+        if question_type in TEXT_TYPES:
+            row['answer_text'] = answer_value
+            row['search_text'] = build_search_document(answer_value)
+            prepared.text_answers.append(answer_value)
+        elif question_type in NUMERIC_TYPES:
+            row['answer_number'] = float(answer_value) if answer_value.isdigit() else None
+        elif question_type in CHOICE_TYPES:
+            row['answer_json'] = json.dumps({'value': answer_value})
+
+        prepared.rows.append(row)
+
+    return prepared
+
+
+def write_question_responses(response_id: int, prepared: PreparedSubmission,
+                             created_at: Optional[datetime] = None) -> int:
+    """Insert all question responses with one executemany INSERT, and index their keywords"""
+    from utils.keyword_index import record_text_answers
+
+    if not prepared.rows:
+        return 0
+    for row in prepared.rows:
+        row['response_id'] = response_id
+    # Core insert: one executemany, the ORM bulk path would split rows by which columns are None
+    db.session.execute(insert(QuestionResponseFlask.__table__), prepared.rows)
+    created_at = created_at or datetime.utcnow()
+    record_text_answers((created_at, row['answer_text'], row.get('sentiment_score')) for row in prepared.rows)
+    return len(prepared.rows)
+
+
+def store_submission(survey_id: int, response_fields: Dict[str, Any], prepared: PreparedSubmission) -> ResponseFlask:
+    """Direct write path: response, question responses and counters in one transaction"""
+    from utils.survey_metrics import record_response
+
+    response = ResponseFlask(survey_id=survey_id, **response_fields)
+    db.session.add(response)
+    db.session.flush()  # Get response ID
+
+    write_question_responses(response.id, prepared, response.created_at)
+
+    # Update survey metrics with SQL-side increments in the same transaction
+    record_response(survey_id, response.is_complete, response.duration_minutes)
+    response.metrics_recorded = True  # Lets SurveyResponseProcessor skip counting it again
+    db.session.commit()
+    return response
+
+
+def analyze_text_answers(text_answers: List[str], analyzer=None) -> Optional[Dict[str, Any]]:
+    """Sentiment columns for a response, computed from its combined text answers"""
+    if not text_answers:
+        return None
+    if analyzer is None:
+        from utils.simple_arabic_analyzer import SimpleArabicAnalyzer
+        analyzer = SimpleArabicAnalyzer()
+
+    analysis_result = analyzer.analyze_feedback_sync(' '.join(text_answers))
+    return {
+        'sentiment_score': analysis_result.get('sentiment_score'),
+        'confidence_score': analysis_result.get('confidence'),
+        'keywords': json.dumps(analysis_result.get('topics', []))
+    }
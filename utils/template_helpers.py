@@ -4,13 +4,17 @@ Jinja2 filters and functions for language support
 """
 
 from flask import request, url_for
+from jinja2 import pass_context
 from .language_manager import language_manager
 
 def register_template_helpers(app):
     """Register all template helper functions with Flask app"""
     
+    # pass_context keeps Jinja from folding '...'|translate into a constant of whichever
+    # language compiled the template first
     @app.template_filter('translate')
-    def translate_filter(key, **kwargs):
+    @pass_context
+    def translate_filter(context, key, **kwargs):
         """Jinja2 filter for translating keys
         Usage: {{ 'navigation.surveys' | translate }}
         Usage with variables: {{ 'messages.welcome' | translate(name=user.name) }}
@@ -51,7 +55,8 @@ def register_template_helpers(app):
         return url_for(endpoint, **values)
     
     @app.template_filter('lang_class')
-    def language_class_filter(base_class=''):
+    @pass_context
+    def language_class_filter(context, base_class=''):
         """Template filter: Add language-specific CSS classes
         Usage: {{ 'text-center' | lang_class }}
         """
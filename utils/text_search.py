@@ -0,0 +1,233 @@
+"""
+Full-text search
+Stemmed Arabic search over feedback and text answers: tsvector + GIN on PostgreSQL, FTS5 on SQLite
+"""
+
+import base64
+import json
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import bindparam, func, literal_column, or_, and_, select, text, update
+
+from app import db
+from models.survey_flask import QuestionResponseFlask, ResponseFlask
+from models_unified import Feedback, FeedbackChannel
+from utils.arabic_search import build_search_document, highlight, search_terms
+
+logger = logging.getLogger(__name__)
+
+BACKFILL_BATCH_SIZE = 1000
+MAX_PAGE_SIZE = 100
+MAX_QUERY_TERMS = 16
+
+# ts_rank_cd normalization: divide by 1 + log(document length), the length term of BM25
+PG_RANK_NORMALIZATION = 1
+
+
+@dataclass(frozen=True)
+class SearchSource:
+    """A searchable table: its original text column and the FTS5 table mirroring search_text"""
+    table: Any
+    text_column: str
+    fts_table: str
+    index_name: str
+
+
+SOURCES = {
+    'feedback': SearchSource(Feedback.__table__, 'content', 'feedback_fts', 'ix_feedback_search_vector'),
+    'answers': SearchSource(QuestionResponseFlask.__table__, 'answer_text', 'question_responses_fts',
+                            'ix_question_responses_flask_search_vector'),
+}
+
+
+def encode_cursor(score: float, row_id: int) -> str:
+    """Opaque keyset cursor for the row after which the next page starts"""
+    return base64.urlsafe_b64encode(json.dumps([score, row_id]).encode()).decode('ascii')
+
+
+def decode_cursor(cursor: str) -> Tuple[float, int]:
+    """Inverse of encode_cursor, ValueError when the cursor was not issued by us"""
+    try:
+        score, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return float(score), int(row_id)
+    except Exception:
+        raise ValueError("Invalid search cursor")
+
+
+def _after(score, row_id, cursor: Optional[Tuple[float, int]]):
+    """Keyset condition for rows ranked after the cursor"""
+    last_score, last_id = cursor
+    return or_(score > last_score, and_(score == last_score, row_id > last_id))
+
+
+def _matches(source: SearchSource, terms: List[str], dialect: str, page: Optional[Tuple] = None):
+    """
+    (join target or None, match condition, score) where a lower score ranks higher
+
+    page=(cursor, limit) lets SQLite rank and cut the page inside the FTS5 scan,
+    so only the page's rows are joined back to the table (no extra filters allowed).
+    """
+    table = source.table
+    if dialect == 'sqlite':
+        fts_query = ' '.join('"' + term.replace('"', '""') + '"' for term in terms)
+        doc_id = literal_column('rowid')
+        score = literal_column(f'bm25({source.fts_table})')
+        matches = (
+            select(doc_id.label('doc_id'), score.label('score'))
+            .select_from(text(source.fts_table))
+            .where(text(f'{source.fts_table} MATCH :fts_query').bindparams(fts_query=fts_query))
+        )
+        if page is not None:
+            cursor, limit = page
+            if cursor is not None:
+                matches = matches.where(_after(score, doc_id, cursor))
+            matches = matches.order_by(score, doc_id).limit(limit)
+        matches = matches.subquery()
+        return matches, table.c.id == matches.c.doc_id, matches.c.score
+
+    # The stored document is already stemmed, so the 'simple' configuration only splits it
+    vector = literal_column(f'{table.name}.search_vector')
+    query = func.plainto_tsquery(literal_column("'simple'"), ' '.join(terms))
+    return None, vector.op('@@')(query), -func.ts_rank_cd(vector, query, PG_RANK_NORMALIZATION)
+
+
+def search(query: str, source: str = 'feedback', limit: int = 20, cursor: Optional[str] = None,
+           channel: Optional[str] = None, survey_id: Optional[int] = None) -> Dict[str, Any]:
+    """
+    One page of ranked matches for query
+
+    Every query term must match (after folding and light stemming). Results are
+    ordered by BM25 score (FTS5) or length-normalized cover density (PostgreSQL),
+    then id; pass the returned next_cursor to fetch the following page.
+    """
+    if source not in SOURCES:
+        raise ValueError(f"Unknown search source: {source}")
+    search_source = SOURCES[source]
+    table = search_source.table
+    terms = search_terms(query)[:MAX_QUERY_TERMS]
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    if not terms:
+        return {'results': [], 'terms': [], 'next_cursor': None}
+
+    dialect = db.session.get_bind().dialect.name
+    cursor = decode_cursor(cursor) if cursor else None
+    filtered = (channel and source == 'feedback') or (survey_id is not None and source == 'answers')
+    page = None if filtered else (cursor, limit + 1)
+    matches, condition, score = _matches(search_source, terms, dialect, page)
+    score = score.label('score')
+
+    if source == 'feedback':
+        columns = [table.c.id, table.c.content, table.c.channel, table.c.sentiment_score, table.c.created_at]
+    else:
+        columns = [table.c.id, table.c.answer_text, table.c.response_id, table.c.question_id,
+                   table.c.sentiment_score, table.c.created_at]
+    statement = select(*columns, score).select_from(table)
+    if matches is not None:
+        statement = statement.join(matches, condition)
+    else:
+        statement = statement.where(condition)
+
+    if channel and source == 'feedback':
+        statement = statement.where(table.c.channel == FeedbackChannel(channel))
+    if survey_id is not None and source == 'answers':
+        responses = ResponseFlask.__table__
+        statement = statement.where(table.c.response_id.in_(
+            select(responses.c.id).where(responses.c.survey_id == survey_id)
+        ))
+    if cursor is not None:
+        statement = statement.where(_after(score, table.c.id, cursor))
+
+    rows = db.session.execute(statement.order_by(score, table.c.id).limit(limit + 1)).all()
+    page = rows[:limit]
+
+    results = []
+    for row in page:
+        result = {
+            'id': row.id,
+            'score': round(-row.score, 4),
+            'highlight': highlight(getattr(row, search_source.text_column), terms),
+            'sentiment_score': row.sentiment_score,
+            'created_at': row.created_at.isoformat() if row.created_at else None,
+        }
+        if source == 'feedback':
+            result['channel'] = getattr(row.channel, 'value', row.channel)
+        else:
+            result['response_id'] = row.response_id
+            result['question_id'] = row.question_id
+        results.append(result)
+
+    next_cursor = encode_cursor(page[-1].score, page[-1].id) if len(rows) > limit else None
+    return {'results': results, 'terms': terms, 'next_cursor': next_cursor}
+
+
+def backfill_search_documents(conn, source: str) -> int:
+    """Populate search_text for rows written before the column existed or through Core inserts"""
+    search_source = SOURCES[source]
+    table = search_source.table
+    text_column = table.c[search_source.text_column]
+    updated = 0
+
+    while True:
+        rows = conn.execute(
+            select(table.c.id, text_column)
+            .where(table.c.search_text.is_(None), text_column.isnot(None))
+            .order_by(table.c.id)
+            .limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        conn.execute(
+            update(table).where(table.c.id == bindparam('row_id')).values(search_text=bindparam('document')),
+            # Empty string marks the row as processed even with no searchable words
+            [{'row_id': row.id, 'document': build_search_document(row[1])} for row in rows]
+        )
+        updated += len(rows)
+
+    if updated:
+        logger.info(f"Backfilled search documents for {updated} rows of {table.name}")
+    return updated
+
+
+def create_search_index(conn, source: str):
+    """Create the dialect-specific full-text index for a source table"""
+    search_source = SOURCES[source]
+    table = search_source.table.name
+    fts = search_source.fts_table
+
+    if conn.dialect.name == 'postgresql':
+        conn.execute(text(
+            f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector "
+            f"GENERATED ALWAYS AS (to_tsvector('simple'::regconfig, coalesce(search_text, ''))) STORED"
+        ))
+        conn.execute(text(
+            f"CREATE INDEX IF NOT EXISTS {search_source.index_name} ON {table} USING gin (search_vector)"
+        ))
+
+    elif conn.dialect.name == 'sqlite':
+        exists = conn.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"
+        ), {'name': fts}).first()
+        if exists:
+            return
+
+        conn.execute(text(
+            f"CREATE VIRTUAL TABLE {fts} USING fts5("
+            f"search_text, content='{table}', content_rowid='id', tokenize='unicode61')"
+        ))
+        conn.execute(text(
+            f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {table} BEGIN "
+            f"INSERT INTO {fts}(rowid, search_text) VALUES (new.id, new.search_text); END"
+        ))
+        conn.execute(text(
+            f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {table} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, search_text) VALUES ('delete', old.id, old.search_text); END"
+        ))
+        conn.execute(text(
+            f"CREATE TRIGGER {fts}_au AFTER UPDATE OF search_text ON {table} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, search_text) VALUES ('delete', old.id, old.search_text); "
+            f"INSERT INTO {fts}(rowid, search_text) VALUES (new.id, new.search_text); END"
+        ))
+        conn.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+        logger.info(f"Created {fts} search index")
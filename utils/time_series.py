@@ -0,0 +1,118 @@
+"""
+Time Series
+Time-bucketed aggregates in a single GROUP BY query, with gap filling for chart series
+"""
+
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import func, select
+
+logger = logging.getLogger(__name__)
+
+GRANULARITIES = ('hour', 'day', 'week', 'month')
+
+# SQLite has no date_trunc; these strftime/date forms give the same bucket starts (weeks start on Monday)
+SQLITE_BUCKETS = {
+    'hour': lambda column: func.strftime('%Y-%m-%d %H:00:00', column),
+    'day': lambda column: func.date(column),
+    'week': lambda column: func.date(column, 'weekday 0', '-6 days'),
+    'month': lambda column: func.strftime('%Y-%m-01', column),
+}
+
+
+def truncate(value: datetime, granularity: str) -> datetime:
+    """Start of the bucket containing value"""
+    if granularity == 'hour':
+        return value.replace(minute=0, second=0, microsecond=0)
+    day = value.replace(hour=0, minute=0, second=0, microsecond=0)
+    if granularity == 'day':
+        return day
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    raise ValueError(f"Unsupported granularity: {granularity}")
+
+
+def next_bucket(value: datetime, granularity: str) -> datetime:
+    """Start of the bucket after the one starting at value"""
+    if granularity == 'hour':
+        return value + timedelta(hours=1)
+    if granularity == 'day':
+        return value + timedelta(days=1)
+    if granularity == 'week':
+        return value + timedelta(days=7)
+    if granularity == 'month':
+        return value.replace(year=value.year + value.month // 12, month=value.month % 12 + 1)
+    raise ValueError(f"Unsupported granularity: {granularity}")
+
+
+def bucket_starts(start: datetime, end: datetime, granularity: str) -> List[datetime]:
+    """Every bucket overlapping [start, end)"""
+    buckets = []
+    current = truncate(start, granularity)
+    while current < end:
+        buckets.append(current)
+        current = next_bucket(current, granularity)
+    return buckets
+
+
+def bucket_expression(column, granularity: str, dialect: str):
+    """SQL expression truncating column to its bucket start"""
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Unsupported granularity: {granularity}")
+    if dialect == 'sqlite':
+        return SQLITE_BUCKETS[granularity](column)
+    return func.date_trunc(granularity, column)
+
+
+def _as_datetime(value) -> datetime:
+    """Bucket values come back as datetimes (PostgreSQL) or ISO strings (SQLite)"""
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value))
+
+
+def bucketed_totals(session, column, aggregates: Dict[str, Any], start: datetime, end: datetime,
+                    granularity: str = 'day', where: Iterable = (), group_by=None) -> Dict[Any, Dict[str, float]]:
+    """
+    Run aggregates per bucket of column over [start, end) in one query
+
+    Returns {bucket_start: {name: value}}, or {(bucket_start, group): {...}} when group_by is given.
+    Buckets without rows are absent; fill_series() adds them back.
+    """
+    dialect = session.get_bind().dialect.name
+    bucket = bucket_expression(column, granularity, dialect).label('bucket')
+    keys = [bucket] if group_by is None else [bucket, group_by]
+    query = select(*keys, *(expression.label(name) for name, expression in aggregates.items())) \
+        .where(column >= start, column < end, *where) \
+        .group_by(*keys)
+
+    totals = {}
+    for row in session.execute(query):
+        values = {name: getattr(row, name) or 0 for name in aggregates}
+        key = _as_datetime(row.bucket) if group_by is None else (_as_datetime(row[0]), row[1])
+        totals[key] = values
+    return totals
+
+
+def fill_series(totals: Dict[datetime, Dict[str, float]], start: datetime, end: datetime, granularity: str,
+                names: Iterable[str], group: Optional[Any] = None) -> List[Dict[str, Any]]:
+    """One entry per bucket in [start, end), zero-filled where nothing was recorded"""
+    names = list(names)
+    series = []
+    for bucket in bucket_starts(start, end, granularity):
+        values = totals.get(bucket if group is None else (bucket, group))
+        point = {name: values[name] if values else 0 for name in names}
+        point['bucket'] = bucket
+        series.append(point)
+    return series
+
+
+def add_to_bucket(totals: Dict[Any, Dict[str, float]], key, values: Dict[str, float]):
+    """Accumulate values computed outside the database (e.g. archived rows) into totals"""
+    current = totals.setdefault(key, {name: 0 for name in values})
+    for name, value in values.items():
+        current[name] = current.get(name, 0) + value
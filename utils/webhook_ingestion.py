@@ -0,0 +1,745 @@
+"""
+Webhook Ingestion Pipeline
+Fast acknowledge path, deduplicated event queue and batch consumer for WhatsApp/SMS callbacks
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from models.webhook_events import WebhookEvent, WebhookEventStatus
+from models.survey_delivery import (
+    SurveyCampaign, SurveyDelivery, SurveyResponse, DeliveryStatus, ResponseStatus
+)
+from models_unified import FeedbackChannel
+
+logger = logging.getLogger(__name__)
+
+# Queue tuning (override via environment)
+DEFAULT_BATCH_SIZE = int(os.environ.get('WEBHOOK_BATCH_SIZE', 500))
+HIGH_WATERMARK = int(os.environ.get('WEBHOOK_QUEUE_HIGH_WATERMARK', 10000))
+MAX_ATTEMPTS = int(os.environ.get('WEBHOOK_MAX_ATTEMPTS', 5))
+RETRY_DELAY_SECONDS = int(os.environ.get('WEBHOOK_RETRY_DELAY', 30))  # before a failed event is tried again
+SATURATION_CHECK_SECONDS = 1.0  # how long one queue depth reading gates enqueues
+
+# Provider statuses ranked so a late "sent" callback never downgrades "read"
+STATUS_RANK = {
+    'sent': 1,
+    'queued': 1,
+    'failed': 2,
+    'undelivered': 2,
+    'delivered': 3,
+    'read': 4,
+}
+
+STATUS_MAPPING = {
+    'sent': DeliveryStatus.SENT,
+    'queued': DeliveryStatus.SENT,
+    'failed': DeliveryStatus.FAILED,
+    'undelivered': DeliveryStatus.FAILED,
+    'delivered': DeliveryStatus.DELIVERED,
+    'read': DeliveryStatus.DELIVERED,
+}
+
+# Stored delivery statuses in the same order, used to refuse downgrades
+DELIVERY_RANK = {
+    DeliveryStatus.PENDING: 0,
+    DeliveryStatus.SENT: 1,
+    DeliveryStatus.FAILED: 2,
+    DeliveryStatus.BOUNCED: 2,
+    DeliveryStatus.DELIVERED: 3,
+}
+
+PROVIDER_CHANNELS = {
+    'whatsapp': FeedbackChannel.WHATSAPP,
+    'sms': FeedbackChannel.SMS,
+}
+
+
+@dataclass
+class RawWebhookEvent:
+    """Provider callback normalized for the queue"""
+    provider: str
+    provider_message_id: str
+    event_type: str  # message, status
+    payload: Dict[str, Any]
+    delivery_token: Optional[str] = None
+    sender: Optional[str] = None
+
+
+def parse_whatsapp_payload(data: Dict[str, Any]) -> List[RawWebhookEvent]:
+    """
+    Split a WhatsApp Cloud API webhook into individual events
+
+    Status callbacks reuse the outbound message ID for every transition
+    (sent, delivered, read), so the status is part of their dedup key.
+    """
+    events = []
+
+    for entry in data.get('entry') or []:
+        for change in entry.get('changes') or []:
+            value = change.get('value') or {}
+
+            for message in value.get('messages') or []:
+                if not message.get('id'):
+                    continue
+                events.append(RawWebhookEvent(
+                    provider='whatsapp',
+                    provider_message_id=message['id'],
+                    event_type='message',
+                    payload=message,
+                    delivery_token=message.get('delivery_token'),
+                    sender=message.get('from')
+                ))
+
+            for status in value.get('statuses') or []:
+                if not status.get('id'):
+                    continue
+                events.append(RawWebhookEvent(
+                    provider='whatsapp',
+                    provider_message_id=f"{status['id']}:{status.get('status', '')}",
+                    event_type='status',
+                    payload=status,
+                    delivery_token=status.get('biz_opaque_callback_data'),
+                    sender=status.get('recipient_id')
+                ))
+
+    return events
+
+
+def parse_sms_form(form: Dict[str, Any]) -> List[RawWebhookEvent]:
+    """Convert a Twilio inbound message or status callback into an event"""
+    message_sid = form.get('MessageSid') or form.get('SmsSid')
+    if not message_sid:
+        return []
+
+    payload = dict(form)
+
+    if form.get('Body') is not None:
+        return [RawWebhookEvent(
+            provider='sms',
+            provider_message_id=message_sid,
+            event_type='message',
+            payload=payload,
+            delivery_token=form.get('delivery_token'),
+            sender=form.get('From')
+        )]
+
+    status = form.get('MessageStatus') or form.get('SmsStatus')
+    if not status:
+        return []
+
+    return [RawWebhookEvent(
+        provider='sms',
+        provider_message_id=f"{message_sid}:{status}",
+        event_type='status',
+        payload=payload,
+        delivery_token=form.get('delivery_token'),
+        sender=form.get('To')
+    )]
+
+
+def extract_reply_text(provider: str, payload: Dict[str, Any]) -> Optional[str]:
+    """Get the customer's answer text from an inbound message payload"""
+    if provider == 'sms':
+        return payload.get('Body')
+
+    if payload.get('text'):
+        return payload['text'].get('body')
+
+    interactive = payload.get('interactive') or {}
+    for reply_type in ('button_reply', 'list_reply'):
+        if interactive.get(reply_type):
+            return interactive[reply_type].get('title')
+
+    if payload.get('button'):
+        return payload['button'].get('text')
+
+    return None
+
+
+def extract_status(provider: str, payload: Dict[str, Any]) -> Optional[str]:
+    """Get the lower-cased provider delivery status from a status payload"""
+    if provider == 'sms':
+        status = payload.get('MessageStatus') or payload.get('SmsStatus')
+    else:
+        status = payload.get('status')
+    return status.lower() if status else None
+
+
+def _phone_variants(phone: str) -> List[str]:
+    """WhatsApp sends numbers without '+', contacts usually store them with it"""
+    digits = phone.lstrip('+')
+    return [digits, f"+{digits}"]
+
+
+class QueueSaturated(Exception):
+    """The consumer is behind the high watermark; providers should retry later"""
+
+
+class IngestionStats:
+    """Thread-safe counters for the ingestion pipeline"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.received = 0
+            self.accepted = 0
+            self.duplicates = 0
+            self.rejected = 0
+            self.applied = 0
+            self.orphaned = 0
+            self.failed_batches = 0
+            self.batches = 0
+            self.last_batch_size = 0
+            self.last_batch_ms = 0.0
+            self.total_batch_ms = 0.0
+
+    def record_enqueue(self, received: int, accepted: int):
+        with self._lock:
+            self.received += received
+            self.accepted += accepted
+            self.duplicates += received - accepted
+
+    def record_rejected(self, received: int):
+        with self._lock:
+            self.rejected += received
+
+    def record_batch(self, applied: int, orphaned: int, elapsed_ms: float):
+        with self._lock:
+            self.batches += 1
+            self.applied += applied
+            self.orphaned += orphaned
+            self.last_batch_size = applied + orphaned
+            self.last_batch_ms = elapsed_ms
+            self.total_batch_ms += elapsed_ms
+
+    def record_failure(self):
+        with self._lock:
+            self.failed_batches += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            processed = self.applied + self.orphaned
+            return {
+                'received': self.received,
+                'accepted': self.accepted,
+                'duplicates': self.duplicates,
+                'rejected': self.rejected,
+                'applied': self.applied,
+                'orphaned': self.orphaned,
+                'batches': self.batches,
+                'failed_batches': self.failed_batches,
+                'last_batch_size': self.last_batch_size,
+                'last_batch_ms': round(self.last_batch_ms, 2),
+                'events_per_second': round(processed / (self.total_batch_ms / 1000), 1)
+                if self.total_batch_ms else 0.0
+            }
+
+
+class WebhookEventQueue:
+    """Durable, deduplicated queue backed by the webhook_events table"""
+
+    def __init__(self, high_watermark: int = HIGH_WATERMARK):
+        self.high_watermark = high_watermark
+        self.stats = IngestionStats()
+        self._saturation = (0.0, False)  # (checked at, saturated)
+
+    def enqueue(self, events: Sequence[RawWebhookEvent], session=None) -> Dict[str, int]:
+        """
+        Append raw events in a single statement and commit
+
+        This is the only work done while the provider waits for its 200,
+        so provider retries are absorbed by the unique index rather than
+        reprocessed. The ASGI endpoints pass their own session (via run_sync).
+        Raises QueueSaturated while the backlog is over the high watermark, so
+        the provider's retry schedule holds events back instead of the table.
+        """
+        session = session if session is not None else db.session
+        if events and self.is_saturated(session):
+            self.stats.record_rejected(len(events))
+            raise QueueSaturated(f"Webhook queue is over its high watermark ({self.high_watermark})")
+        rows = {}
+        for event in events:
+            key = (event.provider, event.provider_message_id)
+            rows.setdefault(key, {
+                'provider': event.provider,
+                'provider_message_id': event.provider_message_id,
+                'event_type': event.event_type,
+                'delivery_token': event.delivery_token,
+                'sender': event.sender,
+                'payload': json.dumps(event.payload, ensure_ascii=False),
+                'status': WebhookEventStatus.PENDING,
+                'attempts': 0,
+                'received_at': datetime.utcnow()
+            })
+
+        if not rows:
+            return {'received': 0, 'accepted': 0, 'duplicates': 0}
+
+        accepted = self._insert_ignoring_duplicates(list(rows.values()), session)
+        session.commit()
+
+        self.stats.record_enqueue(len(events), accepted)
+        return {
+            'received': len(events),
+            'accepted': accepted,
+            'duplicates': len(events) - accepted
+        }
+
+    def _insert_ignoring_duplicates(self, rows: List[Dict[str, Any]], session) -> int:
+        """INSERT ... ON CONFLICT DO NOTHING where supported, row-by-row otherwise"""
+        dialect = session.get_bind().dialect.name
+
+        if dialect in ('postgresql', 'sqlite'):
+            if dialect == 'postgresql':
+                from sqlalchemy.dialects.postgresql import insert as dialect_insert
+            else:
+                from sqlalchemy.dialects.sqlite import insert as dialect_insert
+
+            statement = dialect_insert(WebhookEvent).values(rows).on_conflict_do_nothing(
+                index_elements=['provider', 'provider_message_id']
+            )
+            return session.execute(statement).rowcount
+
+        accepted = 0
+        for row in rows:
+            try:
+                with session.begin_nested():
+                    session.execute(insert(WebhookEvent).values(**row))
+                accepted += 1
+            except IntegrityError:
+                pass
+        return accepted
+
+    def metrics(self) -> Dict[str, Any]:
+        """Queue depth, lag and throughput for backpressure monitoring"""
+        depth, oldest = db.session.execute(
+            select(func.count(WebhookEvent.id), func.min(WebhookEvent.received_at))
+            .where(WebhookEvent.status == WebhookEventStatus.PENDING)
+        ).one()
+
+        lag_seconds = (datetime.utcnow() - oldest).total_seconds() if oldest else 0.0
+
+        return {
+            'queue_depth': depth,
+            'oldest_pending_age_seconds': round(lag_seconds, 2),
+            'high_watermark': self.high_watermark,
+            'backpressure': depth >= self.high_watermark,
+            'counters': self.stats.snapshot()
+        }
+
+    def is_saturated(self, session=None) -> bool:
+        """True when the consumer has fallen behind the high watermark (re-read at most once a second)"""
+        checked_at, saturated = self._saturation
+        if time.monotonic() - checked_at < SATURATION_CHECK_SECONDS:
+            return saturated
+        session = session if session is not None else db.session
+        depth = session.execute(
+            select(func.count(WebhookEvent.id))
+            .where(WebhookEvent.status == WebhookEventStatus.PENDING)
+        ).scalar()
+        saturated = depth >= self.high_watermark
+        self._saturation = (time.monotonic(), saturated)
+        return saturated
+
+
+class WebhookBatchConsumer:
+    """Applies queued events grouped by delivery token using bulk statements"""
+
+    def __init__(self, queue: Optional[WebhookEventQueue] = None, batch_size: int = DEFAULT_BATCH_SIZE):
+        self.queue = queue or webhook_queue
+        self.batch_size = batch_size
+
+    def drain_once(self) -> int:
+        """Process one batch of pending events, returns the number consumed"""
+        started = time.perf_counter()
+
+        retry_before = datetime.utcnow() - timedelta(seconds=RETRY_DELAY_SECONDS)
+        events = self._lock_pending(
+            select(WebhookEvent)
+            .where(WebhookEvent.status == WebhookEventStatus.PENDING)
+            # Events that failed wait RETRY_DELAY_SECONDS instead of heading every batch
+            .where(or_(WebhookEvent.attempts == 0, WebhookEvent.processed_at.is_(None),
+                       WebhookEvent.processed_at <= retry_before))
+            .order_by(WebhookEvent.id)
+            .limit(self.batch_size)
+        )
+        if not events:
+            db.session.rollback()
+            return 0
+
+        event_ids = [event.id for event in events]
+
+        try:
+            applied, orphaned = self._apply_batch(events)
+            db.session.commit()
+            failed = 0
+        except Exception as e:
+            db.session.rollback()
+            logger.warning(f"Webhook batch of {len(event_ids)} events failed ({e}); retrying it in halves")
+            self.queue.stats.record_failure()
+            applied, orphaned, failed = self._apply_isolating_failures(event_ids)
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.queue.stats.record_batch(applied, orphaned, elapsed_ms)
+        return applied + orphaned + failed
+
+    def _lock_pending(self, query) -> List[WebhookEvent]:
+        if db.session.get_bind().dialect.name == 'postgresql':
+            # Let several workers drain the same queue without blocking each other
+            query = query.with_for_update(skip_locked=True)
+        return db.session.execute(query).scalars().all()
+
+    def _apply_isolating_failures(self, event_ids: List[int]) -> Tuple[int, int, int]:
+        """
+        Bisect a failed batch, each part in its own transaction, so only the events that
+        fail on their own are charged an attempt. Returns (applied, orphaned, failed).
+        """
+        applied = orphaned = failed = 0
+        parts = [event_ids]
+        while parts:
+            ids = parts.pop()
+            # Re-read: the rollback released the rows, another worker may have taken them
+            events = self._lock_pending(
+                select(WebhookEvent)
+                .where(WebhookEvent.id.in_(ids), WebhookEvent.status == WebhookEventStatus.PENDING)
+                .order_by(WebhookEvent.id)
+            )
+            if not events:
+                db.session.rollback()
+                continue
+            ids = [event.id for event in events]
+            try:
+                part_applied, part_orphaned = self._apply_batch(events)
+                db.session.commit()
+                applied += part_applied
+                orphaned += part_orphaned
+            except Exception as e:
+                db.session.rollback()
+                if len(ids) == 1:
+                    logger.error(f"Webhook event {ids[0]} failed: {e}")
+                    self._record_failed_attempt(ids, str(e))
+                    failed += 1
+                else:
+                    middle = len(ids) // 2
+                    parts += [ids[middle:], ids[:middle]]
+        return applied, orphaned, failed
+
+    def drain(self, max_batches: Optional[int] = None) -> int:
+        """Process batches until the queue is empty (or max_batches reached)"""
+        total = 0
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            consumed = self.drain_once()
+            if not consumed:
+                break
+            total += consumed
+            batches += 1
+        return total
+
+    def _apply_batch(self, events: List[WebhookEvent]):
+        """Fold a batch into delivery statuses and survey responses"""
+        now = datetime.utcnow()
+        self._resolve_missing_tokens(events)
+
+        tokens = {event.delivery_token for event in events if event.delivery_token}
+        deliveries = {}
+        if tokens:
+            rows = db.session.execute(
+                select(
+                    SurveyDelivery.id,
+                    SurveyDelivery.delivery_token,
+                    SurveyDelivery.campaign_id,
+                    SurveyDelivery.recipient_id,
+                    SurveyDelivery.status
+                ).where(SurveyDelivery.delivery_token.in_(tokens))
+            ).all()
+            deliveries = {row.delivery_token: row for row in rows}
+
+        grouped = defaultdict(list)
+        orphaned_ids = []
+        for event in events:
+            if event.delivery_token in deliveries:
+                grouped[event.delivery_token].append(event)
+            else:
+                orphaned_ids.append(event.id)
+
+        delivery_updates = []
+        replies = {}
+        delivered_by_campaign = defaultdict(int)
+
+        for token, token_events in grouped.items():
+            delivery = deliveries[token]
+            best_rank = 0
+            best_status = None
+            answers = {}
+
+            for event in token_events:
+                payload = json.loads(event.payload)
+                if event.event_type == 'message':
+                    text = extract_reply_text(event.provider, payload)
+                    if text:
+                        answers[event.provider_message_id] = text
+                    # A reply proves the survey reached the customer
+                    status = 'delivered'
+                else:
+                    status = extract_status(event.provider, payload)
+
+                rank = STATUS_RANK.get(status, 0)
+                if rank > best_rank:
+                    best_rank, best_status = rank, status
+
+            if answers:
+                replies[delivery.id] = (delivery, token_events[0].provider, answers)
+
+            new_status = STATUS_MAPPING.get(best_status)
+            if new_status and DELIVERY_RANK[new_status] > DELIVERY_RANK.get(delivery.status, 0):
+                change = {'id': delivery.id, 'status': new_status, 'updated_at': now}
+                if new_status == DeliveryStatus.DELIVERED:
+                    change['delivered_at'] = now
+                    delivered_by_campaign[delivery.campaign_id] += 1
+                elif new_status == DeliveryStatus.FAILED:
+                    change['failed_at'] = now
+                elif new_status == DeliveryStatus.SENT:
+                    change['sent_at'] = now
+                delivery_updates.append(change)
+
+        if delivery_updates:
+            db.session.execute(update(SurveyDelivery), delivery_updates)
+
+        responses_by_campaign = self._apply_replies(replies, now)
+
+        for campaign_id in set(delivered_by_campaign) | set(responses_by_campaign):
+            db.session.execute(
+                update(SurveyCampaign)
+                .where(SurveyCampaign.id == campaign_id)
+                .values(
+                    delivered_count=func.coalesce(SurveyCampaign.delivered_count, 0)
+                    + delivered_by_campaign.get(campaign_id, 0),
+                    response_count=func.coalesce(SurveyCampaign.response_count, 0)
+                    + responses_by_campaign.get(campaign_id, 0),
+                    updated_at=now
+                )
+            )
+
+        applied_ids = [event.id for token_events in grouped.values() for event in token_events]
+        self._mark(applied_ids, WebhookEventStatus.APPLIED, now)
+        self._mark(orphaned_ids, WebhookEventStatus.ORPHANED, now)
+
+        return len(applied_ids), len(orphaned_ids)
+
+    def _apply_replies(self, replies: Dict[int, Any], now: datetime) -> Dict[int, int]:
+        """
+        Merge reply text into one SurveyResponse per delivery
+
+        Answers are keyed by provider message ID, so replaying an already
+        applied event rewrites the same key instead of adding a new answer.
+        """
+        if not replies:
+            return {}
+
+        existing = {
+            row.delivery_id: row
+            for row in db.session.execute(
+                select(SurveyResponse.id, SurveyResponse.delivery_id, SurveyResponse.responses)
+                .where(SurveyResponse.delivery_id.in_(list(replies)))
+            ).all()
+        }
+
+        new_rows = []
+        updated_rows = []
+        created_by_campaign = defaultdict(int)
+
+        for delivery_id, (delivery, provider, answers) in replies.items():
+            current = existing.get(delivery_id)
+            if current:
+                merged = dict(current.responses or {})
+                merged.update(answers)
+                updated_rows.append({
+                    'id': current.id,
+                    'responses': merged,
+                    'last_interaction_at': now,
+                    'updated_at': now
+                })
+            else:
+                new_rows.append({
+                    'campaign_id': delivery.campaign_id,
+                    'delivery_id': delivery_id,
+                    'response_token': delivery.delivery_token,
+                    'respondent_id': delivery.recipient_id,
+                    'responses': answers,
+                    'completion_status': ResponseStatus.PARTIAL,
+                    'started_at': now,
+                    'last_interaction_at': now,
+                    'submission_channel': PROVIDER_CHANNELS[provider],
+                    'created_at': now,
+                    'updated_at': now
+                })
+                created_by_campaign[delivery.campaign_id] += 1
+
+        if new_rows:
+            db.session.execute(insert(SurveyResponse), new_rows)
+        if updated_rows:
+            db.session.execute(update(SurveyResponse), updated_rows)
+
+        return created_by_campaign
+
+    def _resolve_missing_tokens(self, events: List[WebhookEvent]):
+        """Map token-less inbound replies to the latest delivery sent to that phone"""
+        unresolved = [event for event in events if not event.delivery_token and event.sender]
+        if not unresolved:
+            return
+
+        phones = set()
+        for event in unresolved:
+            phones.update(_phone_variants(event.sender))
+
+        rows = db.session.execute(
+            select(
+                SurveyDelivery.delivery_token,
+                SurveyDelivery.recipient_phone,
+                SurveyDelivery.recipient_whatsapp
+            )
+            .where(SurveyDelivery.delivery_token.isnot(None))
+            .where(or_(
+                SurveyDelivery.recipient_phone.in_(phones),
+                SurveyDelivery.recipient_whatsapp.in_(phones)
+            ))
+            .order_by(SurveyDelivery.created_at)
+        ).all()
+
+        # Later deliveries overwrite earlier ones, so the newest survey wins
+        token_by_phone = {}
+        for row in rows:
+            for phone in (row.recipient_phone, row.recipient_whatsapp):
+                if phone:
+                    token_by_phone[phone.lstrip('+')] = row.delivery_token
+
+        for event in unresolved:
+            token = token_by_phone.get(event.sender.lstrip('+'))
+            if token:
+                event.delivery_token = token
+
+    def _mark(self, event_ids: List[int], status: str, now: datetime):
+        if not event_ids:
+            return
+        db.session.execute(
+            update(WebhookEvent)
+            .where(WebhookEvent.id.in_(event_ids))
+            .values(
+                status=status,
+                processed_at=now,
+                attempts=WebhookEvent.attempts + 1,
+                error_message=None
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+    def _record_failed_attempt(self, event_ids: List[int], error: str):
+        """Count the attempt; park events as failed once they exhaust retries"""
+        try:
+            # processed_at holds the last attempt, which starts the retry delay
+            db.session.execute(
+                update(WebhookEvent)
+                .where(WebhookEvent.id.in_(event_ids))
+                .values(attempts=WebhookEvent.attempts + 1, error_message=error[:1000],
+                        processed_at=datetime.utcnow())
+            )
+            db.session.execute(
+                update(WebhookEvent)
+                .where(WebhookEvent.id.in_(event_ids))
+                .where(WebhookEvent.attempts >= MAX_ATTEMPTS)
+                .values(status=WebhookEventStatus.FAILED)
+            )
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Could not record webhook failure: {e}")
+
+
+def replay_events(
+    statuses: Iterable[str] = (WebhookEventStatus.FAILED, WebhookEventStatus.ORPHANED),
+    provider: Optional[str] = None,
+    since: Optional[datetime] = None,
+    event_ids: Optional[List[int]] = None,
+    dry_run: bool = False
+) -> Dict[str, int]:
+    """
+    Reset stored events to pending and re-run them through the consumer
+
+    Applying is idempotent (status ranks only move forward and answers are
+    keyed by provider message ID), so APPLIED events can be replayed too.
+    """
+    conditions = [WebhookEvent.status.in_(list(statuses))]
+    if provider:
+        conditions.append(WebhookEvent.provider == provider)
+    if since:
+        conditions.append(WebhookEvent.received_at >= since)
+    if event_ids:
+        conditions.append(WebhookEvent.id.in_(event_ids))
+
+    matched = db.session.execute(
+        select(func.count(WebhookEvent.id)).where(*conditions)
+    ).scalar()
+
+    if dry_run or not matched:
+        return {'matched': matched, 'processed': 0}
+
+    db.session.execute(
+        update(WebhookEvent)
+        .where(*conditions)
+        .values(status=WebhookEventStatus.PENDING, attempts=0, error_message=None)
+    )
+    db.session.commit()
+
+    processed = WebhookBatchConsumer().drain()
+    logger.info(f"Replayed {matched} webhook events ({processed} processed)")
+    return {'matched': matched, 'processed': processed}
+
+
+_consumer_thread = None
+_consumer_lock = threading.Lock()
+
+
+def start_background_consumer(app, interval: float = 0.5) -> threading.Thread:
+    """Run the batch consumer in a daemon thread (one per process)"""
+    global _consumer_thread
+
+    with _consumer_lock:
+        if _consumer_thread and _consumer_thread.is_alive():
+            return _consumer_thread
+
+        def run():
+            consumer = WebhookBatchConsumer()
+            while True:
+                try:
+                    with app.app_context():
+                        consumed = consumer.drain()
+                except Exception as e:
+                    logger.error(f"Webhook consumer loop error: {e}")
+                    consumed = 0
+                if not consumed:
+                    time.sleep(interval)
+
+        _consumer_thread = threading.Thread(target=run, name='webhook-consumer', daemon=True)
+        _consumer_thread.start()
+        logger.info("Webhook batch consumer started")
+        return _consumer_thread
+
+
+# Global queue instance
+webhook_queue = WebhookEventQueue()
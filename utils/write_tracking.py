@@ -0,0 +1,89 @@
+"""
+Write Tracking
+Tables written by each committed transaction, for in-process caches and feeds that follow data changes
+"""
+
+import logging
+from typing import Callable, Iterable, List, Set
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# Session.info keys for tables written, and tables deleted from, in the open transaction
+_PENDING_KEY = 'written_tables'
+_DELETED_KEY = 'deleted_tables'
+
+_listeners: List[Callable[[Set[str]], None]] = []
+_delete_listeners: List[Callable[[Set[str]], None]] = []
+
+
+def on_commit(listener: Callable[[Set[str]], None]) -> Callable[[Set[str]], None]:
+    """Call listener(tables) after every commit that wrote to at least one table"""
+    _listeners.append(listener)
+    return listener
+
+
+def on_delete(listener: Callable[[Set[str]], None]) -> Callable[[Set[str]], None]:
+    """Call listener(tables) after every commit that deleted rows from at least one table"""
+    _delete_listeners.append(listener)
+    return listener
+
+
+def notify_committed(tables: Iterable[str], deleted: Iterable[str] = ()):
+    """Report a commit made outside the ORM session (e.g. on engine.begin()) to the listeners"""
+    _notify(_listeners, set(tables))
+    _notify(_delete_listeners, set(deleted))
+
+
+def _notify(listeners: List[Callable[[Set[str]], None]], tables: Set[str]):
+    if not tables:
+        return
+    for listener in listeners:
+        try:
+            listener(tables)
+        except Exception as e:
+            logger.warning(f"Write listener {listener.__name__} failed: {e}")
+
+
+def _record_tables(session: Session, tables: Set[str], key: str = _PENDING_KEY):
+    tables.discard(None)
+    if tables:
+        session.info.setdefault(key, set()).update(tables)
+
+
+def _table_names(objects) -> Set[str]:
+    return {getattr(getattr(obj, '__table__', None), 'name', None) for obj in objects}
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_flushed(session, flush_context):
+    # new/dirty/deleted still hold the pre-flush state here
+    _record_tables(session, _table_names(list(session.new) + list(session.dirty) + list(session.deleted)))
+    _record_tables(session, _table_names(session.deleted), _DELETED_KEY)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _collect_executed(orm_execute_state):
+    # Core INSERT/UPDATE/DELETE through the session (submission buffer, counters, executemany rows)
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, 'table', None)
+        if table is not None:
+            _record_tables(orm_execute_state.session, {table.name})
+            if orm_execute_state.is_delete:
+                _record_tables(orm_execute_state.session, {table.name}, _DELETED_KEY)
+
+
+@event.listens_for(Session, 'after_commit')
+def _notify_committed(session):
+    tables = session.info.pop(_PENDING_KEY, None)
+    deleted = session.info.pop(_DELETED_KEY, None)
+    if tables:
+        notify_committed(tables, deleted or ())
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_rolled_back(session):
+    session.info.pop(_PENDING_KEY, None)
+    session.info.pop(_DELETED_KEY, None)
@@ -20,6 +20,7 @@ fi
 # Create staging database
 echo "Setting up staging database..."
 python scripts/database_manager.py staging create
+flask --app app init-db
 
 # Seed with test data
 echo "Adding test data..."